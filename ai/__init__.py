@@ -0,0 +1,26 @@
+# ai/__init__.py
+# Version: 1.5
+# Updated: 2026-10-18 02:30
+# 探索AIモジュール初期化
+
+from .mcts import MCTSController, MCTSSearch, MCTSNode, SearchStats, TurnActions, END_TURN
+from .ismcts import ISMCTSSearch, Determinizer
+from .parallel import RootParallelSearch
+from .expectiminimax import ExpectiminimaxController, ExpectiminimaxSearch, ExpectiminimaxStats
+from .ponder import Ponderer
+
+__all__ = [
+    'MCTSController',
+    'MCTSSearch',
+    'MCTSNode',
+    'SearchStats',
+    'TurnActions',
+    'END_TURN',
+    'ISMCTSSearch',
+    'Determinizer',
+    'RootParallelSearch',
+    'ExpectiminimaxController',
+    'ExpectiminimaxSearch',
+    'ExpectiminimaxStats',
+    'Ponderer'
+]
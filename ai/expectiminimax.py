@@ -0,0 +1,418 @@
+# ai/expectiminimax.py
+# Version: 1.1
+# Updated: 2026-10-18 02:30
+# 期待値ミニマックス（expectiminimax）探索によるAIコントローラー
+#
+# 1段は1ターン分のアクション列（自分のターンは最大化・相手のターンは最小化）。
+# 自分のターンを終えたあと、相手のターン開始時の偶然の要素（ドローするカードの種類・ねむりのコイン）を
+# chanceノードとして結果ごとに展開し、確率で重み付けした期待値を取る。
+# chanceノードは Star1（残りの結果の値域 0〜1 から各子の探索窓を狭める）と
+# Star2（各結果で相手がすぐワザかターン終了を選んだ値を上界として先に調べる）で枝刈りする。
+# ターン内ではアクションをヒューリスティックで並べて上位数手だけ展開し、
+# 順序違いで同じ局面になる列は局面ハッシュで重複を除く。葉の評価は MCTSSearch.evaluate。
+
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from models.card import CONDITION_BITS, SpecialCondition
+from models.game_state import GameState
+from engine.match import Match
+from engine.actions import (legal_actions, ActionCodec, END_TURN, ATTACK, RETREAT, SUMMON, TRAINER,
+                            ATTACH, EVOLVE)
+from engine.agents import AIControllerAgent
+from gui.ai_controller import AIController
+from utils.tracing import tracer, AI, DEBUG, INFO
+
+from .mcts import MCTSSearch, TurnActions
+
+# 評価値の値域（MCTSSearch.evaluate：負け0・勝ち1）
+LOW = 0.0
+HIGH = 1.0
+
+# ワザ・ターン終了以外のアクションの並び順（ヒューリスティックの値に加える基準値）
+_KIND_PRIORITY = {EVOLVE: 300.0, SUMMON: 200.0, ATTACH: 100.0, TRAINER: 50.0, RETREAT: 0.0}
+
+
+@dataclass
+class ExpectiminimaxStats:
+    """
+    1回の探索の統計
+
+    nodes は評価した葉の数、completed は時間切れにならずに指定の深さまで調べきったか
+    （時間切れ後の葉はターン終了時点の局面をそのまま評価する）。
+    """
+    nodes: int = 0
+    chance_nodes: int = 0
+    cutoffs: int = 0
+    chance_cutoffs: int = 0
+    elapsed: float = 0.0
+    value: float = 0.5
+    plan: List[int] = field(default_factory=list)
+    completed: bool = True
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class ExpectiminimaxSearch:
+    """
+    1つの局面から「自分の残りのターン→ドロー・コイン→相手のターン」までの期待値ミニマックス探索
+
+    試合を複製し、両者の山札を探索用乱数で並べ替えてから（実際のドロー順は見ない）変更ジャーナル上で展開する。
+    相手の手札はMCTSSearchと同じく見えるものとして扱う。相手のドローは山札の残りの構成から確率を求め、
+    結果ごとに該当するカードを山札の先頭へ移して（Match.force_next_draw）展開する。
+    """
+
+    def __init__(self, match: Match, side: str, own_width: int = 3, opponent_width: int = 2,
+                 max_turn_actions: int = 3, time_budget: Optional[float] = 0.2, seed: Optional[int] = None,
+                 allow_retreat: bool = True):
+        """
+        Args:
+            own_width: 自分のターンの各局面で展開するワザ・ターン終了以外のアクション数
+            opponent_width: 相手のターンの各局面で展開するワザ・ターン終了以外のアクション数
+            max_turn_actions: 1ターンに展開するワザ・ターン終了以外のアクションの最大数
+            time_budget: 探索の制限時間（秒・Noneなら無制限）
+        """
+        self.side = side
+        self.opponent = GameState.get_opponent(side)
+        self.widths = {side: own_width, self.opponent: opponent_width}
+        self.max_turn_actions = max_turn_actions
+        self.time_budget = time_budget
+        self.allow_retreat = allow_retreat
+        self.rng = random.Random(seed)
+
+        self.match = match.clone(agents={"player": AIControllerAgent(), "opponent": AIControllerAgent()})
+        self.match.rng = random.Random(self.rng.getrandbits(Match.SEED_BITS))
+        state = self.match.game_state
+        for player in ("player", "opponent"):
+            self.rng.shuffle(state.get_deck(player))
+        state.enable_hashing()
+
+        self.controllers = {
+            player: AIController(state, None, side=player, match=self.match)
+            for player in ("player", "opponent")
+        }
+        # 葉の評価値（評価は場とサイドだけで決まるため局面ハッシュで共有できる）
+        self.evaluations: Dict[int, float] = {}
+        self.deadline: Optional[float] = None
+        self.stats = ExpectiminimaxStats()
+
+    def run(self) -> ExpectiminimaxStats:
+        """探索して最善のアクション列（stats.plan・最後はワザかターン終了）と期待値を返す"""
+        stats = self.stats
+        state = self.match.game_state
+        start = time.perf_counter()
+        self.deadline = start + self.time_budget if self.time_budget is not None else None
+
+        with tracer.suspended():
+            mark = state.mark()
+            stats.value, stats.plan = self._turn(self.side, 0, not self.allow_retreat, LOW, HIGH,
+                                                 {state.zobrist_hash})
+            state.undo_to(mark)
+
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _expired(self) -> bool:
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stats.completed = False
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # ターン（最大化・最小化）ノード
+    # ------------------------------------------------------------------
+
+    def _turn(self, player: str, depth: int, retreated: bool, alpha: float, beta: float,
+              seen: Set[int]) -> Tuple[float, List[int]]:
+        """
+        player のターン内のアクション列を深さ優先で展開し、(値, 最善のアクション列)を返す
+
+        seen はこのターンで既に展開した局面のハッシュ（順序違いの同じ局面を除く）。
+        """
+        match = self.match
+        state = match.game_state
+        maximizing = player == self.side
+        best_value: Optional[float] = None
+        best_line = [END_TURN]
+
+        for action in self._candidates(player, depth, retreated):
+            if action == END_TURN:
+                value, line = self._turn_end(player, alpha, beta), [END_TURN]
+            else:
+                mark = state.mark()
+                success, _ = match.apply(action, player)
+                if not success or state.zobrist_hash in seen:
+                    state.undo_to(mark)
+                    continue
+                seen.add(state.zobrist_hash)
+
+                if ActionCodec.ends_turn(action) or match.is_over:
+                    value, line = self._turn_end(player, alpha, beta), [action]
+                else:
+                    value, rest = self._turn(player, depth + 1, retreated or ActionCodec.kind(action) == RETREAT,
+                                             alpha, beta, seen)
+                    line = [action] + rest
+                state.undo_to(mark)
+
+            if best_value is None or (value > best_value if maximizing else value < best_value):
+                best_value, best_line = value, line
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.stats.cutoffs += 1
+                break
+
+        return best_value, best_line
+
+    def _candidates(self, player: str, depth: int, retreated: bool) -> List[int]:
+        """
+        展開するアクション（ワザ→ヒューリスティック上位のアクション→ターン終了の順）
+
+        ワザとターン終了は常に含め、その他は幅・1ターンのアクション数上限・時間内に限る。
+        """
+        attacks = []
+        others = []
+        expand = depth < self.max_turn_actions and not self._expired()
+        for action in legal_actions(self.match.game_state, player, unique=True):
+            kind = ActionCodec.kind(action)
+            if kind == ATTACK:
+                attacks.append((self._score(player, action), action))
+            elif action == END_TURN or not expand or (kind == RETREAT and retreated):
+                continue
+            else:
+                others.append((self._score(player, action), action))
+
+        attacks.sort(reverse=True)
+        others.sort(reverse=True)
+        return ([action for _, action in attacks] +
+                [action for _, action in others[:self.widths[player]]] + [END_TURN])
+
+    def _score(self, player: str, action: int) -> float:
+        """並び替え用のヒューリスティック値（AIControllerの評価を流用）"""
+        state = self.match.game_state
+        controller = self.controllers[player]
+        kind, argument, target = ActionCodec.decode(action)
+
+        if kind == ATTACK:
+            return controller._evaluate_attack_with_colorless_efficiency(
+                argument, state.get_active(player), state.get_active(GameState.get_opponent(player)))
+
+        if kind == RETREAT:
+            new_active = state.get_bench(player)[argument]
+            return new_active.current_hp - state.get_active(player).current_hp
+
+        card = state.get_hand(player)[argument]
+        if kind == SUMMON:
+            return _KIND_PRIORITY[SUMMON] + (card.hp or 0) * 0.1
+        if kind == TRAINER:
+            return _KIND_PRIORITY[TRAINER]
+
+        pokemon = state.get_active(player) if target == 0 else state.get_bench(player)[target - 1]
+        if kind == ATTACH:
+            location = "active" if target == 0 else "bench"
+            return _KIND_PRIORITY[ATTACH] + controller._calculate_energy_priority_with_colorless(pokemon, location)
+        return _KIND_PRIORITY[EVOLVE] + (card.hp or 0) * 0.1
+
+    def _turn_end(self, player: str, alpha: float, beta: float) -> float:
+        """player のターンを終えた局面の値（自分のターンの後なら相手のターン開始のchanceノードへ）"""
+        match = self.match
+        state = match.game_state
+        if match.is_over:
+            return self._evaluate()
+
+        mark = state.mark()
+        match.end_turn()
+        if match.is_over or player != self.side or self._expired():
+            value = self._evaluate()
+        else:
+            value = self._chance(alpha, beta)
+        state.undo_to(mark)
+        return value
+
+    def _evaluate(self) -> float:
+        """葉の評価（決着していなければ局面ハッシュで評価値を共有）"""
+        self.stats.nodes += 1
+        match = self.match
+        if match.is_over:
+            return MCTSSearch.evaluate(match, self.side)
+
+        key = match.game_state.zobrist_hash
+        value = self.evaluations.get(key)
+        if value is None:
+            value = self.evaluations[key] = MCTSSearch.evaluate(match, self.side)
+        return value
+
+    # ------------------------------------------------------------------
+    # chanceノード（相手のターン開始時のドロー・ねむりのコイン）
+    # ------------------------------------------------------------------
+
+    def _outcomes(self) -> List[Tuple[float, object, Optional[bool]]]:
+        """相手のターン開始時の結果の一覧 [(確率, ドローするカードのプロトタイプ, コインの結果)]（確率の高い順）"""
+        state = self.match.game_state
+        deck = state.get_deck(self.opponent)
+        if deck:
+            counts = Counter(card.prototype for card in deck)
+            draws = [(count / len(deck), prototype) for prototype, count in counts.most_common()]
+        else:
+            draws = [(1.0, None)]
+
+        active = state.get_active(self.opponent)
+        if active is None or not active.condition_mask & CONDITION_BITS[SpecialCondition.SLEEP]:
+            return [(probability, prototype, None) for probability, prototype in draws]
+        return [(probability * 0.5, prototype, coin)
+                for probability, prototype in draws for coin in (True, False)]
+
+    def _start_opponent_turn(self, prototype, coin: Optional[bool]) -> bool:
+        """結果を固定して相手のターンを開始（続行できるか）"""
+        match = self.match
+        if prototype is not None:
+            match.force_next_draw(self.opponent, prototype)
+        if coin is not None:
+            match.forced_coins.append(coin)
+        _, can_continue = match.start_turn(self.opponent)
+        match.forced_coins.clear()
+        return can_continue
+
+    def _chance(self, alpha: float, beta: float) -> float:
+        """相手のターン開始のchanceノード（Star1・Star2で枝刈りした期待値）"""
+        stats = self.stats
+        stats.chance_nodes += 1
+        state = self.match.game_state
+        outcomes = self._outcomes()
+
+        # Star2：相手がすぐワザかターン終了を選んだ場合の値は、相手の最善の値の上界になる
+        upper_bounds = []
+        for probability, prototype, coin in outcomes:
+            mark = state.mark()
+            if self._start_opponent_turn(prototype, coin):
+                upper_bounds.append(self._probe())
+            else:
+                upper_bounds.append(self._evaluate())
+            state.undo_to(mark)
+
+        remaining_upper = sum(probability * upper for (probability, _, _), upper in zip(outcomes, upper_bounds))
+        if remaining_upper <= alpha:
+            stats.chance_cutoffs += 1
+            return remaining_upper
+
+        # Star1：確定済みの結果と残りの結果の上界・下界から各結果の探索窓を決める
+        expected = 0.0
+        remaining_probability = 1.0
+        for (probability, prototype, coin), upper in zip(outcomes, upper_bounds):
+            remaining_upper -= probability * upper
+            remaining_probability -= probability
+            low = (alpha - expected - remaining_upper) / probability
+            high = (beta - expected - max(remaining_probability, 0.0) * LOW) / probability
+
+            mark = state.mark()
+            if self._start_opponent_turn(prototype, coin):
+                value, _ = self._turn(self.opponent, 0, False, max(low, LOW), min(high, upper), {state.zobrist_hash})
+            else:
+                value = self._evaluate()
+            state.undo_to(mark)
+            value = min(value, upper)
+
+            expected += probability * value
+            if value <= low:
+                stats.chance_cutoffs += 1
+                return expected + remaining_upper
+            if value >= high:
+                stats.chance_cutoffs += 1
+                return expected + max(remaining_probability, 0.0) * LOW
+        return expected
+
+    def _probe(self) -> float:
+        """相手がすぐワザ（またはターン終了）を選んだ場合の最小値"""
+        match = self.match
+        state = match.game_state
+        value = self._turn_end(self.opponent, LOW, HIGH)
+        for action in legal_actions(state, self.opponent, unique=True):
+            if ActionCodec.kind(action) != ATTACK:
+                continue
+            mark = state.mark()
+            success, _ = match.apply(action, self.opponent)
+            if success:
+                value = min(value, self._turn_end(self.opponent, LOW, HIGH))
+            state.undo_to(mark)
+        return value
+
+
+class ExpectiminimaxController(AIController):
+    """
+    期待値ミニマックス探索で1ターンの行動を決めるAIコントローラー（AIControllerと同じインターフェース）
+
+    execute_ai_turn() ではターン開始時に1回だけ探索し、見つかったアクション列を順に実行する。
+    マリガン・きぜつ後の入れ替えなどの判断はAIControllerのヒューリスティックを引き継ぐ。
+    """
+
+    def __init__(self, game_state: GameState, card_actions, side: str = "opponent",
+                 match: Optional[Match] = None, time_budget: Optional[float] = 0.2, own_width: int = 3,
+                 opponent_width: int = 2, max_turn_actions: int = 3, seed: Optional[int] = None):
+        super().__init__(game_state, card_actions, side=side, match=match)
+        self.time_budget = time_budget
+        self.own_width = own_width
+        self.opponent_width = opponent_width
+        self.max_turn_actions = max_turn_actions
+
+        # 探索用乱数（未指定時は試合のシードから決めるため試合ごとに再現可能）
+        if seed is None:
+            seed = Match.derive_seed(self.match.seed, 3 if side == "player" else 4)
+        self.rng = random.Random(seed)
+
+        # 直近のターンの探索統計
+        self.last_search_stats: Optional[ExpectiminimaxStats] = None
+
+    def search(self) -> ExpectiminimaxStats:
+        """現在の局面から探索する"""
+        search = ExpectiminimaxSearch(self.match, self.side, own_width=self.own_width,
+                                      opponent_width=self.opponent_width, max_turn_actions=self.max_turn_actions,
+                                      time_budget=self.time_budget, seed=self.rng.getrandbits(Match.SEED_BITS))
+        return search.run()
+
+    def execute_ai_turn(self) -> List[str]:
+        """探索したアクション列でターンを実行し、行動メッセージのリストを返す"""
+        messages = []
+
+        if self.game_state.current_player != self.side:
+            messages.append("AIのターンではありません。")
+            return messages
+
+        self.current_action_count = 0
+
+        try:
+            stats = self.search()
+            self.last_search_stats = stats
+            if tracer.ai <= DEBUG:
+                plan_text = ", ".join(ActionCodec.to_string(action) for action in stats.plan)
+                tracer.log(AI, DEBUG, f"期待値探索: [{plan_text}]（期待値{stats.value:.3f}・{stats.nodes}ノード評価・"
+                                      f"{stats.elapsed * 1000:.0f}ms・{'完了' if stats.completed else '時間切れ'}）")
+
+            for action in stats.plan:
+                if action == END_TURN or self.match.is_over:
+                    break
+                success, action_messages = TurnActions.apply(self.match, self.side, action)
+                messages.extend(action_messages)
+                if not success:
+                    break
+                self.current_action_count += 1
+                if TurnActions.ends_turn(action):
+                    break
+
+            if not messages or self.current_action_count == 0:
+                messages.append("相手は何もできませんでした。")
+
+            if tracer.ai <= INFO:
+                tracer.log(AI, INFO, self.get_ai_action_summary())
+
+        except Exception as e:
+            print(f"期待値探索AI行動エラー: {e}")
+            messages.append("相手の行動でエラーが発生しました")
+
+        return messages
@@ -0,0 +1,103 @@
+# ai/ismcts.py
+# Version: 1.1
+# Updated: 2026-10-18 03:30
+# 情報集合MCTS（ISMCTS）：非公開の手札・山札・サイドを公開情報と矛盾しないように引き直して探索
+#
+# 探索側から見えないのは、相手の手札・相手の山札・両者のサイド・自分の山札の並び。
+# デッキリストは公開情報なので、各陣営の「まだ見えていないカード」の多重集合は
+# デッキリストからトラッシュ・場（付いているカードを含む）・スタジアム・自分の手札を除いたものとして決まる。
+# これは実際に非公開ゾーンにあるカードの和集合と一致するため、その和集合を各ゾーンの枚数を保ったまま
+# ランダムに配り直すことで、公開情報と矛盾しない局面（determinization）を得る。
+#
+# 配り直しの順列は事前確保したNumPy配列に一括生成し（batch_size個ずつ）、反復ごとに1行ずつ使う。
+# 局面の複製は行わず、ゾーンのリストを中身だけ置き換えて変更ジャーナルで巻き戻す。
+
+from typing import List, Optional
+
+import numpy as np
+
+from models.game_state import GameState
+from engine.match import Match
+
+from .mcts import MCTSSearch
+
+
+class Determinizer:
+    """
+    観測者から見た非公開ゾーンを、公開情報と矛盾しない配置にランダムに配り直す
+
+    配り直す対象は探索開始時点の局面で固定する（探索中の反復は毎回この局面に巻き戻されるため）。
+    """
+
+    def __init__(self, state: GameState, observer: str, batch_size: int = 256, seed: Optional[int] = None):
+        opponent = GameState.get_opponent(observer)
+
+        # 陣営ごとの非公開ゾーン（自分の手札は見えているため対象外）
+        self.groups = [
+            [state.get_deck(observer), state.get_prizes(observer)],
+            [state.get_hand(opponent), state.get_deck(opponent), state.get_prizes(opponent)]
+        ]
+        self.pools: List[list] = []
+        self.sizes: List[List[int]] = []
+        for zones in self.groups:
+            pool = [card for zone in zones for card in zone]
+            self.pools.append(pool)
+            self.sizes.append([len(zone) for zone in zones])
+
+        # 順列の事前確保バッファ（陣営ごとに [batch_size, 非公開カード枚数]）
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.orders = [np.tile(np.arange(len(pool), dtype=np.int16), (batch_size, 1)) for pool in self.pools]
+        self.row = batch_size
+        self.sampled = 0
+
+    def _refill(self):
+        """次のbatch_size個分の順列をまとめて生成（バッファをその場で並べ替える）"""
+        for order in self.orders:
+            self.rng.permuted(order, axis=1, out=order)
+        self.row = 0
+
+    def sample(self, state: GameState):
+        """非公開ゾーンを1通りの配置に置き換える（ゾーンのリストは同一オブジェクトのまま中身のみ変更）"""
+        if self.row >= self.batch_size:
+            self._refill()
+
+        row = self.row
+        for zones, sizes, pool, order in zip(self.groups, self.sizes, self.pools, self.orders):
+            permutation = order[row].tolist()
+            offset = 0
+            for zone, size in zip(zones, sizes):
+                state.list_snapshot(zone)
+                zone[:] = [pool[index] for index in permutation[offset:offset + size]]
+                offset += size
+
+        # 手札の中身は局面ハッシュの対象のため、有効時は再計算（巻き戻し時はジャーナルから復元される）
+        if state.zobrist_hash is not None:
+            state.zobrist_hash = state.compute_hash()
+
+        self.row += 1
+        self.sampled += 1
+
+
+class ISMCTSSearch(MCTSSearch):
+    """
+    情報集合MCTS（単一観測者版）
+
+    木は探索側のターン内アクションのみで構成され、その合法手は自分の手札と場（公開情報）だけで決まる。
+    そのため反復ごとに異なるdeterminizationを引いても同じ木を共有でき、
+    多数のdeterminizationにまたがる統計がそのまま1つの木に集約される。
+    """
+
+    def __init__(self, match: Match, side: str, determinization_batch: int = 256, **options):
+        self.determinization_batch = determinization_batch
+        super().__init__(match, side, **options)
+
+    def _load(self, match: Match):
+        """試合を複製し、その局面の非公開ゾーンで配り直しを用意（advance() で局面が進むたびに作り直す）"""
+        super()._load(match)
+        self.determinizer = Determinizer(self.match.game_state, self.side, batch_size=self.determinization_batch,
+                                         seed=self.rng.getrandbits(Match.SEED_BITS))
+
+    def _sample_hidden_zones(self, state: GameState):
+        """探索側から見えない手札・山札・サイドを配り直す"""
+        self.determinizer.sample(state)
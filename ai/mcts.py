@@ -0,0 +1,573 @@
+# ai/mcts.py
+# Version: 1.7
+# Updated: 2026-10-18 08:30
+# モンテカルロ木探索（MCTS）によるAIコントローラー
+#
+# 木の各辺は自分のターン内の1アクション（たねポケモン・エネルギー・進化・トレーナーズ・にげる・ワザ・ターン終了）。
+# ターン終了（またはワザ）に達した葉から、既存のAIControllerのヒューリスティックで
+# 両者のターンを指定数だけ進め（ロールアウト）、局面を評価して逆伝播する。
+# 探索は試合の複製（Match.clone()）上で行い、各反復は変更ジャーナルで巻き戻す。
+# 同じターン内の次の意思決定では、選んだアクションの部分木を新しいルートとして引き継ぐ（advance()）。
+# 木のノード数は上限（node_cap）を超えると、最も長く使われていない部分木から削除する。
+
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from models.card import TrainerType
+from models.game_state import GameState
+from engine.match import Match
+from engine.actions import legal_actions, ActionCodec, END_TURN, END, ATTACK, RETREAT, SUMMON, TRAINER, ATTACH
+from engine.agents import AIControllerAgent
+from gui.ai_controller import AIController
+from utils.tracing import tracer, AI, DEBUG, INFO
+
+
+class TurnActions:
+    """
+    ターン内アクションの列挙と実行（engine.actions の整数エンコードを使用）
+
+    アクションは手札・場の位置で表すため、複製した試合と実際の試合で共通に使える。
+    """
+
+    @staticmethod
+    def legal(match: Match, player: str, allow_retreat: bool = True,
+              turn_ending_only: bool = False) -> List[int]:
+        """
+        現在の局面で合法なアクションを列挙
+
+        同じ種類（プロトタイプ）の手札は結果が同じになるため、最初の1枚のみを候補にする。
+        ターン終了は常に含まれる。turn_ending_only ならワザとターン終了のみ。
+        """
+        actions = legal_actions(match.game_state, player, unique=True)
+        if turn_ending_only:
+            return [action for action in actions if ActionCodec.ends_turn(action)]
+        if not allow_retreat:
+            return [action for action in actions if ActionCodec.kind(action) != RETREAT]
+        return list(actions)
+
+    @staticmethod
+    def ends_turn(action: int) -> bool:
+        """アクション後にターンが終わるか（ワザを使うとターン終了）"""
+        return ActionCodec.ends_turn(action)
+
+    @staticmethod
+    def is_retreat(action: int) -> bool:
+        return ActionCodec.kind(action) == RETREAT
+
+    @staticmethod
+    def apply(match: Match, player: str, action: int) -> Tuple[bool, List[str]]:
+        """アクションを実行し、(成功したか, 行動メッセージ)を返す（ターン終了自体はここでは行わない）"""
+        state = match.game_state
+        kind, argument, target = ActionCodec.decode(action)
+
+        if kind == END:
+            return True, []
+
+        if kind == ATTACK:
+            return match.apply(action, player)
+
+        if kind == RETREAT:
+            old_active = state.get_active(player)
+            new_active = state.get_bench(player)[argument]
+            success, _ = match.apply(action, player)
+            return success, [f"相手の{old_active.name}がにげて、{new_active.name}がバトル場に出た。"] if success else []
+
+        card = state.get_hand(player)[argument]
+
+        if kind == SUMMON:
+            location_text = "バトル場" if state.get_active(player) is None else "ベンチ"
+            success, _ = match.apply(action, player)
+            return success, [f"相手が{card.name}を{location_text}に出した。"] if success else []
+
+        if kind == TRAINER:
+            success, _ = match.apply(action, player)
+            if not success:
+                return False, []
+            if card.trainer_type == TrainerType.STADIUM:
+                return True, [f"相手が{card.name}を場に出した。"]
+            return True, [f"相手が{card.name}を使った。"]
+
+        pokemon = state.get_active(player) if target == 0 else state.get_bench(player)[target - 1]
+        location_text = "バトル場" if target == 0 else "ベンチ"
+        success, _ = match.apply(action, player)
+        if not success:
+            return False, []
+        if kind == ATTACH:
+            energy_type = getattr(card, 'energy_kind', card.name)
+            return True, [f"相手が{location_text}の{pokemon.name}に{energy_type}エネルギーをつけた。"]
+        return True, [f"相手が{location_text}の{pokemon.name}を{card.name}に進化させた。"]
+
+
+class MCTSNode:
+    """探索木のノード（ターン内のアクション列に対応）"""
+
+    __slots__ = ('parent', 'action', 'children', 'untried', 'visits', 'value_sum',
+                 'terminal', 'retreated', 'depth', 'last_used')
+
+    def __init__(self, parent: Optional['MCTSNode'], action: Optional[int],
+                 terminal: bool = False, retreated: bool = False, depth: int = 0):
+        self.parent = parent
+        self.action = action
+        self.children: List['MCTSNode'] = []
+        self.untried: Optional[List[int]] = None
+        self.visits = 0
+        self.value_sum = 0.0
+        self.terminal = terminal
+        self.retreated = retreated
+        self.depth = depth
+        # 最後に選択・展開された反復の番号（上限超過時の削除順に使う）
+        self.last_used = 0
+
+    def select_child(self, exploration: float) -> 'MCTSNode':
+        """UCB1で子ノードを選択"""
+        log_visits = math.log(self.visits)
+        best, best_score = None, -1.0
+        for child in self.children:
+            score = child.value_sum / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+@dataclass
+class SearchStats:
+    """
+    1回の意思決定（探索）の統計
+
+    nodes は評価したノード数（1反復で1つの葉をロールアウトで評価する）、
+    tree_size は木に展開されたノード数（小さな局面では木を展開し尽くすと増えなくなる）、
+    reused_nodes は前の意思決定から引き継いだルートの訪問回数、pruned は上限超過で削除したノード数。
+    """
+    nodes: int = 0
+    tree_size: int = 0
+    elapsed: float = 0.0
+    best_action: Optional[int] = None
+    root_visits: Dict[int, int] = field(default_factory=dict)
+    reused_nodes: int = 0
+    pruned: int = 0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def effective_nodes(self) -> int:
+        """意思決定に使われた評価の総数（引き継いだ分を含む）"""
+        return self.nodes + self.reused_nodes
+
+
+class MCTSSearch:
+    """
+    1つの局面からのMCTS（ターン内アクション列を探索）
+
+    試合を複製して探索専用の乱数を与え、各反復の開始時に両者の山札を並べ替えてから
+    選択・展開・ロールアウトを行い、最後に変更ジャーナルで反復前の局面へ戻す。
+    山札の並びを反復ごとに変えるため、探索が実際のドロー順を前提にすることはない。
+    """
+
+    def __init__(self, match: Match, side: str, exploration: float = 0.7, rollout_turns: int = 2,
+                 max_turn_actions: int = 10, seed: Optional[int] = None, allow_retreat: bool = True,
+                 node_cap: Optional[int] = None):
+        """
+        Args:
+            node_cap: 木のノード数の上限（超えたら最も長く使われていない部分木を上限の9割まで削除・Noneなら無制限）
+        """
+        self.side = side
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.max_turn_actions = max_turn_actions
+        self.node_cap = node_cap
+        self.iterations = 0
+        self.rng = random.Random(seed)
+        self._load(match)
+        self.root = MCTSNode(None, None, retreated=not allow_retreat)
+        self.stats = SearchStats()
+
+    def _load(self, match: Match):
+        """探索用に試合を複製し、ロールアウト用のコントローラー（高速な固定順序のヒューリスティック）を用意"""
+        self.match = match.clone(agents={"player": AIControllerAgent(), "opponent": AIControllerAgent()})
+        self.match.rng = random.Random(self.rng.getrandbits(Match.SEED_BITS))
+        state = self.match.game_state
+        self.rollout_controllers = {
+            player: AIController(state, None, side=player, match=self.match, use_planner=False)
+            for player in ("player", "opponent")
+        }
+
+    def run(self, time_budget: Optional[float] = None, node_budget: Optional[int] = None) -> SearchStats:
+        """予算（秒・評価ノード数のどちらか早い方）まで反復し、統計を返す"""
+        stats = self.stats
+        start = time.perf_counter()
+        deadline = start + time_budget if time_budget is not None else None
+
+        with tracer.suspended():
+            while True:
+                self._iterate()
+                stats.nodes += 1
+                if node_budget is not None and stats.nodes >= node_budget:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if deadline is None and node_budget is None:
+                    break
+
+        stats.elapsed = time.perf_counter() - start
+        stats.root_visits = {child.action: child.visits for child in self.root.children}
+        stats.best_action = self.best_action()
+        return stats
+
+    def best_action(self) -> int:
+        """訪問回数が最多のアクション（未探索ならターン終了）"""
+        if not self.root.children:
+            return END_TURN
+        return max(self.root.children, key=lambda child: child.visits).action
+
+    def _iterate(self):
+        """選択・展開・ロールアウト・逆伝播を1回行う"""
+        match = self.match
+        state = match.game_state
+        mark = state.mark()
+        self._sample_hidden_zones(state)
+        self.iterations += 1
+        iteration = self.iterations
+
+        node = self.root
+        node.last_used = iteration
+        while not node.terminal:
+            if node.untried is None:
+                node.untried = self._legal_actions(node)
+                node.untried.reverse()
+            if node.untried:
+                action = node.untried.pop()
+                TurnActions.apply(match, self.side, action)
+                child = MCTSNode(node, action,
+                                 terminal=TurnActions.ends_turn(action) or match.is_over,
+                                 retreated=node.retreated or TurnActions.is_retreat(action),
+                                 depth=node.depth + 1)
+                child.last_used = iteration
+                node.children.append(child)
+                self.stats.tree_size += 1
+                node = child
+                break
+            node = node.select_child(self.exploration)
+            node.last_used = iteration
+            TurnActions.apply(match, self.side, node.action)
+
+        value = self._rollout(node.terminal)
+
+        while node is not None:
+            node.visits += 1
+            node.value_sum += value
+            node = node.parent
+
+        state.undo_to(mark)
+
+        if self.node_cap is not None and self.stats.tree_size > self.node_cap:
+            self._prune()
+
+    def _prune(self):
+        """
+        最も長く使われていない部分木から削除し、木のノード数を上限の9割まで減らす
+
+        削除した子ノードのアクションは親の未展開リストへ戻す（再び選ばれれば展開し直す）。
+        """
+        nodes = []
+        stack = list(self.root.children)
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(node.children)
+        nodes.sort(key=lambda node: node.last_used)
+
+        target = int(self.node_cap * 0.9)
+        removed = set()
+        for node in nodes:
+            if len(nodes) - len(removed) <= target or node.last_used >= self.iterations:
+                break
+            if id(node) in removed:
+                continue
+            node.parent.children.remove(node)
+            node.parent.untried.append(node.action)
+            stack = [node]
+            while stack:
+                descendant = stack.pop()
+                removed.add(id(descendant))
+                stack.extend(descendant.children)
+
+        self.stats.pruned += len(removed)
+        self.stats.tree_size = len(nodes) - len(removed)
+
+    def advance(self, action: int, match: Match) -> bool:
+        """
+        選んだアクションの子ノードを新しいルートにし、部分木と統計を次の意思決定に引き継ぐ
+
+        match はアクションを適用した後の実際の試合（探索用に複製し直す）。
+        ドローなどで局面が木の想定とずれた場合に備え、新しい局面で合法でなくなった子ノードは捨てる。
+        子ノードがない（またはターンが終わる）場合はFalse。
+        """
+        child = next((node for node in self.root.children if node.action == action), None)
+        if child is None or child.terminal:
+            return False
+
+        self._load(match)
+        child.parent = None
+        self.root = child
+
+        legal = self._legal_actions(child)
+        kept = [node for node in child.children if node.action in legal]
+        expanded = {node.action for node in kept}
+        dropped = [node for node in child.children if node.action not in expanded]
+        child.children = kept
+        child.untried = [legal_action for legal_action in reversed(legal) if legal_action not in expanded]
+
+        self.stats = SearchStats(tree_size=self._count_nodes(kept), reused_nodes=child.visits,
+                                 pruned=self._count_nodes(dropped))
+        return True
+
+    @staticmethod
+    def _count_nodes(nodes: List[MCTSNode]) -> int:
+        """ノードとその子孫の総数"""
+        count = 0
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+    def _legal_actions(self, node: MCTSNode) -> List[int]:
+        """ノードで選べるアクション（1ターンのアクション数上限に達したらワザかターン終了のみ）"""
+        return TurnActions.legal(self.match, self.side, allow_retreat=not node.retreated,
+                                 turn_ending_only=node.depth >= self.max_turn_actions)
+
+    def _sample_hidden_zones(self, state: GameState):
+        """
+        反復ごとに非公開情報を引き直す（ジャーナルに記録するため巻き戻し可能）
+
+        既定では両者の山札の並びのみを探索用乱数で並べ替える。
+        手札・サイドも引き直す情報集合探索は ai.ismcts.ISMCTSSearch を参照。
+        """
+        for player in ("player", "opponent"):
+            deck = state.get_deck(player)
+            state.list_snapshot(deck)
+            self.rng.shuffle(deck)
+
+    def _rollout(self, turn_ended: bool) -> float:
+        """ヒューリスティックで自分のターンの残りと以降のターンを進め、局面を評価"""
+        match = self.match
+        state = match.game_state
+
+        if not turn_ended and not match.is_over:
+            self.rollout_controllers[self.side].execute_ai_turn()
+
+        turns = 0
+        while not match.is_over:
+            match.end_turn()
+            if match.is_over or turns >= self.rollout_turns:
+                break
+            player = state.current_player
+            _, can_continue = match.start_turn(player)
+            if not can_continue:
+                break
+            self.rollout_controllers[player].execute_ai_turn()
+            turns += 1
+
+        return self.evaluate(match, self.side)
+
+    @staticmethod
+    def evaluate(match: Match, side: str) -> float:
+        """局面の評価値（sideから見た0〜1。決着済みなら勝ち1・負け0・引き分け0.5）"""
+        if match.is_over:
+            if match.winner is None:
+                return 0.5
+            return 1.0 if match.winner == side else 0.0
+
+        state = match.game_state
+        opponent = GameState.get_opponent(side)
+        prize_lead = len(state.get_prizes(opponent)) - len(state.get_prizes(side))
+        board_lead = MCTSSearch._board_strength(state, side) - MCTSSearch._board_strength(state, opponent)
+        value = 0.5 + 0.07 * prize_lead + 0.1 * math.tanh(board_lead / 200.0)
+        return min(0.95, max(0.05, value))
+
+    @staticmethod
+    def _board_strength(state: GameState, player: str) -> float:
+        """場のポケモンの残りHPと付いているエネルギーの合計"""
+        strength = 0.0
+        pokemon_list = [state.get_active(player)] + list(state.get_bench(player))
+        for pokemon in pokemon_list:
+            if pokemon is not None:
+                strength += pokemon.current_hp + 20 * len(pokemon.attached_energy)
+        return strength
+
+
+class MCTSController(AIController):
+    """
+    MCTSで1ターンの行動を決めるAIコントローラー（AIControllerと同じインターフェース）
+
+    execute_ai_turn() ではアクションごとに探索し、最も訪問されたアクションを実際の試合に適用する。
+    ターン終了かワザを選ぶまで繰り返す。予算は1回の意思決定あたりの秒数（time_budget）と
+    ノード数（node_budget）で指定し、どちらか早い方で打ち切る。
+    workers（2以上）か共有の parallel（ai.parallel.RootParallelSearch）を指定すると
+    ルート並列で探索する（node_budget は木1本あたり）。自前のプールは close() で終了する。
+    information_set=True（既定）では相手の手札・山札・サイドを見ずに、
+    公開情報と矛盾しない配置を反復ごとに引き直して探索する（ai.ismcts.ISMCTSSearch）。
+    ponderer（ai.ponder.Ponderer）を指定すると、ターン最初の意思決定では相手の手番中に先読みした木のうち
+    実際の局面に一致するものを引き継ぎ、先読みに使った時間・反復数を予算から差し引いて探索を続ける。
+    reuse_tree=True（既定）では、同じターン内の次の意思決定で選んだアクションの部分木を引き継ぐ
+    （木のノード数は node_cap まで・ルート並列探索では引き継がない）。
+    マリガン・きぜつ後の入れ替えなどの判断はAIControllerのヒューリスティックを引き継ぐ。
+    """
+
+    def __init__(self, game_state: GameState, card_actions, side: str = "opponent",
+                 match: Optional[Match] = None, time_budget: Optional[float] = 0.5,
+                 node_budget: Optional[int] = None, exploration: float = 0.7,
+                 rollout_turns: int = 2, max_turn_actions: int = 10, seed: Optional[int] = None,
+                 workers: Optional[int] = None, parallel=None, information_set: bool = True, ponderer=None,
+                 reuse_tree: bool = True, node_cap: Optional[int] = 50000):
+        super().__init__(game_state, card_actions, side=side, match=match)
+        self.max_actions_per_turn = max_turn_actions
+        self.information_set = information_set
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+
+        # 探索用乱数（未指定時は試合のシードから決めるため、ノード数予算なら試合ごとに再現可能）
+        if seed is None:
+            seed = Match.derive_seed(self.match.seed, 1 if side == "player" else 2)
+        self.rng = random.Random(seed)
+
+        # ルート並列探索（指定時のみプロセスプールを使用）
+        self._owns_parallel = parallel is None and workers is not None and workers > 1
+        if self._owns_parallel:
+            from .parallel import RootParallelSearch
+            parallel = RootParallelSearch(workers, exploration=exploration, rollout_turns=rollout_turns)
+        self.parallel = parallel
+
+        # 先読み（相手の手番中に育てた木の引き継ぎ）
+        self.ponderer = ponderer
+
+        # ターン内の意思決定間での木の引き継ぎ
+        self.reuse_tree = reuse_tree
+        self.node_cap = node_cap
+        self._search: Optional[MCTSSearch] = None
+
+        # 直近のターンの探索統計
+        self.last_search_stats: List[SearchStats] = []
+
+    def create_search(self, match: Match, allow_retreat: bool = True,
+                      max_turn_actions: Optional[int] = None) -> MCTSSearch:
+        """この設定の探索（単一の木）を作成（max_turn_actions 未指定時はターンの最初から）"""
+        search_class = MCTSSearch
+        if self.information_set:
+            from .ismcts import ISMCTSSearch
+            search_class = ISMCTSSearch
+        if max_turn_actions is None:
+            max_turn_actions = self.max_actions_per_turn
+        return search_class(match, self.side, exploration=self.exploration,
+                            rollout_turns=self.rollout_turns, max_turn_actions=max_turn_actions,
+                            seed=self.rng.getrandbits(Match.SEED_BITS), allow_retreat=allow_retreat,
+                            node_cap=self.node_cap)
+
+    def search(self, allow_retreat: bool = True) -> SearchStats:
+        """現在の局面から1回の意思決定分の探索を行う"""
+        remaining_actions = max(0, self.max_actions_per_turn - self.current_action_count)
+        if self._search is not None:
+            return self._search.run(time_budget=self.time_budget, node_budget=self.node_budget)
+
+        if self.ponderer is not None and self.current_action_count == 0:
+            pondered = self.ponderer.take(self.match)
+            if pondered is not None:
+                search, pondered_time = pondered
+                time_budget = max(0.0, self.time_budget - pondered_time) if self.time_budget is not None else None
+                # run の node_budget は先読み分を含む累計の反復数の上限なので、そのまま渡す
+                stats = search.run(time_budget=time_budget, node_budget=self.node_budget)
+                stats.elapsed += pondered_time
+                if self.reuse_tree:
+                    self._search = search
+                return stats
+
+        if self.parallel is not None:
+            return self.parallel.search(self.match, self.side, time_budget=self.time_budget,
+                                        node_budget=self.node_budget, seed=self.rng.getrandbits(Match.SEED_BITS),
+                                        allow_retreat=allow_retreat, max_turn_actions=remaining_actions,
+                                        information_set=self.information_set)
+
+        search = self.create_search(self.match, allow_retreat=allow_retreat, max_turn_actions=remaining_actions)
+        if self.reuse_tree:
+            self._search = search
+        return search.run(time_budget=self.time_budget, node_budget=self.node_budget)
+
+    def execute_ai_turn(self) -> List[str]:
+        """MCTSでアクションを1つずつ決めながらターンを実行し、行動メッセージのリストを返す"""
+        messages = []
+
+        if self.game_state.current_player != self.side:
+            messages.append("AIのターンではありません。")
+            return messages
+
+        self.current_action_count = 0
+        self.last_search_stats = []
+        self._search = None
+        retreated = False
+
+        try:
+            while not self.match.is_over:
+                legal_actions = TurnActions.legal(
+                    self.match, self.side, allow_retreat=not retreated,
+                    turn_ending_only=self.current_action_count >= self.max_actions_per_turn)
+                if legal_actions == [END_TURN]:
+                    break
+
+                stats = self.search(allow_retreat=not retreated)
+                self.last_search_stats.append(stats)
+                action = stats.best_action
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, f"MCTS: {ActionCodec.to_string(action)} を選択（{stats.nodes}ノード評価・"
+                                          f"引き継ぎ{stats.reused_nodes}・木{stats.tree_size}ノード・"
+                                          f"{stats.nodes_per_second:.0f}ノード/秒）")
+                if action == END_TURN:
+                    break
+
+                success, action_messages = TurnActions.apply(self.match, self.side, action)
+                messages.extend(action_messages)
+                if not success:
+                    break
+
+                self.current_action_count += 1
+                retreated = retreated or TurnActions.is_retreat(action)
+                if TurnActions.ends_turn(action):
+                    break
+                if self._search is not None and not self._search.advance(action, self.match):
+                    self._search = None
+
+            if not messages or self.current_action_count == 0:
+                messages.append("相手は何もできませんでした。")
+
+            if tracer.ai <= INFO:
+                tracer.log(AI, INFO, self.get_ai_action_summary())
+
+        except Exception as e:
+            print(f"MCTS AI行動エラー: {e}")
+            messages.append("相手の行動でエラーが発生しました")
+
+        finally:
+            self._search = None
+
+        return messages
+
+    def close(self):
+        """自前で起動したルート並列探索のプロセスプールを終了"""
+        if self._owns_parallel and self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+    def get_ai_action_summary(self) -> str:
+        """AI行動の要約（探索量とノード/秒を含む）"""
+        nodes = sum(stats.nodes for stats in self.last_search_stats)
+        elapsed = sum(stats.elapsed for stats in self.last_search_stats)
+        rate = nodes / elapsed if elapsed > 0 else 0.0
+        return (f"AI行動完了: {self.current_action_count}回の行動を実行"
+                f"（MCTS {len(self.last_search_stats)}回・{nodes}ノード・{elapsed:.2f}秒・{rate:.0f}ノード/秒）")
@@ -0,0 +1,109 @@
+# ai/parallel.py
+# Version: 1.2
+# Updated: 2026-10-17 21:30
+# ルート並列MCTS：同じ局面からK本の独立した木をプロセスプールで探索し、ルートの訪問回数を合算
+#
+# 1プロセスのMCTSはGILに縛られるため、局面を1回だけシリアライズして各ワーカーへ送り、
+# それぞれ別の乱数で探索した結果（ルートの子ごとの訪問回数・評価値合計）を親でまとめる。
+# 木同士は通信しないので、ワーカー数がコア数以内ならノード/秒はほぼ線形に伸びる。
+
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from engine.match import Match
+from utils.tracing import tracer
+
+from .mcts import MCTSSearch, SearchStats, END_TURN
+from .ismcts import ISMCTSSearch
+
+
+def _init_worker():
+    """ワーカープロセスの初期化：トレース無効化・標準出力の抑制"""
+    tracer.configure("off")
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+
+
+def _warm_up(_index: int) -> int:
+    """プロセス起動とモジュール読み込みを済ませる（最初の意思決定が遅くならないように）"""
+    return os.getpid()
+
+
+def _search_tree(payload: bytes, side: str, options: dict, seed: int,
+                 time_budget: Optional[float], node_budget: Optional[int],
+                 information_set: bool = False) -> Tuple[Dict[int, Tuple[int, float]], int, int]:
+    """
+    ワーカーで1本の木を探索（ワーカープロセスで実行）
+
+    Returns:
+        Tuple[Dict, int, int]: ({ルートのアクション: (訪問回数, 評価値合計)}, 評価ノード数, 木のノード数)
+    """
+    match = pickle.loads(payload)
+    search_class = ISMCTSSearch if information_set else MCTSSearch
+    search = search_class(match, side, seed=seed, **options)
+    stats = search.run(time_budget=time_budget, node_budget=node_budget)
+    root_children = {child.action: (child.visits, child.value_sum) for child in search.root.children}
+    return root_children, stats.nodes, stats.tree_size
+
+
+class RootParallelSearch:
+    """
+    プロセスプールによるルート並列MCTS
+
+    ワーカーは生成時に起動して使い回す（意思決定ごとのプロセス起動はしない）。
+    使い終わったら close() でプールを終了する。
+    """
+
+    def __init__(self, workers: Optional[int] = None, exploration: float = 0.7, rollout_turns: int = 2):
+        self.workers = workers or os.cpu_count() or 1
+        self.options = {"exploration": exploration, "rollout_turns": rollout_turns}
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        list(self.executor.map(_warm_up, range(self.workers)))
+
+    def search(self, match: Match, side: str, time_budget: Optional[float] = 0.5,
+               node_budget: Optional[int] = None, seed: int = 0, allow_retreat: bool = True,
+               max_turn_actions: int = 10, information_set: bool = False) -> SearchStats:
+        """
+        K本の木を並列に探索して統計を合算
+
+        Args:
+            time_budget: 1回の意思決定あたりの探索時間（秒・各ワーカー共通）
+            node_budget: 木1本あたりの評価ノード数の上限
+            information_set: 各木を情報集合MCTS（非公開ゾーンを引き直す）で探索するか
+        """
+        started = time.perf_counter()
+        payload = pickle.dumps(match.clone(), pickle.HIGHEST_PROTOCOL)
+        options = dict(self.options, allow_retreat=allow_retreat, max_turn_actions=max_turn_actions)
+
+        futures = [
+            self.executor.submit(_search_tree, payload, side, options, Match.derive_seed(seed, tree),
+                                 time_budget, node_budget, information_set)
+            for tree in range(self.workers)
+        ]
+
+        merged: Dict[int, Tuple[int, float]] = {}
+        stats = SearchStats()
+        for future in futures:
+            root_children, nodes, tree_size = future.result()
+            stats.nodes += nodes
+            stats.tree_size += tree_size
+            for action, (visits, value_sum) in root_children.items():
+                total_visits, total_value = merged.get(action, (0, 0.0))
+                merged[action] = (total_visits + visits, total_value + value_sum)
+
+        stats.elapsed = time.perf_counter() - started
+        stats.root_visits = {action: visits for action, (visits, _) in merged.items()}
+        if merged:
+            # 訪問回数の合計が最多のアクション（同数なら評価値の平均が高い方）
+            stats.best_action = max(merged, key=lambda action: (merged[action][0],
+                                                                merged[action][1] / max(1, merged[action][0])))
+        else:
+            stats.best_action = END_TURN
+        return stats
+
+    def close(self):
+        """プロセスプールを終了"""
+        self.executor.shutdown(wait=True)
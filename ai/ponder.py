@@ -0,0 +1,209 @@
+# ai/ponder.py
+# Version: 1.1
+# Updated: 2026-10-18 08:30
+# 先読み（ポンダリング）：相手（人間）の手番中に、予想される自分のターン開始局面の探索木を裏で育てる
+#
+# 相手の手番の局面から「相手がこのままターンを終える」「相手がヒューリスティック通りにターンを進める」の2通りを予想し、
+# それぞれについて自分のターン開始時のドロー（山札の構成で重み付け・ねむりならコインの裏表も）ごとに
+# MCTSの探索木を作って、予想の確率に比例するように反復を割り振る。
+# 自分のターンが実際に始まったら、実際の局面と一致する木（take()）をそのまま引き継いで探索を続ける。
+# 局面の一致は探索側から見える情報（情報集合探索では相手の手札の中身を除く）の局面ハッシュで判定する。
+
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.card import CONDITION_BITS, SpecialCondition
+from models.game_state import GameState
+from engine.match import Match
+from gui.ai_controller import AIController
+from gui.ai_worker import acquire_switch_interval, release_switch_interval
+from utils.tracing import tracer
+
+from .mcts import MCTSSearch
+
+
+class Ponderer:
+    """
+    相手の手番中にバックグラウンドのスレッドで探索木を育て、自分の手番で引き渡す
+
+    GUIスレッドから相手の手番の局面が変わるたびに start() を呼び、自分の手番のコントローラーが
+    take() で実際の局面に一致する木を受け取る（受け取った時点で先読みは止まり、残りの木は捨てる）。
+    """
+
+    def __init__(self, search_factory: Callable[[Match], MCTSSearch], side: str = "opponent",
+                 information_set: bool = True, slice_nodes: int = 16, max_nodes: int = 20000,
+                 switch_interval: float = 0.001):
+        """
+        Args:
+            search_factory: 予想した局面（試合の複製）から探索を作る関数（例: MCTSController.create_search）
+            side: 先読みする側（AI）
+            information_set: 探索が情報集合探索か（Trueなら相手の手札の中身は局面の一致判定に含めない）
+            slice_nodes: 1本の木を続けて探索する反復数（この間隔で停止要求を確認する）
+            max_nodes: 1本の木あたりの反復数の上限（すべて達したら待機する）
+            switch_interval: 先読み中のGILの切り替え間隔（秒・GUIの応答性のため短くする・
+                             AIの思考スレッドと共有し、どちらも終わったときだけ元の値に戻る）
+        """
+        self.search_factory = search_factory
+        self.side = side
+        self.information_set = information_set
+        self.slice_nodes = slice_nodes
+        self.max_nodes = max_nodes
+        self.switch_interval = switch_interval
+
+        # 予想した自分のターン開始局面ごとの [探索, 重み, 先読みに使った秒数]
+        self.trees: Dict[tuple, list] = {}
+        self.origin_key: Optional[tuple] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stop_requested = threading.Event()
+
+        # 統計
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def state_key(match: Match, observer: str, information_set: bool = True) -> tuple:
+        """
+        局面の一致判定用のキー
+
+        局面ハッシュに含まれないターン数・スタジアム・山札の枚数を加え、
+        information_set なら相手の手札は枚数のみを含める（複製上で計算し、元の局面は変更しない）。
+        """
+        state = match.game_state.clone()
+        opponent = GameState.get_opponent(observer)
+        hidden_hand = state.get_hand(opponent)
+        hidden_hand_size = len(hidden_hand)
+        if information_set:
+            hidden_hand.clear()
+        stadium = state.stadium.prototype if state.stadium is not None else None
+        return (state.compute_hash(), state.current_player, state.turn_count, stadium, hidden_hand_size,
+                len(state.get_deck("player")), len(state.get_deck("opponent")))
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, match: Match):
+        """
+        相手の手番の局面から先読みを開始（GUIスレッドから呼ぶ）
+
+        前回と同じ局面なら続行し、局面が変わっていれば予想をやり直す。
+        """
+        if match.is_over or match.game_state.current_player == self.side:
+            return
+
+        origin_key = self.state_key(match, self.side, information_set=False)
+        if origin_key == self.origin_key and self.thread is not None:
+            return
+
+        self.stop()
+        self.trees = {}
+        self.origin_key = origin_key
+        self.stop_requested = threading.Event()
+        acquire_switch_interval(self.switch_interval)
+        self.thread = threading.Thread(target=self._run, args=(match.clone(), self.stop_requested),
+                                       name="Ponderer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """先読みを止める（スレッドの終了を待つ）"""
+        if self.thread is not None:
+            self.stop_requested.set()
+            self.thread.join()
+            self.thread = None
+            release_switch_interval()
+
+    def take(self, match: Match) -> Optional[Tuple[MCTSSearch, float]]:
+        """
+        実際の局面に一致する木を (探索, 先読みに使った秒数) で受け取る（なければNone）
+
+        先読みは止まり、受け取らなかった木は捨てる。
+        """
+        self.stop()
+        trees, self.trees = self.trees, {}
+        self.origin_key = None
+        if not trees:
+            return None
+
+        entry = trees.get(self.state_key(match, self.side, self.information_set))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        search, _, pondered = entry
+        return search, pondered
+
+    def _run(self, origin: Match, stop_requested: threading.Event):
+        """先読みスレッド：予想局面ごとに木を作り、重みに比例するように反復を割り振る"""
+        try:
+            with tracer.suspended():
+                for root, weight in self._predict_roots(origin):
+                    if stop_requested.is_set():
+                        return
+                    key = self.state_key(root, self.side, self.information_set)
+                    entry = self.trees.get(key)
+                    if entry is not None:
+                        entry[1] += weight
+                    else:
+                        self.trees[key] = [self.search_factory(root), weight, 0.0]
+
+                entries = list(self.trees.values())
+                while entries and not stop_requested.is_set():
+                    # 重みあたりの反復数が最も少ない木を探索
+                    entry = min(entries, key=lambda item: item[0].stats.nodes / item[1])
+                    search = entry[0]
+                    start = time.perf_counter()
+                    search.run(node_budget=search.stats.nodes + self.slice_nodes)
+                    entry[2] += time.perf_counter() - start
+                    if search.stats.nodes >= self.max_nodes:
+                        entries.remove(entry)
+        except Exception as e:
+            print(f"先読みエラー: {e}")
+
+    def _predict_roots(self, origin: Match) -> List[Tuple[Match, float]]:
+        """予想される自分のターン開始局面（試合の複製）と重み（合計1）の一覧"""
+        opponent = GameState.get_opponent(self.side)
+
+        # 相手がこのままターンを終える場合と、ヒューリスティック通りにターンを進める場合
+        finished = origin.clone()
+        AIController(finished.game_state, None, side=opponent, match=finished).execute_ai_turn()
+        plans = [origin]
+        if self.state_key(finished, opponent, False) != self.state_key(origin, opponent, False):
+            plans.append(finished)
+
+        roots = []
+        for plan in plans:
+            if plan.is_over:
+                continue
+            plan = plan.clone()
+            plan.end_turn()
+            if plan.is_over:
+                continue
+            for probability, prototype, coin in self._turn_start_outcomes(plan):
+                root = plan.clone()
+                if prototype is not None:
+                    root.force_next_draw(self.side, prototype)
+                if coin is not None:
+                    root.forced_coins.append(coin)
+                _, can_continue = root.start_turn(self.side)
+                root.forced_coins.clear()
+                if can_continue:
+                    roots.append((root, probability / len(plans)))
+        return roots
+
+    def _turn_start_outcomes(self, match: Match) -> List[Tuple[float, object, Optional[bool]]]:
+        """自分のターン開始時の結果 [(確率, ドローするカードのプロトタイプ, ねむりのコイン)]"""
+        state = match.game_state
+        deck = state.get_deck(self.side)
+        if deck:
+            counts = Counter(card.prototype for card in deck)
+            draws = [(count / len(deck), prototype) for prototype, count in counts.most_common()]
+        else:
+            draws = [(1.0, None)]
+
+        active = state.get_active(self.side)
+        if active is None or not active.condition_mask & CONDITION_BITS[SpecialCondition.SLEEP]:
+            return [(probability, prototype, None) for probability, prototype in draws]
+        return [(probability * 0.5, prototype, coin)
+                for probability, prototype in draws for coin in (True, False)]
@@ -0,0 +1,351 @@
+# ai/tuning.py
+# Version: 1.2
+# Updated: 2026-10-18 08:00
+# AIControllerのヒューリスティックの重み調整：CMA-ESで重みベクトルを探索し、AI対AI対戦で評価する
+#
+# 使い方:
+#   python -m ai.tuning --decks 1,2 --generations 20 --games 40 --workers 8
+#   python -m ai.tuning --decks 1,2 --generations 5 --population 8 --games 16 --output /tmp/ai_weights.json
+#   python -m ai.tuning --decks 1,2 --fixed-order   # 固定の順序の行動（ターンプランナーなし）の重みを調整
+#
+# 重みは既定値からの倍率の対数で探索する（すべての重みが正のまま、桁の異なる重みを同じ尺度で扱える）。
+# 探索するのは行動の方式で実際に使われる重み（AIWeights.tuned_names）だけで、残りは基準の重みのまま書き出す。
+# 各候補は基準の重み（起動時の重み）のAIと対戦し、勝ち1・引き分け0.5の平均を適応度とする。
+# 同じ世代の候補はすべて同じ試合シード・同じ先手後手とデッキの割り当てで対戦させ（共通乱数）、
+# 候補間の差に対戦ごとの運の差が混ざらないようにする。対戦はプロセスプールで並列に実行する。
+# エラーで中断した試合は得点に含めず、候補ごとのエラー数を表示する。
+# 最後に「基準の重み・最終世代の平均・最良の候補」を新しいシードで再評価し、最も良かった重みを書き出す
+# （書き出し先の ai_weights.json は AIController が起動時に読み込む）。
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from engine.match import Match
+from engine.agents import AIControllerAgent
+from gui.ai_controller import AIController
+from gui.ai_weights import AIWeights, DEFAULT_WEIGHTS_PATH
+from utils.tracing import tracer
+
+# 倍率の対数の範囲（既定値の約1/20〜20倍）
+LOG_SCALE_LIMIT = 3.0
+
+# ワーカープロセスごとの設定（初期化時に1回だけ読み込む）
+_worker_decks: Dict[int, list] = {}
+_worker_baseline: Optional[AIWeights] = None
+_worker_max_turns: int = Match.DEFAULT_MAX_TURNS
+_worker_use_planner: bool = True
+
+
+def _init_worker(deck_ids: Tuple[int, int], baseline: Sequence[float], max_turns: int, use_planner: bool = True):
+    """ワーカープロセスの初期化：CSV読み込み・標準出力の抑制・トレース無効化"""
+    global _worker_baseline, _worker_max_turns, _worker_use_planner
+
+    tracer.configure("off")
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+
+    from database.database_manager import DatabaseManager
+    database_manager = DatabaseManager(
+        cards_csv_path=os.path.join(PROJECT_ROOT, "cards", "cards.csv"),
+        deck_csv_path=os.path.join(PROJECT_ROOT, "cards", "deck.csv")
+    )
+    for deck_id in deck_ids:
+        _worker_decks[deck_id] = database_manager.get_deck_cards(deck_id)
+    _worker_baseline = AIWeights.from_vector(baseline)
+    _worker_max_turns = max_turns
+    _worker_use_planner = use_planner
+
+
+def play_game(task: Tuple[int, Tuple[float, ...], int, int, int, int]) -> Tuple[int, Optional[float]]:
+    """
+    候補の重みのAIと基準の重みのAIで1試合を行う（ワーカープロセスで実行）
+
+    Args:
+        task: (候補番号, 候補の重みベクトル, 試合番号, 試合シード, 候補側のデッキID, 基準側のデッキID)
+
+    Returns:
+        Tuple[int, Optional[float]]: (候補番号, 候補側の得点（勝ち1・引き分け0.5・負け0・エラーで中断したらNone）)
+    """
+    candidate_index, vector, game_index, seed, candidate_deck_id, baseline_deck_id = task
+    candidate_side = "player" if game_index % 2 == 0 else "opponent"
+    baseline_side = "opponent" if candidate_side == "player" else "player"
+
+    try:
+        agents = {candidate_side: AIControllerAgent(use_planner=_worker_use_planner,
+                                                    weights=AIWeights.from_vector(vector)),
+                  baseline_side: AIControllerAgent(use_planner=_worker_use_planner, weights=_worker_baseline)}
+        decks = {candidate_side: _worker_decks[candidate_deck_id], baseline_side: _worker_decks[baseline_deck_id]}
+        match = Match(agents=agents, max_turns=_worker_max_turns, seed=seed)
+        result = match.run(Match.build_deck(decks["player"]), Match.build_deck(decks["opponent"]))
+    except Exception as e:
+        print(f"重み調整の試合{game_index}でエラー: {e}", file=sys.stderr)
+        return candidate_index, None
+
+    if result.winner is None:
+        return candidate_index, 0.5
+    return candidate_index, 1.0 if result.winner == candidate_side else 0.0
+
+
+class CMAES:
+    """
+    CMA-ES（共分散行列適応進化戦略）：適応度を最大化する（ask() で候補を生成し、tell() で評価を返す）
+
+    重み付き再結合・累積経路による歩幅制御・rank-oneとrank-μの共分散更新を行う標準的な構成。
+    """
+
+    def __init__(self, mean: Sequence[float], sigma: float, population: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.dimension = n = len(mean)
+        self.mean = np.array(mean, dtype=float)
+        self.sigma = sigma
+        self.population = population or 4 + int(3 * math.log(n))
+        self.rng = np.random.default_rng(seed)
+
+        # 再結合の重み（上位半分）
+        mu = self.population // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu = mu
+        self.mueff = 1.0 / np.sum(self.weights ** 2)
+
+        # 学習率
+        mueff = self.mueff
+        self.cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        self.cs = (mueff + 2) / (n + mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        self.cmu = min(1 - self.c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        # 進化経路と共分散行列（C = B diag(D^2) B^T）
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.C = np.eye(n)
+        self.generation = 0
+
+    def ask(self) -> List[np.ndarray]:
+        """今世代の候補を生成"""
+        samples = self.rng.standard_normal((self.population, self.dimension))
+        return [self.mean + self.sigma * (self.B @ (self.D * z)) for z in samples]
+
+    def tell(self, candidates: List[np.ndarray], fitnesses: Sequence[float]):
+        """候補の適応度（大きいほど良い）から平均・歩幅・共分散行列を更新"""
+        n = self.dimension
+        order = np.argsort(-np.asarray(fitnesses), kind="stable")[:self.mu]
+        steps = np.array([(candidates[index] - self.mean) / self.sigma for index in order])
+        step = self.weights @ steps
+        self.mean = self.mean + self.sigma * step
+
+        # 歩幅制御の経路（C^-1/2 で白色化）
+        inverse_sqrt = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * (inverse_sqrt @ step)
+        self.generation += 1
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.generation)) / self.chi_n < 1.4 + 2 / (n + 1)
+
+        # 共分散の経路と共分散行列
+        self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * step
+        rank_mu = (steps.T * self.weights) @ steps
+        self.C = ((1 - self.c1 - self.cmu) * self.C
+                  + self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+                  + self.cmu * rank_mu)
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+
+        # 固有値分解（数値誤差で非対称・負の固有値にならないように整える）
+        self.C = (self.C + self.C.T) / 2
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+
+class WeightTuner:
+    """
+    CMA-ESでAIControllerの重みを調整する（候補の評価はプロセスプールでの並列対戦）
+
+    探索空間は基準の重みに対する倍率の対数（0なら基準の重みそのもの）で、
+    行動の方式で使われる重み（AIWeights.tuned_names）の次元だけを持つ。
+    """
+
+    def __init__(self, deck_ids: Tuple[int, int], games: int = 40, population: Optional[int] = None,
+                 sigma: float = 0.3, workers: Optional[int] = None, base_seed: Optional[int] = None,
+                 max_turns: int = Match.DEFAULT_MAX_TURNS, baseline: Optional[AIWeights] = None,
+                 use_planner: bool = True):
+        """
+        Args:
+            games: 候補1つあたりの対戦数（先手後手・デッキの割り当てを入れ替えるため4の倍数を推奨）
+            population: 1世代の候補数（未指定時はCMA-ESの標準値）
+            sigma: 初期歩幅（倍率の対数）
+            baseline: 対戦相手かつ探索の中心とする重み（未指定時は起動時に読み込んだ重み）
+            use_planner: 両方のAIがターンプランナーで行動するか（Falseなら固定の順序・energy_* を調整）
+        """
+        self.deck_ids = tuple(deck_ids)
+        self.games = games
+        self.workers = workers or os.cpu_count() or 1
+        self.max_turns = max_turns
+        self.use_planner = use_planner
+        if base_seed is None:
+            base_seed = random.SystemRandom().getrandbits(Match.SEED_BITS)
+        self.base_seed = base_seed
+
+        self.baseline = baseline or AIController.default_weights
+        self.base_vector = np.array(self.baseline.to_vector(), dtype=float)
+        self.tuned_names = AIWeights.tuned_names(use_planner)
+        names = AIWeights.names()
+        self.tuned_indices = np.array([names.index(name) for name in self.tuned_names])
+        self.strategy = CMAES(np.zeros(len(self.tuned_indices)), sigma, population=population,
+                              seed=Match.derive_seed(base_seed, -1))
+
+        self.seed_offset = 0
+        self.best_weights = self.baseline
+        self.best_score = 0.5
+        self.history: List[Tuple[int, float, float]] = []
+        # 直前の evaluate でエラーで中断した試合数（候補ごと）
+        self.last_errors: List[int] = []
+
+    def to_weights(self, log_scales: Sequence[float]) -> AIWeights:
+        """調整する重みの倍率の対数から重みを作成（範囲外は切り詰める・調整しない重みは基準のまま）"""
+        log_scales = np.clip(np.asarray(log_scales, dtype=float), -LOG_SCALE_LIMIT, LOG_SCALE_LIMIT)
+        vector = self.base_vector.copy()
+        vector[self.tuned_indices] *= np.exp(log_scales)
+        return AIWeights.from_vector(vector)
+
+    def _next_seeds(self, games: int) -> List[int]:
+        """まだ使っていない試合シードを games 個（同じ評価内の候補で共通に使う）"""
+        seeds = [Match.derive_seed(self.base_seed, self.seed_offset + index) for index in range(games)]
+        self.seed_offset += games
+        return seeds
+
+    def evaluate(self, executor: ProcessPoolExecutor, candidates: List[AIWeights], games: int) -> List[float]:
+        """
+        各候補の基準の重みに対する得点率（全候補で同じシード・同じ割り当ての試合を使う）
+
+        エラーで中断した試合は除いて平均する（候補ごとのエラー数は last_errors・全試合エラーなら得点率0）。
+        """
+        deck_a, deck_b = self.deck_ids
+        seeds = self._next_seeds(games)
+        tasks = []
+        for candidate_index, weights in enumerate(candidates):
+            vector = tuple(weights.to_vector())
+            for game_index, seed in enumerate(seeds):
+                # 2試合ごとにデッキを、1試合ごとに先手後手（候補側の陣営）を入れ替える
+                candidate_deck, baseline_deck = (deck_a, deck_b) if game_index // 2 % 2 == 0 else (deck_b, deck_a)
+                tasks.append((candidate_index, vector, game_index, seed, candidate_deck, baseline_deck))
+
+        totals = [0.0] * len(candidates)
+        errors = [0] * len(candidates)
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        for candidate_index, score in executor.map(play_game, tasks, chunksize=chunksize):
+            if score is None:
+                errors[candidate_index] += 1
+            else:
+                totals[candidate_index] += score
+        self.last_errors = errors
+        return [total / (games - error_count) if error_count < games else 0.0
+                for total, error_count in zip(totals, errors)]
+
+    def _report_errors(self, label: str):
+        """直前の evaluate でエラーがあれば候補ごとのエラー数を表示"""
+        if any(self.last_errors):
+            counts = ", ".join(f"候補{index}: {count}" for index, count in enumerate(self.last_errors) if count)
+            print(f"  {label}: エラーで中断した試合（得点から除外） {counts}", file=sys.stderr)
+
+    def run(self, generations: int, validation_games: Optional[int] = None) -> Tuple[AIWeights, float]:
+        """
+        指定世代数だけ探索し、(最良の重み, 検証での得点率) を返す
+
+        最良の候補は選択の偏り（運よく勝った候補）を含むため、最後に新しいシードで
+        基準の重み・最終世代の平均・最良の候補を再評価して最も良いものを選ぶ。
+        """
+        validation_games = validation_games or self.games * 2
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.deck_ids, tuple(self.base_vector), self.max_turns,
+                                           self.use_planner)) as executor:
+            best_candidate, best_candidate_score = self.baseline, 0.5
+            for generation in range(generations):
+                samples = self.strategy.ask()
+                candidates = [self.to_weights(sample) for sample in samples]
+                scores = self.evaluate(executor, candidates, self.games)
+                self.strategy.tell(samples, scores)
+
+                best_index = int(np.argmax(scores))
+                if scores[best_index] > best_candidate_score:
+                    best_candidate, best_candidate_score = candidates[best_index], scores[best_index]
+                mean_score = float(np.mean(scores))
+                self.history.append((generation, mean_score, scores[best_index]))
+                print(f"  世代{generation + 1}/{generations}: 平均{mean_score:.3f}  最良{scores[best_index]:.3f}"
+                      f"  歩幅{self.strategy.sigma:.3f}  （{time.perf_counter() - started:.1f}秒）", file=sys.stderr)
+                self._report_errors(f"世代{generation + 1}")
+
+            finalists = [self.baseline, self.to_weights(self.strategy.mean), best_candidate]
+            validation = self.evaluate(executor, finalists, validation_games)
+            self._report_errors("検証")
+
+        best_index = int(np.argmax(validation))
+        self.best_weights, self.best_score = finalists[best_index], validation[best_index]
+        labels = ("基準の重み", "最終世代の平均", "最良の候補")
+        for label, score in zip(labels, validation):
+            print(f"  検証（{validation_games}試合）: {label} {score:.3f}", file=sys.stderr)
+        return self.best_weights, self.best_score
+
+
+def _parse_decks(value: str) -> Tuple[int, int]:
+    """--decks 引数（例: 1,2）を解析"""
+    try:
+        deck_ids = tuple(int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"デッキIDは整数で指定してください: {value}")
+    if len(deck_ids) != 2:
+        raise argparse.ArgumentTypeError(f"デッキIDは2つ指定してください: {value}")
+    return deck_ids
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインエントリーポイント"""
+    parser = argparse.ArgumentParser(description="AIControllerのヒューリスティックの重み調整（CMA-ES・並列対戦）")
+    parser.add_argument("--decks", type=_parse_decks, required=True, help="対戦させるデッキID（例: 1,2）")
+    parser.add_argument("--generations", type=int, default=20, help="世代数")
+    parser.add_argument("--population", type=int, default=None, help="1世代の候補数（既定: CMA-ESの標準値）")
+    parser.add_argument("--games", type=int, default=40, help="候補1つあたりの対戦数")
+    parser.add_argument("--validation-games", type=int, default=None, help="最後の検証の対戦数（既定: --games の2倍）")
+    parser.add_argument("--sigma", type=float, default=0.3, help="初期歩幅（重みの倍率の対数）")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定: CPU数）")
+    parser.add_argument("--seed", type=int, default=None, help="基準シード（同じ値で調整全体を再現）")
+    parser.add_argument("--max-turns", type=int, default=Match.DEFAULT_MAX_TURNS, help="引き分けとするターン上限")
+    parser.add_argument("--fixed-order", action="store_true",
+                        help="ターンプランナーを使わず固定の順序で行動するAIの重みを調整")
+    parser.add_argument("--output", default=DEFAULT_WEIGHTS_PATH, help="最良の重みを書き出すJSONファイル")
+    args = parser.parse_args(argv)
+
+    if args.games <= 0 or args.generations <= 0:
+        parser.error("--games と --generations は1以上を指定してください")
+
+    tuner = WeightTuner(args.decks, games=args.games, population=args.population, sigma=args.sigma,
+                        workers=args.workers, base_seed=args.seed, max_turns=args.max_turns,
+                        use_planner=not args.fixed_order)
+    print(f"重み調整: {len(tuner.tuned_names)}次元（{'固定の順序' if args.fixed_order else 'ターンプランナー'}）・{tuner.strategy.population}候補/世代・"
+          f"{args.games}試合/候補・基準シード {tuner.base_seed}")
+    weights, score = tuner.run(args.generations, validation_games=args.validation_games)
+
+    weights.save(args.output)
+    print(f"基準の重みに対する得点率: {score:.3f}")
+    for name, value in zip(AIWeights.names(), weights.to_vector()):
+        print(f"  {name}: {value:.4g}")
+    print(f"保存先: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
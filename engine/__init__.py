@@ -0,0 +1,19 @@
+# engine/__init__.py
+# Version: 1.3
+# Updated: 2026-10-18 04:30
+# ヘッドレス対戦エンジンモジュール初期化
+
+from .match import Match, MatchResult
+from .agents import Agent, AIControllerAgent, MCTSAgent, ExpectiminimaxAgent
+from .planner import TurnPlanner, PlannerStats
+
+__all__ = [
+    'Match',
+    'MatchResult',
+    'Agent',
+    'AIControllerAgent',
+    'MCTSAgent',
+    'ExpectiminimaxAgent',
+    'TurnPlanner',
+    'PlannerStats'
+]
@@ -0,0 +1,263 @@
+# engine/actions.py
+# Version: 1.0
+# Updated: 2026-10-17 21:30
+# 合法手の列挙と整数エンコード（探索・強化学習用）
+#
+# 行動空間（要件定義書の行動：たねポケモン・エネルギー・トレーナーズ・進化・にげる・ワザ・ターン終了）を
+# 0〜ACTION_COUNT-1 の連続した整数に割り当てる。
+#
+#   0                         ターン終了
+#   ATTACK_BASE  + n          ワザ（n=0:ワザ1、1:ワザ2）
+#   RETREAT_BASE + b          にげる（b=交代するベンチのインデックス）
+#   SUMMON_BASE  + h          手札hのたねポケモンを出す
+#   TRAINER_BASE + h          手札hのトレーナーズを使う
+#   ATTACH_BASE  + h*TARGETS + t   手札hのエネルギーを対象tに付ける（t=0:バトル場、1〜5:ベンチ0〜4）
+#   EVOLVE_BASE  + h*TARGETS + t   手札hの進化ポケモンで対象tを進化させる
+#
+# 手札のインデックスは MAX_HAND 未満のみエンコードする（それ以降の手札は候補に含めない）。
+# 判定はMatch（can_attack / can_retreat / get_evolution_targets / EnergyCostChecker）と同じ規則を
+# メッセージ文字列を作らずに直接行い、ワザのコストはプロトタイプごとにキャッシュする。
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models.card import Card, CardType, TrainerType, SpecialCondition, CONDITION_BITS
+from models.game_state import GameState
+from utils.energy_cost_checker import EnergyCostChecker
+from engine.match import Match
+
+MAX_HAND = 32
+TARGETS = 1 + Match.BENCH_SIZE
+
+END_TURN = 0
+ATTACK_BASE = 1
+RETREAT_BASE = ATTACK_BASE + 2
+SUMMON_BASE = RETREAT_BASE + Match.BENCH_SIZE
+TRAINER_BASE = SUMMON_BASE + MAX_HAND
+ATTACH_BASE = TRAINER_BASE + MAX_HAND
+EVOLVE_BASE = ATTACH_BASE + MAX_HAND * TARGETS
+ACTION_COUNT = EVOLVE_BASE + MAX_HAND * TARGETS
+
+# アクションの種類
+END, ATTACK, RETREAT, SUMMON, TRAINER, ATTACH, EVOLVE = range(7)
+KIND_NAMES = ("end", "attack", "retreat", "summon", "trainer", "attach", "evolve")
+
+# ワザ・にげるを封じる特殊状態
+_CANNOT_ACT_MASK = CONDITION_BITS[SpecialCondition.SLEEP] | CONDITION_BITS[SpecialCondition.PARALYSIS]
+_COLORLESS_NAMES = ('無色', 'colorless', 'Colorless', 'ノーマル')
+
+
+def _build_decode_table() -> List[Tuple[int, int, int]]:
+    """整数→(種類, 手札またはワザ・ベンチのインデックス, 対象)の対応表"""
+    table = [(END, 0, 0)]
+    table.extend((ATTACK, n + 1, 0) for n in range(2))
+    table.extend((RETREAT, b, 0) for b in range(Match.BENCH_SIZE))
+    table.extend((SUMMON, h, 0) for h in range(MAX_HAND))
+    table.extend((TRAINER, h, 0) for h in range(MAX_HAND))
+    table.extend((ATTACH, h, t) for h in range(MAX_HAND) for t in range(TARGETS))
+    table.extend((EVOLVE, h, t) for h in range(MAX_HAND) for t in range(TARGETS))
+    return table
+
+
+_DECODE = _build_decode_table()
+
+# プロトタイプごとのキャッシュ（静的データのみから決まる値）
+_attack_costs: Dict[object, tuple] = {}
+_energy_types: Dict[object, str] = {}
+_trainer_types: Dict[object, TrainerType] = {}
+
+
+class ActionCodec:
+    """アクションの整数エンコード・デコード"""
+
+    @staticmethod
+    def attack(attack_number: int) -> int:
+        return ATTACK_BASE + attack_number - 1
+
+    @staticmethod
+    def retreat(bench_index: int) -> int:
+        return RETREAT_BASE + bench_index
+
+    @staticmethod
+    def summon(hand_index: int) -> int:
+        return SUMMON_BASE + hand_index
+
+    @staticmethod
+    def trainer(hand_index: int) -> int:
+        return TRAINER_BASE + hand_index
+
+    @staticmethod
+    def attach(hand_index: int, target: int) -> int:
+        return ATTACH_BASE + hand_index * TARGETS + target
+
+    @staticmethod
+    def evolve(hand_index: int, target: int) -> int:
+        return EVOLVE_BASE + hand_index * TARGETS + target
+
+    @staticmethod
+    def decode(action: int) -> Tuple[int, int, int]:
+        """
+        整数を(種類, 引数, 対象)に変換
+
+        引数はワザならワザ番号（1/2）、にげるならベンチのインデックス、それ以外は手札のインデックス。
+        対象は0=バトル場、1〜5=ベンチ0〜4。
+        """
+        return _DECODE[action]
+
+    @staticmethod
+    def kind(action: int) -> int:
+        return _DECODE[action][0]
+
+    @staticmethod
+    def ends_turn(action: int) -> bool:
+        """アクション後に自分の番が終わるか（ワザを使うとターン終了）"""
+        return action < RETREAT_BASE
+
+    @staticmethod
+    def to_string(action: int) -> str:
+        """表示用の文字列（例: attach(hand=3, target=1)）"""
+        kind, argument, target = _DECODE[action]
+        if kind == END:
+            return "end"
+        if kind == ATTACK:
+            return f"attack({argument})"
+        if kind == RETREAT:
+            return f"retreat(bench={argument})"
+        if kind in (SUMMON, TRAINER):
+            return f"{KIND_NAMES[kind]}(hand={argument})"
+        return f"{KIND_NAMES[kind]}(hand={argument}, target={target})"
+
+
+def _attack_cost(pokemon: Card, attack_number: int) -> Optional[tuple]:
+    """ワザのコスト（(タイプ指定分の((タイプ, 枚数), ...), 合計枚数)、ワザなしはNone）"""
+    prototype = pokemon.prototype
+    costs = _attack_costs.get(prototype)
+    if costs is None:
+        costs = []
+        for name, cost_types in ((prototype.attack_name, prototype.attack_cost_types),
+                                 (prototype.attack2_name, prototype.attack2_cost_types)):
+            if not name:
+                costs.append(None)
+                continue
+            cost_types = cost_types or {}
+            specific = tuple((energy_type, count) for energy_type, count in cost_types.items()
+                             if energy_type not in _COLORLESS_NAMES)
+            costs.append((specific, sum(cost_types.values())))
+        costs = _attack_costs[prototype] = tuple(costs)
+    return costs[attack_number - 1]
+
+
+def _energy_type(energy: Card) -> str:
+    """エネルギーカードの正規化済みタイプ（EnergyCostCheckerと同じ規則）"""
+    prototype = energy.prototype
+    energy_type = _energy_types.get(prototype)
+    if energy_type is None:
+        energy_type = energy.energy_kind or energy.name or '不明'
+        energy_type = _energy_types[prototype] = EnergyCostChecker._ENERGY_TYPE_ALIASES.get(energy_type, energy_type)
+    return energy_type
+
+
+def _trainer_type(card: Card) -> TrainerType:
+    """トレーナーズの種類（未設定時はカード名から推定）"""
+    prototype = card.prototype
+    trainer_type = _trainer_types.get(prototype)
+    if trainer_type is None:
+        trainer_type = card.trainer_type or Match._detect_trainer_type_from_name(card.name)
+        _trainer_types[prototype] = trainer_type
+    return trainer_type
+
+
+def can_pay_attack(pokemon: Card, attack_number: int) -> bool:
+    """ワザのエネルギーコストを払えるか（EnergyCostChecker.can_use_attackのコスト判定と同じ結果）"""
+    cost = _attack_cost(pokemon, attack_number)
+    if cost is None:
+        return False
+    specific, total = cost
+    attached = pokemon.attached_energy
+    if len(attached) < total:
+        return False
+    if not specific:
+        return True
+
+    counts: Dict[str, int] = {}
+    for energy in attached:
+        energy_type = _energy_type(energy)
+        counts[energy_type] = counts.get(energy_type, 0) + 1
+    for energy_type, count in specific:
+        if counts.get(energy_type, 0) < count:
+            return False
+    return True
+
+
+def legal_actions(state: GameState, player: str, unique: bool = False) -> Iterator[int]:
+    """
+    合法手を整数で列挙（ターン終了は常に最後に含まれる）
+
+    Args:
+        unique: 同じ種類（プロトタイプ）の手札は最初の1枚のみを候補にする（探索用）
+    """
+    if state.current_player != player:
+        return
+
+    # ワザを使ったらターン終了のみ
+    has_attacked = state.player_has_attacked if player == "player" else state.opponent_has_attacked
+    if has_attacked or state.attacks_this_turn >= state.max_attacks_per_turn:
+        yield END_TURN
+        return
+
+    opponent = GameState.get_opponent(player)
+    hand = state.get_hand(player)
+    active = state.get_active(player)
+    bench = state.get_bench(player)
+    slots = [active] + bench[:Match.BENCH_SIZE]
+
+    bench_open = None in bench[:Match.BENCH_SIZE]
+    can_attach = not state.energy_played_this_turn
+    can_evolve = state.initialization_complete and not state.is_current_player_first_turn()
+    can_use_supporter = state.can_use_supporter()
+
+    seen = set() if unique else None
+    for hand_index in range(min(len(hand), MAX_HAND)):
+        card = hand[hand_index]
+        if seen is not None:
+            prototype = card.prototype
+            if prototype in seen:
+                continue
+            seen.add(prototype)
+
+        card_type = card.card_type
+        if card_type == CardType.ENERGY:
+            if can_attach:
+                base = ATTACH_BASE + hand_index * TARGETS
+                for target, pokemon in enumerate(slots):
+                    if pokemon is not None:
+                        yield base + target
+        elif card_type == CardType.POKEMON:
+            if not card.evolve_step:
+                if active is None or bench_open:
+                    yield SUMMON_BASE + hand_index
+            elif can_evolve and card.evolves_from:
+                base = EVOLVE_BASE + hand_index * TARGETS
+                for target, pokemon in enumerate(slots):
+                    if (pokemon is not None and not pokemon.summoned_this_turn and
+                            pokemon.card_type == CardType.POKEMON and card.evolves_from == pokemon.name):
+                        yield base + target
+        elif card_type == CardType.TRAINER or card_type == CardType.TOOL:
+            if can_use_supporter or _trainer_type(card) != TrainerType.SUPPORTER:
+                yield TRAINER_BASE + hand_index
+
+    if active is not None:
+        cannot_act = active.condition_mask & _CANNOT_ACT_MASK
+
+        # にげる（コスト分のエネルギーとベンチが必要）
+        if not cannot_act and len(active.attached_energy) >= (active.retreat_cost or 0):
+            for bench_index in range(Match.BENCH_SIZE):
+                if bench[bench_index] is not None:
+                    yield RETREAT_BASE + bench_index
+
+        # ワザ
+        if (not cannot_act and state.can_attack() and state.get_active(opponent) is not None):
+            for attack_number in (1, 2):
+                if can_pay_attack(active, attack_number):
+                    yield ATTACK_BASE + attack_number - 1
+
+    yield END_TURN
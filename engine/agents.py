@@ -0,0 +1,129 @@
+# engine/agents.py
+# Version: 1.8
+# Updated: 2026-10-18 08:00
+# 対戦エージェント：Matchに差し込むプレイヤーの意思決定インターフェース
+
+from typing import List, Tuple
+
+from models.card import Card
+
+
+class Agent:
+    """
+    対戦エージェントの基底クラス
+
+    既定実装はGUI版と同じ単純な方針（先頭のたねポケモンを出す等）で、
+    サブクラスで必要な判断だけを上書きする。
+    """
+
+    def choose_initial_pokemon(self, match, player: str,
+                               basic_pokemon: List[Card]) -> Tuple[Card, List[Card]]:
+        """初期配置のバトルポケモンとベンチポケモンを選択"""
+        return basic_pokemon[0], basic_pokemon[1:match.BENCH_SIZE + 1]
+
+    def choose_mulligan_draw(self, match, player: str, max_draw: int) -> int:
+        """相手のマリガンによる追加ドロー枚数を選択"""
+        return max_draw
+
+    def choose_replacement(self, match, player: str,
+                           bench_options: List[Tuple[int, Card]]) -> int:
+        """きぜつ後にバトル場へ出すベンチのインデックスを選択"""
+        return bench_options[0][0]
+
+    def take_turn(self, match, player: str) -> List[str]:
+        """ターン中の行動を実行し、行動メッセージのリストを返す"""
+        return []
+
+
+class AIControllerAgent(Agent):
+    """
+    既存のAIControllerのヒューリスティックで行動するエージェント
+
+    ヘッドレス対戦（シミュレーション・重み調整・ベンチマーク）用のため、ターンプランナーの展開数の上限は
+    GUIのAIController（20000）より小さい HEADLESS_PLANNER_MAX_NODES とする。
+    上限を超えた計画はその時点の局面でターンを終える列・ワザで終わる列だけを評価する。
+    """
+
+    # ヘッドレス対戦でのターンプランナーの展開数の上限（大半のターンは上限内で網羅できる）
+    HEADLESS_PLANNER_MAX_NODES = 50
+
+    def __init__(self, attack_evaluator=None, use_planner: bool = True, weights=None,
+                 planner_max_nodes: int = HEADLESS_PLANNER_MAX_NODES):
+        """
+        Args:
+            attack_evaluator: AIControllerのワザ評価の代わりに使う評価器（例: rl.NetworkAttackEvaluator）
+                              （指定時はワザ選択に評価器を使う従来の固定の順序で行動し、use_planner は無視する）
+            use_planner: ターンプランナー（engine.planner）で行動するか（Falseなら従来の固定の順序）
+            weights: ヒューリスティックの重み（gui.ai_weights.AIWeights・未指定時は起動時に読み込んだ重み）
+            planner_max_nodes: ターンプランナーの展開数の上限
+        """
+        self._match = None
+        self._controllers = {}
+        self.attack_evaluator = attack_evaluator
+        self.use_planner = use_planner and attack_evaluator is None
+        self.weights = weights
+        self.planner_max_nodes = planner_max_nodes
+
+    def _get_controller(self, match, player: str):
+        """Match・プレイヤーごとのAIControllerを取得（遅延生成）"""
+        if match is not self._match:
+            self._match = match
+            self._controllers = {}
+
+        controller = self._controllers.get(player)
+        if controller is None:
+            controller = self._create_controller(match, player)
+            if self.attack_evaluator is not None:
+                controller.attack_evaluator = self.attack_evaluator
+            self._controllers[player] = controller
+        return controller
+
+    def _create_controller(self, match, player: str):
+        """担当プレイヤーのコントローラーを作成"""
+        from gui.ai_controller import AIController
+        controller = AIController(match.game_state, None, side=player, match=match, use_planner=self.use_planner,
+                                  weights=self.weights)
+        controller.planner_max_nodes = self.planner_max_nodes
+        return controller
+
+    def choose_mulligan_draw(self, match, player: str, max_draw: int) -> int:
+        return self._get_controller(match, player).decide_mulligan_penalty_draw(max_draw)
+
+    def choose_replacement(self, match, player: str,
+                           bench_options: List[Tuple[int, Card]]) -> int:
+        return self._get_controller(match, player).choose_replacement(bench_options)
+
+    def take_turn(self, match, player: str) -> List[str]:
+        return self._get_controller(match, player).execute_ai_turn()
+
+
+class MCTSAgent(AIControllerAgent):
+    """MCTS（ai.mcts.MCTSController）で行動を決めるエージェント"""
+
+    def __init__(self, **search_options):
+        """
+        Args:
+            search_options: MCTSControllerへ渡す探索設定（time_budget, node_budget, rollout_turns 等）
+        """
+        super().__init__()
+        self.search_options = search_options
+
+    def _create_controller(self, match, player: str):
+        from ai.mcts import MCTSController
+        return MCTSController(match.game_state, None, side=player, match=match, **self.search_options)
+
+
+class ExpectiminimaxAgent(AIControllerAgent):
+    """期待値ミニマックス探索（ai.expectiminimax.ExpectiminimaxController）で行動を決めるエージェント"""
+
+    def __init__(self, **search_options):
+        """
+        Args:
+            search_options: ExpectiminimaxControllerへ渡す探索設定（time_budget, own_width, opponent_width 等）
+        """
+        super().__init__()
+        self.search_options = search_options
+
+    def _create_controller(self, match, player: str):
+        from ai.expectiminimax import ExpectiminimaxController
+        return ExpectiminimaxController(match.game_state, None, side=player, match=match, **self.search_options)
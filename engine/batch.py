@@ -0,0 +1,377 @@
+# engine/batch.py
+# Version: 1.0
+# Updated: 2026-10-17 19:00
+# NumPyによるN試合一括の簡易プレイアウト（勝率推定用）
+#
+# models.GameState の盤面をN試合分の配列（構造体の配列ではなく配列の構造体）に写し、
+# 簡易ルール・簡易方策で全試合を配列演算のみで同時に進める。
+#
+# 簡易ルールで扱うもの：ドロー（山札のエネルギー比率で抽選）、山札切れ、1ターン1回のエネルギー装着、
+#   ワザのコスト判定（無色はどのエネルギーでも支払える）、弱点×2・抵抗力-30（DamageCalculatorと同じ）、
+#   きぜつ・サイド獲得（exは2枚）・ベンチからの補充、先攻1ターン目の攻撃制限、ターン上限
+# 扱わないもの：進化・トレーナーズ・にげる・特殊状態・手札からの新たなポケモンの展開
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.card import Card, CardType
+from models.game_state import GameState
+from utils.damage_calculator import DamageCalculator
+from utils.energy_cost_checker import EnergyCostChecker
+
+SIDES = ("player", "opponent")
+SLOTS = 6                 # 0=バトル場、1〜5=ベンチ
+COLORLESS = "無色"
+
+# 勝者の値
+NO_WINNER = -1
+DRAW = 2
+
+
+def _energy_type(card: Card) -> str:
+    """エネルギーカードのタイプ（EnergyCostCheckerと同じ正規化）"""
+    energy_type = card.energy_kind or card.name
+    return EnergyCostChecker._ENERGY_TYPE_ALIASES.get(energy_type, energy_type)
+
+
+class CardTable:
+    """
+    ポケモンの静的データの配列表現（行0は空きスロット用）
+
+    Attributes:
+        energy_types: エネルギータイプ名（配列の最後の軸の並び）
+        hp, prize_value, pokemon_type, weakness, resistance: [K]
+        attack_power: [2, K]、attack_cost: [2, T, K]（無色以外の必要数）、
+        attack_colorless: [2, K]、attack_total: [2, K]、attack_defined: [2, K]
+        （ワザ番号・タイプを先頭の軸に置き、カードの行で引いた結果が試合の軸で連続するようにする）
+    """
+
+    def __init__(self, prototypes: List, energy_types: List[str]):
+        self.energy_types = list(energy_types)
+        self.type_index: Dict[str, int] = {name: i for i, name in enumerate(self.energy_types)}
+        self.row: Dict[int, int] = {}
+
+        count = len(prototypes) + 1
+        energy_count = len(self.energy_types)
+        self.hp = np.zeros(count, dtype=np.int16)
+        self.prize_value = np.zeros(count, dtype=np.int8)
+        self.pokemon_type = np.full(count, -1, dtype=np.int8)
+        self.weakness = np.full(count, -2, dtype=np.int8)
+        self.resistance = np.full(count, -2, dtype=np.int8)
+        self.attack_power = np.zeros((2, count), dtype=np.int16)
+        self.attack_cost = np.zeros((2, energy_count, count), dtype=np.int8)
+        self.attack_colorless = np.zeros((2, count), dtype=np.int8)
+        self.attack_total = np.zeros((2, count), dtype=np.int8)
+        self.attack_defined = np.zeros((2, count), dtype=bool)
+
+        for row, prototype in enumerate(prototypes, start=1):
+            self.row[prototype.id] = row
+            self.hp[row] = prototype.hp or 0
+            self.prize_value[row] = 2 if prototype.rule and "ex" in prototype.rule else 1
+            self.pokemon_type[row] = self._type_id(prototype.pokemon_type, -1)
+            self.weakness[row] = self._type_id(prototype.weakness, -2)
+            self.resistance[row] = self._type_id(prototype.resistance, -2)
+
+            attacks = ((prototype.attack_name, prototype.attack_power, prototype.attack_cost_types),
+                       (prototype.attack2_name, prototype.attack2_power, prototype.attack2_cost_types))
+            for number, (name, power, cost_types) in enumerate(attacks):
+                if not name:
+                    continue
+                self.attack_defined[number, row] = True
+                self.attack_power[number, row] = power or 0
+                for energy_type, required in (cost_types or {}).items():
+                    energy_type = EnergyCostChecker._ENERGY_TYPE_ALIASES.get(energy_type, energy_type)
+                    if energy_type == COLORLESS or energy_type not in self.type_index:
+                        self.attack_colorless[number, row] += required
+                    else:
+                        self.attack_cost[number, self.type_index[energy_type], row] += required
+                    self.attack_total[number, row] += required
+
+    def _type_id(self, type_name: Optional[str], missing: int) -> int:
+        """タイプ名→エネルギータイプのインデックス（DamageCalculatorと同じ正規化）"""
+        if not type_name:
+            return missing
+        return self.type_index.get(DamageCalculator._normalize_type_name(type_name), missing)
+
+    @classmethod
+    def from_game_state(cls, game_state: GameState) -> 'CardTable':
+        """局面に登場する全カードから表を作成"""
+        prototypes = {}
+        energy_types = set()
+        for card in game_state._all_cards():
+            if card.card_type == CardType.POKEMON:
+                prototypes.setdefault(card.prototype.id, card.prototype)
+                for energy_type in (card.pokemon_type, card.weakness, card.resistance):
+                    if energy_type:
+                        energy_types.add(DamageCalculator._normalize_type_name(energy_type))
+            elif card.card_type == CardType.ENERGY:
+                energy_types.add(_energy_type(card))
+        return cls(sorted(prototypes.values(), key=lambda prototype: prototype.id), sorted(energy_types))
+
+
+class BatchGameState:
+    """
+    N試合分のゲーム状態（NumPy配列）
+
+    どの配列も試合の軸を最後（メモリ上で連続）に置く。先頭の軸はプレイヤー（0=player、1=opponent）。
+    タイプ別の枚数などの小さな軸を試合の軸より前に置くことで、タイプ方向の集計が
+    長さNの連続ベクトル同士の演算になり、小さな軸に沿ったreduceを避けられる。
+    フィールドは models.GameState の対応する項目を簡易化したもの。
+    """
+
+    def __init__(self, table: CardTable, size: int, max_turns: int = 200, seed: Optional[int] = None):
+        energy_count = len(table.energy_types)
+        self.table = table
+        self.size = size
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+
+        # 場のポケモン（カード表の行・ダメージ・付いているエネルギーのタイプ別枚数）
+        self.card = np.zeros((2, SLOTS, size), dtype=np.int16)
+        self.damage = np.zeros((2, SLOTS, size), dtype=np.int16)
+        self.energy = np.zeros((2, SLOTS, energy_count, size), dtype=np.int8)
+
+        # ゾーンの枚数（手札・山札のエネルギーはタイプ別）
+        self.hand_count = np.zeros((2, size), dtype=np.int16)
+        self.hand_energy = np.zeros((2, energy_count, size), dtype=np.int16)
+        self.deck_count = np.zeros((2, size), dtype=np.int16)
+        self.deck_energy = np.zeros((2, energy_count, size), dtype=np.int16)
+        self.discard_count = np.zeros((2, size), dtype=np.int16)
+        self.prizes = np.zeros((2, size), dtype=np.int8)
+
+        # ターン情報
+        self.current_player = np.zeros(size, dtype=np.int8)
+        self.turn = np.ones(size, dtype=np.int16)
+        self.energy_played = np.zeros(size, dtype=bool)
+        self.first_player_first_turn = np.zeros(size, dtype=bool)
+        self.needs_draw = np.ones(size, dtype=bool)
+
+        # 決着
+        self.done = np.zeros(size, dtype=bool)
+        self.winner = np.full(size, NO_WINNER, dtype=np.int8)
+
+    @classmethod
+    def from_game_state(cls, game_state: GameState, size: int, max_turns: int = 200,
+                        seed: Optional[int] = None, table: Optional[CardTable] = None,
+                        turn_started: bool = True) -> 'BatchGameState':
+        """
+        1つの局面をN試合分に複製した一括状態を作成
+
+        Args:
+            turn_started: 現在の手番プレイヤーがすでにドロー済みか（False なら最初にドローから始める）
+        """
+        table = table or CardTable.from_game_state(game_state)
+        batch = cls(table, size, max_turns=max_turns, seed=seed)
+        type_index = table.type_index
+
+        for p, side in enumerate(SIDES):
+            pokemon_slots = [game_state.get_active(side)] + list(game_state.get_bench(side))
+            for slot, pokemon in enumerate(pokemon_slots[:SLOTS]):
+                if pokemon is None:
+                    continue
+                batch.card[p, slot] = table.row[pokemon.prototype.id]
+                batch.damage[p, slot] = pokemon.damage_taken
+                for energy in pokemon.attached_energy:
+                    batch.energy[p, slot, type_index[_energy_type(energy)]] += 1
+
+            hand = game_state.get_hand(side)
+            deck = game_state.get_deck(side)
+            batch.hand_count[p] = len(hand)
+            batch.deck_count[p] = len(deck)
+            batch.discard_count[p] = len(game_state.get_discard(side))
+            batch.prizes[p] = len(game_state.get_prizes(side))
+            for card in hand:
+                if card.card_type == CardType.ENERGY:
+                    batch.hand_energy[p, type_index[_energy_type(card)]] += 1
+            for card in deck:
+                if card.card_type == CardType.ENERGY:
+                    batch.deck_energy[p, type_index[_energy_type(card)]] += 1
+
+        batch.current_player[:] = SIDES.index(game_state.current_player)
+        batch.turn[:] = game_state.turn_count
+        batch.energy_played[:] = game_state.energy_played_this_turn
+        batch.first_player_first_turn[:] = game_state.is_first_player_first_turn()
+        batch.needs_draw[:] = not turn_started
+        return batch
+
+    # ------------------------------------------------------------------
+    # 一括進行
+    # ------------------------------------------------------------------
+
+    def step(self):
+        """未決着の全試合で、手番プレイヤーの1ターン（ドロー・装着・ワザ・交代）を進める"""
+        playing = ~self.done
+        for me in (0, 1):
+            mask = playing & (self.current_player == me)
+            if mask.any():
+                self._play_turn(me, mask)
+
+    def run(self, max_steps: Optional[int] = None) -> np.ndarray:
+        """全試合の決着まで進めて勝者の配列を返す"""
+        steps = 0
+        limit = max_steps or (self.max_turns * 2 + 2)
+        while not self.done.all() and steps < limit:
+            self.step()
+            steps += 1
+        return self.winner
+
+    def win_rate(self, side: str) -> float:
+        """指定プレイヤーの勝率（引き分け・未決着は0.5として数える）"""
+        player = SIDES.index(side)
+        wins = np.count_nonzero(self.winner == player)
+        undecided = np.count_nonzero((self.winner == NO_WINNER) | (self.winner == DRAW))
+        return (wins + 0.5 * undecided) / self.size
+
+    def _play_turn(self, me: int, mask: np.ndarray):
+        """手番プレイヤーmeの1ターン（maskの試合のみ）"""
+        them = 1 - me
+        mask = self._draw(me, them, mask)
+        self._attach_energy(me, mask)
+        self._attack(me, them, mask)
+        self._end_turn(mask & ~self.done)
+
+    def _draw(self, me: int, them: int, mask: np.ndarray) -> np.ndarray:
+        """ターン開始のドロー（山札のエネルギー比率で抽選）と山札切れ判定。続行する試合のマスクを返す"""
+        drawing = mask & self.needs_draw
+        deck_count = self.deck_count[me]
+
+        # 山札切れ：引けなければ敗北
+        deck_out = drawing & (deck_count <= 0)
+        if deck_out.any():
+            self._finish(deck_out, them)
+            mask = mask & ~deck_out
+            drawing = drawing & ~deck_out
+
+        # 一様乱数を山札の並び（タイプ0のエネルギー, タイプ1の…, エネルギー以外）に当てはめる
+        deck_energy = self.deck_energy[me]
+        hand_energy = self.hand_energy[me]
+        pick = self.rng.random(self.size) * deck_count
+        boundary = np.zeros(self.size, dtype=np.int16)
+        for energy_type in range(len(deck_energy)):
+            lower = boundary.copy()
+            boundary += deck_energy[energy_type]
+            drawn = drawing & (pick >= lower) & (pick < boundary)
+            deck_energy[energy_type] -= drawn
+            hand_energy[energy_type] += drawn
+
+        deck_count -= drawing
+        self.hand_count[me] += drawing
+        self.needs_draw &= ~mask
+        return mask
+
+    def _attach_energy(self, me: int, mask: np.ndarray):
+        """手札のエネルギーをバトルポケモンに1枚付ける（ワザに足りないタイプを優先）"""
+        hand_energy = self.hand_energy[me]
+        active = self.card[me, 0]
+        in_hand = hand_energy > 0
+        can_attach = mask & ~self.energy_played & (active > 0) & in_hand.any(axis=0)
+        if not can_attach.any():
+            return
+
+        # 足りないタイプが手札にあればその最初のもの、なければ手札の最初のエネルギー
+        attached = self.energy[me, 0]
+        cost = self.table.attack_cost[:, :, active]
+        shortfall = in_hand & ((cost[0] > attached) | (cost[1] > attached))
+        chosen = np.where(shortfall.any(axis=0), shortfall.argmax(axis=0), in_hand.argmax(axis=0))
+        for energy_type in range(len(hand_energy)):
+            attach = can_attach & (chosen == energy_type)
+            attached[energy_type] += attach
+            hand_energy[energy_type] -= attach
+
+        self.hand_count[me] -= can_attach
+        self.energy_played |= can_attach
+
+    def _attack(self, me: int, them: int, mask: np.ndarray):
+        """使えるワザのうち威力の高い方でバトルポケモンを攻撃し、きぜつ・サイド・補充を処理"""
+        table = self.table
+        attacker = self.card[me, 0]
+        defender = self.card[them, 0]
+        ready = mask & ~self.first_player_first_turn & (attacker > 0) & (defender > 0)
+        if not ready.any():
+            return
+
+        # ワザのコスト判定（タイプ指定分を満たし、合計枚数が足りれば無色分も払える）
+        attached = self.energy[me, 0]
+        attached_total = attached.sum(axis=0, dtype=np.int16)
+        power = np.zeros(self.size, dtype=np.int16)
+        for number in range(2):
+            usable = table.attack_defined[number, attacker] & (attached_total >= table.attack_total[number, attacker])
+            usable &= (attached >= table.attack_cost[number][:, attacker]).all(axis=0)
+            np.maximum(power, np.where(usable, table.attack_power[number, attacker], 0), out=power)
+
+        hits = ready & (power > 0)
+        if not hits.any():
+            return
+
+        # 弱点×2・抵抗力-30（DamageCalculatorと同じ順序）
+        attacker_type = table.pokemon_type[attacker]
+        damage = np.where(table.weakness[defender] == attacker_type, power * 2, power)
+        damage = np.where(table.resistance[defender] == attacker_type, np.maximum(0, damage - 30), damage)
+        defender_damage = self.damage[them, 0]
+        defender_damage += np.where(hits, damage, 0).astype(np.int16)
+
+        knocked_out = hits & (defender_damage >= table.hp[defender])
+        if knocked_out.any():
+            self._knock_out(me, them, knocked_out, defender)
+
+    def _knock_out(self, taker: int, owner: int, knocked_out: np.ndarray, defender: np.ndarray):
+        """きぜつ：トラッシュ、サイド獲得、ベンチからの補充（最も残りHPが多いポケモン）"""
+        table = self.table
+        card, damage, energy = self.card[owner], self.damage[owner], self.energy[owner]
+        self.discard_count[owner] += np.where(knocked_out, 1 + energy[0].sum(axis=0, dtype=np.int16), 0)
+        card[0, knocked_out] = 0
+        damage[0, knocked_out] = 0
+        energy[0][:, knocked_out] = 0
+
+        prizes = self.prizes[taker]
+        taken = np.where(knocked_out, np.minimum(prizes, table.prize_value[defender]), 0).astype(np.int8)
+        prizes -= taken
+        self.hand_count[taker] += taken
+
+        has_bench = (card[1:] > 0).any(axis=0)
+        won = knocked_out & ((prizes <= 0) | ~has_bench)
+        if won.any():
+            self._finish(won, taker)
+
+        promote = knocked_out & ~won
+        if promote.any():
+            games = np.flatnonzero(promote)
+            bench = card[1:, games]
+            remaining_hp = np.where(bench > 0, table.hp[bench] - damage[1:, games], -1)
+            slot = remaining_hp.argmax(axis=0) + 1
+            card[0, games] = card[slot, games]
+            damage[0, games] = damage[slot, games]
+            energy[0][:, games] = energy[slot, :, games].T
+            card[slot, games] = 0
+            damage[slot, games] = 0
+            energy[slot, :, games] = 0
+
+    def _end_turn(self, mask: np.ndarray):
+        """手番交代とターン上限判定"""
+        self.current_player[mask] ^= 1
+        self.turn += mask
+        self.energy_played &= ~mask
+        self.first_player_first_turn &= ~mask
+        self.needs_draw |= mask
+
+        over_limit = mask & (self.turn > self.max_turns)
+        if over_limit.any():
+            self.done |= over_limit
+            self.winner[over_limit] = DRAW
+
+    def _finish(self, games: np.ndarray, winner: int):
+        """決着を記録（最初の決着のみ有効）"""
+        decided = games & ~self.done
+        self.winner[decided] = winner
+        self.done |= decided
+
+
+def estimate_win_probability(game_state: GameState, side: str, playouts: int = 10000,
+                             seed: Optional[int] = None, max_turns: int = 200,
+                             turn_started: bool = True) -> float:
+    """局面から簡易プレイアウトをまとめて実行し、指定プレイヤーの勝率を推定"""
+    batch = BatchGameState.from_game_state(game_state, playouts, max_turns=max_turns, seed=seed,
+                                           turn_started=turn_started)
+    batch.run()
+    return batch.win_rate(side)
@@ -0,0 +1,323 @@
+# engine/benchmark.py
+# Version: 1.6
+# Updated: 2026-10-18 03:30
+# 探索用基盤のマイクロベンチマーク
+#
+# 使い方:
+#   python -m engine.benchmark clone --decks 1,2 --turns 10
+#   python -m engine.benchmark journal --decks 1,2 --turns 10
+#   python -m engine.benchmark actions --decks 1,2 --turns 10
+#   python -m engine.benchmark batch --decks 1,2 --turns 6 --playouts 100000
+#   python -m engine.benchmark mcts --decks 1,2 --turns 6 --budget 1.0 --workers 1,4,8,16,32
+#   python -m engine.benchmark reuse --decks 1,2 --turns 6 --positions 20 --nodes 300 --node-cap 50000
+
+import argparse
+import contextlib
+import copy
+import io
+import os
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from engine.match import Match
+from engine.agents import AIControllerAgent
+
+
+def load_decks(deck_ids: Tuple[int, int]) -> Tuple[list, list]:
+    """CSVから2つのデッキデータを読み込む（読み込み時のログは抑制）"""
+    from database.database_manager import DatabaseManager
+    with contextlib.redirect_stdout(io.StringIO()):
+        database_manager = DatabaseManager(
+            cards_csv_path=os.path.join(PROJECT_ROOT, "cards", "cards.csv"),
+            deck_csv_path=os.path.join(PROJECT_ROOT, "cards", "deck.csv")
+        )
+        return database_manager.get_deck_cards(deck_ids[0]), database_manager.get_deck_cards(deck_ids[1])
+
+
+def build_midgame_match(deck_ids: Tuple[int, int], turns: int, seed: int = 0) -> Match:
+    """AI同士で指定ターン数だけ進めた試合を作成（ベンチマーク用の中盤局面）"""
+    player_deck, opponent_deck = load_decks(deck_ids)
+    match = Match(agents={"player": AIControllerAgent(), "opponent": AIControllerAgent()}, seed=seed)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        match.setup(Match.build_deck(player_deck), Match.build_deck(opponent_deck))
+        for player in ("player", "opponent"):
+            basic_pokemon = [card for card in match.game_state.get_hand(player) if match.is_basic_pokemon(card)]
+            active, bench = match.agents[player].choose_initial_pokemon(match, player, basic_pokemon)
+            match.place_initial_pokemon(player, active, bench)
+        match.begin("player")
+
+        for _ in range(turns):
+            player = match.game_state.current_player
+            _, can_continue = match.start_turn(player)
+            if not can_continue:
+                break
+            match.agents[player].take_turn(match, player)
+            if match.is_over:
+                break
+            match.end_turn()
+
+    return match
+
+
+def time_per_call(function: Callable[[], object], repeat: int) -> float:
+    """1回あたりの平均実行時間（秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def benchmark_clone(deck_ids: Tuple[int, int], turns: int, repeat: int) -> List[str]:
+    """GameState.clone() と copy.deepcopy(game_state) の比較"""
+    game_state = build_midgame_match(deck_ids, turns).game_state
+
+    deepcopy_time = time_per_call(lambda: copy.deepcopy(game_state), max(1, repeat // 20))
+    clone_time = time_per_call(game_state.clone, repeat)
+
+    return [
+        f"=== GameState複製ベンチマーク（ターン{game_state.turn_count}の局面） ===",
+        f"copy.deepcopy: {deepcopy_time * 1e6:.1f}µs/回",
+        f"clone():       {clone_time * 1e6:.1f}µs/回",
+        f"速度比: {deepcopy_time / clone_time:.1f}倍"
+    ]
+
+
+def _play_one_turn(match: Match):
+    """現在の手番プレイヤーの1ターン（開始・行動・終了）を進める"""
+    player = match.game_state.current_player
+    _, can_continue = match.start_turn(player)
+    if can_continue:
+        match.agents[player].take_turn(match, player)
+        if not match.is_over:
+            match.end_turn()
+
+
+def benchmark_journal(deck_ids: Tuple[int, int], turns: int, repeat: int) -> List[str]:
+    """1ターン分の展開と巻き戻し：変更ジャーナル（make/unmake）と clone() の比較"""
+    match = build_midgame_match(deck_ids, turns)
+    state = match.game_state
+    agents = match.agents
+
+    def with_journal():
+        mark = state.mark()
+        _play_one_turn(match)
+        state.undo_to(mark)
+
+    def with_clone():
+        _play_one_turn(match.clone(agents={"player": AIControllerAgent(), "opponent": AIControllerAgent()}))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        journal_time = time_per_call(with_journal, repeat)
+        clone_time = time_per_call(with_clone, repeat)
+    state.stop_journal()
+    match.agents = agents
+
+    return [
+        f"=== 1ターン展開＋巻き戻しベンチマーク（ターン{state.turn_count}の局面） ===",
+        f"ジャーナル（mark/undo_to）: {journal_time * 1e6:.1f}µs/回",
+        f"clone()して展開:           {clone_time * 1e6:.1f}µs/回"
+    ]
+
+
+def benchmark_actions(deck_ids: Tuple[int, int], turns: int, repeat: int) -> List[str]:
+    """合法手の列挙（engine.actions.legal_actions）の所要時間"""
+    from engine.actions import legal_actions, ActionCodec
+
+    match = build_midgame_match(deck_ids, turns)
+    state = match.game_state
+    player = state.current_player
+
+    actions = list(legal_actions(state, player))
+    unique_actions = list(legal_actions(state, player, unique=True))
+    full_time = time_per_call(lambda: list(legal_actions(state, player)), repeat)
+    unique_time = time_per_call(lambda: list(legal_actions(state, player, unique=True)), repeat)
+
+    return [
+        f"=== 合法手列挙ベンチマーク（ターン{state.turn_count}の局面・{player}） ===",
+        f"全列挙:         {full_time * 1e6:.1f}µs/回（{len(actions)}手）",
+        f"同種カード除外: {unique_time * 1e6:.1f}µs/回（{len(unique_actions)}手）",
+        "合法手: " + ", ".join(ActionCodec.to_string(action) for action in unique_actions)
+    ]
+
+
+def benchmark_batch(deck_ids: Tuple[int, int], turns: int, playouts: int) -> List[str]:
+    """NumPy一括プレイアウト（engine.batch）のスループット"""
+    from engine.batch import BatchGameState
+
+    state = build_midgame_match(deck_ids, turns).game_state
+    start = time.perf_counter()
+    batch = BatchGameState.from_game_state(state, playouts, seed=0)
+    batch.run()
+    elapsed = time.perf_counter() - start
+
+    return [
+        f"=== 一括プレイアウトベンチマーク（ターン{state.turn_count}の局面・{playouts}試合） ===",
+        f"所要時間: {elapsed:.3f}秒（{playouts / elapsed:,.0f}プレイアウト/秒）",
+        f"{state.current_player}の推定勝率: {batch.win_rate(state.current_player):.3f}"
+    ]
+
+
+def benchmark_mcts(deck_ids: Tuple[int, int], turns: int, budget: float,
+                   worker_counts: Tuple[int, ...] = (1,)) -> List[str]:
+    """MCTS（ai.mcts / ai.parallel）の1回の意思決定あたりの探索量（難易度ごとの予算の目安）"""
+    from ai.mcts import MCTSSearch
+    from engine.actions import ActionCodec
+    from ai.parallel import RootParallelSearch
+
+    match = build_midgame_match(deck_ids, turns)
+    side = match.game_state.current_player
+    lines = [f"=== MCTSベンチマーク（ターン{match.game_state.turn_count}の局面・{side}・{budget}秒/意思決定） ==="]
+
+    base_rate = None
+    for workers in worker_counts:
+        if workers <= 1:
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = MCTSSearch(match, side, seed=0).run(time_budget=budget)
+        else:
+            parallel = RootParallelSearch(workers)
+            try:
+                stats = parallel.search(match, side, time_budget=budget, seed=0)
+            finally:
+                parallel.close()
+
+        rate = stats.nodes_per_second
+        base_rate = base_rate or rate
+        lines.append(f"ワーカー{workers:>3}: {stats.nodes:>8}ノード評価  {rate:>10,.0f}ノード/秒"
+                     f"  （×{rate / base_rate:.2f}）  選択: {ActionCodec.to_string(stats.best_action)}")
+    return lines
+
+
+def benchmark_reuse(deck_ids: Tuple[int, int], turns: int, positions: int, node_budget: int,
+                    node_cap: Optional[int]) -> List[str]:
+    """ターン内の意思決定間で木を引き継ぐ場合と引き継がない場合の、1回の意思決定あたりの実効ノード数"""
+    from ai.mcts import MCTSController
+
+    lines = [f"=== 木の引き継ぎベンチマーク（ターン{turns}以降の局面{positions}個・{node_budget}ノード/意思決定） ==="]
+    results = {}
+    for reuse_tree in (False, True):
+        decisions = effective = later_decisions = later_effective = pruned = 0
+        start = time.perf_counter()
+        for seed in range(positions):
+            match = build_midgame_match(deck_ids, turns, seed=seed)
+            if match.is_over:
+                continue
+            side = match.game_state.current_player
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, can_continue = match.start_turn(side)
+            if not can_continue:
+                continue
+            controller = MCTSController(match.game_state, None, side=side, match=match, time_budget=None,
+                                        node_budget=node_budget, seed=seed, reuse_tree=reuse_tree,
+                                        node_cap=node_cap)
+            with contextlib.redirect_stdout(io.StringIO()):
+                controller.execute_ai_turn()
+            for index, stats in enumerate(controller.last_search_stats):
+                decisions += 1
+                effective += stats.effective_nodes
+                pruned += stats.pruned
+                if index > 0:
+                    later_decisions += 1
+                    later_effective += stats.effective_nodes
+        elapsed = time.perf_counter() - start
+
+        mean = effective / decisions if decisions else 0.0
+        later_mean = later_effective / later_decisions if later_decisions else 0.0
+        results[reuse_tree] = (mean, later_mean)
+        label = "引き継ぐ    " if reuse_tree else "引き継がない"
+        lines.append(f"{label}: {decisions:>4}回の意思決定  実効{mean:>9,.1f}ノード/意思決定"
+                     f"（2回目以降{later_decisions}回: {later_mean:,.1f}）  削除{pruned:>6}ノード  {elapsed:.2f}秒")
+
+    base_mean, base_later = results[False]
+    if base_mean > 0 and base_later > 0:
+        lines.append(f"実効ノード数の増加: ×{results[True][0] / base_mean:.2f}"
+                     f"（2回目以降 ×{results[True][1] / base_later:.2f}）")
+    return lines
+
+
+def _parse_decks(value: str) -> Tuple[int, int]:
+    """--decks 引数（例: 1,2）を解析"""
+    try:
+        deck_ids = tuple(int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"デッキIDは整数で指定してください: {value}")
+    if len(deck_ids) != 2:
+        raise argparse.ArgumentTypeError(f"デッキIDは2つ指定してください: {value}")
+    return deck_ids
+
+
+def _parse_worker_counts(value: str) -> Tuple[int, ...]:
+    """--workers 引数（例: 1,4,8）を解析"""
+    try:
+        return tuple(int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ワーカー数は整数で指定してください: {value}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインエントリーポイント"""
+    parser = argparse.ArgumentParser(description="探索用基盤のマイクロベンチマーク")
+    subparsers = parser.add_subparsers(dest="target", required=True)
+
+    clone_parser = subparsers.add_parser("clone", help="GameState.clone() と deepcopy の比較")
+    clone_parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    clone_parser.add_argument("--turns", type=int, default=10, help="局面を作るために進めるターン数")
+    clone_parser.add_argument("--repeat", type=int, default=2000, help="clone()の計測回数")
+
+    journal_parser = subparsers.add_parser("journal", help="変更ジャーナルによる巻き戻しと clone() の比較")
+    journal_parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    journal_parser.add_argument("--turns", type=int, default=10, help="局面を作るために進めるターン数")
+    journal_parser.add_argument("--repeat", type=int, default=500, help="計測回数")
+
+    actions_parser = subparsers.add_parser("actions", help="合法手の列挙の所要時間")
+    actions_parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    actions_parser.add_argument("--turns", type=int, default=10, help="局面を作るために進めるターン数")
+    actions_parser.add_argument("--repeat", type=int, default=20000, help="計測回数")
+
+    batch_parser = subparsers.add_parser("batch", help="NumPy一括プレイアウトのスループット")
+    batch_parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    batch_parser.add_argument("--turns", type=int, default=6, help="局面を作るために進めるターン数")
+    batch_parser.add_argument("--playouts", type=int, default=100000, help="同時に進める試合数")
+
+    mcts_parser = subparsers.add_parser("mcts", help="MCTSのノード/秒")
+    mcts_parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    mcts_parser.add_argument("--turns", type=int, default=6, help="局面を作るために進めるターン数")
+    mcts_parser.add_argument("--budget", type=float, default=1.0, help="探索時間（秒）")
+    mcts_parser.add_argument("--workers", type=_parse_worker_counts, default=(1,),
+                             help="ルート並列のワーカー数（カンマ区切りで複数指定可、例: 1,4,8）")
+
+    reuse_parser = subparsers.add_parser("reuse", help="ターン内の木の引き継ぎによる実効ノード数")
+    reuse_parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    reuse_parser.add_argument("--turns", type=int, default=6, help="局面を作るために進めるターン数")
+    reuse_parser.add_argument("--positions", type=int, default=20, help="計測する局面数（シード0から順に作成）")
+    reuse_parser.add_argument("--nodes", type=int, default=300, help="1回の意思決定あたりの評価ノード数")
+    reuse_parser.add_argument("--node-cap", type=int, default=50000, help="木のノード数の上限")
+
+    args = parser.parse_args(argv)
+    if args.target == "clone":
+        lines = benchmark_clone(args.decks, args.turns, args.repeat)
+    elif args.target == "journal":
+        lines = benchmark_journal(args.decks, args.turns, args.repeat)
+    elif args.target == "actions":
+        lines = benchmark_actions(args.decks, args.turns, args.repeat)
+    elif args.target == "batch":
+        lines = benchmark_batch(args.decks, args.turns, args.playouts)
+    elif args.target == "mcts":
+        lines = benchmark_mcts(args.decks, args.turns, args.budget, args.workers)
+    elif args.target == "reuse":
+        lines = benchmark_reuse(args.decks, args.turns, args.positions, args.nodes, args.node_cap)
+    else:
+        parser.error(f"不明なベンチマーク: {args.target}")
+
+    for line in lines:
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
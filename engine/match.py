@@ -0,0 +1,898 @@
+# engine/match.py
+# Version: 1.14
+# Updated: 2026-10-18 10:00
+# ヘッドレス対戦エンジン：tkinter非依存のルール進行（GUI・AI対戦共通）
+
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from models.card import Card, CardType, TrainerType, SpecialCondition, CONDITION_BITS
+from models.game_state import GameState
+from utils.energy_cost_checker import EnergyCostChecker
+from utils.damage_calculator import DamageCalculator
+from utils.special_condition_helper import SpecialConditionHelper
+
+if TYPE_CHECKING:
+    from engine.agents import Agent
+
+
+@dataclass
+class MatchResult:
+    """1試合の結果"""
+    winner: Optional[str]           # "player" / "opponent" / None（引き分け・中断）
+    reason: str                     # "prizes" / "no_pokemon" / "deck_out" / "turn_limit" / "setup_failed"
+    turns: int
+    first_player: Optional[str]
+    player_prizes_taken: int
+    opponent_prizes_taken: int
+    seed: Optional[int] = None      # 試合の乱数シード（同じシード・デッキ・エージェントで再現可能）
+
+    @property
+    def deck_out(self) -> bool:
+        """山札切れで決着したかどうか"""
+        return self.reason == "deck_out"
+
+
+class Match:
+    """
+    GameStateのみを操作して対戦を進行するルールエンジン
+
+    GUI（CardActions / GameController / AIController）はこのクラスのアダプタとして動作し、
+    ヘッドレス対戦ではエージェントを登録して run() で決着まで自動進行する。
+
+    シャッフル・マリガン・ねむり判定・先攻決定などの乱数はすべて試合ごとの self.rng から引くため、
+    同じシードを渡せば試合を完全に再現できる（グローバルな random の状態には依存しない）。
+
+    盤面の変更はすべてGameStateの変更ジャーナル操作（set_attr / list_append 等）を経由するため、
+    state.mark() と state.undo_to(mark) で任意のアクションを巻き戻せる（決着情報も含む）。
+    乱数の状態はジャーナルの対象外。
+    """
+
+    PRIZE_COUNT = 6
+    OPENING_HAND_SIZE = 7
+    BENCH_SIZE = 5
+    MAX_MULLIGANS = 10
+    DEFAULT_MAX_TURNS = 200
+    SEED_BITS = 63
+
+    def __init__(self, game_state: Optional[GameState] = None,
+                 agents: Optional[Dict[str, 'Agent']] = None,
+                 max_turns: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.game_state = game_state if game_state is not None else GameState()
+        self.agents = agents or {}
+        self.max_turns = max_turns
+
+        # 試合専用の乱数ストリーム（シード未指定時はOSの乱数からシードを決めて記録）
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(self.SEED_BITS)
+        self.rng = random.Random(self.seed)
+
+        # 決着情報
+        self.winner: Optional[str] = None
+        self.end_reason: Optional[str] = None
+
+        # 探索でコインの結果を固定するときに積む（空なら self.rng で投げる）
+        self.forced_coins: List[bool] = []
+
+        # 行動の監視者：行動を実行する直前に (プレイヤー, 整数エンコードのアクション) で呼ばれる（GUIの思考スレッド用）
+        self.action_listener: Optional[Callable[[str, int], None]] = None
+
+    @property
+    def is_over(self) -> bool:
+        """決着（または中断）しているかどうか"""
+        return self.end_reason is not None
+
+    def clone(self, agents: Optional[Dict[str, 'Agent']] = None) -> 'Match':
+        """
+        探索用に試合を複製（GameState.clone()で盤面を複製し、乱数の状態も引き継ぐ）
+
+        Args:
+            agents: 複製先で使うエージェント（未指定時は空）
+        """
+        new = Match.__new__(Match)
+        new.game_state = self.game_state.clone()
+        new.agents = agents or {}
+        new.max_turns = self.max_turns
+        new.seed = self.seed
+        new.rng = random.Random()
+        new.rng.setstate(self.rng.getstate())
+        new.winner = self.winner
+        new.end_reason = self.end_reason
+        new.forced_coins = []
+        new.action_listener = None
+        return new
+
+    # ------------------------------------------------------------------
+    # 対戦準備
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def derive_seed(base_seed: int, index: int) -> int:
+        """
+        基準シードと試合番号から試合ごとのシードを導出
+
+        SHA-256で混ぜるため、連番の試合でも乱数ストリームが互いに相関しない。
+        どのワーカーで実行されても試合番号だけで同じシードになる。
+        """
+        digest = hashlib.sha256(f"{base_seed}:{index}".encode("ascii")).digest()
+        return int.from_bytes(digest[:8], "big") >> (64 - Match.SEED_BITS)
+
+    @staticmethod
+    def build_deck(deck_data: List[Tuple[Card, int]]) -> List[Card]:
+        """
+        (Card, 枚数)のリストから独立したカードインスタンスの山札を作成
+
+        静的データはプロトタイプを共有し、各インスタンスはゲーム状態（初期値）のみを持つ。
+        """
+        cards = []
+        for original_card, count in deck_data:
+            for _ in range(count):
+                cards.append(original_card.new_instance())
+        return cards
+
+    @staticmethod
+    def is_basic_pokemon(card: Card) -> bool:
+        """たねポケモンかどうか"""
+        return card.card_type == CardType.POKEMON and getattr(card, 'evolve_step', 0) == 0
+
+    def setup(self, player_cards: List[Card], opponent_cards: List[Card]) -> bool:
+        """山札のシャッフル、サイド配布、マリガン込みの初期手札配布を行う"""
+        state = self.game_state
+
+        self.rng.shuffle(player_cards)
+        self.rng.shuffle(opponent_cards)
+
+        state.set_attr(state, 'player_deck', player_cards.copy())
+        state.set_attr(state, 'opponent_deck', opponent_cards.copy())
+
+        # サイド（プライズ）カードを配る
+        state.set_attr(state, 'player_prizes', [])
+        state.set_attr(state, 'opponent_prizes', [])
+        for _ in range(self.PRIZE_COUNT):
+            if state.player_deck:
+                state.list_append(state.player_prizes, state.list_pop(state.player_deck, 0))
+            if state.opponent_deck:
+                state.list_append(state.opponent_prizes, state.list_pop(state.opponent_deck, 0))
+
+        player_ok = self._deal_opening_hand("player")
+        opponent_ok = self._deal_opening_hand("opponent")
+        return player_ok and opponent_ok
+
+    def _deal_opening_hand(self, player: str) -> bool:
+        """たねポケモンが来るまで初期手札を引き直す"""
+        state = self.game_state
+        deck = state.get_deck(player)
+        hand = state.get_hand(player)
+        mulligans = 0
+        found = False
+
+        while not found and mulligans < self.MAX_MULLIGANS:
+            # 前の試合の手札が残っていれば取り除く
+            while hand:
+                state.list_pop(hand)
+            for _ in range(self.OPENING_HAND_SIZE):
+                if deck:
+                    state.list_append(hand, state.list_pop(deck, 0))
+
+            if any(self.is_basic_pokemon(card) for card in hand):
+                found = True
+            else:
+                # 手札を山札に戻してシャッフル
+                mulligans += 1
+                while hand:
+                    state.list_append(deck, state.list_pop(hand, 0))
+                state.list_snapshot(deck)
+                self.rng.shuffle(deck)
+
+        state.set_attr(state, 'player_mulligans' if player == "player" else 'opponent_mulligans', mulligans)
+
+        return found
+
+    def get_mulligan_bonus(self, player: str) -> int:
+        """相手のマリガン回数に応じた追加ドロー可能枚数"""
+        state = self.game_state
+        if player == "player":
+            return max(0, state.opponent_mulligans - state.player_mulligans)
+        return max(0, state.player_mulligans - state.opponent_mulligans)
+
+    def draw_cards(self, player: str, count: int) -> List[Card]:
+        """山札から指定枚数を手札に加える（山札切れ判定なし）"""
+        state = self.game_state
+        deck = state.get_deck(player)
+        hand = state.get_hand(player)
+        drawn = []
+        for _ in range(count):
+            if not deck:
+                break
+            card = state.list_pop(deck, 0)
+            state.list_append(hand, card)
+            drawn.append(card)
+        return drawn
+
+    def place_initial_pokemon(self, player: str, active: Card, bench: List[Card]) -> bool:
+        """初期配置：手札からバトル場とベンチにたねポケモンを出す"""
+        state = self.game_state
+        if active is None or not self.is_basic_pokemon(active):
+            return False
+
+        self._take_from_hand(player, active)
+        state.set_active(player, active)
+        # 初期配置は「そのターンに出された」扱いにしない
+        state.set_attr(active, 'summoned_this_turn', False)
+
+        bench_slots = state.get_bench(player)
+        for i in range(len(bench_slots)):
+            state.list_set(bench_slots, i, None)
+
+        for i, pokemon in enumerate(bench[:self.BENCH_SIZE]):
+            self._take_from_hand(player, pokemon)
+            state.list_set(bench_slots, i, pokemon)
+            state.set_attr(pokemon, 'summoned_this_turn', False)
+
+        return True
+
+    def begin(self, first_player: str):
+        """先攻を決めて最初のターンに入る"""
+        state = self.game_state
+        state.set_first_player(first_player)
+        state.set_attr(state, 'current_player', first_player)
+        state.set_attr(state, 'turn_count', 1)
+        state.set_attr(state, 'initialization_complete', True)
+
+    # ------------------------------------------------------------------
+    # ターン進行
+    # ------------------------------------------------------------------
+
+    def start_turn(self, player: str) -> Tuple[List[str], bool]:
+        """
+        ターン開始処理（ドロー・特殊状態）
+
+        Returns:
+            Tuple[List[str], bool]: (メッセージリスト, ゲーム継続可能か)
+        """
+        state = self.game_state
+        messages = []
+
+        state.start_turn(player)
+
+        if state.can_draw_card():
+            drawn_card, can_continue = state.draw_card(player)
+            if not can_continue:
+                # 公式ルール：山札切れで引けなければ敗北
+                messages.append(f"{player}は山札が空のためカードを引けませんでした")
+                messages.append(f"{player}の敗北です")
+                self._finish(GameState.get_opponent(player), "deck_out")
+                return messages, False
+            elif drawn_card:
+                messages.append(f"{player}が{drawn_card.name}を引きました")
+
+        messages.extend(self._process_special_conditions_start_of_turn(player))
+        return messages, not self.is_over
+
+    def end_turn(self):
+        """ターン終了処理（ターン交代）"""
+        state = self.game_state
+        self._process_special_conditions_end_of_turn(state.current_player)
+        state.switch_turn()
+
+        if self.max_turns and state.turn_count > self.max_turns:
+            self._finish(None, "turn_limit")
+
+    def _process_special_conditions_start_of_turn(self, player: str) -> List[str]:
+        """ターン開始時の特殊状態処理"""
+        state = self.game_state
+        messages = []
+        active_pokemon = state.get_active(player)
+        if not active_pokemon or not active_pokemon.condition_mask:
+            return messages
+
+        conditions = active_pokemon.special_conditions
+        remove_mask = 0
+
+        # どく、やけどのダメージ処理
+        if SpecialCondition.POISON in conditions:
+            state.set_attr(active_pokemon, 'damage_taken', active_pokemon.damage_taken + 10)
+            messages.append(f"{active_pokemon.name}はどくのダメージを受けました（10ダメージ）")
+
+        if SpecialCondition.BURN in conditions:
+            state.set_attr(active_pokemon, 'damage_taken', active_pokemon.damage_taken + 20)
+            messages.append(f"{active_pokemon.name}はやけどのダメージを受けました（20ダメージ）")
+            remove_mask |= CONDITION_BITS[SpecialCondition.BURN]
+
+        # ねむりはコインがオモテなら回復
+        if SpecialCondition.SLEEP in conditions:
+            if self.flip_coin():
+                remove_mask |= CONDITION_BITS[SpecialCondition.SLEEP]
+                messages.append(f"{active_pokemon.name}のねむりが回復しました")
+
+        # マヒは自動的に回復
+        if SpecialCondition.PARALYSIS in conditions:
+            remove_mask |= CONDITION_BITS[SpecialCondition.PARALYSIS]
+            messages.append(f"{active_pokemon.name}のマヒが回復しました")
+
+        if remove_mask:
+            state.set_attr(active_pokemon, 'condition_mask', active_pokemon.condition_mask & ~remove_mask)
+
+        # どく・やけどによるきぜつ
+        if active_pokemon.is_knocked_out():
+            messages.append(f"{active_pokemon.name}はきぜつしました！")
+            messages.extend(self.knock_out(player, active_pokemon))
+
+        return messages
+
+    def flip_coin(self) -> bool:
+        """
+        コインを1回投げる（オモテならTrue）
+
+        forced_coins に結果が積まれていればそれを使う（期待値探索のchanceノードで結果ごとに展開するため）。
+        """
+        if self.forced_coins:
+            return self.forced_coins.pop()
+        return self.rng.random() < 0.5
+
+    def force_next_draw(self, player: str, prototype) -> bool:
+        """
+        山札から指定の種類（プロトタイプ）のカードを1枚先頭へ移し、次のドローで引くカードを固定する（探索用）
+
+        変更は変更ジャーナルに記録される。山札にその種類がなければ何もせずFalseを返す。
+        """
+        state = self.game_state
+        deck = state.get_deck(player)
+        for index, card in enumerate(deck):
+            if card.prototype is prototype:
+                if index:
+                    state.list_snapshot(deck)
+                    deck[0], deck[index] = card, deck[0]
+                return True
+        return False
+
+    def _process_special_conditions_end_of_turn(self, player: str):
+        """ターン終了時の特殊状態処理（将来の効果用）"""
+        pass
+
+    # ------------------------------------------------------------------
+    # アクション
+    # ------------------------------------------------------------------
+
+    def play_basic_pokemon(self, player: str, card: Card) -> Tuple[bool, str]:
+        """たねポケモンをバトル場（空の場合）またはベンチに出す"""
+        state = self.game_state
+
+        if card.card_type != CardType.POKEMON:
+            return False, f"{card.name}はポケモンカードではありません"
+
+        if getattr(card, 'evolve_step', 0) != 0:
+            return False, f"{card.name}は進化ポケモンです。進化元となるポケモンを場に出してから進化させてください。"
+
+        if state.get_active(player) is None:
+            self._notify_action(player, "summon", card)
+            self._take_from_hand(player, card)
+            state.set_active(player, card)
+            state.set_attr(card, 'summoned_this_turn', True)
+            return True, f"{card.name}をバトル場に出しました"
+
+        bench = state.get_bench(player)
+        for i in range(self.BENCH_SIZE):
+            if bench[i] is None:
+                self._notify_action(player, "summon", card)
+                self._take_from_hand(player, card)
+                state.list_set(bench, i, card)
+                # そのターンに出されたポケモンは進化できない
+                state.set_attr(card, 'summoned_this_turn', True)
+                return True, f"{card.name}をベンチに出しました"
+
+        return False, "ベンチが満杯です"
+
+    def attach_energy(self, player: str, energy: Card, target: Card) -> Tuple[bool, str]:
+        """手札のエネルギーを場のポケモンに装着（1ターン1回）"""
+        state = self.game_state
+
+        if state.energy_played_this_turn:
+            return False, "このターンはすでにエネルギーを装着しました。エネルギーの装着は1ターンに1回までです。"
+
+        if energy.card_type != CardType.ENERGY:
+            return False, f"{energy.name}はエネルギーカードではありません"
+
+        if target is None or self._find_in_play(player, target) is None:
+            return False, "対象のポケモンが見つかりません"
+
+        self._notify_action(player, "attach", energy, target)
+        self._take_from_hand(player, energy)
+        state.list_append(target.attached_energy, energy)
+        state.set_attr(state, 'energy_played_this_turn', True)
+
+        return True, f"{target.name}に{energy.name}を装着しました"
+
+    def get_evolution_targets(self, player: str, evolution_card: Card) -> List[Tuple[str, int, Card]]:
+        """進化ルールを満たす進化先候補を(位置, インデックス, ポケモン)で取得"""
+        state = self.game_state
+        targets = []
+
+        if not evolution_card.evolves_from:
+            return targets
+
+        active = state.get_active(player)
+        if active and evolution_card.can_evolve_from(active) and state.can_evolve_pokemon(active):
+            targets.append(("active", 0, active))
+
+        for i, bench_pokemon in enumerate(state.get_bench(player)):
+            if (bench_pokemon and evolution_card.can_evolve_from(bench_pokemon) and
+                    state.can_evolve_pokemon(bench_pokemon)):
+                targets.append(("bench", i, bench_pokemon))
+
+        return targets
+
+    def evolve(self, player: str, evolution_card: Card, target: Card) -> Tuple[bool, str]:
+        """場のポケモンを手札の進化カードで進化させる"""
+        state = self.game_state
+
+        if not evolution_card.can_evolve_from(target):
+            return False, f"{evolution_card.name}は{target.name}から進化できません"
+
+        if not state.can_evolve_pokemon(target):
+            return False, f"{target.name}は現在進化できません（進化制限により）"
+
+        location = self._find_in_play(player, target)
+        if location is None:
+            return False, "対象のポケモンが見つかりません"
+
+        self._notify_action(player, "evolve", evolution_card, target)
+        self._take_from_hand(player, evolution_card)
+
+        # 進化前ポケモンの状態を引き継ぎ
+        state.set_attr(evolution_card, 'damage_taken', target.damage_taken)
+        state.set_attr(evolution_card, 'attached_energy', target.attached_energy.copy())
+        state.set_attr(evolution_card, 'attached_tools', target.attached_tools.copy())
+        state.set_attr(evolution_card, 'condition_mask', target.condition_mask)
+        state.set_attr(evolution_card, 'summoned_this_turn', False)
+        state.set_attr(evolution_card, 'evolved_this_turn', True)
+
+        if location == -1:
+            state.set_active(player, evolution_card)
+        else:
+            state.list_set(state.get_bench(player), location, evolution_card)
+
+        # 進化前ポケモンは捨て札へ
+        state.list_append(state.get_discard(player), target)
+
+        return True, f"{target.name}を{evolution_card.name}に進化させました"
+
+    def play_trainer(self, player: str, card: Card) -> Tuple[bool, str]:
+        """トレーナーズを使用（サポートは1ターン1枚・先攻1ターン目不可）"""
+        state = self.game_state
+        if card.card_type not in (CardType.TRAINER, CardType.TOOL):
+            return False, f"{card.name}はトレーナーズではありません"
+
+        trainer_type = getattr(card, 'trainer_type', None) or self._detect_trainer_type_from_name(card.name)
+
+        if trainer_type == TrainerType.SUPPORTER:
+            if not state.can_use_supporter():
+                return False, f"{card.name}を使用できません。{state.get_supporter_restriction_reason()}"
+
+            self._notify_action(player, "trainer", card)
+            self._take_from_hand(player, card)
+            state.list_append(state.get_discard(player), card)
+            state.set_attr(state, 'supporter_played_this_turn', True)
+            return True, f"{card.name}を使用しました。{self._apply_trainer_effect(player, card)}"
+
+        if trainer_type == TrainerType.STADIUM:
+            self._notify_action(player, "trainer", card)
+            previous_stadium = state.stadium
+            if previous_stadium:
+                state.list_append(state.get_discard(player), previous_stadium)
+
+            self._take_from_hand(player, card)
+            state.set_attr(state, 'stadium', card)
+            effect_message = self._apply_trainer_effect(player, card)
+            if previous_stadium:
+                return True, f"{card.name}を場に出しました。{previous_stadium.name}はトラッシュされました。{effect_message}"
+            return True, f"{card.name}を場に出しました。{effect_message}"
+
+        # グッズ（不明なタイプもグッズとして扱う）
+        self._notify_action(player, "trainer", card)
+        self._take_from_hand(player, card)
+        state.list_append(state.get_discard(player), card)
+        return True, f"{card.name}を使用しました。{self._apply_trainer_effect(player, card)}"
+
+    @staticmethod
+    def _detect_trainer_type_from_name(card_name: str) -> TrainerType:
+        """カード名からトレーナータイプを推定（trainer_type未設定時の暫定実装）"""
+        supporter_keywords = ["博士", "ジム", "リーダー", "チャンピオン", "研究員", "助手"]
+        stadium_keywords = ["スタジアム", "ジム", "センター", "タワー", "島", "山", "森", "湖", "遺跡"]
+
+        if any(keyword in card_name for keyword in supporter_keywords):
+            return TrainerType.SUPPORTER
+        if any(keyword in card_name for keyword in stadium_keywords):
+            return TrainerType.STADIUM
+        return TrainerType.ITEM
+
+    def _apply_trainer_effect(self, player: str, card: Card) -> str:
+        """トレーナーズの効果を適用（今後実装）"""
+        return "効果はまだ実装されていません。"
+
+    def can_retreat(self, player: str) -> Tuple[bool, str]:
+        """バトルポケモンがにげられるかをチェック"""
+        state = self.game_state
+        active = state.get_active(player)
+
+        if active is None:
+            return False, "バトル場にポケモンがいません"
+
+        if state.current_player != player:
+            return False, "自分のターンでのみにげることができます"
+
+        # ねむり・マヒ状態ではにげられない
+        if active.has_special_condition(SpecialCondition.SLEEP):
+            return False, "ねむり状態のためにげることができません"
+        if active.has_special_condition(SpecialCondition.PARALYSIS):
+            return False, "マヒ状態のためにげることができません"
+
+        can_retreat, reason = SpecialConditionHelper.can_retreat(active)
+        if not can_retreat:
+            return False, reason
+
+        retreat_cost = getattr(active, 'retreat_cost', 0) or 0
+        attached_count = len(active.attached_energy)
+        if attached_count < retreat_cost:
+            return False, f"にげるコストが不足しています（必要: {retreat_cost}個、装着: {attached_count}個）"
+
+        if not state.get_bench_pokemon(player):
+            return False, "ベンチに交代できるポケモンがいません"
+
+        return True, ""
+
+    def retreat(self, player: str, bench_index: int) -> Tuple[bool, str]:
+        """にげるコストを支払い、バトルポケモンとベンチポケモンを入れ替える"""
+        state = self.game_state
+
+        can_retreat, reason = self.can_retreat(player)
+        if not can_retreat:
+            return False, reason
+
+        bench = state.get_bench(player)
+        if bench_index < 0 or bench_index >= len(bench) or bench[bench_index] is None:
+            return False, "選択されたベンチスロットにポケモンがいません"
+
+        retreating_pokemon = state.get_active(player)
+        replacement_pokemon = bench[bench_index]
+        retreat_cost = getattr(retreating_pokemon, 'retreat_cost', 0) or 0
+        self._notify_action(player, "retreat", argument=bench_index)
+
+        # エネルギーを捨て札に送る（後ろから取る）
+        discard = state.get_discard(player)
+        for _ in range(retreat_cost):
+            state.list_append(discard, state.list_pop(retreating_pokemon.attached_energy))
+
+        state.set_active(player, replacement_pokemon)
+        state.list_set(bench, bench_index, retreating_pokemon)
+
+        message_parts = [f"{retreating_pokemon.name}がにげました"]
+        if retreat_cost > 0:
+            message_parts.append(f"エネルギー{retreat_cost}個を支払いました")
+        message_parts.append(f"{replacement_pokemon.name}がバトル場に出ました")
+        return True, "\n".join(message_parts)
+
+    def can_attack(self, player: str, attack_number: int) -> Tuple[bool, str]:
+        """バトルポケモンが指定のワザを使えるかをチェック"""
+        state = self.game_state
+
+        if state.current_player != player:
+            return False, "相手のターンです。攻撃はできません。"
+
+        if state.is_first_player_first_turn():
+            return False, "先攻プレイヤーの最初のターンは攻撃できません"
+
+        if not state.can_attack():
+            return False, "このターンはすでに攻撃しました"
+
+        attacker = state.get_active(player)
+        if not attacker:
+            return False, "攻撃するポケモンが見つかりません"
+
+        if not state.get_active(GameState.get_opponent(player)):
+            return False, "攻撃対象が見つかりません"
+
+        # ねむり・マヒ状態ではワザを使えない
+        if attacker.has_special_condition(SpecialCondition.SLEEP):
+            return False, f"{attacker.name}はねむり状態のためワザを使えません"
+        if attacker.has_special_condition(SpecialCondition.PARALYSIS):
+            return False, f"{attacker.name}はマヒ状態のためワザを使えません"
+
+        return EnergyCostChecker.can_use_attack(attacker, attack_number, state)
+
+    def attack(self, player: str, attack_number: int) -> Tuple[bool, List[str]]:
+        """バトルポケモンのワザを使用し、ダメージ・きぜつ・サイド獲得まで処理"""
+        state = self.game_state
+
+        can_attack, reason = self.can_attack(player, attack_number)
+        if not can_attack:
+            return False, [reason]
+        self._notify_action(player, "attack", argument=attack_number)
+
+        opponent = GameState.get_opponent(player)
+        attacker = state.get_active(player)
+        defender = state.get_active(opponent)
+        attack_name = attacker.attack_name if attack_number == 1 else attacker.attack2_name
+
+        damage, damage_messages = DamageCalculator.calculate_damage(attacker, defender, attack_number)
+        is_knocked_out, apply_messages = DamageCalculator.apply_damage(defender, damage, state)
+
+        messages = [f"{attacker.name}の「{attack_name}」！"]
+        messages.extend(damage_messages)
+        messages.extend(apply_messages)
+
+        state.mark_attack_completed()
+
+        if is_knocked_out:
+            messages.extend(self.knock_out(opponent, defender))
+
+        return True, messages
+
+    def _notify_action(self, player: str, kind: str, card: Optional[Card] = None,
+                       target: Optional[Card] = None, argument: int = 0):
+        """
+        action_listener へ実行するアクションを通知（検証を通り、局面を変更する直前に呼ぶ）
+
+        Args:
+            kind: ActionCodec のエンコード関数名（summon, trainer, attach, evolve, retreat, attack）
+            card: 使う手札のカード（手札の位置でエンコード）
+            target: 対象の場のポケモン（バトル場0・ベンチ1〜5でエンコード）
+            argument: 手札を使わないアクションの引数（ベンチのインデックス・ワザ番号）
+        """
+        if self.action_listener is None:
+            return
+
+        from engine.actions import ActionCodec
+
+        if card is not None:
+            argument = next(index for index, hand_card in enumerate(self.game_state.get_hand(player))
+                            if hand_card is card)
+        encode = getattr(ActionCodec, kind)
+        if target is not None:
+            action = encode(argument, self._find_in_play(player, target) + 1)
+        else:
+            action = encode(argument)
+        self.action_listener(player, action)
+
+    def apply(self, action: int, player: Optional[str] = None) -> Tuple[bool, List[str]]:
+        """
+        整数エンコードされたアクション（engine.actions）を実行
+
+        ターン終了はターン交代と次のプレイヤーのターン開始（ドロー・特殊状態）まで進める。
+        ワザを使った後は legal_actions と同じくターン終了以外のアクションを受け付けない。
+
+        Args:
+            player: 行動するプレイヤー（未指定時は手番プレイヤー）
+
+        Returns:
+            Tuple[bool, List[str]]: (成功したか, メッセージリスト)
+        """
+        from engine.actions import ActionCodec, END, ATTACK, RETREAT, SUMMON, TRAINER, ATTACH
+
+        state = self.game_state
+        player = player or state.current_player
+        kind, argument, target = ActionCodec.decode(action)
+
+        if kind == END:
+            self.end_turn()
+            if self.is_over:
+                return True, []
+            messages, _ = self.start_turn(state.current_player)
+            return True, messages
+
+        # ワザを使ったらターン終了のみ
+        has_attacked = state.player_has_attacked if player == "player" else state.opponent_has_attacked
+        if has_attacked or state.attacks_this_turn >= state.max_attacks_per_turn:
+            return False, ["ワザを使った後はターンを終えることしかできません"]
+
+        if kind == ATTACK:
+            return self.attack(player, argument)
+
+        if kind == RETREAT:
+            success, message = self.retreat(player, argument)
+            return success, [message]
+
+        hand = state.get_hand(player)
+        if argument >= len(hand):
+            return False, ["指定された手札のカードがありません"]
+        card = hand[argument]
+
+        if kind == SUMMON:
+            success, message = self.play_basic_pokemon(player, card)
+        elif kind == TRAINER:
+            success, message = self.play_trainer(player, card)
+        else:
+            pokemon = state.get_active(player) if target == 0 else state.get_bench(player)[target - 1]
+            if pokemon is None:
+                return False, ["対象のポケモンが見つかりません"]
+            if kind == ATTACH:
+                success, message = self.attach_energy(player, card, pokemon)
+            else:
+                success, message = self.evolve(player, card, pokemon)
+        return success, [message]
+
+    # ------------------------------------------------------------------
+    # きぜつ・サイド・勝敗
+    # ------------------------------------------------------------------
+
+    def knock_out(self, owner: str, pokemon: Card) -> List[str]:
+        """きぜつ処理：トラッシュ、サイド獲得、バトル場の補充、勝敗判定"""
+        state = self.game_state
+        taker = GameState.get_opponent(owner)
+        messages = []
+
+        location = self._find_in_play(owner, pokemon)
+        if location is None:
+            return messages
+        if location == -1:
+            state.set_active(owner, None)
+        else:
+            state.list_set(state.get_bench(owner), location, None)
+
+        # きぜつしたポケモンと付属カードをトラッシュ
+        discard = state.get_discard(owner)
+        for attached_card in pokemon.attached_energy + pokemon.attached_tools:
+            state.list_append(discard, attached_card)
+        state.set_attr(pokemon, 'attached_energy', [])
+        state.set_attr(pokemon, 'attached_tools', [])
+        state.set_attr(pokemon, 'damage_taken', 0)
+        state.set_attr(pokemon, 'condition_mask', 0)
+        state.list_append(discard, pokemon)
+
+        # サイド獲得（ルールを持つexポケモンは2枚）
+        prize_count = 2 if pokemon.rule and "ex" in pokemon.rule else 1
+        messages.extend(self.take_prizes(taker, prize_count))
+
+        if not state.get_prizes(taker):
+            self._finish(taker, "prizes")
+            return messages
+
+        if state.get_active(owner) is None:
+            bench_options = state.get_bench_pokemon(owner)
+            if not bench_options:
+                if owner == "player":
+                    messages.append("ベンチにポケモンがいません！ゲーム終了です！")
+                else:
+                    messages.append("相手のベンチにポケモンがいません！あなたの勝利です！")
+                self._finish(taker, "no_pokemon")
+                return messages
+
+            bench_index = self._choose_replacement(owner, bench_options)
+            messages.append(self.promote(owner, bench_index))
+
+        return messages
+
+    def take_prizes(self, player: str, count: int) -> List[str]:
+        """サイドを指定枚数手札に加える"""
+        state = self.game_state
+        prizes = state.get_prizes(player)
+        hand = state.get_hand(player)
+        taken = 0
+        for _ in range(count):
+            if prizes:
+                state.list_append(hand, state.list_pop(prizes, 0))
+                taken += 1
+
+        if not taken:
+            return []
+        if player == "player":
+            return [f"サイドを{taken}枚獲得しました"]
+        return [f"相手がサイドを{taken}枚獲得しました"]
+
+    def promote(self, player: str, bench_index: int) -> str:
+        """ベンチポケモンをバトル場に出す"""
+        state = self.game_state
+        bench = state.get_bench(player)
+        pokemon = bench[bench_index]
+        state.list_set(bench, bench_index, None)
+        state.set_active(player, pokemon)
+
+        if player == "player":
+            return f"{pokemon.name}をバトル場に出しました"
+        return f"相手が{pokemon.name}をバトル場に出しました"
+
+    def _choose_replacement(self, player: str, bench_options: List[Tuple[int, Card]]) -> int:
+        """きぜつ後に出すベンチポケモンを決定（エージェント未登録なら先頭）"""
+        agent = self.agents.get(player)
+        if agent is not None:
+            return agent.choose_replacement(self, player, bench_options)
+        return bench_options[0][0]
+
+    def _finish(self, winner: Optional[str], reason: str):
+        """決着を記録（最初の決着のみ有効）"""
+        if self.end_reason is None:
+            self.game_state.set_attr(self, 'winner', winner)
+            self.game_state.set_attr(self, 'end_reason', reason)
+
+    def get_result(self) -> MatchResult:
+        """現在の結果を取得"""
+        state = self.game_state
+        return MatchResult(
+            winner=self.winner,
+            reason=self.end_reason or "in_progress",
+            turns=state.turn_count,
+            first_player=state.first_player,
+            player_prizes_taken=self.PRIZE_COUNT - len(state.player_prizes),
+            opponent_prizes_taken=self.PRIZE_COUNT - len(state.opponent_prizes),
+            seed=self.seed
+        )
+
+    # ------------------------------------------------------------------
+    # ヘッドレス自動進行
+    # ------------------------------------------------------------------
+
+    def run(self, player_cards: List[Card], opponent_cards: List[Card],
+            first_player: Optional[str] = None) -> MatchResult:
+        """準備から決着までを登録済みエージェントで自動進行"""
+        if not self.prepare(player_cards, opponent_cards, first_player):
+            return self.get_result()
+        return self.play()
+
+    def prepare(self, player_cards: List[Card], opponent_cards: List[Card],
+                first_player: Optional[str] = None) -> bool:
+        """
+        準備（山札・マリガン・初期配置）を登録済みエージェントで行い、最初のターンの直前まで進める
+
+        Returns:
+            bool: 準備できたか（失敗時は "setup_failed" で決着扱い）
+        """
+        if not self.setup(player_cards, opponent_cards):
+            self._finish(None, "setup_failed")
+            return False
+
+        for player in ("player", "opponent"):
+            bonus = self.get_mulligan_bonus(player)
+            if bonus > 0:
+                self.draw_cards(player, self.agents[player].choose_mulligan_draw(self, player, bonus))
+
+        for player in ("player", "opponent"):
+            basic_pokemon = [card for card in self.game_state.get_hand(player) if self.is_basic_pokemon(card)]
+            active, bench = self.agents[player].choose_initial_pokemon(self, player, basic_pokemon)
+            self.place_initial_pokemon(player, active, bench)
+
+        self.begin(first_player or self.rng.choice(("player", "opponent")))
+        return True
+
+    def play(self) -> MatchResult:
+        """現在のターンから決着まで進行"""
+        state = self.game_state
+        if not self.max_turns:
+            self.max_turns = self.DEFAULT_MAX_TURNS
+
+        while not self.is_over:
+            player = state.current_player
+            _, can_continue = self.start_turn(player)
+            if not can_continue:
+                break
+
+            self.agents[player].take_turn(self, player)
+            if self.is_over:
+                break
+
+            self.end_turn()
+
+        return self.get_result()
+
+    # ------------------------------------------------------------------
+    # 内部ヘルパー
+    # ------------------------------------------------------------------
+
+    def _take_from_hand(self, player: str, card: Card) -> Card:
+        """手札から指定インスタンスを取り除く（同名カードと区別するため同一性で検索）"""
+        hand = self.game_state.get_hand(player)
+        for i, hand_card in enumerate(hand):
+            if hand_card is card:
+                return self.game_state.list_pop(hand, i)
+        raise ValueError(f"{card.name}は手札にありません")
+
+    def _find_in_play(self, player: str, pokemon: Card) -> Optional[int]:
+        """場のポケモンの位置を取得（バトル場は-1、ベンチはインデックス、場にいなければNone）"""
+        state = self.game_state
+        if state.get_active(player) is pokemon:
+            return -1
+        for i, bench_pokemon in enumerate(state.get_bench(player)):
+            if bench_pokemon is pokemon:
+                return i
+        return None
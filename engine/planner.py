@@ -0,0 +1,205 @@
+# engine/planner.py
+# Version: 1.1
+# Updated: 2026-10-18 07:00
+# ターンプランナー：1ターン分のアクション列を網羅的に列挙し、同じ結果になる列を除いて最善の列を選ぶ
+#
+# ターン内では順序を入れ替えても同じ結果になるアクションが多い（ベンチへのエネルギー装着とたねポケモンを出す等）。
+# そのため次の2段階で列挙を小さくする。
+#   1. 正規化：たねポケモンを出す・エネルギーを付ける・進化の3種類は互いに可換なので、
+#      連続する可換なアクションは (種類, カードのプロトタイプ, 対象) の昇順にのみ並べる
+#      （直前のアクションより前に並ぶアクションは、直前のアクションより前から選べた場合に限り省く）。
+#   2. 重複除去：ターン内の各局面を局面ハッシュで記録し、別の順序で到達済みの局面は展開しない。
+#      ターンの終わりの局面もハッシュで記録し、評価は一意な局面ごとに1回だけ行う。
+# トレーナーズ（ドロー・山札の操作を含む）とにげるは可換とみなさず、正規化の区切りにする。
+# ワザで終わる列には、ワザを使う前の局面でのワザ自体の評価（attack_score）を終了局面の評価に加える。
+# 山札の並びは探索用乱数で並べ替えてから展開するため、実際のドロー順は見ない。
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from engine.match import Match
+from engine.actions import legal_actions, ActionCodec, END_TURN, ATTACK, RETREAT, SUMMON, ATTACH, EVOLVE
+from engine.agents import AIControllerAgent
+from utils.tracing import tracer
+
+# 互いに可換なアクションの種類（自分の場と手札だけを決まった形で変更する）
+COMMUTATIVE_KINDS = (SUMMON, ATTACH, EVOLVE)
+
+
+@dataclass
+class PlannerStats:
+    """
+    1回の計画の統計
+
+    nodes は実行したアクション数、end_states は評価した一意なターン終了局面の数、
+    transpositions は別の順序で到達済みだったため展開しなかった局面の数、
+    duplicate_ends は評価済みのターン終了局面に再び到達した数、reordered は正規化で省いたアクション数。
+    completed は展開数の上限（max_nodes）に達せずに網羅できたか。
+    """
+    nodes: int = 0
+    end_states: int = 0
+    transpositions: int = 0
+    duplicate_ends: int = 0
+    reordered: int = 0
+    elapsed: float = 0.0
+    value: float = 0.0
+    plan: List[int] = field(default_factory=list)
+    completed: bool = True
+
+
+class TurnPlanner:
+    """
+    現在の局面から1ターン分の完全なアクション列（最後はワザかターン終了）を列挙して評価する
+
+    試合を複製し、変更ジャーナル上で深さ優先に展開する。局面の評価は score(試合, 担当プレイヤー) で、
+    値が大きいほど良い（例: AIController._evaluate_end_state）。
+    attack_score(試合, 担当プレイヤー, ワザ番号のリスト) を指定すると、ワザで終わる列の評価に
+    ワザを使う前の局面での各ワザの評価を加える（例: AIController._score_planned_attacks）。
+    """
+
+    def __init__(self, match: Match, side: str, score: Callable[[Match, str], float],
+                 max_actions: int = 10, max_nodes: int = 20000, allow_retreat: bool = True,
+                 seed: Optional[int] = None,
+                 attack_score: Optional[Callable[[Match, str, List[int]], List[float]]] = None):
+        """
+        Args:
+            score: ターン終了局面の評価関数
+            attack_score: ワザの評価関数（ワザ番号ごとの値のリストを返す・Noneなら加えない）
+            max_actions: 1ターンに行うワザ・ターン終了以外のアクションの最大数
+            max_nodes: 展開するアクション数の上限（超えたら以降はその場でターンを終える列のみ評価）
+            allow_retreat: にげるを候補に含めるか（1ターンに1回まで）
+        """
+        self.side = side
+        self.score = score
+        self.attack_score = attack_score
+        self.max_actions = max_actions
+        self.max_nodes = max_nodes
+        self.allow_retreat = allow_retreat
+        self.rng = random.Random(seed)
+
+        self.match = match.clone(agents={"player": AIControllerAgent(), "opponent": AIControllerAgent()})
+        self.match.rng = random.Random(self.rng.getrandbits(Match.SEED_BITS))
+        state = self.match.game_state
+        for player in ("player", "opponent"):
+            self.rng.shuffle(state.get_deck(player))
+        state.enable_hashing()
+
+        # 展開済みの局面と、評価済みのターン終了局面の評価値
+        self.seen: Set[tuple] = set()
+        self.end_values: Dict[tuple, float] = {}
+        self.stats = PlannerStats()
+
+    def run(self) -> PlannerStats:
+        """列挙して最善のアクション列（stats.plan）と評価値を返す"""
+        stats = self.stats
+        state = self.match.game_state
+        start = time.perf_counter()
+
+        with tracer.suspended():
+            mark = state.mark()
+            result = self._expand(0, not self.allow_retreat, None, frozenset())
+            state.undo_to(mark)
+
+        if result is not None:
+            stats.value, stats.plan = result
+        else:
+            stats.value, stats.plan = self._evaluate(), [END_TURN]
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _state_key(self) -> tuple:
+        """局面ハッシュに含まれないスタジアムを加えた局面のキー"""
+        state = self.match.game_state
+        stadium = state.stadium.prototype if state.stadium is not None else None
+        return state.zobrist_hash, id(stadium)
+
+    def _canonical_key(self, action: int) -> Optional[tuple]:
+        """可換なアクションの並び順のキー（手札のインデックスによらない）・可換でなければNone"""
+        kind, argument, target = ActionCodec.decode(action)
+        if kind not in COMMUTATIVE_KINDS:
+            return None
+        card = self.match.game_state.get_hand(self.side)[argument]
+        return kind, card.prototype.id, target
+
+    def _evaluate(self) -> float:
+        """ターン終了局面の評価（同じ局面は1回だけ評価）"""
+        key = self._state_key()
+        value = self.end_values.get(key)
+        if value is not None:
+            self.stats.duplicate_ends += 1
+            return value
+        value = self.score(self.match, self.side)
+        self.end_values[key] = value
+        self.stats.end_states += 1
+        return value
+
+    def _expand(self, depth: int, retreated: bool, previous: Optional[tuple],
+                previous_available: frozenset) -> Optional[Tuple[float, List[int]]]:
+        """
+        現在の局面からのアクション列を展開し、(評価値, 最善のアクション列)を返す（展開済みの局面ならNone）
+
+        previous は直前の可換なアクションのキー、previous_available はその前の局面で選べた可換なアクションのキー。
+        """
+        match = self.match
+        state = match.game_state
+        stats = self.stats
+
+        key = self._state_key() + (retreated, depth)
+        if key in self.seen:
+            stats.transpositions += 1
+            return None
+        self.seen.add(key)
+
+        actions = list(legal_actions(state, self.side, unique=True))
+        if depth >= self.max_actions or stats.nodes >= self.max_nodes:
+            if stats.nodes >= self.max_nodes:
+                stats.completed = False
+            actions = [action for action in actions if ActionCodec.ends_turn(action)]
+        elif retreated:
+            actions = [action for action in actions if ActionCodec.kind(action) != RETREAT]
+
+        # ワザの評価（ワザを使う前の局面でまとめて評価）
+        attack_values: Dict[int, float] = {}
+        if self.attack_score is not None:
+            attacks = [action for action in actions if ActionCodec.kind(action) == ATTACK]
+            if attacks:
+                values = self.attack_score(match, self.side, [ActionCodec.decode(action)[1] for action in attacks])
+                attack_values = dict(zip(attacks, values))
+
+        canonical_keys = {action: self._canonical_key(action) for action in actions}
+        available = frozenset(canonical_key for canonical_key in canonical_keys.values() if canonical_key is not None)
+
+        best: Optional[Tuple[float, List[int]]] = None
+        for action in actions:
+            if action == END_TURN:
+                value, plan = self._evaluate(), [END_TURN]
+            else:
+                canonical_key = canonical_keys[action]
+                if (canonical_key is not None and previous is not None and canonical_key < previous
+                        and canonical_key in previous_available):
+                    stats.reordered += 1
+                    continue
+
+                mark = state.mark()
+                success, _ = match.apply(action, self.side)
+                stats.nodes += 1
+                if not success:
+                    state.undo_to(mark)
+                    continue
+
+                if ActionCodec.ends_turn(action) or match.is_over:
+                    value, plan = self._evaluate() + attack_values.get(action, 0.0), [action]
+                else:
+                    result = self._expand(depth + 1, retreated or ActionCodec.kind(action) == RETREAT,
+                                          canonical_key, available)
+                    if result is None:
+                        state.undo_to(mark)
+                        continue
+                    value, plan = result[0], [action] + result[1]
+                state.undo_to(mark)
+
+            if best is None or value > best[0]:
+                best = (value, plan)
+        return best
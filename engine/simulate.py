@@ -0,0 +1,315 @@
+# engine/simulate.py
+# Version: 1.4
+# Updated: 2026-10-18 08:00
+# デッキ対戦バッチシミュレータ：ProcessPoolExecutorによるAI対AI大量対戦
+#
+# 使い方:
+#   python -m engine.simulate --decks 1,2 --games 100000 --workers 8 --output results.jsonl
+#   python -m engine.simulate --decks 1,2 --seed 42 --games 1000      # 実行全体を再現
+#   python -m engine.simulate --decks 2,1 --replay 1234567890          # JSONLのseedから1試合を再現
+#   python -m engine.simulate --decks 1,2 --fixed-order                # ターンプランナーなし（従来の固定の順序・高速）
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from engine.match import Match
+from engine.agents import AIControllerAgent
+from utils.tracing import tracer
+
+# ワーカープロセスごとのデッキデータ（初期化時に1回だけ読み込む）
+_worker_decks: Dict[int, list] = {}
+_worker_max_turns: int = Match.DEFAULT_MAX_TURNS
+_worker_use_planner: bool = True
+
+
+def _init_worker(deck_ids: Tuple[int, int], max_turns: int, quiet: bool = True,
+                 trace_spec: Optional[str] = None, use_planner: bool = True):
+    """ワーカープロセスの初期化：CSV読み込み・標準出力の抑制・トレース設定"""
+    global _worker_max_turns, _worker_use_planner
+
+    # 既定ではトレースはすべて無効（指定時のみリングバッファへ記録）
+    tracer.configure(trace_spec or "off")
+
+    if quiet:
+        # 既存コードのデバッグ出力を捨てる（大量対戦時のボトルネック回避）
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+
+    from database.database_manager import DatabaseManager
+    database_manager = DatabaseManager(
+        cards_csv_path=os.path.join(PROJECT_ROOT, "cards", "cards.csv"),
+        deck_csv_path=os.path.join(PROJECT_ROOT, "cards", "deck.csv")
+    )
+    for deck_id in deck_ids:
+        _worker_decks[deck_id] = database_manager.get_deck_cards(deck_id)
+    _worker_max_turns = max_turns
+    _worker_use_planner = use_planner
+
+
+def play_game(task: Tuple[int, int, int, int]) -> dict:
+    """
+    1試合を実行して結果を辞書で返す（ワーカープロセスで実行）
+
+    Args:
+        task: (試合番号, プレイヤー側デッキID, 相手側デッキID, 試合シード)
+    """
+    game_index, player_deck_id, opponent_deck_id, seed = task
+    started = time.perf_counter()
+    tracer.clear()
+
+    try:
+        agents = {side: AIControllerAgent(use_planner=_worker_use_planner) for side in ("player", "opponent")}
+        match = Match(agents=agents, max_turns=_worker_max_turns, seed=seed)
+        result = match.run(Match.build_deck(_worker_decks[player_deck_id]),
+                           Match.build_deck(_worker_decks[opponent_deck_id]))
+    except Exception as e:
+        # 直近のトレースを添えてエラーを記録（対戦全体は止めない）
+        return {
+            "game": game_index,
+            "player_deck": player_deck_id,
+            "opponent_deck": opponent_deck_id,
+            "seed": seed,
+            "error": f"{type(e).__name__}: {e}",
+            "trace": tracer.format_events()[-200:]
+        }
+
+    winner_deck = None
+    if result.winner == "player":
+        winner_deck = player_deck_id
+    elif result.winner == "opponent":
+        winner_deck = opponent_deck_id
+
+    return {
+        "game": game_index,
+        "player_deck": player_deck_id,
+        "opponent_deck": opponent_deck_id,
+        "seed": seed,
+        "first_player": result.first_player,
+        "winner": result.winner,
+        "winner_deck": winner_deck,
+        "reason": result.reason,
+        "turns": result.turns,
+        "player_prizes_taken": result.player_prizes_taken,
+        "opponent_prizes_taken": result.opponent_prizes_taken,
+        "deck_out": result.deck_out,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+def _build_tasks(deck_ids: Tuple[int, int], games: int, base_seed: int) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    試合タスクを生成（先手・後手の偏りを避けるため陣営を交互に入れ替える）
+
+    試合シードは基準シードと試合番号から導出するため、ワーカー数やchunksizeに関係なく
+    各試合は独立した乱数ストリームを持ち、同じ基準シードなら実行全体が再現される。
+    """
+    deck_a, deck_b = deck_ids
+    for game_index in range(games):
+        seed = Match.derive_seed(base_seed, game_index)
+        if game_index % 2 == 0:
+            yield game_index, deck_a, deck_b, seed
+        else:
+            yield game_index, deck_b, deck_a, seed
+
+
+def wilson_interval(wins: int, total: int, z: float = 1.96) -> Tuple[float, float]:
+    """勝率のWilsonスコア信頼区間（既定は95%）"""
+    if total == 0:
+        return 0.0, 0.0
+    p = wins / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class SimulationSummary:
+    """
+    対戦結果の集計
+
+    勝ち数は deck_ids の何番目のデッキか（0/1）で数える（同じデッキ同士の対戦でも両側を区別する）。
+    """
+
+    def __init__(self, deck_ids: Tuple[int, int]):
+        self.deck_ids = deck_ids
+        self.games = 0
+        self.wins = [0, 0]
+        self.draws = 0
+        self.deck_outs = 0
+        self.total_turns = 0
+        self.first_player_wins = 0
+        self.errors = 0
+        self.reasons: Dict[str, int] = {}
+
+    def add(self, record: dict):
+        """1試合分の結果を加算"""
+        if "error" in record:
+            self.errors += 1
+            return
+
+        self.games += 1
+        self.total_turns += record["turns"]
+        self.reasons[record["reason"]] = self.reasons.get(record["reason"], 0) + 1
+        if record["deck_out"]:
+            self.deck_outs += 1
+
+        if record["winner"] is None:
+            self.draws += 1
+        else:
+            self.wins[self.winner_index(record)] += 1
+            if record["winner"] == record["first_player"]:
+                self.first_player_wins += 1
+
+    @staticmethod
+    def winner_index(record: dict) -> int:
+        """勝ったデッキが deck_ids の何番目か（_build_tasks と同じく偶数番の試合はプレイヤー側が0番目）"""
+        player_index = record["game"] % 2
+        return player_index if record["winner"] == "player" else 1 - player_index
+
+    def format_report(self, elapsed: float) -> List[str]:
+        """集計結果のレポート行を作成"""
+        lines = [f"=== シミュレーション結果: デッキ{self.deck_ids[0]} vs デッキ{self.deck_ids[1]} ==="]
+        lines.append(f"試合数: {self.games}  所要時間: {elapsed:.1f}秒"
+                     f"（{self.games / elapsed if elapsed > 0 else 0:.1f}試合/秒）")
+
+        mirror = self.deck_ids[0] == self.deck_ids[1]
+        for index, deck_id in enumerate(self.deck_ids):
+            wins = self.wins[index]
+            rate = wins / self.games if self.games else 0.0
+            low, high = wilson_interval(wins, self.games)
+            label = f"デッキ{deck_id}（{index + 1}つ目）" if mirror else f"デッキ{deck_id}"
+            lines.append(f"{label}: {wins}勝  勝率 {rate:.2%}  95%信頼区間 [{low:.2%}, {high:.2%}]")
+
+        decided = self.games - self.draws
+        if decided:
+            low, high = wilson_interval(self.first_player_wins, decided)
+            lines.append(f"先攻勝率: {self.first_player_wins / decided:.2%}  95%信頼区間 [{low:.2%}, {high:.2%}]")
+
+        lines.append(f"引き分け（ターン上限等）: {self.draws}")
+        lines.append(f"山札切れ決着: {self.deck_outs}")
+        if self.errors:
+            lines.append(f"エラーで中断した試合: {self.errors}（JSONLのtraceを参照）")
+        if self.games:
+            lines.append(f"平均ターン数: {self.total_turns / self.games:.1f}")
+        lines.append("決着理由: " + ", ".join(f"{reason}={count}" for reason, count in sorted(self.reasons.items())))
+        return lines
+
+
+def run_simulation(deck_ids: Tuple[int, int], games: int, workers: Optional[int] = None,
+                   output_path: Optional[str] = None, max_turns: int = Match.DEFAULT_MAX_TURNS,
+                   chunksize: Optional[int] = None, progress_interval: int = 1000,
+                   trace_spec: Optional[str] = None, base_seed: Optional[int] = None,
+                   use_planner: bool = True) -> SimulationSummary:
+    """
+    独立したAI対AI対戦をプロセスプールで実行し、結果をJSONLに逐次書き出す
+
+    base_seed未指定時はOSの乱数から決め、レポートに表示する（再実行時に --seed で指定）。
+    use_planner=False なら両方のAIがターンプランナーを使わず固定の順序で行動する（探索がないため高速）。
+
+    Returns:
+        SimulationSummary: 集計結果
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        # タスク送信のオーバーヘッドを抑えつつ進捗が滞らない程度のまとまり
+        chunksize = max(1, min(256, games // (workers * 16) or 1))
+    if base_seed is None:
+        base_seed = random.SystemRandom().getrandbits(Match.SEED_BITS)
+
+    summary = SimulationSummary(deck_ids)
+    output_file = open(output_path, "w", encoding="utf-8") if output_path else None
+    started = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(tuple(deck_ids), max_turns, True, trace_spec, use_planner)) as executor:
+            for record in executor.map(play_game, _build_tasks(deck_ids, games, base_seed), chunksize=chunksize):
+                summary.add(record)
+                if "error" in record:
+                    print(f"  試合{record['game']}でエラー: {record['error']}", file=sys.stderr)
+                if output_file:
+                    output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+                if progress_interval and summary.games and summary.games % progress_interval == 0:
+                    elapsed = time.perf_counter() - started
+                    print(f"  {summary.games}/{games}試合完了（{elapsed:.1f}秒）", file=sys.stderr)
+    finally:
+        if output_file:
+            output_file.close()
+
+    for line in summary.format_report(time.perf_counter() - started):
+        print(line)
+    print(f"基準シード: {base_seed}")
+    return summary
+
+
+def replay_game(deck_ids: Tuple[int, int], seed: int, max_turns: int = Match.DEFAULT_MAX_TURNS,
+                trace_spec: Optional[str] = None, use_planner: bool = True) -> dict:
+    """
+    シードから1試合を現在のプロセスで再現する（deck_idsはJSONLの player_deck, opponent_deck の順）
+
+    trace_spec指定時はトレースを標準エラー出力へ表示する。
+    """
+    _init_worker(tuple(dict.fromkeys(deck_ids)), max_turns, quiet=False, trace_spec=trace_spec,
+                 use_planner=use_planner)
+    tracer.echo = bool(trace_spec)
+    tracer.echo_stream = sys.stderr
+    return play_game((0, deck_ids[0], deck_ids[1], seed))
+
+
+def _parse_decks(value: str) -> Tuple[int, int]:
+    """--decks 引数（例: 1,2）を解析"""
+    try:
+        deck_ids = tuple(int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"デッキIDは整数で指定してください: {value}")
+    if len(deck_ids) != 2:
+        raise argparse.ArgumentTypeError(f"デッキIDは2つ指定してください: {value}")
+    return deck_ids
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインエントリーポイント"""
+    parser = argparse.ArgumentParser(description="ポケモンカード AI対AI バッチシミュレータ")
+    parser.add_argument("--decks", type=_parse_decks, required=True, help="対戦させるデッキID（例: 1,2）")
+    parser.add_argument("--games", type=int, default=1000, help="試合数")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定: CPU数）")
+    parser.add_argument("--output", default="simulation_results.jsonl", help="試合ごとの結果を書き出すJSONLファイル")
+    parser.add_argument("--max-turns", type=int, default=Match.DEFAULT_MAX_TURNS, help="引き分けとするターン上限")
+    parser.add_argument("--chunksize", type=int, default=None, help="ワーカーへ一度に送る試合数")
+    parser.add_argument("--seed", type=int, default=None, help="基準シード（同じ値で実行全体を再現）")
+    parser.add_argument("--replay", type=int, default=None, metavar="SEED",
+                        help="JSONLに記録された試合シードで1試合だけ再現（--decks はプレイヤー側,相手側の順）")
+    parser.add_argument("--trace", default=None,
+                        help="有効にするトレースカテゴリ（例: ai,damage:info）。エラー時にJSONLへ出力")
+    parser.add_argument("--fixed-order", action="store_true",
+                        help="ターンプランナーを使わず固定の順序で行動する（従来のAI・高速）")
+    args = parser.parse_args(argv)
+
+    if args.replay is not None:
+        record = replay_game(args.decks, args.replay, max_turns=args.max_turns, trace_spec=args.trace,
+                             use_planner=not args.fixed_order)
+        print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    if args.games <= 0:
+        parser.error("--games は1以上を指定してください")
+
+    run_simulation(args.decks, args.games, workers=args.workers, output_path=args.output,
+                   max_turns=args.max_turns, chunksize=args.chunksize, trace_spec=args.trace,
+                   base_seed=args.seed, use_planner=not args.fixed_order)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
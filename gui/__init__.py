@@ -1,11 +1,13 @@
 # gui/__init__.py
-# Version: 4.33
-# Updated: 2025-06-24 14:35
+# Version: 4.35
+# Updated: 2026-10-18 05:30
 # GUIモジュール初期化：MainGUI別名削除・統一版
 
 from .main_gui import PokemonTCGGUI
 from .game_controller import GameController
 from .ai_controller import AIController
+from .ai_worker import AITurnWorker
+from .ai_weights import AIWeights
 from .dialog_manager import DialogManager
 from .card_actions import CardActions
 from .battle_field_ui import BattleFieldUI
@@ -18,6 +20,8 @@ __all__ = [
     'PokemonTCGGUI',
     'GameController', 
     'AIController',
+    'AITurnWorker',
+    'AIWeights',
     'DialogManager',
     'CardActions',
     'BattleFieldUI',
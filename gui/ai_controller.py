@@ -1,53 +1,155 @@
 # gui/ai_controller.py
-# Version: 4.22
-# Updated: 2025-06-10 16:15
-# AIコントローラー：無色エネルギーシステム対応版
+# Version: 4.31
+# Updated: 2026-10-18 07:30
+# AIコントローラー：無色エネルギーシステム対応・engine.Match経由・トレース対応・ターンプランナー・重みベクトル版
 
-from typing import List, Optional
 import random
+from typing import List, Optional, Tuple
 from models.game_state import GameState
 from models.card import Card, CardType, TrainerType
 from utils.energy_cost_checker import EnergyCostChecker
 from utils.damage_calculator import DamageCalculator
+from utils.tracing import tracer, AI, DEBUG
+from utils.evaluation_cache import EvaluationCache, MISSING
+from engine.match import Match
+from engine.planner import TurnPlanner
+from engine.actions import END_TURN, TRAINER, RETREAT, ActionCodec
+from .ai_weights import AIWeights
 
 class AIController:
-    """AIの行動を制御するクラス（無色エネルギーシステム対応版）"""
+    """AIの行動を制御するクラス（無色エネルギーシステム対応版・操作はengine.Matchに委譲）"""
     
-    def __init__(self, game_state: GameState, card_actions):
+    # 評価のメモ化キャッシュ（プロセス内の全コントローラーで共有・戦略の重みに依存しない項のみ保持）
+    # ワザ評価: (攻撃側, 防御側のプロトタイプ, ワザ番号, 攻撃側のエネルギー, 防御側のダメージ) → 評価の各項
+    attack_cache = EvaluationCache(maxsize=65536)
+    # エネルギー装着優先度: (ポケモンのプロトタイプ, エネルギー) → (ワザごとの使用可否, 無色エネルギー効率ボーナス)
+    energy_cache = EvaluationCache(maxsize=65536)
+    
+    # 起動時に読み込むヒューリスティックの重み（ai_weights.json・なければ既定値）
+    default_weights = AIWeights.load_default()
+    
+    def __init__(self, game_state: GameState, card_actions, side: str = "opponent",
+                 match: Optional[Match] = None, use_planner: bool = True,
+                 weights: Optional[AIWeights] = None):
         self.game_state = game_state
         self.card_actions = card_actions
         
+        # 担当プレイヤー（ヘッドレス対戦では両陣営に配置可能）
+        self.side = side
+        if match is None:
+            match = getattr(card_actions, 'match', None) or Match(game_state)
+        self.match = match
+        
         # AI行動回数制限
         self.max_actions_per_turn = 5
         self.current_action_count = 0
         
         # AI戦略フラグ（無色エネルギー対応強化）
         self.prefer_aggressive_play = True  # 攻撃的なプレイを好む
-        self.energy_management_priority = 0.8  # エネルギー管理の優先度
-        self.colorless_efficiency_weight = 1.2  # 無色エネルギー効率の重み
+        
+        # ヒューリスティックの重み（エネルギー管理の優先度・無色エネルギー効率の重みなど）
+        self.weights = weights or AIController.default_weights
+        
+        # 外部のワザ評価器（score_attacks(match, side, attack_numbers) を持つもの。例: rl.NetworkAttackEvaluator）
+        # 設定時は _evaluate_attack_with_colorless_efficiency の代わりに使う
+        # ワザの選択は固定の順序の行動でのみ行うため、設定時は use_planner に関係なく固定の順序で行動する
+        self.attack_evaluator = None
+        
+        # ターンプランナー（engine.planner）でターン全体の行動列を選ぶか
+        # Falseなら従来の固定の順序（たね→エネルギー→進化→トレーナーズ→ワザ）で行動する（探索のロールアウト用）
+        self.use_planner = use_planner
+        self.planner_max_nodes = 20000
+        self.last_planner_stats = []
+        self._planner_rng = None
+        # ターン終了局面の評価のうち自分のポケモン1匹分の項（重みに依存するためコントローラーごと）
+        # (カードのハッシュ, バトル場か) → 評価値。カードのハッシュはプロトタイプ・ダメージ・特殊状態・エネルギーで決まる
+        self._pokemon_state_cache = EvaluationCache(maxsize=4096)
+    
+    # 担当プレイヤーの領域アクセス
+    @property
+    def my_hand(self) -> List[Card]:
+        return self.game_state.get_hand(self.side)
+    
+    @property
+    def my_active(self) -> Optional[Card]:
+        return self.game_state.get_active(self.side)
+    
+    @property
+    def my_bench(self) -> List[Optional[Card]]:
+        return self.game_state.get_bench(self.side)
+    
+    @property
+    def enemy_active(self) -> Optional[Card]:
+        return self.game_state.get_active(GameState.get_opponent(self.side))
+    
+    def decide_mulligan_penalty_draw(self, max_draw: int) -> int:
+        """
+        AIがマリガンペナルティで何枚引くかを戦略的に決定
+        Args:
+            max_draw:最大ドロー可能枚数
+            Returns:実際に引く枚数（0〜max_draw）
+        """
+        try:
+            # 基本的な判断ロジック：手札の質を考慮
+            current_hand_size = len(self.my_hand)
+            
+            # 手札が少ない場合は多めに引く
+            if current_hand_size <= 5:
+                return max_draw  # 最大まで引く
+            
+            # 手札に十分なたねポケモンがある場合は控えめに
+            basic_pokemon_count = len([card for card in self.my_hand if self._is_basic_pokemon(card)])
+            
+            if basic_pokemon_count >= 3:
+                return max(0, max_draw - 1)  # 1枚少なく引く
+            
+            # その他の場合は中程度
+            return min(max_draw, max(1, max_draw // 2))
+            
+        except Exception as e:
+            print(f"AI マリガンペナルティ判断エラー: {e}")
+            return max_draw  # エラー時は最大まで引く
+    
+    def choose_replacement(self, bench_options: List[Tuple[int, Card]]) -> int:
+        """きぜつ後にバトル場へ出すベンチポケモンを選択（残りHPが最も多いポケモン）"""
+        best_index, _ = max(bench_options, key=lambda option: option[1].current_hp)
+        return best_index
     
     def execute_ai_turn(self) -> List[str]:
         """AIのターンを実行し、行動メッセージのリストを返す（先攻制限対応版）"""
         messages = []
         
-        if self.game_state.current_player != "opponent":
+        if self.game_state.current_player != self.side:
             messages.append("AIのターンではありません。")
             return messages
         
         try:
-            print(f"AI行動開始: ターン{self.game_state.turn_count}")
+            if tracer.ai <= DEBUG:
+                tracer.log(AI, DEBUG, f"AI行動開始: ターン{self.game_state.turn_count}")
             
             # 🆕 先攻制限チェック表示
             if self.game_state.is_first_player_first_turn():
-                print("AI: 先攻最初のターン - 攻撃・サポート使用不可")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, "AI: 先攻最初のターン - 攻撃・サポート使用不可")
             elif self.game_state.is_current_player_first_turn():
-                print("AI: 最初のターン - 進化不可")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, "AI: 最初のターン - 進化不可")
             else:
-                print("AI: 通常ターン - 全アクション可能")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, "AI: 通常ターン - 全アクション可能")
             
             # 行動回数リセット
             self.current_action_count = 0
             
+            # ワザ評価器の設定時は、評価器を使う固定の順序で行動する
+            if self.use_planner and self.attack_evaluator is None:
+                self._execute_planned_turn(messages)
+                if not messages or self.current_action_count == 0:
+                    messages.append("相手は何もできませんでした。")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, f"AI行動完了: {self.current_action_count}回の行動を実行")
+                return messages
+            
             # AIの行動優先度（先攻制限対応版）
             self._ai_play_basic_pokemon(messages)
             
@@ -64,7 +166,8 @@ class AIController:
             if not messages or self.current_action_count == 0:
                 messages.append("相手は何もできませんでした。")
             
-            print(f"AI行動完了: {self.current_action_count}回の行動を実行")
+            if tracer.ai <= DEBUG:
+                tracer.log(AI, DEBUG, f"AI行動完了: {self.current_action_count}回の行動を実行")
             
         except Exception as e:
             print(f"AI行動エラー: {e}")
@@ -72,6 +175,133 @@ class AIController:
         
         return messages
 
+    def _execute_planned_turn(self, messages: List[str]):
+        """
+        ターンプランナーで選んだ行動列を実行
+        
+        トレーナーズ（ドロー・山札の操作）の結果は計画時の想定と異なるため、使った後は残りのターンを計画し直す。
+        """
+        # 行動メッセージの組み立てはMCTSのアクション実行を共用（ai.mcts は本モジュールを読み込むため遅延読み込み）
+        from ai.mcts import TurnActions
+        
+        if self._planner_rng is None:
+            self._planner_rng = random.Random(Match.derive_seed(self.match.seed, 5 if self.side == "player" else 6))
+        self.last_planner_stats = []
+        retreated = False
+        
+        while not self.match.is_over and self.game_state.current_player == self.side:
+            planner = TurnPlanner(self.match, self.side, self._evaluate_end_state,
+                                  max_actions=max(0, self.max_actions_per_turn - self.current_action_count),
+                                  max_nodes=self.planner_max_nodes, allow_retreat=not retreated,
+                                  seed=self._planner_rng.getrandbits(Match.SEED_BITS),
+                                  attack_score=self._score_planned_attacks)
+            stats = planner.run()
+            self.last_planner_stats.append(stats)
+            if tracer.ai <= DEBUG:
+                plan_text = ", ".join(ActionCodec.to_string(action) for action in stats.plan)
+                tracer.log(AI, DEBUG, f"AI計画: [{plan_text}]（評価{stats.value:.1f}・終了局面{stats.end_states}・"
+                                      f"展開{stats.nodes}・重複{stats.transpositions + stats.duplicate_ends}）")
+            
+            replan = False
+            for action in stats.plan:
+                if action == END_TURN:
+                    return
+                success, action_messages = TurnActions.apply(self.match, self.side, action)
+                messages.extend(action_messages)
+                if not success:
+                    return
+                self.current_action_count += 1
+                retreated = retreated or ActionCodec.kind(action) == RETREAT
+                if ActionCodec.ends_turn(action):
+                    return
+                if ActionCodec.kind(action) == TRAINER:
+                    replan = True
+                    break
+            if not replan:
+                return
+    
+    def _evaluate_end_state(self, match: Match, side: str) -> float:
+        """
+        ターンプランナー用：ターン終了時点の局面の評価値（大きいほど side に有利）
+        
+        サイドの差・相手の場の残りHP・自分の場の育ち具合（HP・エネルギー・使えるワザ）を
+        重み（self.weights の state_*）で合計する。ワザ自体の評価は _score_planned_attacks で加える。
+        """
+        try:
+            if match.is_over:
+                if match.winner is None:
+                    return 0.0
+                return 1e6 if match.winner == side else -1e6
+            
+            weights = self.weights
+            state = match.game_state
+            opponent = GameState.get_opponent(side)
+            
+            # サイドの差
+            score = (len(state.get_prizes(opponent)) - len(state.get_prizes(side))) * weights.state_prize
+            
+            # 相手の場のポケモンの残りHP（ダメージを与えるほど高評価）・特殊状態
+            enemy_active = state.get_active(opponent)
+            for pokemon in [enemy_active] + list(state.get_bench(opponent)):
+                if pokemon is not None:
+                    score -= pokemon.current_hp * weights.state_enemy_hp
+            if enemy_active is not None and enemy_active.condition_mask:
+                score += weights.state_enemy_condition
+            
+            # 自分の場のポケモン（局面ハッシュが有効ならカードのハッシュで1匹ごとにキャッシュ）
+            hashed = state.zobrist_hash is not None
+            my_active = state.get_active(side)
+            for active, pokemon in [(True, my_active)] + [(False, pokemon) for pokemon in state.get_bench(side)]:
+                if pokemon is None:
+                    continue
+                if not hashed:
+                    score += self._evaluate_pokemon_state(pokemon, active)
+                    continue
+                key = (pokemon.zhash, active)
+                value = self._pokemon_state_cache.get(key)
+                if value is MISSING:
+                    value = self._evaluate_pokemon_state(pokemon, active)
+                    self._pokemon_state_cache.put(key, value)
+                score += value
+            
+            return score
+        
+        except Exception as e:
+            print(f"AI局面評価エラー: {e}")
+            return 0.0
+    
+    def _evaluate_pokemon_state(self, pokemon: Card, active: bool) -> float:
+        """ターン終了局面の評価のうち自分のポケモン1匹分（ベンチ・残りHP・進化段階・エネルギー・使えるワザ）"""
+        weights = self.weights
+        score = 0.0 if active else weights.state_bench_slot
+        if pokemon.hp:
+            score += pokemon.current_hp * weights.state_hp_factor
+        score += pokemon.evolve_step * weights.state_evolution
+        score += len(pokemon.attached_energy) * weights.state_energy
+        
+        attack_states, colorless_efficiency_bonus = self._get_energy_profile(pokemon)
+        for attack_state in attack_states:
+            if attack_state == self._ATTACK_USABLE:
+                score += weights.state_active_attack if active else weights.state_bench_attack
+            elif attack_state == self._ATTACK_ENABLED_BY_ENERGY:
+                score += weights.state_attack_one_energy_away
+        return score + colorless_efficiency_bonus
+    
+    def _score_planned_attacks(self, match: Match, side: str, attack_numbers: List[int]) -> List[float]:
+        """ターンプランナー用：ワザを使う前の局面での各ワザの評価値（_evaluate_attack_with_colorless_efficiency と同じ重み）"""
+        try:
+            state = match.game_state
+            attacker = state.get_active(side)
+            defender = state.get_active(GameState.get_opponent(side))
+            if attacker is None or defender is None:
+                return [0.0] * len(attack_numbers)
+            return [self._evaluate_attack_with_colorless_efficiency(attack_number, attacker, defender)
+                    for attack_number in attack_numbers]
+        
+        except Exception as e:
+            print(f"AI計画ワザ評価エラー: {e}")
+            return [0.0] * len(attack_numbers)
+    
     def _increment_action_count(self) -> bool:
         """行動回数をカウントし、制限チェック"""
         self.current_action_count += 1
@@ -81,40 +311,34 @@ class AIController:
         """AIがたねポケモンを場に出す（従来機能維持）"""
         try:
             # たねポケモンのみを厳密にフィルタリング
-            basic_pokemon = [card for card in self.game_state.opponent_hand 
+            basic_pokemon = [card for card in self.my_hand 
                             if self._is_basic_pokemon(card)]
             
             if not basic_pokemon:
                 return
             
             # バトル場が空の場合は最初のポケモンを出す
-            if not self.game_state.opponent_active:
+            if not self.my_active:
                 pokemon = basic_pokemon[0]
-                self.game_state.opponent_hand.remove(pokemon)
-                self.game_state.opponent_active = pokemon
-                pokemon.summoned_this_turn = True
-                messages.append(f"相手が{pokemon.name}をバトル場に出した。")
-                self._increment_action_count()
+                success, _ = self.match.play_basic_pokemon(self.side, pokemon)
+                if success:
+                    messages.append(f"相手が{pokemon.name}をバトル場に出した。")
+                    self._increment_action_count()
                 return
             
             # ベンチに空きがあればたねポケモンを出す
-            for i, slot in enumerate(self.game_state.opponent_bench):
-                if slot is None and basic_pokemon and self._increment_action_count():
-                    pokemon = basic_pokemon[0]
-                    self.game_state.opponent_hand.remove(pokemon)
-                    self.game_state.opponent_bench[i] = pokemon
-                    pokemon.summoned_this_turn = True
+            if None in self.my_bench and self._increment_action_count():
+                pokemon = basic_pokemon[0]
+                success, _ = self.match.play_basic_pokemon(self.side, pokemon)
+                if success:
                     messages.append(f"相手が{pokemon.name}をベンチに出した。")
-                    basic_pokemon.remove(pokemon)
-                    break
         
         except Exception as e:
             print(f"AI基本ポケモン配置エラー: {e}")
     
     def _is_basic_pokemon(self, card: Card) -> bool:
         """カードがたねポケモンかどうかを厳密にチェック"""
-        return (card.card_type == CardType.POKEMON and 
-                getattr(card, 'evolve_step', 0) == 0)
+        return Match.is_basic_pokemon(card)
     
     def _ai_attach_energy_with_colorless_strategy(self, messages: List[str]):
         """AIがエネルギーをつける（v4.22無色エネルギー戦略版）"""
@@ -122,7 +346,7 @@ class AIController:
             if self.game_state.energy_played_this_turn:
                 return
             
-            energy_cards = [card for card in self.game_state.opponent_hand 
+            energy_cards = [card for card in self.my_hand 
                            if card.card_type == CardType.ENERGY]
             
             if not energy_cards:
@@ -135,12 +359,9 @@ class AIController:
                 energy = energy_cards[0]
                 target_location, target_pokemon = best_target
                 
-                self.game_state.opponent_hand.remove(energy)
-                if not hasattr(target_pokemon, 'attached_energy'):
-                    target_pokemon.attached_energy = []
-                target_pokemon.attached_energy.append(energy)
-                
-                self.game_state.energy_played_this_turn = True
+                success, _ = self.match.attach_energy(self.side, energy, target_pokemon)
+                if not success:
+                    return
                 
                 location_text = "バトル場" if target_location == "active" else "ベンチ"
                 energy_type = getattr(energy, 'energy_kind', energy.name)
@@ -155,13 +376,13 @@ class AIController:
             candidates = []
             
             # バトル場のポケモンをチェック
-            if self.game_state.opponent_active:
-                pokemon = self.game_state.opponent_active
+            if self.my_active:
+                pokemon = self.my_active
                 priority = self._calculate_energy_priority_with_colorless(pokemon, "active")
                 candidates.append((priority, "active", pokemon))
             
             # ベンチのポケモンをチェック
-            for i, pokemon in enumerate(self.game_state.opponent_bench):
+            for i, pokemon in enumerate(self.my_bench):
                 if pokemon:
                     priority = self._calculate_energy_priority_with_colorless(pokemon, "bench")
                     candidates.append((priority, "bench", pokemon))
@@ -182,35 +403,33 @@ class AIController:
     def _calculate_energy_priority_with_colorless(self, pokemon: Card, location: str) -> float:
         """無色エネルギーを考慮したポケモンのエネルギー装着優先度を計算"""
         try:
+            weights = self.weights
             priority = 0.0
             
             # 基本優先度：バトル場 > ベンチ
             if location == "active":
-                priority += 10.0
+                priority += weights.energy_active_priority
             else:
-                priority += 5.0
+                priority += weights.energy_bench_priority
             
-            # ワザが使用可能になるかチェック（無色エネルギー対応）
-            available_attacks = EnergyCostChecker.get_available_attacks(pokemon)
+            # ワザが使用可能になるかチェック（無色エネルギー対応・キャッシュ済みの判定結果を使用）
+            attack_states, colorless_efficiency_bonus = self._get_energy_profile(pokemon)
             
-            for attack_number, attack_name, can_use, _ in available_attacks:
-                if not can_use:
-                    # 無色エネルギー効率を考慮した使用可能性判定
-                    if self._would_enable_attack_with_colorless_consideration(pokemon, attack_number):
-                        priority += 20.0 * self.colorless_efficiency_weight  # 無色エネルギー効率重み適用
-                else:
-                    priority += 3.0  # 既に使用可能なワザがある場合
+            for attack_state in attack_states:
+                if attack_state == self._ATTACK_ENABLED_BY_ENERGY:
+                    priority += weights.energy_enables_attack * weights.colorless_efficiency_weight  # 無色エネルギー効率重み適用
+                elif attack_state == self._ATTACK_USABLE:
+                    priority += weights.energy_attack_usable  # 既に使用可能なワザがある場合
             
             # HPの高いポケモンを優先
             if pokemon.hp:
-                priority += pokemon.hp * 0.15
+                priority += pokemon.hp * weights.energy_hp_factor
             
             # 現在のエネルギー数（少ない方が優先、但し無色エネルギー効率考慮）
             current_energy_count = len(getattr(pokemon, 'attached_energy', []))
-            priority -= current_energy_count * 1.5
+            priority -= current_energy_count * weights.energy_count_penalty
             
             # 無色エネルギー効率ボーナス（無色コストが多いワザほど優先）
-            colorless_efficiency_bonus = self._calculate_colorless_efficiency_bonus(pokemon)
             priority += colorless_efficiency_bonus
             
             return priority
@@ -219,6 +438,52 @@ class AIController:
             print(f"エネルギー優先度計算エラー: {e}")
             return 0.0
     
+    # _get_energy_profile のワザごとの状態
+    _ATTACK_NOT_READY = 0
+    _ATTACK_ENABLED_BY_ENERGY = 1
+    _ATTACK_USABLE = 2
+    
+    @staticmethod
+    def _energy_signature(pokemon: Card) -> tuple:
+        """付いているエネルギーの組み合わせ（キャッシュのキー用・順序は無視）"""
+        return tuple(sorted(energy.prototype.id for energy in pokemon.attached_energy))
+    
+    def _get_energy_profile(self, pokemon: Card) -> Tuple[tuple, float]:
+        """
+        エネルギー装着優先度のうち、ポケモンの種類と付いているエネルギーだけで決まる部分（キャッシュ付き）
+        
+        Returns:
+            Tuple[tuple, float]: (ワザごとの状態（使用可能 / エネルギー1個で使用可能 / それ以外）, 無色エネルギー効率ボーナス)
+        """
+        key = (pokemon.prototype, self._energy_signature(pokemon))
+        profile = self.energy_cache.get(key)
+        if profile is not MISSING:
+            return profile
+        
+        attack_states = []
+        for attack_number, attack_name, can_use, _ in EnergyCostChecker.get_available_attacks(pokemon):
+            if can_use:
+                attack_states.append(self._ATTACK_USABLE)
+            elif self._would_enable_attack_with_colorless_consideration(pokemon, attack_number):
+                attack_states.append(self._ATTACK_ENABLED_BY_ENERGY)
+            else:
+                attack_states.append(self._ATTACK_NOT_READY)
+        
+        profile = (tuple(attack_states), self._calculate_colorless_efficiency_bonus(pokemon))
+        self.energy_cache.put(key, profile)
+        return profile
+    
+    @classmethod
+    def get_evaluation_cache_stats(cls) -> dict:
+        """評価キャッシュの統計（ヒット・ミス数など）"""
+        return {"attack": cls.attack_cache.stats(), "energy": cls.energy_cache.stats()}
+    
+    @classmethod
+    def clear_evaluation_caches(cls):
+        """評価キャッシュを消去（カードデータを読み直したとき等）"""
+        cls.attack_cache.clear()
+        cls.energy_cache.clear()
+    
     def _calculate_colorless_efficiency_bonus(self, pokemon: Card) -> float:
         """無色エネルギー効率ボーナスを計算"""
         try:
@@ -303,57 +568,33 @@ class AIController:
         try:
             # v4.10強化：進化制限チェック
             if self.game_state.is_current_player_first_turn():
-                print("AI: 最初のターンのため進化をスキップします")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, "AI: 最初のターンのため進化をスキップします")
                 return
             
-            evolution_cards = [card for card in self.game_state.opponent_hand 
+            evolution_cards = [card for card in self.my_hand 
                               if card.card_type == CardType.POKEMON and card.evolves_from]
             
             for evolution_card in evolution_cards:
                 if not self._increment_action_count():
                     break
                 
-                # バトル場のポケモンをチェック
-                if (self.game_state.opponent_active and 
-                    evolution_card.can_evolve_from(self.game_state.opponent_active) and
-                    self.game_state.can_evolve_pokemon(self.game_state.opponent_active)):
-                    
-                    self._perform_ai_evolution(evolution_card, "active", None, messages)
+                # バトル場 → ベンチの順に進化先をチェック
+                targets = self.match.get_evolution_targets(self.side, evolution_card)
+                if targets:
+                    location, _, target_pokemon = targets[0]
+                    self._perform_ai_evolution(evolution_card, location, target_pokemon, messages)
                     break
-                
-                # ベンチのポケモンをチェック
-                for i, bench_pokemon in enumerate(self.game_state.opponent_bench):
-                    if (bench_pokemon and 
-                        evolution_card.can_evolve_from(bench_pokemon) and
-                        self.game_state.can_evolve_pokemon(bench_pokemon)):
-                        
-                        self._perform_ai_evolution(evolution_card, "bench", i, messages)
-                        break
         
         except Exception as e:
             print(f"AI進化エラー: {e}")
     
-    def _perform_ai_evolution(self, evolution_card: Card, location: str, index: Optional[int], messages: List[str]):
+    def _perform_ai_evolution(self, evolution_card: Card, location: str, old_pokemon: Card, messages: List[str]):
         """AIの進化処理を実行"""
         try:
-            self.game_state.opponent_hand.remove(evolution_card)
-            
-            if location == "active":
-                old_pokemon = self.game_state.opponent_active
-                self.game_state.opponent_active = evolution_card
-            else:
-                old_pokemon = self.game_state.opponent_bench[index]
-                self.game_state.opponent_bench[index] = evolution_card
-            
-            # 進化前のポケモンの状態を引き継ぎ
-            if hasattr(old_pokemon, 'attached_energy'):
-                evolution_card.attached_energy = old_pokemon.attached_energy.copy()
-            if hasattr(old_pokemon, 'attached_tools'):
-                evolution_card.attached_tools = old_pokemon.attached_tools.copy()
-            if hasattr(old_pokemon, 'special_conditions'):
-                evolution_card.special_conditions = old_pokemon.special_conditions.copy()
-            
-            evolution_card.damage_taken = getattr(old_pokemon, 'damage_taken', 0)
+            success, _ = self.match.evolve(self.side, evolution_card, old_pokemon)
+            if not success:
+                return
             
             location_text = "バトル場" if location == "active" else "ベンチ"
             messages.append(f"相手が{location_text}の{old_pokemon.name}を{evolution_card.name}に進化させた。")
@@ -368,54 +609,21 @@ class AIController:
             # 🆕 先攻制限を含む全体的なサポート使用可能性チェック
             if not self.game_state.can_use_supporter():
                 # サポートが使用できない場合、グッズ・スタジアムのみを対象にする
-                print("AI: サポート使用制限により、グッズ・スタジアムのみ使用可能")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, "AI: サポート使用制限により、グッズ・スタジアムのみ使用可能")
                 self._ai_use_non_supporter_trainers(messages)
                 return
             
-            trainer_cards = [card for card in self.game_state.opponent_hand 
-                            if card.card_type == CardType.TRAINER]
+            trainer_cards = [card for card in self.my_hand 
+                            if card.card_type == CardType.TRAINER and
+                            getattr(card, 'trainer_type', None) is not None]
             
             for trainer in trainer_cards:
                 if not self._increment_action_count():
                     break
                 
-                # トレーナータイプ別処理
-                if hasattr(trainer, 'trainer_type'):
-                    if trainer.trainer_type == TrainerType.SUPPORTER:
-                        # サポートの使用
-                        if self.game_state.can_use_supporter():
-                            self.game_state.opponent_hand.remove(trainer)
-                            self.game_state.opponent_discard.append(trainer)
-                            self.game_state.supporter_played_this_turn = True
-                            messages.append(f"相手が{trainer.name}を使った。")
-                            print(f"AI: サポート「{trainer.name}」を使用")
-                            break
-                        else:
-                            # 使用できない理由をログ出力
-                            reason = self.game_state.get_supporter_restriction_reason()
-                            print(f"AI: サポート「{trainer.name}」使用不可 - {reason}")
-                    
-                    elif trainer.trainer_type == TrainerType.ITEM:
-                        # グッズは制限なし
-                        self.game_state.opponent_hand.remove(trainer)
-                        self.game_state.opponent_discard.append(trainer)
-                        messages.append(f"相手が{trainer.name}を使った。")
-                        print(f"AI: グッズ「{trainer.name}」を使用")
-                        break
-                    
-                    elif trainer.trainer_type == TrainerType.STADIUM:
-                        # スタジアムは制限なし
-                        # 既存スタジアムがある場合はトラッシュ
-                        if self.game_state.stadium:
-                            old_stadium = self.game_state.stadium
-                            self.game_state.opponent_discard.append(old_stadium)
-                            print(f"AI: 既存スタジアム「{old_stadium.name}」をトラッシュ")
-                        
-                        self.game_state.opponent_hand.remove(trainer)
-                        self.game_state.stadium = trainer
-                        messages.append(f"相手が{trainer.name}を場に出した。")
-                        print(f"AI: スタジアム「{trainer.name}」を設置")
-                        break
+                if self._ai_play_trainer(trainer, messages):
+                    break
         
         except Exception as e:
             print(f"AIトレーナー使用エラー: {e}")
@@ -424,62 +632,61 @@ class AIController:
     def _ai_use_non_supporter_trainers(self, messages: List[str]):
         """🆕 AIがサポート以外のトレーナーカードを使用"""
         try:
-            trainer_cards = [card for card in self.game_state.opponent_hand 
+            trainer_cards = [card for card in self.my_hand 
                             if (card.card_type == CardType.TRAINER and 
-                                hasattr(card, 'trainer_type') and
+                                getattr(card, 'trainer_type', None) is not None and
                                 card.trainer_type != TrainerType.SUPPORTER)]
             
             for trainer in trainer_cards:
                 if not self._increment_action_count():
                     break
                 
-                if trainer.trainer_type == TrainerType.ITEM:
-                    # グッズの使用
-                    self.game_state.opponent_hand.remove(trainer)
-                    self.game_state.opponent_discard.append(trainer)
-                    messages.append(f"相手が{trainer.name}を使った。")
-                    print(f"AI: グッズ「{trainer.name}」を使用（サポート制限中）")
-                    break
-                
-                elif trainer.trainer_type == TrainerType.STADIUM:
-                    # スタジアムの使用
-                    if self.game_state.stadium:
-                        old_stadium = self.game_state.stadium
-                        self.game_state.opponent_discard.append(old_stadium)
-                        print(f"AI: 既存スタジアム「{old_stadium.name}」をトラッシュ")
-                    
-                    self.game_state.opponent_hand.remove(trainer)
-                    self.game_state.stadium = trainer
-                    messages.append(f"相手が{trainer.name}を場に出した。")
-                    print(f"AI: スタジアム「{trainer.name}」を設置（サポート制限中）")
+                if self._ai_play_trainer(trainer, messages):
                     break
         
         except Exception as e:
             print(f"AIサポート以外トレーナー使用エラー: {e}")
     
+    def _ai_play_trainer(self, trainer: Card, messages: List[str]) -> bool:
+        """トレーナーカードを1枚使用（Match経由）"""
+        success, message = self.match.play_trainer(self.side, trainer)
+        if not success:
+            if tracer.ai <= DEBUG:
+                tracer.log(AI, DEBUG, f"AI: トレーナーズ「{trainer.name}」使用不可 - {message}")
+            return False
+        
+        if trainer.trainer_type == TrainerType.STADIUM:
+            messages.append(f"相手が{trainer.name}を場に出した。")
+        else:
+            messages.append(f"相手が{trainer.name}を使った。")
+        if tracer.ai <= DEBUG:
+            tracer.log(AI, DEBUG, f"AI: トレーナーズ「{trainer.name}」を使用")
+        return True
+    
 
     def _ai_execute_attack_with_colorless_consideration(self, messages: List[str]):
         """AIが攻撃を実行（v4.22無色エネルギー効率考慮版）"""
         try:
-            if not self.game_state.opponent_active:
+            if not self.my_active:
                 return
             
-            if not self.game_state.player_active:
+            if not self.enemy_active:
                 return
             
             # 攻撃回数制限チェック
             if not self._increment_action_count():
                 return
             
-            attacker = self.game_state.opponent_active
-            defender = self.game_state.player_active
+            attacker = self.my_active
+            defender = self.enemy_active
             
             # 使用可能なワザを取得
             available_attacks = EnergyCostChecker.get_available_attacks(attacker)
             usable_attacks = [(num, name, can_use, details) for num, name, can_use, details in available_attacks if can_use]
             
             if not usable_attacks:
-                print("AI: 使用可能なワザがありません")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, "AI: 使用可能なワザがありません")
                 return
             
             # 無色エネルギー効率を考慮した最適なワザを選択
@@ -488,14 +695,15 @@ class AIController:
             if best_attack:
                 attack_number = best_attack[0]
                 
-                # ワザ使用システムを使って攻撃実行
-                attack_messages = DamageCalculator.execute_attack(
-                    self.game_state, attacker, defender, attack_number, "opponent"
-                )
+                # ルールエンジンで攻撃実行（ダメージ・きぜつ・サイド獲得まで）
+                success, attack_messages = self.match.attack(self.side, attack_number)
                 
                 messages.extend(attack_messages)
+                if not success:
+                    return
                 
-                print(f"AI攻撃実行: {attacker.name}のワザ{attack_number}（無色エネルギー効率考慮）")
+                if tracer.ai <= DEBUG:
+                    tracer.log(AI, DEBUG, f"AI攻撃実行: {attacker.name}のワザ{attack_number}（無色エネルギー効率考慮）")
         
         except Exception as e:
             print(f"AI攻撃実行エラー: {e}")
@@ -506,14 +714,16 @@ class AIController:
             if not usable_attacks:
                 return None
             
-            # 各ワザの評価値を計算（無色エネルギー効率考慮）
-            attack_scores = []
+            # 各ワザの評価値を計算（外部評価器があれば全候補をまとめて評価、なければ無色エネルギー効率考慮）
+            candidates = [attack for attack in usable_attacks if attack[2]]
+            if self.attack_evaluator is not None and candidates:
+                scores = self.attack_evaluator.score_attacks(self.match, self.side, [attack[0] for attack in candidates])
+            else:
+                scores = [self._evaluate_attack_with_colorless_efficiency(attack[0], attacker, defender)
+                          for attack in candidates]
             
-            for attack_number, attack_name, can_use, details in usable_attacks:
-                if not can_use:
-                    continue
-                
-                score = self._evaluate_attack_with_colorless_efficiency(attack_number, attacker, defender)
+            attack_scores = []
+            for score, (attack_number, attack_name, can_use, details) in zip(scores, candidates):
                 attack_scores.append((score, attack_number, attack_name, can_use, details))
             
             if not attack_scores:
@@ -530,50 +740,34 @@ class AIController:
             return usable_attacks[0] if usable_attacks else None
     
     def _evaluate_attack_with_colorless_efficiency(self, attack_number: int, attacker: Card, defender: Card) -> float:
-        """無色エネルギー効率を考慮したワザの評価値を計算"""
+        """無色エネルギー効率を考慮したワザの評価値を計算（戦略の重みに依存しない項はキャッシュ）"""
         try:
-            score = 0.0
+            key = (attacker.prototype, defender.prototype, attack_number,
+                   self._energy_signature(attacker), defender.damage_taken)
+            terms = self.attack_cache.get(key)
+            if terms is MISSING:
+                terms = self._calculate_attack_terms(attack_number, attacker, defender)
+                self.attack_cache.put(key, terms)
+            damage, knocks_out, colorless_ratio, efficiency, has_condition_effect = terms
+            weights = self.weights
             
             # ダメージ期待値
-            damage, _ = DamageCalculator.calculate_damage(attacker, defender, attack_number)
-            score += damage * 1.0
+            score = damage * weights.attack_damage
             
-            # きぜつ可能性ボーナス
-            if defender.hp and damage >= (defender.hp - getattr(defender, 'damage_taken', 0)):
-                score += 50.0  # きぜつさせられる場合は大幅ボーナス
+            # きぜつさせられる場合は大幅ボーナス
+            if knocks_out:
+                score += weights.attack_ko_bonus
             
-            # 無色エネルギー効率（無色コストが多いほど効率的と判定）
-            if attack_number == 1:
-                cost_types = attacker.attack_cost_types or {}
-            else:
-                cost_types = getattr(attacker, 'attack2_cost_types', {}) or {}
-            
-            total_cost = sum(cost_types.values())
-            colorless_cost = 0
-            
-            for energy_type, count in cost_types.items():
-                if energy_type.lower() in ['colorless', '無色', 'ノーマル']:
-                    colorless_cost += count
-            
-            if total_cost > 0:
+            if colorless_ratio is not None:
                 # 無色コストの比率が高いほど効率的（任意のエネルギーで支払えるため）
-                colorless_ratio = colorless_cost / total_cost
-                score += colorless_ratio * 15.0 * self.colorless_efficiency_weight
+                score += colorless_ratio * weights.attack_colorless_ratio * weights.colorless_efficiency_weight
                 
                 # 総エネルギー効率
-                efficiency = damage / total_cost if total_cost > 0 else 0
-                score += efficiency * 3.0
-            
-            # ワザの効果ボーナス（簡易版）
-            if attack_number == 1:
-                effect_text = getattr(attacker, 'attack_effect', '')
-            else:
-                effect_text = getattr(attacker, 'attack2_effect', '')
+                score += efficiency * weights.attack_efficiency
             
-            if effect_text:
-                # 特殊状態付与は追加価値
-                if any(condition in effect_text for condition in ["マヒ", "どく", "やけど", "ねむり", "こんらん"]):
-                    score += 12.0
+            # 特殊状態付与は追加価値
+            if has_condition_effect:
+                score += weights.attack_condition_bonus
             
             return score
         
@@ -581,6 +775,49 @@ class AIController:
             print(f"ワザ評価エラー: {e}")
             return 0.0
     
+    def _calculate_attack_terms(self, attack_number: int, attacker: Card, defender: Card) -> tuple:
+        """
+        ワザ評価の各項を計算
+        
+        Returns:
+            tuple: (ダメージ, きぜつさせられるか, 無色コスト比率（コストなしはNone）, ダメージ/コスト, 特殊状態付与の効果があるか)
+        """
+        # ダメージ期待値
+        damage, _ = DamageCalculator.calculate_damage(attacker, defender, attack_number)
+        
+        # きぜつ可能性
+        knocks_out = bool(defender.hp) and damage >= (defender.hp - getattr(defender, 'damage_taken', 0))
+        
+        # 無色エネルギー効率（無色コストが多いほど効率的と判定）
+        if attack_number == 1:
+            cost_types = attacker.attack_cost_types or {}
+        else:
+            cost_types = getattr(attacker, 'attack2_cost_types', {}) or {}
+        
+        total_cost = sum(cost_types.values())
+        colorless_cost = 0
+        
+        for energy_type, count in cost_types.items():
+            if energy_type.lower() in ['colorless', '無色', 'ノーマル']:
+                colorless_cost += count
+        
+        colorless_ratio = None
+        efficiency = 0.0
+        if total_cost > 0:
+            colorless_ratio = colorless_cost / total_cost
+            efficiency = damage / total_cost
+        
+        # ワザの効果ボーナス（簡易版）
+        if attack_number == 1:
+            effect_text = getattr(attacker, 'attack_effect', '')
+        else:
+            effect_text = getattr(attacker, 'attack2_effect', '')
+        
+        has_condition_effect = bool(effect_text) and any(
+            condition in effect_text for condition in ["マヒ", "どく", "やけど", "ねむり", "こんらん"])
+        
+        return damage, knocks_out, colorless_ratio, efficiency, has_condition_effect
+    
     def get_ai_action_summary(self) -> str:
         """AI行動の要約を取得（無色エネルギー対応版）"""
         return f"AI行動完了: {self.current_action_count}回の行動を実行（無色エネルギー戦略対応）"
\ No newline at end of file
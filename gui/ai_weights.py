@@ -0,0 +1,107 @@
+# gui/ai_weights.py
+# Version: 1.1
+# Updated: 2026-10-18 07:00
+# AIコントローラーのヒューリスティックの重み（重みベクトル・JSONファイルへの保存と読み込み）
+#
+# 重みは ai.tuning の調整器で探索し、最良の重みを ai_weights.json に書き出す。
+# AIControllerは起動時（モジュール読み込み時）に環境変数 POKECA_AI_WEIGHTS のファイル、
+# なければプロジェクト直下の ai_weights.json を読み込み、どちらもなければ既定値を使う。
+
+import json
+import os
+from dataclasses import dataclass, fields, asdict
+from typing import List, Optional, Sequence
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WEIGHTS_PATH = os.path.join(PROJECT_ROOT, "ai_weights.json")
+
+
+@dataclass(frozen=True)
+class AIWeights:
+    """
+    AIControllerのヒューリスティックの重み（すべて正の値）
+
+    energy_* はエネルギー装着先の優先度（固定の順序の行動のみ）、attack_* はワザの評価（両方）、
+    state_* はターンプランナー用の局面評価の重み（ターンプランナーのみ）。
+    """
+    # 戦略全体
+    colorless_efficiency_weight: float = 1.2  # 無色エネルギー効率の重み（ワザの無色コスト比率・装着でワザが使えるようになる）
+
+    # エネルギー装着優先度
+    energy_active_priority: float = 10.0      # バトル場への装着
+    energy_bench_priority: float = 5.0        # ベンチへの装着
+    energy_enables_attack: float = 20.0       # 装着でワザが使えるようになる
+    energy_attack_usable: float = 3.0         # 既に使えるワザがある
+    energy_hp_factor: float = 0.15            # HPあたりの優先度
+    energy_count_penalty: float = 1.5         # 付いているエネルギー1個あたりの減点
+
+    # ワザの評価
+    attack_damage: float = 1.0                # ダメージ1あたり
+    attack_ko_bonus: float = 50.0             # きぜつさせられる場合のボーナス
+    attack_colorless_ratio: float = 15.0      # 無色コスト比率
+    attack_efficiency: float = 3.0            # ダメージ/コスト
+    attack_condition_bonus: float = 12.0      # 特殊状態を与える効果
+
+    # ターン終了局面の評価
+    state_prize: float = 50.0                 # サイド1枚の差
+    state_enemy_hp: float = 1.0               # 相手の場の残りHP1あたりの減点
+    state_enemy_condition: float = 12.0       # 相手のバトルポケモンの特殊状態
+    state_bench_slot: float = 5.0             # ベンチのポケモン1匹あたり
+    state_hp_factor: float = 0.15             # 自分の場の残りHP1あたり
+    state_evolution: float = 10.0             # 進化段階1あたり
+    state_energy: float = 8.0                 # 付いているエネルギー1個あたり
+    state_active_attack: float = 24.0         # バトルポケモンの使えるワザ1つあたり
+    state_bench_attack: float = 6.0           # ベンチポケモンの使えるワザ1つあたり
+    state_attack_one_energy_away: float = 3.0  # エネルギー1個で使えるワザ1つあたり
+
+    @classmethod
+    def names(cls) -> List[str]:
+        """重みベクトルの各要素の名前（ベクトルの並び順）"""
+        return [field.name for field in fields(cls)]
+
+    @classmethod
+    def tuned_names(cls, use_planner: bool = True) -> List[str]:
+        """行動の方式で評価に使われる重みの名前（ターンプランナーなら state_*、固定の順序なら energy_*）"""
+        prefix = "state_" if use_planner else "energy_"
+        return [name for name in cls.names()
+                if name == "colorless_efficiency_weight" or name.startswith("attack_") or name.startswith(prefix)]
+
+    def to_vector(self) -> List[float]:
+        """重みベクトルに変換"""
+        return [getattr(self, name) for name in self.names()]
+
+    @classmethod
+    def from_vector(cls, vector: Sequence[float]) -> 'AIWeights':
+        """重みベクトルから作成（並びは names() の順）"""
+        return cls(**{name: float(value) for name, value in zip(cls.names(), vector)})
+
+    def save(self, path: str = DEFAULT_WEIGHTS_PATH):
+        """JSONファイルに保存"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file, ensure_ascii=False, indent=2)
+            file.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> 'AIWeights':
+        """
+        JSONファイルから読み込む（ファイルにない重みは既定値・未知の名前は無視）
+
+        Raises:
+            OSError, ValueError: 読み込みに失敗した場合
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        known = set(cls.names())
+        return cls(**{name: float(value) for name, value in data.items() if name in known})
+
+    @classmethod
+    def load_default(cls, path: Optional[str] = None) -> 'AIWeights':
+        """起動時の重み（POKECA_AI_WEIGHTS → ai_weights.json → 既定値の順・読み込みエラー時は既定値）"""
+        path = path or os.environ.get("POKECA_AI_WEIGHTS") or DEFAULT_WEIGHTS_PATH
+        if not os.path.exists(path):
+            return cls()
+        try:
+            return cls.load(path)
+        except Exception as e:
+            print(f"AI重みファイル読み込みエラー: {path}: {e}")
+            return cls()
@@ -0,0 +1,139 @@
+# gui/ai_worker.py
+# Version: 1.1
+# Updated: 2026-10-18 08:30
+# AIのターンをワーカースレッドで考えさせ、決まった行動をスレッドセーフなキューでGUIへ返す
+#
+# ワーカーは試合の複製（Match.clone()）上でAIコントローラーにターンを実行させ、
+# Match.action_listener で行動が決まるたびに整数エンコードのアクション（engine.actions）をキューへ入れる。
+# GUIスレッドは root.after で定期的に poll() してアクションを実際の試合に適用するため、
+# 思考中もTkのメインループは止まらない。思考中はGILの切り替え間隔（既定5ms）を短くし、
+# GUIスレッドがGILを待つ時間を1フレーム（約16ms）より十分短く抑える。
+# 切り替え間隔はプロセス全体の設定のため、先読み（ai.ponder）と共有の参照カウントで管理し、
+# 短い間隔を必要とするスレッドがすべて終わったときだけ元の値に戻す。
+
+import queue
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from engine.match import Match
+
+# キューに入るイベントの種類
+ACTION = "action"
+ERROR = "error"
+DONE = "done"
+
+# 短いGILの切り替え間隔を必要としているスレッドの数と、それ以前の切り替え間隔
+_switch_lock = threading.Lock()
+_switch_users = 0
+_normal_switch_interval = sys.getswitchinterval()
+
+
+def acquire_switch_interval(interval: float):
+    """思考スレッドの開始時に呼ぶ：GILの切り替え間隔を短くする（最初の利用者が元の値を記録）"""
+    global _switch_users, _normal_switch_interval
+    with _switch_lock:
+        if _switch_users == 0:
+            _normal_switch_interval = sys.getswitchinterval()
+        _switch_users += 1
+        sys.setswitchinterval(min(interval, sys.getswitchinterval()))
+
+
+def release_switch_interval():
+    """思考スレッドの終了時に呼ぶ：利用者がいなくなったら元の切り替え間隔に戻す"""
+    global _switch_users
+    with _switch_lock:
+        if _switch_users == 0:
+            return
+        _switch_users -= 1
+        if _switch_users == 0:
+            sys.setswitchinterval(_normal_switch_interval)
+
+
+class AITurnWorker:
+    """
+    AIのターンを1回ずつワーカースレッドで実行する
+
+    start() で思考を開始し、GUIスレッドから poll() で (種類, 値) のイベントを取り出す。
+    ACTION の値はアクションの整数、ERROR はエラーメッセージ、DONE でターンの行動が終わる。
+    cancel() 後は新しいイベントを返さない（思考中のスレッドは複製上で動くため、実際の試合には影響しない）。
+    """
+
+    def __init__(self, controller_factory: Callable[[Match, str], object], switch_interval: float = 0.001):
+        """
+        Args:
+            controller_factory: (複製した試合, 担当プレイヤー) から execute_ai_turn() を持つコントローラーを作る関数
+            switch_interval: 思考中のGILの切り替え間隔（秒・思考中のスレッドと先読みがすべて終わったら元の値に戻す）
+        """
+        self.controller_factory = controller_factory
+        self.switch_interval = switch_interval
+        self.events: queue.Queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.action_count = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def elapsed(self) -> float:
+        """思考開始からの経過秒数"""
+        return time.perf_counter() - self.started_at if self.thread is not None else 0.0
+
+    def start(self, match: Match, side: str):
+        """現在の局面を複製してワーカースレッドで思考を開始（GUIスレッドから呼ぶ）"""
+        # 前回のスレッドが残っていても、そのキュー・中断フラグとは切り離す
+        self.events = queue.Queue()
+        self.cancelled = threading.Event()
+        self.action_count = 0
+        self.started_at = time.perf_counter()
+
+        snapshot = match.clone()
+        acquire_switch_interval(self.switch_interval)
+        self.thread = threading.Thread(target=self._run, args=(snapshot, side, self.events, self.cancelled),
+                                       name="AITurnWorker", daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """思考を中断（以降のイベントは捨てる）"""
+        self.cancelled.set()
+
+    def poll(self) -> List[Tuple[str, object]]:
+        """届いているイベントをすべて取り出す（待たない）"""
+        events = []
+        if self.cancelled.is_set():
+            return events
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == ACTION:
+                self.action_count += 1
+            events.append(event)
+        return events
+
+    def _run(self, snapshot: Match, side: str, events: queue.Queue, cancelled: threading.Event):
+        """ワーカースレッド：複製上でAIのターンを実行"""
+        def on_action(player: str, action: int):
+            if cancelled.is_set():
+                # 中断後は複製の試合を終わらせ、コントローラーの行動ループを抜けさせる
+                snapshot._finish(None, "cancelled")
+                return
+            if player == side:
+                events.put((ACTION, action))
+
+        snapshot.action_listener = on_action
+        try:
+            controller = self.controller_factory(snapshot, side)
+            controller.execute_ai_turn()
+        except Exception as e:
+            print(f"AI思考スレッドエラー: {e}")
+            events.put((ERROR, str(e)))
+        finally:
+            # 中断後に次の思考が始まっていても、各スレッドが開始時の1回分だけ戻す
+            release_switch_interval()
+        events.put((DONE, None))
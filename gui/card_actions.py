@@ -1,20 +1,19 @@
 # gui/card_actions.py
-# Version: 4.31
-# Updated: 2025-06-15 12:10
-# カードアクション：マリガン修正版
+# Version: 4.33
+# Updated: 2026-10-18 10:00
+# カードアクション：engine.Match経由版
 from typing import List, Optional, Tuple, Any, Dict
-import copy
 
-from models.card import Card, CardType, TrainerType  # TrainerTypeを追加
+from models.card import Card, CardType
 from models.game_state import GameState
-from utils.energy_cost_checker import EnergyCostChecker
-from utils.damage_calculator import DamageCalculator
+from engine.match import Match
 
 class CardActions:
-    """カードの行動を処理するクラス（にげるシステム完全実装版）"""
+    """カードの行動を処理するクラス（ルール処理はengine.Matchに委譲）"""
     
-    def __init__(self, game_state: GameState):
+    def __init__(self, game_state: GameState, match: Optional[Match] = None):
         self.game_state = game_state
+        self.match = match if match is not None else Match(game_state)
         self.dialog_manager = None
                 
         # 結果管理用の定数
@@ -50,25 +49,15 @@ class CardActions:
         try:
             print(f"🏃 にげる処理開始: {retreating_pokemon.name}")
             
-            # 1. 基本条件チェック
+            # 1. 基本条件・にげるコストチェック
             validation_result = self._validate_retreat_conditions(retreating_pokemon)
             if not validation_result["success"]:
                 return validation_result
             
-            # 2. にげるコストチェック
-            cost_result = self._check_retreat_cost(retreating_pokemon)
-            if not cost_result["success"]:
-                return cost_result
-            
-            # 3. ベンチポケモン選択肢を取得
+            # 2. ベンチポケモン選択肢を取得
             bench_options = self._get_bench_replacement_options()
-            if not bench_options:
-                return {
-                    "success": False,
-                    "message": "ベンチに交代できるポケモンがいません"
-                }
             
-            # 4. 複数選択肢がある場合は選択が必要
+            # 3. 複数選択肢がある場合は選択が必要
             if len(bench_options) > 1:
                 return {
                     "success": False,
@@ -78,7 +67,7 @@ class CardActions:
                     "retreat_cost": getattr(retreating_pokemon, 'retreat_cost', 0) or 0
                 }
             
-            # 5. 自動的に交代実行（選択肢が1つの場合）
+            # 4. 自動的に交代実行（選択肢が1つの場合）
             return self._execute_retreat(retreating_pokemon, bench_options[0])
         
         except Exception as e:
@@ -100,16 +89,8 @@ class CardActions:
                     "message": "バトル場のポケモンのみがにげることができます"
                 }
             
-            # プレイヤーのターンかチェック
-            if self.game_state.current_player != "player":
-                return {
-                    "success": False,
-                    "message": "自分のターンでのみにげることができます"
-                }
-            
-            # 特殊状態による制限チェック
-            from utils.special_condition_helper import SpecialConditionHelper
-            can_retreat, reason = SpecialConditionHelper.can_retreat(pokemon)
+            # ターン・特殊状態・コスト・ベンチの条件はルールエンジンでチェック
+            can_retreat, reason = self.match.can_retreat("player")
             if not can_retreat:
                 return {
                     "success": False,
@@ -125,43 +106,10 @@ class CardActions:
                 "message": f"にげる条件のチェック中にエラーが発生しました: {e}"
             }
     
-    def _check_retreat_cost(self, pokemon: Card) -> dict:
-        """にげるコストをチェック"""
-        try:
-            retreat_cost = getattr(pokemon, 'retreat_cost', 0) or 0
-            
-            if retreat_cost == 0:
-                return {"success": True, "message": "にげるコストはありません"}
-            
-            # 装着されているエネルギーを取得
-            attached_energy = getattr(pokemon, 'attached_energy', [])
-            attached_count = len(attached_energy)
-            
-            if attached_count < retreat_cost:
-                return {
-                    "success": False,
-                    "message": f"にげるコストが不足しています（必要: {retreat_cost}個、装着: {attached_count}個）"
-                }
-            
-            return {
-                "success": True,
-                "message": f"にげるコスト: {retreat_cost}個のエネルギーを支払います"
-            }
-        
-        except Exception as e:
-            print(f"にげるコストチェックエラー: {e}")
-            return {
-                "success": False,
-                "message": f"にげるコストのチェック中にエラーが発生しました: {e}"
-            }
-    
     def _get_bench_replacement_options(self) -> List[Tuple[int, Card]]:
         """ベンチから交代可能なポケモンの選択肢を取得"""
         try:
-            options = []
-            for i, bench_pokemon in enumerate(self.game_state.player_bench):
-                if bench_pokemon is not None:
-                    options.append((i, bench_pokemon))
+            options = self.game_state.get_bench_pokemon("player")
             
             print(f"交代可能なベンチポケモン: {len(options)}匹")
             return options
@@ -174,34 +122,18 @@ class CardActions:
         """にげる処理を実行"""
         try:
             bench_index, replacement_pokemon = bench_choice
-            retreat_cost = getattr(retreating_pokemon, 'retreat_cost', 0) or 0
             
             print(f"🏃 にげる実行: {retreating_pokemon.name} → {replacement_pokemon.name}")
             
-            # 1. エネルギーコストを支払う
-            if retreat_cost > 0:
-                cost_paid = self._pay_retreat_cost(retreating_pokemon, retreat_cost)
-                if not cost_paid:
-                    return {
-                        "success": False,
-                        "message": "エネルギーコストの支払いに失敗しました"
-                    }
-            
-            # 2. ポケモンを交代
-            self.game_state.player_active = replacement_pokemon
-            self.game_state.player_bench[bench_index] = retreating_pokemon
+            # コスト支払いと交代はルールエンジンで実行
+            success, message = self.match.retreat("player", bench_index)
             
-            # 3. 結果メッセージ作成
-            message_parts = [f"{retreating_pokemon.name}がにげました"]
-            if retreat_cost > 0:
-                message_parts.append(f"エネルギー{retreat_cost}個を支払いました")
-            message_parts.append(f"{replacement_pokemon.name}がバトル場に出ました")
-            
-            print("✅ にげる処理完了")
+            if success:
+                print("✅ にげる処理完了")
             
             return {
-                "success": True,
-                "message": "\n".join(message_parts)
+                "success": success,
+                "message": message
             }
         
         except Exception as e:
@@ -213,28 +145,6 @@ class CardActions:
                 "message": f"にげる実行中にエラーが発生しました: {e}"
             }
     
-    def _pay_retreat_cost(self, pokemon: Card, cost: int) -> bool:
-        """にげるコストとしてエネルギーを支払う"""
-        try:
-            attached_energy = getattr(pokemon, 'attached_energy', [])
-            
-            if len(attached_energy) < cost:
-                print(f"エネルギー不足: 必要{cost}個、装着{len(attached_energy)}個")
-                return False
-            
-            # エネルギーを捨て札に送る（後ろから取る）
-            for _ in range(cost):
-                if attached_energy:
-                    discarded_energy = attached_energy.pop()
-                    self.game_state.player_discard.append(discarded_energy)
-                    print(f"エネルギーを捨て札に: {discarded_energy.name}")
-            
-            return True
-        
-        except Exception as e:
-            print(f"エネルギー支払いエラー: {e}")
-            return False
-    
     def retreat_pokemon_with_choice(self, retreating_pokemon: Card, bench_index: int) -> dict:
         """
         選択されたベンチポケモンとの交代でにげる処理を実行
@@ -273,12 +183,14 @@ class CardActions:
         try:
             print(f"攻撃実行開始: 位置={pokemon_position}, ワザ番号={attack_number}")
             
-            # ポケモンの取得
+            # ポケモンの取得（ワザを使えるのはバトルポケモンのみ）
             if pokemon_position == "active":
                 attacking_pokemon = self.game_state.player_active
             elif pokemon_position.startswith("bench_"):
-                bench_index = int(pokemon_position.split("_")[1])
-                attacking_pokemon = self.game_state.player_bench[bench_index]
+                return {
+                    "success": False,
+                    "message": "バトル場のポケモンのみがワザを使えます"
+                }
             else:
                 return {
                     "success": False,
@@ -301,7 +213,6 @@ class CardActions:
                         "message": "ワザ1が設定されていません"
                     }
                 attack_name = attacking_pokemon.attack_name
-                attack_power = getattr(attacking_pokemon, 'attack_power', 0) or 0
             elif attack_number == 2:
                 if not hasattr(attacking_pokemon, 'attack2_name') or not attacking_pokemon.attack2_name:
                     return {
@@ -309,91 +220,32 @@ class CardActions:
                         "message": "ワザ2が設定されていません"
                     }
                 attack_name = attacking_pokemon.attack2_name
-                attack_power = getattr(attacking_pokemon, 'attack2_power', 0) or 0
             else:
                 return {
                     "success": False,
                     "message": "無効なワザ番号です（1または2を指定してください）"
                 }
             
-            print(f"使用ワザ: {attack_name} (ダメージ: {attack_power})")
-            
             # エネルギーコスト判定
-            from utils.energy_cost_checker import EnergyCostChecker
-            can_use, cost_message = EnergyCostChecker.can_use_attack(attacking_pokemon, attack_number, self.game_state)
-            
+            can_use, reason = self.match.can_attack("player", attack_number)
             if not can_use:
                 return {
                     "success": False,
-                    "message": f"「{attack_name}」は使用できません: {cost_message}"
+                    "message": f"「{attack_name}」は使用できません: {reason}"
                 }
             
-            print(f"エネルギーコスト判定: OK - {cost_message}")
-            
-            # 攻撃対象の取得
             target_pokemon = self.game_state.opponent_active
-            if not target_pokemon:
-                return {
-                    "success": False,
-                    "message": "攻撃対象が見つかりません"
-                }
-            
-            print(f"攻撃対象: {target_pokemon.name}")
-            
-            # ダメージ計算
-            from utils.damage_calculator import DamageCalculator
-            actual_damage, damage_messages = DamageCalculator.calculate_damage(
-                attacking_pokemon, target_pokemon, attack_number
-            )
-            
-            print(f"計算ダメージ: {actual_damage}")
-            
-            # ダメージ適用
-            is_knocked_out, apply_messages = DamageCalculator.apply_damage(
-                target_pokemon, actual_damage
-            )
-            
-            # メッセージ作成
-            result_messages = []
-            result_messages.append(f"{attacking_pokemon.name}の「{attack_name}」！")
-            result_messages.extend(damage_messages)
-            result_messages.extend(apply_messages)
-            
-            # きぜつ処理
-            if is_knocked_out:
-                print(f"{target_pokemon.name}がきぜつしました")
-                
-                # 相手のバトル場をクリア
-                self.game_state.opponent_active = None
-                
-                # 捨て札に送る
-                self.game_state.opponent_discard.append(target_pokemon)
-                
-                # 相手のベンチから新しいポケモンを出す（簡易AI）
-                for i, bench_pokemon in enumerate(self.game_state.opponent_bench):
-                    if bench_pokemon:
-                        self.game_state.opponent_active = bench_pokemon
-                        self.game_state.opponent_bench[i] = None
-                        result_messages.append(f"相手が{bench_pokemon.name}をバトル場に出しました")
-                        print(f"相手の新バトルポケモン: {bench_pokemon.name}")
-                        break
-                
-                # サイド獲得処理（簡易実装）
-                if self.game_state.opponent_prizes:
-                    side_card = self.game_state.opponent_prizes.pop(0)
-                    self.game_state.player_hand.append(side_card)
-                    result_messages.append("サイドを1枚獲得しました")
-                    print("サイド獲得")
+            target_hp_before = target_pokemon.current_hp
             
-            # 攻撃完了処理
-            self.game_state.mark_attack_completed()
-            print("攻撃完了マーク設定")
+            # ダメージ計算・きぜつ・サイド獲得・攻撃完了処理はルールエンジンで実行
+            success, result_messages = self.match.attack("player", attack_number)
             
             return {
-                "success": True,
+                "success": success,
                 "message": "\n".join(result_messages),
-                "damage_dealt": actual_damage,
-                "target_knocked_out": is_knocked_out
+                "damage_dealt": target_hp_before - target_pokemon.current_hp if success else 0,
+                "target_knocked_out": success and target_pokemon is not self.game_state.opponent_active,
+                "game_over": self.match.is_over
             }
         
         except Exception as e:
@@ -504,29 +356,7 @@ class CardActions:
                 return targets
             
             print(f"🧬 進化チェック開始: {pokemon_card.name} ← {pokemon_card.evolves_from}")
-            
-            # バトル場をチェック
-            if (self.game_state.player_active and 
-                self.game_state.player_active.name == pokemon_card.evolves_from):
-                
-                # 🆕 ゲームルールに基づく進化可能性チェック
-                if self.game_state.can_evolve_pokemon(self.game_state.player_active):
-                    targets.append(("active", 0, self.game_state.player_active))
-                    print(f"✅ バトル場の{self.game_state.player_active.name}は進化可能")
-                else:
-                    print(f"❌ バトル場の{self.game_state.player_active.name}は進化制限により進化不可")
-            
-            # ベンチをチェック
-            for i, bench_pokemon in enumerate(self.game_state.player_bench):
-                if bench_pokemon and bench_pokemon.name == pokemon_card.evolves_from:
-                    
-                    # 🆕 ゲームルールに基づく進化可能性チェック
-                    if self.game_state.can_evolve_pokemon(bench_pokemon):
-                        targets.append(("bench", i, bench_pokemon))
-                        print(f"✅ ベンチ{i+1}の{bench_pokemon.name}は進化可能")
-                    else:
-                        print(f"❌ ベンチ{i+1}の{bench_pokemon.name}は進化制限により進化不可")
-            
+            targets = self.match.get_evolution_targets("player", pokemon_card)
             print(f"🧬 進化可能対象数: {len(targets)}")
         
         except Exception as e:
@@ -564,192 +394,15 @@ class CardActions:
             return f"エネルギーカード使用エラー: {e}"
 
     def _handle_trainer_play(self, trainer_card: Card, card_index: int) -> str:
-        """トレーナーカードの使用処理（公式ルール準拠版）"""
-        try:
-            # トレーナータイプを取得
-            trainer_type = getattr(trainer_card, 'trainer_type', None)
-            
-            if not trainer_type:
-                # trainer_typeが設定されていない場合はカード名から推定
-                trainer_type = self._detect_trainer_type_from_name(trainer_card.name)
-            
-            print(f"トレーナーカード使用: {trainer_card.name} (タイプ: {trainer_type})")
-            
-            # タイプ別処理
-            if trainer_type == "supporter" or trainer_type == TrainerType.SUPPORTER:
-                return self._handle_supporter_play(trainer_card, card_index)
-            elif trainer_type == "item" or trainer_type == TrainerType.ITEM:
-                return self._handle_item_play(trainer_card, card_index)  
-            elif trainer_type == "stadium" or trainer_type == TrainerType.STADIUM:
-                return self._handle_stadium_play(trainer_card, card_index)
-            else:
-                # 不明なタイプの場合はグッズとして扱う
-                print(f"警告: {trainer_card.name}のタイプが不明です。グッズとして処理します。")
-                return self._handle_item_play(trainer_card, card_index)
-        
-        except Exception as e:
-            return f"トレーナーカード使用エラー: {e}"
-    
- 
-    def _handle_supporter_play(self, supporter_card: Card, card_index: int) -> str:
-        """サポートカードの使用処理（公式ルール準拠版）"""
-        try:
-            # 🆕 サポート使用制限チェック（先攻制限含む）
-            if not self.game_state.can_use_supporter():
-                restriction_reason = self.game_state.get_supporter_restriction_reason()
-                return f"{supporter_card.name}を使用できません。{restriction_reason}"
-            
-            # 手札からトラッシュへ移動
-            if self._move_card_from_hand_to_discard(card_index):
-                # サポート使用フラグを設定
-                self.game_state.supporter_played_this_turn = True
-                
-                # 効果処理は今後実装
-                effect_message = self._apply_supporter_effect(supporter_card)
-                
-                return f"{supporter_card.name}を使用しました。{effect_message}"
-            else:
-                return f"{supporter_card.name}の使用に失敗しました。"
-        
-        except Exception as e:
-            return f"サポートカード使用エラー: {e}"
-            
-    def _handle_item_play(self, item_card: Card, card_index: int) -> str:
-        """グッズカードの使用処理（制限なし）"""
+        """トレーナーカードの使用処理（公式ルール準拠版・サポート/グッズ/スタジアムの判定はMatch）"""
         try:
-            # グッズには使用回数制限なし
+            print(f"トレーナーカード使用: {trainer_card.name} (タイプ: {getattr(trainer_card, 'trainer_type', None)})")
             
-            # 手札からトラッシュへ移動
-            if self._move_card_from_hand_to_discard(card_index):
-                # 効果処理は今後実装
-                effect_message = self._apply_item_effect(item_card)
-                
-                return f"{item_card.name}を使用しました。{effect_message}"
-            else:
-                return f"{item_card.name}の使用に失敗しました。"
-        
-        except Exception as e:
-            return f"グッズカード使用エラー: {e}"
-    
-    def _handle_stadium_play(self, stadium_card: Card, card_index: int) -> str:
-        """スタジアムカードの使用処理"""
-        try:
-            # 既存のスタジアムがある場合の処理
-            previous_stadium = None
-            if self.game_state.stadium:
-                previous_stadium = self.game_state.stadium
-                # 既存スタジアムをトラッシュへ
-                self.game_state.player_discard.append(previous_stadium)
-                print(f"既存のスタジアム「{previous_stadium.name}」をトラッシュしました")
-            
-            # 手札からスタジアムエリアへ移動
-            if self._move_card_from_hand_to_stadium(card_index, stadium_card):
-                # 効果処理は今後実装
-                effect_message = self._apply_stadium_effect(stadium_card)
-                
-                if previous_stadium:
-                    return f"{stadium_card.name}を場に出しました。{previous_stadium.name}はトラッシュされました。{effect_message}"
-                else:
-                    return f"{stadium_card.name}を場に出しました。{effect_message}"
-            else:
-                return f"{stadium_card.name}の使用に失敗しました。"
+            _, message = self.match.play_trainer("player", trainer_card)
+            return message
         
         except Exception as e:
-            return f"スタジアムカード使用エラー: {e}"
-
-    def _move_card_from_hand_to_discard(self, card_index: int) -> bool:
-        """手札からトラッシュへカードを移動"""
-        try:
-            if card_index >= len(self.game_state.player_hand):
-                print(f"無効なカードインデックス: {card_index}")
-                return False
-            
-            # カードを手札から削除してトラッシュへ追加
-            card = self.game_state.player_hand.pop(card_index)
-            self.game_state.player_discard.append(card)
-            
-            print(f"カード移動: {card.name} → トラッシュ")
-            return True
-        
-        except Exception as e:
-            print(f"カード移動エラー: {e}")
-            return False
-    
-    def _move_card_from_hand_to_stadium(self, card_index: int, stadium_card: Card) -> bool:
-        """手札からスタジアムエリアへカードを移動"""
-        try:
-            if card_index >= len(self.game_state.player_hand):
-                print(f"無効なカードインデックス: {card_index}")
-                return False
-            
-            # カードを手札から削除してスタジアムエリアへ設定
-            card = self.game_state.player_hand.pop(card_index)
-            self.game_state.stadium = card
-            
-            print(f"スタジアム設置: {card.name}")
-            return True
-        
-        except Exception as e:
-            print(f"スタジアム設置エラー: {e}")
-            return False
-    
-    def _detect_trainer_type_from_name(self, card_name: str) -> str:
-        """カード名からトレーナータイプを推定（暫定実装）"""
-        # よくあるサポートカード名のパターン
-        supporter_keywords = ["博士", "ジム", "リーダー", "チャンピオン", "研究員", "助手"]
-        
-        # よくあるスタジアム名のパターン  
-        stadium_keywords = ["スタジアム", "ジム", "センター", "タワー", "島", "山", "森", "湖", "遺跡"]
-        
-        card_name_lower = card_name.lower()
-        
-        for keyword in supporter_keywords:
-            if keyword in card_name:
-                return "supporter"
-        
-        for keyword in stadium_keywords:
-            if keyword in card_name:
-                return "stadium"
-        
-        # どちらにも該当しない場合はグッズとして扱う
-        return "item"
-    
-    def _apply_supporter_effect(self, supporter_card: Card) -> str:
-        """サポートカードの効果を適用（今後実装）"""
-        # 現在は効果未実装のため、基本メッセージのみ
-        return "効果はまだ実装されていません。"
-    
-    def _apply_item_effect(self, item_card: Card) -> str:
-        """グッズカードの効果を適用（今後実装）"""
-        # 現在は効果未実装のため、基本メッセージのみ
-        return "効果はまだ実装されていません。"
-    
-    def _apply_stadium_effect(self, stadium_card: Card) -> str:
-        """スタジアムカードの効果を適用（今後実装）"""
-        # 現在は効果未実装のため、基本メッセージのみ
-        return "効果はまだ実装されていません。"
-
-    def _get_evolution_targets(self, pokemon_card: Card) -> List[Tuple[str, int]]:
-        """進化可能なポケモンを取得"""
-        targets = []
-        try:
-            if not pokemon_card.evolves_from:
-                return targets
-            
-            # バトル場をチェック
-            if (self.game_state.player_active and 
-                self.game_state.player_active.name == pokemon_card.evolves_from):
-                targets.append(("active", 0))
-            
-            # ベンチをチェック
-            for i, bench_pokemon in enumerate(self.game_state.player_bench):
-                if bench_pokemon and bench_pokemon.name == pokemon_card.evolves_from:
-                    targets.append(("bench", i))
-        
-        except Exception as e:
-            print(f"進化対象取得エラー: {e}")
-        
-        return targets
+            return f"トレーナーカード使用エラー: {e}"
     
     def _get_energy_targets(self) -> List[Tuple[str, Optional[int], Card]]:
         """エネルギー装着可能なポケモンを取得"""
@@ -775,44 +428,12 @@ class CardActions:
         try:
             print(f"🧬 進化実行: {target_pokemon.name} → {evolution_card.name}")
             
-            # 🆕 再度進化可能性チェック（二重チェック）
-            if not self.game_state.can_evolve_pokemon(target_pokemon):
-                return f"{target_pokemon.name}は現在進化できません（進化制限により）"
+            # 状態の引き継ぎ・進化前ポケモンのトラッシュはルールエンジンで実行
+            success, message = self.match.evolve("player", evolution_card, target_pokemon)
             
-            # 進化前ポケモンの状態を進化後に引き継ぎ
-            evolution_card.damage_taken = getattr(target_pokemon, 'damage_taken', 0)
-            
-            if hasattr(target_pokemon, 'attached_energy'):
-                evolution_card.attached_energy = target_pokemon.attached_energy.copy()
-            else:
-                evolution_card.attached_energy = []
-            
-            if hasattr(target_pokemon, 'attached_tools'):
-                evolution_card.attached_tools = target_pokemon.attached_tools.copy()
-            else:
-                evolution_card.attached_tools = []
-            
-            if hasattr(target_pokemon, 'special_conditions'):
-                evolution_card.special_conditions = target_pokemon.special_conditions.copy()
-            else:
-                evolution_card.special_conditions = set()
-            
-            # 🆕 進化したポケモンのsummoned_this_turnフラグを設定
-            evolution_card.summoned_this_turn = False
-            evolution_card.evolved_this_turn = True
-            
-            # 場所に応じて配置
-            if target_location == "active":
-                self.game_state.player_active = evolution_card
-            elif target_location == "bench":
-                self.game_state.player_bench[target_index] = evolution_card
-            
-            # 手札から進化カードを削除し、進化前ポケモンを捨て札に
-            self.game_state.player_hand.pop(card_index)
-            self.game_state.player_discard.append(target_pokemon)
-            
-            print(f"✅ 進化完了: {target_pokemon.name} → {evolution_card.name}")
-            return f"{target_pokemon.name}を{evolution_card.name}に進化させました"
+            if success:
+                print(f"✅ 進化完了: {target_pokemon.name} → {evolution_card.name}")
+            return message
         
         except Exception as e:
             print(f"進化処理エラー: {e}")
@@ -822,32 +443,12 @@ class CardActions:
     def _place_pokemon_on_bench(self, pokemon_card: Card, card_index: int) -> str:
         """ポケモンをベンチに配置（summoned_this_turnフラグ設定強化版）"""
         try:
-            # ポケモンカードかチェック
-            if pokemon_card.card_type != CardType.POKEMON:
-                return f"{pokemon_card.name}はポケモンカードではありません"
-            
-            # たねポケモンかチェック
-            if getattr(pokemon_card, 'evolve_step', 0) != 0:
-                return f"{pokemon_card.name}は進化ポケモンです。進化元となるポケモンを場に出してから進化させてください。"
-            
-            # 空いているベンチスロットを探す
-            for i in range(5):  # ベンチは最大5匹
-                if i >= len(self.game_state.player_bench) or not self.game_state.player_bench[i]:
-                    # 空きスロットに配置
-                    while len(self.game_state.player_bench) <= i:
-                        self.game_state.player_bench.append(None)
-                    
-                    self.game_state.player_bench[i] = pokemon_card
-                    self.game_state.player_hand.pop(card_index)
-                    
-                    # 🆕 summoned_this_turnフラグを設定（そのターンに出されたため進化不可）
-                    pokemon_card.summoned_this_turn = True
-                    self.game_state.set_pokemon_summoned_this_turn(pokemon_card, True)
-                    
-                    print(f"✅ ベンチ配置: {pokemon_card.name} (summoned_this_turn=True)")
-                    return f"{pokemon_card.name}をベンチに出しました"
-            
-            return "ベンチが満杯です"
+            # たねポケモン判定・空きスロット探索・summoned_this_turnフラグ設定はMatchで実行
+            success, message = self.match.play_basic_pokemon("player", pokemon_card)
+            
+            if success:
+                print(f"✅ ベンチ配置: {pokemon_card.name} (summoned_this_turn=True)")
+            return message
     
         except Exception as e:
             return f"ベンチ配置エラー: {e}"
@@ -871,10 +472,6 @@ class CardActions:
                                 location: str, index: Optional[int]) -> str:
         """指定されたポケモンにエネルギーを装着（1ターン1回制限対応版）"""
         try:
-            # 🆕 エネルギー装着1ターン1回制限チェック（二重チェック）
-            if self.game_state.energy_played_this_turn:
-                return "このターンはすでにエネルギーを装着しました。エネルギーの装着は1ターンに1回までです。"
-            
             # 対象ポケモンを取得
             if location == "active":
                 target_pokemon = self.game_state.player_active
@@ -883,21 +480,12 @@ class CardActions:
             else:
                 return "無効な装着位置です"
             
-            if not target_pokemon:
-                return "対象のポケモンが見つかりません"
-            
-            # エネルギーを装着
-            if not hasattr(target_pokemon, 'attached_energy'):
-                target_pokemon.attached_energy = []
-            
-            target_pokemon.attached_energy.append(energy_card)
-            self.game_state.player_hand.pop(card_index)
-            
-            # 🆕 エネルギー装着フラグを設定
-            self.game_state.energy_played_this_turn = True
-            print(f"✅ エネルギー装着フラグ設定: energy_played_this_turn = True")
+            # 1ターン1回制限チェック・装着はルールエンジンで実行
+            success, message = self.match.attach_energy("player", energy_card, target_pokemon)
             
-            return f"{target_pokemon.name}に{energy_card.name}を装着しました"
+            if success:
+                print(f"✅ エネルギー装着フラグ設定: energy_played_this_turn = True")
+            return message
         
         except Exception as e:
             return f"エネルギー装着エラー: {e}"
\ No newline at end of file
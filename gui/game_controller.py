@@ -1,22 +1,23 @@
 # gui/game_controller.py
-# Version: 4.29
-# Updated: 2025-06-12 12:10
-# ゲームコントローラー：公式ルール準拠ドロー処理・山札切れ敗北対応版
+# Version: 4.32
+# Updated: 2026-10-18 10:00
+# ゲームコントローラー：ヘッドレス対戦エンジン（engine.Match）アダプタ版
 
-import random
-import copy
 from typing import List, Optional, Tuple
 
 from models.game_state import GameState
-from models.card import Card, CardType
+from models.card import Card
+from engine.match import Match
 
 class GameController:
-    """ゲーム進行を制御するクラス（公式ルール準拠ドロー処理・山札切れ敗北対応版）"""
+    """ゲーム進行を制御するクラス（ルール処理はengine.Matchに委譲）"""
     
-    def __init__(self, game_state: GameState, database_manager, debug_mode: bool = True):
+    def __init__(self, game_state: GameState, database_manager, debug_mode: bool = True,
+                 match: Optional[Match] = None):
         self.game_state = game_state
         self.database_manager = database_manager
         self.debug_mode = debug_mode
+        self.match = match if match is not None else Match(game_state)
     
     def set_dialog_manager(self, dialog_manager):
         """ダイアログマネージャーを設定"""
@@ -28,6 +29,7 @@ class GameController:
         try:
             print(f"=== ゲーム初期化開始 ===")
             print(f"プレイヤーデッキID: {player_deck_id}, 相手デッキID: {opponent_deck_id}")
+            print(f"乱数シード: {self.match.seed}（同じシードで対戦を再現できます）")
             
             # デッキIDを保存
             self.game_state.player_deck_id = player_deck_id
@@ -41,30 +43,13 @@ class GameController:
                 print("デッキの読み込みに失敗しました")
                 return False
             
-            # デッキをシャッフル
-            random.shuffle(player_cards)
-            random.shuffle(opponent_cards)
-            
-            # ゲーム状態を初期化
-            self.game_state.player_deck = player_cards.copy()
-            self.game_state.opponent_deck = opponent_cards.copy()
-            
-            # サイド（プライズ）カードを配る（6枚）
-            self.game_state.player_prizes = []
-            self.game_state.opponent_prizes = []
-            
-            for _ in range(6):
-                if self.game_state.player_deck:
-                    self.game_state.player_prizes.append(self.game_state.player_deck.pop(0))
-                if self.game_state.opponent_deck:
-                    self.game_state.opponent_prizes.append(self.game_state.opponent_deck.pop(0))
-            
-            # マリガン処理を含む初期手札配布 - 修正：追加
-            mulligan_success = self._initial_hand_with_mulligan()
-            if not mulligan_success:
+            # シャッフル・サイド配布・マリガン処理を含む初期手札配布
+            if not self.match.setup(player_cards, opponent_cards):
                 print("マリガン処理に失敗しました")
                 return False
             
+            self._apply_opponent_mulligan_bonus()
+            
             if self.debug_mode:
                 print(f"プレイヤー手札: {len(self.game_state.player_hand)}枚")
                 print(f"相手手札: {len(self.game_state.opponent_hand)}枚")
@@ -87,102 +72,28 @@ class GameController:
             traceback.print_exc()
             return False
 
-    def _initial_hand_with_mulligan(self) -> bool:
-        """マリガン処理を含む初期手札配布（マリガンペナルティ選択制対応版）"""
+    def _apply_opponent_mulligan_bonus(self):
+        """🆕 マリガンペナルティの適用（相手AI分。プレイヤー分は後でUIで選択）"""
         try:
-            print("=== 初期手札配布・マリガン処理開始 ===")
-            
-            # プレイヤーと相手のマリガン回数を初期化
-            player_mulligans = 0
-            opponent_mulligans = 0
-            
-            # プレイヤーの初期手札配布・マリガン処理
-            player_basic_found = False
-            while not player_basic_found and player_mulligans < 10:  # 無限ループ防止
-                # 手札を7枚引く
-                self.game_state.player_hand = []
-                for _ in range(7):
-                    if self.game_state.player_deck:
-                        self.game_state.player_hand.append(self.game_state.player_deck.pop(0))
-                
-                # たねポケモンがあるかチェック - 修正：判定条件統一
-                basic_pokemon = [card for card in self.game_state.player_hand 
-                            if card.card_type == CardType.POKEMON and getattr(card, 'evolve_step', 0) == 0]
-                
-                if basic_pokemon:
-                    player_basic_found = True
-                    print(f"プレイヤー: たねポケモン発見 ({len(basic_pokemon)}匹)")
-                else:
-                    # マリガン実行
-                    player_mulligans += 1
-                    print(f"プレイヤー: マリガン{player_mulligans}回目（たねポケモンなし）")
-                    
-                    # 手札を山札に戻してシャッフル
-                    self.game_state.player_deck.extend(self.game_state.player_hand)
-                    random.shuffle(self.game_state.player_deck)
-                    self.game_state.player_hand = []
-            
-            # 相手の初期手札配布・マリガン処理
-            opponent_basic_found = False
-            while not opponent_basic_found and opponent_mulligans < 10:  # 無限ループ防止
-                # 手札を7枚引く
-                self.game_state.opponent_hand = []
-                for _ in range(7):
-                    if self.game_state.opponent_deck:
-                        self.game_state.opponent_hand.append(self.game_state.opponent_deck.pop(0))
-                
-                # たねポケモンがあるかチェック - 修正：判定条件統一
-                basic_pokemon = [card for card in self.game_state.opponent_hand 
-                            if card.card_type == CardType.POKEMON and getattr(card, 'evolve_step', 0) == 0]
-                
-                if basic_pokemon:
-                    opponent_basic_found = True
-                    print(f"相手: たねポケモン発見 ({len(basic_pokemon)}匹)")
-                else:
-                    # マリガン実行
-                    opponent_mulligans += 1
-                    print(f"相手: マリガン{opponent_mulligans}回目（たねポケモンなし）")
-                    
-                    # 手札を山札に戻してシャッフル
-                    self.game_state.opponent_deck.extend(self.game_state.opponent_hand)
-                    random.shuffle(self.game_state.opponent_deck)
-                    self.game_state.opponent_hand = []
-            
-            # 🆕 マリガンペナルティの適用（選択制・公式ルール準拠版）
-            net_player_advantage = opponent_mulligans - player_mulligans
-            net_opponent_advantage = player_mulligans - opponent_mulligans
-            
-            # プレイヤーが追加ドローを受ける権利がある場合
-            if net_player_advantage > 0:
-                print(f"プレイヤーがマリガンペナルティで最大{net_player_advantage}枚引く権利を獲得")
-                # 追加ドローは後でUIで選択するため、ここでは何もしない
-                
-            # 相手（AI）が追加ドローを受ける権利がある場合
-            elif net_opponent_advantage > 0:
+            player_bonus = self.match.get_mulligan_bonus("player")
+            if player_bonus > 0:
+                print(f"プレイヤーがマリガンペナルティで最大{player_bonus}枚引く権利を獲得")
+            
+            opponent_bonus = self.match.get_mulligan_bonus("opponent")
+            if opponent_bonus > 0:
                 # AIの判断ロジック：戦略的に決定
-                ai_draw_count = self._ai_decide_mulligan_penalty_draw(net_opponent_advantage)
-                
-                for _ in range(ai_draw_count):
-                    if self.game_state.opponent_deck:
-                        self.game_state.opponent_hand.append(self.game_state.opponent_deck.pop(0))
+                ai_draw_count = self._ai_decide_mulligan_penalty_draw(opponent_bonus)
+                self.match.draw_cards("opponent", ai_draw_count)
                 
                 if ai_draw_count > 0:
-                    print(f"相手がマリガンペナルティで{ai_draw_count}枚追加ドロー（最大{net_opponent_advantage}枚）")
+                    print(f"相手がマリガンペナルティで{ai_draw_count}枚追加ドロー（最大{opponent_bonus}枚）")
                 else:
                     print(f"相手はマリガンペナルティの追加ドローを辞退")
-
-            # マリガン回数を記録
-            self.game_state.player_mulligans = player_mulligans
-            self.game_state.opponent_mulligans = opponent_mulligans
-            
-            print(f"マリガン処理完了: プレイヤー{player_mulligans}回, 相手{opponent_mulligans}回")
-            print("=== 初期手札配布・マリガン処理完了 ===")
             
-            return player_basic_found and opponent_basic_found
+            print(f"マリガン処理完了: プレイヤー{self.game_state.player_mulligans}回, 相手{self.game_state.opponent_mulligans}回")
             
         except Exception as e:
-            print(f"マリガン処理エラー: {e}")
-            return False
+            print(f"マリガンペナルティ処理エラー: {e}")
     
     def _ai_decide_mulligan_penalty_draw(self, max_draw: int) -> int:
         """
@@ -191,27 +102,8 @@ class GameController:
             max_draw:最大ドロー可能枚数
             Returns:実際に引く枚数（0〜max_draw）
         """
-        try:
-            # 基本的な判断ロジック：手札の質を考慮
-            current_hand_size = len(self.game_state.opponent_hand)
-            
-            # 手札が少ない場合は多めに引く
-            if current_hand_size <= 5:
-                return max_draw  # 最大まで引く
-            
-            # 手札に十分なたねポケモンがある場合は控えめに
-            basic_pokemon_count = len([card for card in self.game_state.opponent_hand 
-                                     if card.card_type == CardType.POKEMON and getattr(card, 'evolve_step', 0) == 0])
-            
-            if basic_pokemon_count >= 3:
-                return max(0, max_draw - 1)  # 1枚少なく引く
-            
-            # その他の場合は中程度
-            return min(max_draw, max(1, max_draw // 2))
-            
-        except Exception as e:
-            print(f"AI マリガンペナルティ判断エラー: {e}")
-            return max_draw  # エラー時は最大まで引く
+        from gui.ai_controller import AIController
+        return AIController(self.game_state, None, side="opponent", match=self.match).decide_mulligan_penalty_draw(max_draw)
 
     def execute_additional_draw(self, draw_count: int) -> bool:
         """
@@ -225,21 +117,15 @@ class GameController:
                 return True
             
             # 追加ドロー可能枚数をチェック
-            max_additional = max(0, self.game_state.opponent_mulligans - self.game_state.player_mulligans)
+            max_additional = self.match.get_mulligan_bonus("player")
             if draw_count > max_additional:
                 print(f"追加ドロー枚数が上限を超えています: {draw_count} > {max_additional}")
                 return False
             
             # 指定された枚数をドロー
-            drawn_cards = []
-            for _ in range(draw_count):
-                if self.game_state.player_deck:
-                    card = self.game_state.player_deck.pop(0)
-                    self.game_state.player_hand.append(card)
-                    drawn_cards.append(card)
-                else:
-                    print("山札が不足しています")
-                    break
+            drawn_cards = self.match.draw_cards("player", draw_count)
+            if len(drawn_cards) < draw_count:
+                print("山札が不足しています")
             
             print(f"マリガンペナルティで{len(drawn_cards)}枚追加ドロー")
             if self.debug_mode:
@@ -267,46 +153,18 @@ class GameController:
                 print(f"デッキID {deck_id} のカードが見つかりません")
                 return []
             
-            cards = []
-            instance_counter = 0
-            
+            valid_entries = []
             for card_tuple in deck_data:
-                try:
-                    # tupleから適切にCardオブジェクトと枚数を取り出し
-                    if isinstance(card_tuple, tuple) and len(card_tuple) == 2:
-                        original_card, count = card_tuple
-                        print(f"デッキ{deck_id}: {original_card.name} x {count}枚")
-                        
-                        # 指定された枚数分だけカードのコピーを作成
-                        for i in range(count):
-                            # 各カードの独立したコピーを作成（重要：deep copyによる完全な独立性確保）
-                            card_copy = copy.deepcopy(original_card)
-                            
-                            # HP引き継ぎバグ修正：各インスタンスにユニークIDを付与
-                            card_copy._instance_id = f"{card_copy.name}_{instance_counter}_{id(card_copy)}"
-                            
-                            # ダメージ状態を確実に初期化
-                            card_copy.damage_taken = 0
-                            if hasattr(card_copy, 'special_conditions'):
-                                card_copy.special_conditions = set()
-                            
-                            # ターンフラグも初期化
-                            if hasattr(card_copy, 'summoned_this_turn'):
-                                card_copy.summoned_this_turn = False
-                            if hasattr(card_copy, 'evolved_this_turn'):
-                                card_copy.evolved_this_turn = False
-                            
-                            cards.append(card_copy)
-                            instance_counter += 1
-                            
-                            if self.debug_mode and i == 0:  # 最初の1枚だけログ出力
-                                print(f"  カード作成: {card_copy.name} (インスタンス: {card_copy._instance_id})")
-                    else:
-                        print(f"警告: 不正なデータ形式 - {card_tuple}")
-                        
-                except Exception as e:
-                    print(f"カードコピー作成エラー {card_tuple}: {e}")
-                    continue
+                # tupleから適切にCardオブジェクトと枚数を取り出し
+                if isinstance(card_tuple, tuple) and len(card_tuple) == 2:
+                    original_card, count = card_tuple
+                    print(f"デッキ{deck_id}: {original_card.name} x {count}枚")
+                    valid_entries.append(card_tuple)
+                else:
+                    print(f"警告: 不正なデータ形式 - {card_tuple}")
+            
+            # 指定された枚数分だけ独立したカードインスタンスを作成
+            cards = Match.build_deck(valid_entries)
             
             print(f"デッキ{deck_id}の読み込み完了: {len(cards)}枚")
             return cards
@@ -387,67 +245,26 @@ class GameController:
         try:
             print(f"=== {player}の初期ポケモン配置開始 ===")
             
-            # 手札を取得
-            if player == "player":
-                hand = self.game_state.player_hand
-            else:
-                hand = self.game_state.opponent_hand
-            
             # たねポケモンを探す（ポケモンカードのみ）
+            hand = self.game_state.get_hand(player)
             basic_pokemon = [card for card in hand if self._is_basic_pokemon(card)]
             
             if not basic_pokemon:
                 print(f"{player}の手札にたねポケモンがありません")
-                # マリガン処理は_initial_hand_with_mulliganで実行済み
+                # マリガン処理はMatch.setupで実行済み
                 return False
             
             if self.debug_mode:
                 pokemon_names = [p.name for p in basic_pokemon]
                 print(f"{player}のたねポケモン: {pokemon_names}")
             
-            # 最初のたねポケモンをバトル場に配置
-            active_pokemon = basic_pokemon[0]
-            
-            # 手札から取り除いてバトル場に配置
-            hand.remove(active_pokemon)
-            
-            if player == "player":
-                self.game_state.player_active = active_pokemon
-            else:
-                self.game_state.opponent_active = active_pokemon
-            
-            # 重要：初期配置時はsummoned_this_turnフラグをFalseに設定
-            # （初期配置は「そのターンに出された」扱いにしない）
-            active_pokemon.summoned_this_turn = False
-            self.game_state.set_pokemon_summoned_this_turn(active_pokemon, False)
-            
-            print(f"{player}のバトル場: {active_pokemon.name}")
-            
-            # 残りのたねポケモンをベンチに配置（最大5匹）
-            bench_pokemon = basic_pokemon[1:6]  # 最大5匹まで
-            
-            if player == "player":
-                for i, pokemon in enumerate(bench_pokemon):
-                    if i < 5:  # ベンチは最大5匹
-                        hand.remove(pokemon)
-                        self.game_state.player_bench[i] = pokemon
-                        
-                        # 初期配置時はsummoned_this_turnフラグをFalseに設定
-                        pokemon.summoned_this_turn = False
-                        self.game_state.set_pokemon_summoned_this_turn(pokemon, False)
-                        
-                        print(f"{player}のベンチ{i+1}: {pokemon.name}")
-            else:
-                for i, pokemon in enumerate(bench_pokemon):
-                    if i < 5:  # ベンチは最大5匹
-                        hand.remove(pokemon)
-                        self.game_state.opponent_bench[i] = pokemon
-                        
-                        # 初期配置時はsummoned_this_turnフラグをFalseに設定
-                        pokemon.summoned_this_turn = False
-                        self.game_state.set_pokemon_summoned_this_turn(pokemon, False)
-                        
-                        print(f"{player}のベンチ{i+1}: {pokemon.name}")
+            # 最初のたねポケモンをバトル場、残りをベンチに配置（最大5匹）
+            if not self.match.place_initial_pokemon(player, basic_pokemon[0], basic_pokemon[1:6]):
+                return False
+            
+            print(f"{player}のバトル場: {basic_pokemon[0].name}")
+            for i, pokemon in enumerate(basic_pokemon[1:6]):
+                print(f"{player}のベンチ{i+1}: {pokemon.name}")
             
             print(f"=== {player}の初期ポケモン配置完了 ===")
             return True
@@ -460,8 +277,7 @@ class GameController:
     
     def _is_basic_pokemon(self, card: Card) -> bool:
         """基本ポケモン（たねポケモン）かどうかをチェック（修正版）"""
-        return (card.card_type == CardType.POKEMON and 
-                getattr(card, 'evolve_step', 0) == 0)
+        return Match.is_basic_pokemon(card)
     
     def start_turn(self, player: str) -> Tuple[List[str], bool]:
         """
@@ -472,36 +288,15 @@ class GameController:
         """
         try:
             print(f"=== {player}のターン開始 ===")
-            messages = []
-            
-            # ゲーム状態でターン開始処理
-            self.game_state.start_turn(player)
             
-            # 🆕 ドロー処理（v4.29修正版：公式ルール準拠）
-            if self.game_state.can_draw_card():
-                drawn_card, can_continue = self.game_state.draw_card(player)
-                
-                if not can_continue:
-                    # 🆕 山札切れによる敗北
-                    messages.append(f"{player}は山札が空のためカードを引けませんでした")
-                    messages.append(f"{player}の敗北です")
-                    print(f"🏁 ゲーム終了: {player}が山札切れで敗北")
-                    return messages, False  # ゲーム終了
-                elif drawn_card:
-                    messages.append(f"{player}が{drawn_card.name}を引きました")
-                    print(f"✅ ドロー成功: {player}が{drawn_card.name}を引きました")
-                else:
-                    messages.append(f"{player}はドローに失敗しました")
-                    print(f"⚠️ ドロー失敗: {player}")
-            else:
-                print("ℹ️ ドロー条件を満たしていません")
+            # ドロー・特殊状態処理はMatchで実行
+            messages, can_continue = self.match.start_turn(player)
             
-            # ターン開始時の特殊状態処理
-            special_messages = self._process_special_conditions_start_of_turn(player)
-            messages.extend(special_messages)
+            if not can_continue:
+                print(f"🏁 ゲーム終了: 勝者 {self.match.winner}（{self.match.end_reason}）")
             
             print(f"=== {player}のターン開始処理完了 ===")
-            return messages, True  # ゲーム継続
+            return messages, can_continue
             
         except Exception as e:
             print(f"ターン開始処理エラー ({player}): {e}")
@@ -513,11 +308,8 @@ class GameController:
             current_player = self.game_state.current_player
             print(f"=== {current_player}のターン終了処理開始 ===")
             
-            # ターン終了時の特殊状態処理
-            self._process_special_conditions_end_of_turn(current_player)
-            
-            # ゲーム状態でターン終了処理
-            self.game_state.switch_turn()
+            # ターン交代（特殊状態処理を含む）
+            self.match.end_turn()
             
             print(f"=== {current_player}のターン終了処理完了 ===")
             
@@ -525,68 +317,3 @@ class GameController:
             print(f"ターン終了処理エラー: {e}")
             import traceback
             traceback.print_exc()
-            
-    def _process_special_conditions_start_of_turn(self, player: str) -> List[str]:
-        """ターン開始時の特殊状態処理"""
-        messages = []
-        try:
-            # プレイヤーのアクティブポケモンを取得
-            if player == "player":
-                active_pokemon = self.game_state.player_active
-            else:
-                active_pokemon = self.game_state.opponent_active
-            
-            if not active_pokemon or not hasattr(active_pokemon, 'special_conditions'):
-                return messages
-            
-            # 特殊状態の処理（基本実装）
-            from models.card import SpecialCondition
-            
-            conditions_to_remove = set()
-            
-            # どく、やけどのダメージ処理
-            if SpecialCondition.POISON in active_pokemon.special_conditions:
-                active_pokemon.damage_taken += 10
-                messages.append(f"{active_pokemon.name}はどくのダメージを受けました（10ダメージ）")
-                print(f"{active_pokemon.name}はどくのダメージを受けました（10ダメージ）")
-                
-            if SpecialCondition.BURN in active_pokemon.special_conditions:
-                active_pokemon.damage_taken += 20
-                messages.append(f"{active_pokemon.name}はやけどのダメージを受けました（20ダメージ）")
-                print(f"{active_pokemon.name}はやけどのダメージを受けました（20ダメージ）")
-                # やけどは自動的に回復
-                conditions_to_remove.add(SpecialCondition.BURN)
-            
-            # ねむり、マヒの自動回復判定（簡易実装）
-            if SpecialCondition.SLEEP in active_pokemon.special_conditions:
-                # 50%の確率で回復
-                if random.random() < 0.5:
-                    conditions_to_remove.add(SpecialCondition.SLEEP)
-                    messages.append(f"{active_pokemon.name}のねむりが回復しました")
-                    print(f"{active_pokemon.name}のねむりが回復しました")
-            
-            if SpecialCondition.PARALYSIS in active_pokemon.special_conditions:
-                # マヒは自動的に回復
-                conditions_to_remove.add(SpecialCondition.PARALYSIS)
-                messages.append(f"{active_pokemon.name}のマヒが回復しました")
-                print(f"{active_pokemon.name}のマヒが回復しました")
-            
-            # 特殊状態を削除
-            for condition in conditions_to_remove:
-                active_pokemon.special_conditions.discard(condition)
-            
-            return messages
-                
-        except Exception as e:
-            print(f"ターン開始時特殊状態処理エラー: {e}")
-            return [f"特殊状態処理でエラーが発生しました: {e}"]
-    
-    def _process_special_conditions_end_of_turn(self, player: str):
-        """ターン終了時の特殊状態処理"""
-        try:
-            # 基本実装では何もしない
-            # 将来的にターン終了時に発動する効果があれば実装
-            pass
-            
-        except Exception as e:
-            print(f"ターン終了時特殊状態処理エラー: {e}")
\ No newline at end of file
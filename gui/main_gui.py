@@ -1,10 +1,10 @@
 # gui/main_gui.py
-# Version: 4.31
-# Updated: 2025-06-14 12:15
-# メインGUI：にげるシステム完全統合版
+# Version: 4.34
+# Updated: 2026-10-18 02:30
+# メインGUI：ヘッドレス対戦エンジン（engine.Match）統合版・AI思考のバックグラウンド実行・先読み
 
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 from typing import List, Optional
 
 from gui.deck_selection_dialog import DeckSelectionDialog
@@ -15,22 +15,34 @@ from gui.attack_selection_dialog import AttackSelectionDialog
 from gui.game_controller import GameController
 from gui.card_actions import CardActions
 from gui.ai_controller import AIController
+from gui.ai_worker import AITurnWorker, ACTION, ERROR, DONE
 from models.game_state import GameState
 from models.card import Card, CardType
+from engine.match import Match
 
 class PokemonTCGGUI:
     """ポケモンTCGシミュレータのメインGUIクラス（にげるシステム完全統合版）"""
     
-    def __init__(self, root: tk.Tk, database_manager):
+    # AI思考中にキューを確認する間隔（ミリ秒・約60fps）
+    AI_POLL_INTERVAL_MS = 16
+    
+    def __init__(self, root: tk.Tk, database_manager, search_options: Optional[dict] = None):
+        """
+        Args:
+            search_options: 指定時はAIを探索版（MCTSController）にし、この設定（time_budget 等）を渡す。
+                プレイヤーのターン中はAIが先読みする
+        """
         self.root = root
         self.database_manager = database_manager
         
         # ゲーム状態とコントローラーの初期化
+        # ルール処理はMatchに集約し、各コントローラーはそのアダプタとして動作
         self.game_state = GameState()
-        self.game_controller = GameController(self.game_state, database_manager)
+        self.match = Match(self.game_state)
+        self.game_controller = GameController(self.game_state, database_manager, match=self.match)
         self.dialog_manager = DialogManager(root)
-        self.card_actions = CardActions(self.game_state)
-        self.ai_controller = AIController(self.game_state, self.card_actions)
+        self.card_actions = CardActions(self.game_state, match=self.match)
+        self.ai_controller = AIController(self.game_state, self.card_actions, match=self.match)
         
         # 🆕 ダイアログマネージャーを各コントローラーに設定
         self.card_actions.set_dialog_manager(self.dialog_manager)
@@ -50,6 +62,21 @@ class PokemonTCGGUI:
         # ターン管理フラグ
         self.ai_turn_in_progress = False
         
+        # 🆕 AIの思考はワーカースレッドで実行し、決まった行動をキュー経由で受け取る
+        self.ai_worker = AITurnWorker(self._create_ai_controller)
+        self.ai_turn_messages: List[str] = []
+        
+        # 🆕 探索AIはプレイヤーのターン中に予想局面の探索木を育て、AIのターンで引き継ぐ
+        # （aiパッケージはgui.ai_controllerを読み込むため、循環しないよう使う箇所で読み込む）
+        self.search_options = search_options
+        self.ai_ponderer = None
+        if search_options is not None:
+            from ai.ponder import Ponderer
+            self.ai_ponderer = Ponderer(
+                lambda match: self._create_ai_controller(match, "opponent").create_search(match),
+                information_set=search_options.get("information_set", True)
+            )
+        
         # UIコンポーネント
         self.battle_field_ui = None
         self.hand_ui = None
@@ -137,6 +164,15 @@ class PokemonTCGGUI:
             anchor="w"
         )
         self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        # 🆕 AI思考中の進行表示と中断ボタン（思考中のみ表示）
+        self.ai_cancel_button = tk.Button(
+            status_frame,
+            text="思考を中断",
+            font=("Arial", 10),
+            command=self._on_cancel_ai_clicked
+        )
+        self.ai_progress = ttk.Progressbar(status_frame, mode="indeterminate", length=150)
 
     def _create_battle_log_area(self, parent_frame):
         """🆕 バトルログエリアを作成"""
@@ -331,18 +367,10 @@ class PokemonTCGGUI:
                         card.card_type == CardType.POKEMON and 
                         getattr(card, 'evolve_step', 0) == 0]
             
-            # バトル場に配置
+            # バトル場・ベンチに配置（ベンチの上限5匹）
             battle_pokemon = basic_pokemon[battle_index]
-            self.game_state.player_active = battle_pokemon
-            self.game_state.player_hand.remove(battle_pokemon)
-            
-            # ベンチに配置
-            self.game_state.player_bench = [None] * 5
-            for i, bench_index in enumerate(bench_indices):
-                if i < 5:  # ベンチの上限
-                    bench_pokemon = basic_pokemon[bench_index]
-                    self.game_state.player_bench[i] = bench_pokemon
-                    self.game_state.player_hand.remove(bench_pokemon)
+            bench_pokemon = [basic_pokemon[bench_index] for bench_index in bench_indices[:5]]
+            self.match.place_initial_pokemon("player", battle_pokemon, bench_pokemon)
             
             print(f"初期配置完了: バトル場={battle_pokemon.name}, ベンチ={len(bench_indices)}匹")
             
@@ -355,18 +383,15 @@ class PokemonTCGGUI:
             self.opponent_initial_setup_complete = True
             
             # 先攻を決定（プレイヤーが先攻）
-            self.game_state.set_first_player("player")
-            self.game_state.current_player = "player"
-            self.game_state.turn_count = 1
-            self.game_state.initialization_complete = True
+            self.match.begin("player")
             
             # 初回のターン開始処理を実行（ドロー処理含む）
             turn_messages, can_continue = self.game_controller.start_turn("player")
             if not can_continue:
-                # 山札切れによる敗北
+                # 山札切れ等による決着
                 message_text = "\n".join(turn_messages)
                 self.dialog_manager.show_game_message("ゲーム終了", message_text)
-                self._handle_game_over("opponent")  # プレイヤーが負け
+                self._handle_game_over(self.match.winner)
                 return
             elif turn_messages:
                 message_text = "\n".join(turn_messages)
@@ -447,15 +472,8 @@ class PokemonTCGGUI:
                             getattr(card, 'evolve_step', 0) == 0]
             
             if opponent_basic:
-                # バトル場に配置（最初のポケモン）
-                self.game_state.opponent_active = opponent_basic[0]
-                self.game_state.opponent_hand.remove(opponent_basic[0])
-                
-                # ベンチに配置（残りのポケモンを最大3匹）
-                self.game_state.opponent_bench = [None] * 5
-                for i, pokemon in enumerate(opponent_basic[1:4]):  # 最大3匹
-                    self.game_state.opponent_bench[i] = pokemon
-                    self.game_state.opponent_hand.remove(pokemon)
+                # バトル場に最初のポケモン、ベンチに残りのポケモンを最大3匹配置
+                self.match.place_initial_pokemon("opponent", opponent_basic[0], opponent_basic[1:4])
                 
                 print(f"相手初期配置完了: バトル場={self.game_state.opponent_active.name}")
         
@@ -552,6 +570,11 @@ class PokemonTCGGUI:
                 # 画面更新
                 self._update_display()
                 
+                # きぜつによる決着
+                if self.match.is_over:
+                    self._handle_game_over(self.match.winner)
+                    return
+                
                 # 攻撃後、プレイヤーのターンを自動終了
                 print("⚔️ 攻撃完了 - 自動でターンを終了します")
                 self.root.after(1000, self._on_end_turn_clicked)
@@ -978,12 +1001,10 @@ class PokemonTCGGUI:
             
             print("プレイヤーのターン終了")
             
-            # プレイヤーのターン終了処理
+            # プレイヤーのターン終了処理（ターン交代はMatchで実行）
             self.game_controller.end_turn("player")
             
             # 相手（AI）のターン開始
-            self.game_state.current_player = "opponent"
-            self.game_state.turn_count += 1
             self.status_label.config(text="相手のターンです...")
             self.ai_turn_in_progress = True
             
@@ -997,42 +1018,122 @@ class PokemonTCGGUI:
             print(f"ターン終了処理エラー: {e}")
             self.dialog_manager.show_game_message("エラー", f"ターン終了処理中にエラーが発生しました: {e}")
     
+    def _create_ai_controller(self, match: Match, side: str) -> AIController:
+        """思考スレッドで使うAIコントローラーを作成（試合の複製ごとに作る）"""
+        if self.search_options is not None:
+            from ai.mcts import MCTSController
+            return MCTSController(match.game_state, None, side=side, match=match,
+                                  ponderer=self.ai_ponderer, **self.search_options)
+        return AIController(match.game_state, None, side=side, match=match)
+    
+    def _update_pondering(self):
+        """🆕 プレイヤーのターン中はAIに先読みさせる（局面が変わっていれば予想し直す）"""
+        if self.ai_ponderer is None or self.ai_turn_in_progress or self.waiting_for_initial_setup:
+            return
+        self.ai_ponderer.start(self.match)
+    
     def _execute_ai_turn(self):
-        """AIのターン実行"""
+        """AIのターン実行（ターン開始処理の後、思考はワーカースレッドで行う）"""
         try:
             print("🤖 AIのターン開始")
             
             # AIターン開始処理
             turn_messages, can_continue = self.game_controller.start_turn("opponent")
             if not can_continue:
-                # 山札切れによる敗北
+                # 山札切れ等による決着
                 message_text = "\n".join(turn_messages)
                 self.dialog_manager.show_game_message("ゲーム終了", message_text)
-                self._handle_game_over("player")  # 相手が負け（プレイヤーが勝ち）
+                self._handle_game_over(self.match.winner)
+                return
+            
+            # 🆕 局面を複製して思考を開始し、行動はキューから順に受け取る
+            self.ai_turn_messages = []
+            self._update_display()
+            self.ai_worker.start(self.match, "opponent")
+            self._show_ai_progress()
+            self.root.after(self.AI_POLL_INTERVAL_MS, self._poll_ai_turn)
+        
+        except Exception as e:
+            self._recover_from_ai_error(e)
+    
+    def _poll_ai_turn(self):
+        """思考スレッドから届いた行動を実際の試合に適用（root.afterで定期実行）"""
+        try:
+            if not self.ai_turn_in_progress:
+                return
+            
+            from ai.mcts import TurnActions
+            for kind, value in self.ai_worker.poll():
+                if kind == ACTION:
+                    success, action_messages = TurnActions.apply(self.match, "opponent", value)
+                    self.ai_turn_messages.extend(action_messages)
+                    self._update_display()
+                    if not success:
+                        # 複製と実際の局面が食い違った場合はここでターンを終える
+                        print(f"AI行動の適用に失敗しました: {value}")
+                        self.ai_worker.cancel()
+                        self._finish_ai_turn()
+                        return
+                    if self.match.is_over:
+                        self.ai_worker.cancel()
+                        self._finish_ai_turn()
+                        return
+                elif kind == ERROR:
+                    self.ai_turn_messages.append("相手の行動でエラーが発生しました")
+                elif kind == DONE:
+                    self._finish_ai_turn()
+                    return
+            
+            # 進行表示（経過時間・決まった行動の数）を更新して次の確認を予約
+            self.status_label.config(
+                text=f"相手が考えています... {self.ai_worker.elapsed:.1f}秒（行動{self.ai_worker.action_count}回）"
+            )
+            self.root.after(self.AI_POLL_INTERVAL_MS, self._poll_ai_turn)
+        
+        except Exception as e:
+            self._recover_from_ai_error(e)
+    
+    def _on_cancel_ai_clicked(self):
+        """🆕 思考の中断：それまでに適用した行動でAIのターンを終える"""
+        try:
+            if not self.ai_turn_in_progress:
                 return
             
-            # AI行動実行（修正：正しいメソッド名を使用）
-            ai_messages = self.ai_controller.execute_ai_turn()
+            self.ai_worker.cancel()
+            self.ai_turn_messages.append("相手の思考を中断しました。")
+            self._finish_ai_turn()
+        
+        except Exception as e:
+            self._recover_from_ai_error(e)
+    
+    def _finish_ai_turn(self):
+        """AIの行動終了後の処理（行動の表示・ターン交代・プレイヤーのターン開始）"""
+        try:
+            self._hide_ai_progress()
             
-            # AI行動結果を表示（修正：文字列リストとして処理）
-            if ai_messages:
-                self.dialog_manager.show_game_message("相手の行動", "\n".join(ai_messages))
+            # AI行動結果を表示
+            if not self.ai_turn_messages:
+                self.ai_turn_messages.append("相手は何もできませんでした。")
+            self.dialog_manager.show_game_message("相手の行動", "\n".join(self.ai_turn_messages))
             
-            # AIターン終了処理
-            self.game_controller.end_turn("opponent")
+            # AIの攻撃による決着
+            if self.match.is_over:
+                self.ai_turn_in_progress = False
+                self._update_display()
+                self._handle_game_over(self.match.winner)
+                return
             
-            # プレイヤーのターンに戻す
-            self.game_state.current_player = "player"
-            self.game_state.turn_count += 1
+            # AIターン終了処理（プレイヤーへのターン交代はMatchで実行）
+            self.game_controller.end_turn("opponent")
             self.ai_turn_in_progress = False
             
             # プレイヤーターン開始処理
             turn_messages, can_continue = self.game_controller.start_turn("player")
             if not can_continue:
-                # 山札切れによる敗北
+                # 山札切れ等による決着
                 message_text = "\n".join(turn_messages)
                 self.dialog_manager.show_game_message("ゲーム終了", message_text)
-                self._handle_game_over("opponent")  # プレイヤーが負け
+                self._handle_game_over(self.match.winner)
                 return
             elif turn_messages:
                 message_text = "\n".join(turn_messages)
@@ -1046,15 +1147,36 @@ class PokemonTCGGUI:
             print("🎮 プレイヤーのターン開始")
         
         except Exception as e:
-            print(f"AIターン実行エラー: {e}")
-            self.ai_turn_in_progress = False
-            self.game_state.current_player = "player"
-            self.status_label.config(text="エラーが発生しました - あなたのターンです")
-            self.dialog_manager.show_game_message("エラー", f"AI行動中にエラーが発生しました: {e}")
+            self._recover_from_ai_error(e)
+    
+    def _show_ai_progress(self):
+        """🆕 思考中の進行表示と中断ボタンを表示"""
+        self.ai_cancel_button.pack(side=tk.RIGHT, padx=5)
+        self.ai_progress.pack(side=tk.RIGHT, padx=5)
+        self.ai_progress.start(self.AI_POLL_INTERVAL_MS)
+    
+    def _hide_ai_progress(self):
+        """🆕 思考中の進行表示と中断ボタンを隠す"""
+        self.ai_progress.stop()
+        self.ai_progress.pack_forget()
+        self.ai_cancel_button.pack_forget()
+    
+    def _recover_from_ai_error(self, error: Exception):
+        """AIターン中のエラーからプレイヤーのターンへ復帰"""
+        print(f"AIターン実行エラー: {error}")
+        self.ai_worker.cancel()
+        self._hide_ai_progress()
+        self.ai_turn_in_progress = False
+        self.game_state.current_player = "player"
+        self.status_label.config(text="エラーが発生しました - あなたのターンです")
+        self.dialog_manager.show_game_message("エラー", f"AI行動中にエラーが発生しました: {error}")
     
     def _handle_game_over(self, winner: str):
         """ゲーム終了処理"""
         try:
+            if self.ai_ponderer is not None:
+                self.ai_ponderer.stop()
+            
             if winner == "player":
                 message = "🎉 勝利！おめでとうございます！"
             else:
@@ -1079,6 +1201,9 @@ class PokemonTCGGUI:
             # 🆕 スタジアム情報をステータスラベルに表示
             self._update_status_with_stadium_info()
             
+            # 🆕 プレイヤーの操作で局面が変わったら先読みをやり直す
+            self._update_pondering()
+            
         except Exception as e:
             print(f"表示更新エラー: {e}")
 
@@ -1,6 +1,6 @@
 # main.py
-# Version: 4.21
-# Updated: 2025-06-09 18:50
+# Version: 4.23
+# Updated: 2026-10-18 02:30
 # ワザ使用システム完全実装版
 
 import tkinter as tk
@@ -81,13 +81,22 @@ def main():
     root = tk.Tk()
     
     try:
+        # GUIではデバッグコンソール用にトレースを標準出力へも表示（POKECA_TRACE指定時はそちらを優先）
+        from utils.tracing import tracer, DEBUG
+        if not os.environ.get("POKECA_TRACE"):
+            tracer.set_all(DEBUG)
+        tracer.echo = True
+        
         # データベースマネージャーの初期化
         from database.database_manager import DatabaseManager
         database_manager = DatabaseManager()
         
-        # メインGUIの起動
+        # メインGUIの起動（POKECA_AI=mcts でAIを探索版にする・思考時間は POKECA_AI_TIME 秒）
         from gui.main_gui import PokemonTCGGUI
-        app = PokemonTCGGUI(root, database_manager)
+        search_options = None
+        if os.environ.get("POKECA_AI") == "mcts":
+            search_options = {"time_budget": float(os.environ.get("POKECA_AI_TIME", "1.0"))}
+        app = PokemonTCGGUI(root, database_manager, search_options=search_options)
         
         print("✅ アプリケーション起動成功")
         print("\n⚔️ ワザ使用システムの使い方:")
@@ -1,13 +1,15 @@
 # models/__init__.py
-# Version: 4.23
-# Updated: 2025-06-12 11:45
+# Version: 4.24
+# Updated: 2026-10-17 14:00
 # 不要ファイル削除・簡略化版
 
-from .card import Card, CardType, TrainerType, SpecialCondition
+from .card import Card, CardInstance, CardPrototype, CardType, TrainerType, SpecialCondition
 from .game_state import GameState
 
 __all__ = [
     'Card', 
+    'CardInstance', 
+    'CardPrototype', 
     'CardType', 
     'TrainerType', 
     'SpecialCondition', 
@@ -1,11 +1,13 @@
 # models/card.py
-# Version: 4.5
-# Updated: 2024-12-06
-# カードモデル：簡素化版
+# Version: 5.3
+# Updated: 2026-10-17 18:00
+# カードモデル：共有プロトタイプ（静的データ）＋__slots__インスタンス（ゲーム状態）版
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, fields
 from typing import List, Optional, Dict, Set
 from enum import Enum
+from operator import attrgetter
+import itertools
 import random
 
 class CardType(Enum):
@@ -28,8 +30,36 @@ class SpecialCondition(Enum):
     PARALYSIS = "マヒ"
     CONFUSION = "こんらん"
 
-@dataclass
-class Card:
+# 特殊状態のビット表現（Card.condition_mask で使用）
+CONDITION_BITS: Dict[SpecialCondition, int] = {
+    condition: 1 << index for index, condition in enumerate(SpecialCondition)
+}
+EXCLUSIVE_CONDITION_MASK = (CONDITION_BITS[SpecialCondition.SLEEP] |
+                            CONDITION_BITS[SpecialCondition.PARALYSIS] |
+                            CONDITION_BITS[SpecialCondition.CONFUSION])
+
+# ビットマスク→特殊状態集合の対応表（取得時に集合を組み立てないよう事前計算）
+_CONDITION_SETS = tuple(
+    frozenset(condition for condition, bit in CONDITION_BITS.items() if mask & bit)
+    for mask in range(1 << len(CONDITION_BITS))
+)
+
+
+def conditions_to_mask(conditions) -> int:
+    """特殊状態の集合をビットマスクに変換"""
+    mask = 0
+    for condition in conditions:
+        mask |= CONDITION_BITS[condition]
+    return mask
+
+@dataclass(frozen=True, eq=False)
+class CardPrototype:
+    """
+    CSV由来の静的なカードデータ（不変・同名カードの全インスタンスで共有）
+    
+    山札を作る際はプロトタイプを共有したCardを生成するだけなので、
+    カード1枚あたりのコストはゲーム中の状態分のみになる。
+    """
     id: int
     name: str
     card_type: CardType
@@ -78,20 +108,95 @@ class Card:
     rarity: Optional[str] = None
     regulation: Optional[str] = None
     
-    # ゲーム中の状態
-    damage_taken: int = 0
-    attached_energy: List['Card'] = field(default_factory=list)
-    attached_tools: List['Card'] = field(default_factory=list)
-    special_conditions: Set[SpecialCondition] = field(default_factory=set)
-    summoned_this_turn: bool = False
-    evolved_this_turn: bool = False
-    
     def __post_init__(self):
         """初期化後の処理"""
         if self.attack_cost_types is None:
-            self.attack_cost_types = {}
+            object.__setattr__(self, 'attack_cost_types', {})
         if self.attack2_cost_types is None:
-            self.attack2_cost_types = {}
+            object.__setattr__(self, 'attack2_cost_types', {})
+
+
+class Card:
+    """
+    ゲーム中のカード1枚（可変なゲーム状態のみを保持）
+    
+    静的データ（名前・HP・ワザ等）は共有のCardPrototypeを参照する読み取り専用プロパティ。
+    従来通り Card(id=..., name=..., ...) でも生成でき、その場合は専用のプロトタイプを作成する。
+    
+    __slots__ でインスタンス辞書を持たず、特殊状態は小さな整数のビットマスク（condition_mask）で保持する。
+    special_conditions プロパティは従来通り集合（frozenset）として参照・代入できる。
+    """
+    
+    __slots__ = ('prototype', 'instance_id', 'damage_taken', 'attached_energy', 'attached_tools',
+                 'condition_mask', 'summoned_this_turn', 'evolved_this_turn', 'zhash')
+    
+    _instance_counter = itertools.count()
+    
+    def __init__(self, *args, prototype: Optional[CardPrototype] = None,
+                 damage_taken: int = 0,
+                 attached_energy: Optional[List['Card']] = None,
+                 attached_tools: Optional[List['Card']] = None,
+                 special_conditions: Optional[Set[SpecialCondition]] = None,
+                 summoned_this_turn: bool = False,
+                 evolved_this_turn: bool = False,
+                 **kwargs):
+        if prototype is None:
+            prototype = CardPrototype(*args, **kwargs)
+        elif args or kwargs:
+            raise TypeError("prototypeを指定した場合は静的データを渡せません")
+        
+        self.prototype = prototype
+        self.instance_id = next(Card._instance_counter)
+        
+        # ゲーム中の状態
+        self.damage_taken = damage_taken
+        self.attached_energy = attached_energy if attached_energy is not None else []
+        self.attached_tools = attached_tools if attached_tools is not None else []
+        self.condition_mask = conditions_to_mask(special_conditions) if special_conditions else 0
+        self.summoned_this_turn = summoned_this_turn
+        self.evolved_this_turn = evolved_this_turn
+        
+        # 局面ハッシュ用のカード単位ハッシュ（GameState.enable_hashing()時に計算）
+        self.zhash = 0
+    
+    def new_instance(self) -> 'Card':
+        """同じプロトタイプを共有する新しいカードインスタンス（状態は初期値）を作成"""
+        return Card(prototype=self.prototype)
+    
+    def clone(self) -> 'Card':
+        """
+        ゲーム状態のみを複製したインスタンスを作成（探索用）
+        
+        プロトタイプとinstance_idは共有し、付いているエネルギー・どうぐも再帰的に複製する。
+        """
+        new = Card.__new__(Card)
+        new.prototype = self.prototype
+        new.instance_id = self.instance_id
+        new.damage_taken = self.damage_taken
+        new.attached_energy = [card.clone() for card in self.attached_energy] if self.attached_energy else []
+        new.attached_tools = [card.clone() for card in self.attached_tools] if self.attached_tools else []
+        new.condition_mask = self.condition_mask
+        new.summoned_this_turn = self.summoned_this_turn
+        new.evolved_this_turn = self.evolved_this_turn
+        new.zhash = self.zhash
+        return new
+    
+    @property
+    def _instance_id(self) -> str:
+        """デバッグ表示用のインスタンス識別子"""
+        return f"{self.prototype.name}_{self.instance_id}"
+    
+    @property
+    def special_conditions(self) -> frozenset:
+        """特殊状態の集合（読み取り専用。変更は add/remove_special_condition か代入で行う）"""
+        return _CONDITION_SETS[self.condition_mask]
+    
+    @special_conditions.setter
+    def special_conditions(self, conditions):
+        self.condition_mask = conditions_to_mask(conditions)
+    
+    def __repr__(self) -> str:
+        return f"Card(id={self.prototype.id}, name={self.prototype.name!r}, instance_id={self.instance_id})"
     
     def can_evolve_from(self, base_pokemon: 'Card') -> bool:
         """このカードが指定のポケモンから進化できるかチェック"""
@@ -114,26 +219,25 @@ class Card:
     
     def add_special_condition(self, condition: SpecialCondition):
         """特殊状態を追加"""
-        # 相互排他的な特殊状態の処理
-        exclusive_conditions = {SpecialCondition.SLEEP, SpecialCondition.PARALYSIS, SpecialCondition.CONFUSION}
+        bit = CONDITION_BITS[condition]
         
-        if condition in exclusive_conditions:
-            # 既存の排他的状態を削除
-            self.special_conditions = {c for c in self.special_conditions if c not in exclusive_conditions}
+        # 相互排他的な特殊状態（ねむり・マヒ・こんらん）は既存のものを置き換える
+        if bit & EXCLUSIVE_CONDITION_MASK:
+            self.condition_mask &= ~EXCLUSIVE_CONDITION_MASK
         
-        self.special_conditions.add(condition)
+        self.condition_mask |= bit
     
     def remove_special_condition(self, condition: SpecialCondition):
         """特殊状態を削除"""
-        self.special_conditions.discard(condition)
+        self.condition_mask &= ~CONDITION_BITS[condition]
     
     def has_special_condition(self, condition: SpecialCondition) -> bool:
         """特殊状態を持っているかチェック"""
-        return condition in self.special_conditions
+        return bool(self.condition_mask & CONDITION_BITS[condition])
     
     def clear_special_conditions(self):
         """全ての特殊状態をクリア"""
-        self.special_conditions.clear()
+        self.condition_mask = 0
     
     def is_knocked_out(self) -> bool:
         """きぜつしているかチェック"""
@@ -154,4 +258,12 @@ class Card:
         """現在のHPを取得"""
         if not self.hp:
             return 0
-        return max(0, self.hp - self.damage_taken)
\ No newline at end of file
+        return max(0, self.hp - self.damage_taken)
+
+# 静的データはプロトタイプへの読み取り専用プロパティとして公開（C実装のattrgetterで高速に参照）
+for _field in fields(CardPrototype):
+    setattr(Card, _field.name, property(attrgetter(f"prototype.{_field.name}")))
+del _field
+
+# 可変状態側の型名（Cardと同一）
+CardInstance = Card
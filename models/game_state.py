@@ -1,10 +1,36 @@
 # models/game_state.py
-# Version: 4.24
-# Updated: 2025-06-12 12:10
-# 公式ルール準拠ドロー処理・山札切れ敗北対応版
+# Version: 4.29
+# Updated: 2026-10-17 18:00
+# 公式ルール準拠ドロー処理・山札切れ敗北対応版・トレース対応
 
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 from .card import Card
+from . import zobrist
+from utils.tracing import tracer, TURN, DEBUG
+
+# 変更ジャーナルの操作種別（記録するのは「元に戻す」ための逆操作）
+# 各エントリの末尾には変更前の局面ハッシュ（無効時はNone）を持つ
+_UNDO_SETATTR = 0     # (種別, オブジェクト, 属性名, 旧値, ハッシュ)
+_UNDO_POP = 1         # (種別, リスト, None, None, ハッシュ)        末尾に追加した要素を取り除く
+_UNDO_INSERT = 2      # (種別, リスト, インデックス, 要素, ハッシュ)  取り出した要素を戻す
+_UNDO_SETITEM = 3     # (種別, リスト, インデックス, 旧値, ハッシュ)
+_UNDO_RESTORE = 4     # (種別, リスト, None, 旧内容, ハッシュ)      シャッフル等の一括変更を戻す
+
+# 局面ハッシュの対象属性
+_HASHED_FLAGS = ('energy_played_this_turn', 'supporter_played_this_turn', 'current_player')
+_ACTIVE_ZONES = {'player_active': "player", 'opponent_active': "opponent"}
+_BENCH_ZONES = {'player_bench': "player", 'opponent_bench': "opponent"}
+_MULTISET_ZONES = {
+    'player_hand': ("player", "hand"),
+    'opponent_hand': ("opponent", "hand"),
+    'player_discard': ("player", "discard"),
+    'opponent_discard': ("opponent", "discard")
+}
+_PRIZE_ZONES = {'player_prizes': "player", 'opponent_prizes': "opponent"}
+_HASHED_STATE_ATTRS = (_HASHED_FLAGS + tuple(_ACTIVE_ZONES) + tuple(_BENCH_ZONES) +
+                       tuple(_MULTISET_ZONES) + tuple(_PRIZE_ZONES))
+_HASHED_CARD_ATTRS = frozenset(('damage_taken', 'condition_mask', 'attached_energy'))
+_HASHED_ATTRS = frozenset(_HASHED_STATE_ATTRS) | _HASHED_CARD_ATTRS
 
 class GameState:
     """ゲーム状態を管理するクラス（公式ルール準拠ドロー処理・山札切れ敗北対応版）"""
@@ -76,6 +102,302 @@ class GameState:
         self.max_attacks_per_turn: int = 1
         self.turn_started_at: Optional[str] = None
         self.last_action: str = ""
+        
+        # 変更ジャーナル（mark()で記録開始、undo_to()で巻き戻し。Noneの間は記録しない）
+        self.journal: Optional[list] = None
+        
+        # 局面ハッシュ（enable_hashing()で有効化。Noneの間は計算しない）
+        self.zobrist_hash: Optional[int] = None
+
+    # カードを保持するゾーン（clone()で複製する対象）
+    CARD_LIST_ZONES = (
+        'player_hand', 'opponent_hand',
+        'player_bench', 'opponent_bench',
+        'player_prizes', 'opponent_prizes',
+        'player_deck', 'opponent_deck',
+        'player_discard', 'opponent_discard'
+    )
+    CARD_SLOT_ZONES = ('player_active', 'opponent_active', 'stadium')
+
+    def clone(self) -> 'GameState':
+        """
+        探索用の高速な複製を作成
+        
+        スカラー値の属性はそのままコピーし、カードはゲーム状態のみを複製する
+        （静的データのCardPrototypeは共有）。copy.deepcopyと違い、プロトタイプや
+        ワザのコスト辞書などを辿らないため大幅に高速。
+        """
+        new = GameState.__new__(GameState)
+        new.__dict__.update(self.__dict__)
+        
+        for zone in self.CARD_LIST_ZONES:
+            new.__dict__[zone] = [card.clone() if card is not None else None for card in self.__dict__[zone]]
+        
+        for zone in self.CARD_SLOT_ZONES:
+            card = self.__dict__[zone]
+            if card is not None:
+                new.__dict__[zone] = card.clone()
+        
+        # ジャーナルは複製元のオブジェクトを指しているため引き継がない
+        new.journal = None
+        return new
+
+    # 🆕 変更ジャーナル（探索用のmake/unmake）
+    # 盤面を変更する処理（Match・DamageCalculator・本クラスのターン処理）は以下の操作を経由し、
+    # ジャーナル有効時は逆操作を記録する。オブジェクトの確保なしに局面を戻せるため、
+    # 探索で1つのGameStateを使い回せる。
+    # 局面ハッシュ有効時（enable_hashing()後）は同じ操作の中でzobrist_hashを差分更新する。
+    def mark(self) -> int:
+        """現在位置を返す（ジャーナル未開始なら記録を開始）"""
+        if self.journal is None:
+            self.journal = []
+        return len(self.journal)
+
+    def undo_to(self, mark: int):
+        """mark()の時点まで変更を巻き戻す（局面ハッシュも復元）"""
+        journal = self.journal
+        if journal is None or len(journal) <= mark:
+            return
+        hash_before = None
+        while len(journal) > mark:
+            op, target, key, value, hash_before = journal.pop()
+            if op == _UNDO_SETATTR:
+                setattr(target, key, value)
+            elif op == _UNDO_POP:
+                target.pop()
+            elif op == _UNDO_INSERT:
+                target.insert(key, value)
+            elif op == _UNDO_SETITEM:
+                target[key] = value
+            else:
+                target[:] = value
+        
+        if self.zobrist_hash is not None:
+            # 記録時にハッシュが無効だった場合のみ再計算
+            self.zobrist_hash = hash_before if hash_before is not None else self.compute_hash()
+
+    def stop_journal(self):
+        """ジャーナルの記録を終了（記録済みの履歴も破棄）"""
+        self.journal = None
+
+    def set_attr(self, obj: Any, name: str, value: Any):
+        """属性を変更（GameState自身・カード・Matchなど任意のオブジェクト）"""
+        if self.zobrist_hash is not None and name in _HASHED_ATTRS:
+            self._set_attr_hashed(obj, name, value)
+            return
+        if self.journal is not None:
+            self.journal.append((_UNDO_SETATTR, obj, name, getattr(obj, name), self.zobrist_hash))
+        setattr(obj, name, value)
+
+    def list_append(self, items: list, item: Any):
+        """リストの末尾に追加"""
+        if self.journal is not None:
+            self.journal.append((_UNDO_POP, items, None, None, self.zobrist_hash))
+        if self.zobrist_hash is not None:
+            self._hash_list_change(items, item, 1)
+        items.append(item)
+
+    def list_pop(self, items: list, index: int = -1) -> Any:
+        """リストから要素を取り出す"""
+        if index < 0:
+            index += len(items)
+        if self.journal is not None:
+            self.journal.append((_UNDO_INSERT, items, index, items[index], self.zobrist_hash))
+        if self.zobrist_hash is not None:
+            self._hash_list_change(items, items[index], -1)
+        return items.pop(index)
+
+    def list_set(self, items: list, index: int, value: Any):
+        """リストの要素を置き換える（ベンチのスロット等）"""
+        if self.journal is not None:
+            self.journal.append((_UNDO_SETITEM, items, index, items[index], self.zobrist_hash))
+        if self.zobrist_hash is not None:
+            side = self._bench_side(items)
+            if side is not None:
+                self.zobrist_hash = (self.zobrist_hash +
+                                     zobrist.slot_component(side, index + 1, value) -
+                                     zobrist.slot_component(side, index + 1, items[index])) & zobrist.MASK64
+        items[index] = value
+
+    def list_snapshot(self, items: list):
+        """
+        これから一括変更（シャッフル等）するリストの内容を記録
+        
+        一括変更は局面ハッシュに反映されないため、ハッシュ対象外の山札にのみ使用する。
+        """
+        if self.journal is not None:
+            self.journal.append((_UNDO_RESTORE, items, None, items.copy(), self.zobrist_hash))
+
+    # 🆕 局面ハッシュ（トランスポジションテーブル用）
+    # 対象：バトル場・ベンチのポケモン（種類・ダメージ・特殊状態・付いているエネルギー）、
+    # 手札とトラッシュの内容（カードの種類単位）、サイド枚数、手番、ターン内フラグ。
+    # 山札の並びは含まない。
+    def enable_hashing(self) -> int:
+        """局面ハッシュを有効化（以後は各変更操作で差分更新）"""
+        self.zobrist_hash = self.compute_hash()
+        return self.zobrist_hash
+
+    def disable_hashing(self):
+        """局面ハッシュを無効化"""
+        self.zobrist_hash = None
+
+    def compute_hash(self) -> int:
+        """局面ハッシュを全走査で計算（カード単位のハッシュも計算し直す）"""
+        for card in self._all_cards():
+            card.zhash = zobrist.card_hash(card)
+        
+        total = 0
+        for name in _HASHED_STATE_ATTRS:
+            total += self._state_component(name, self.__dict__[name])
+        return total & zobrist.MASK64
+
+    def _all_cards(self):
+        """ゲーム中の全カード（付いているエネルギー・どうぐを含む）"""
+        for zone in self.CARD_LIST_ZONES + self.CARD_SLOT_ZONES:
+            value = self.__dict__[zone]
+            for card in (value if isinstance(value, list) else (value,)):
+                if card is not None:
+                    yield card
+                    yield from card.attached_energy
+                    yield from card.attached_tools
+
+    def _state_component(self, name: str, value: Any) -> int:
+        """GameStateの属性1つ分の局面ハッシュへの寄与"""
+        if name in _HASHED_FLAGS:
+            return zobrist.flag_component(name, value)
+        if name in _ACTIVE_ZONES:
+            return zobrist.slot_component(_ACTIVE_ZONES[name], 0, value)
+        if name in _BENCH_ZONES:
+            side = _BENCH_ZONES[name]
+            total = 0
+            for i, pokemon in enumerate(value):
+                total += zobrist.slot_component(side, i + 1, pokemon)
+            return total
+        if name in _MULTISET_ZONES:
+            return zobrist.multiset(_MULTISET_ZONES[name], value)
+        return zobrist.count_component(_PRIZE_ZONES[name], 'prizes', len(value))
+
+    def _set_attr_hashed(self, obj: Any, name: str, value: Any):
+        """局面ハッシュ対象の属性を変更（差分更新）"""
+        old_value = getattr(obj, name)
+        hash_before = self.zobrist_hash
+        if self.journal is not None:
+            self.journal.append((_UNDO_SETATTR, obj, name, old_value, hash_before))
+        
+        if obj is self:
+            setattr(obj, name, value)
+            self.zobrist_hash = (hash_before + self._state_component(name, value) -
+                                 self._state_component(name, old_value)) & zobrist.MASK64
+        elif name in _HASHED_CARD_ATTRS:
+            self._update_card_hash(obj, zobrist.card_attr_component(name, value) -
+                                   zobrist.card_attr_component(name, old_value))
+            setattr(obj, name, value)
+        else:
+            setattr(obj, name, value)
+
+    def _update_card_hash(self, card: Card, delta: int):
+        """カードのハッシュを変更し、場にいれば局面ハッシュにも反映"""
+        location = self._locate_in_play(card)
+        total = self.zobrist_hash
+        if location is not None:
+            total -= zobrist.slot_component(location[0], location[1], card)
+        
+        if self.journal is not None:
+            self.journal.append((_UNDO_SETATTR, card, 'zhash', card.zhash, self.zobrist_hash))
+        card.zhash = (card.zhash + delta) & zobrist.MASK64
+        
+        if location is not None:
+            total += zobrist.slot_component(location[0], location[1], card)
+        self.zobrist_hash = total & zobrist.MASK64
+
+    def _hash_list_change(self, items: list, card: Card, delta: int):
+        """リストへの1枚の追加（delta=1）・取り出し（delta=-1）を局面ハッシュに反映（変更前に呼ぶ）"""
+        d = self.__dict__
+        for name, zone in _MULTISET_ZONES.items():
+            if d[name] is items:
+                self.zobrist_hash = (self.zobrist_hash +
+                                     delta * zobrist.zone_card_component(zone[0], zone[1], card)) & zobrist.MASK64
+                return
+        for name, side in _PRIZE_ZONES.items():
+            if d[name] is items:
+                count = len(items)
+                self.zobrist_hash = (self.zobrist_hash +
+                                     zobrist.count_component(side, 'prizes', count + delta) -
+                                     zobrist.count_component(side, 'prizes', count)) & zobrist.MASK64
+                return
+        
+        # 場のポケモンに付いているエネルギー
+        for pokemon in self._in_play():
+            if pokemon.attached_energy is items:
+                self._update_card_hash(pokemon, delta * zobrist.energy_component(card))
+                return
+
+    def _in_play(self):
+        """場のポケモン（両プレイヤー）"""
+        d = self.__dict__
+        for active_name, bench_name in (('player_active', 'player_bench'), ('opponent_active', 'opponent_bench')):
+            if d[active_name] is not None:
+                yield d[active_name]
+            for pokemon in d[bench_name]:
+                if pokemon is not None:
+                    yield pokemon
+
+    def _locate_in_play(self, card: Card) -> Optional[Tuple[str, int]]:
+        """場のポケモンの位置（プレイヤー, スロット：0=バトル場、1〜5=ベンチ）"""
+        d = self.__dict__
+        for side in ("player", "opponent"):
+            if d[side + '_active'] is card:
+                return side, 0
+            for i, pokemon in enumerate(d[side + '_bench']):
+                if pokemon is card:
+                    return side, i + 1
+        return None
+
+    def _bench_side(self, items: list) -> Optional[str]:
+        """リストがベンチならそのプレイヤー"""
+        if items is self.player_bench:
+            return "player"
+        if items is self.opponent_bench:
+            return "opponent"
+        return None
+
+    # 🆕 プレイヤー別ゾーンアクセス（ヘッドレスエンジン用）
+    @staticmethod
+    def get_opponent(player: str) -> str:
+        """指定プレイヤーの対戦相手を取得"""
+        return "opponent" if player == "player" else "player"
+
+    def get_hand(self, player: str) -> List[Card]:
+        """指定プレイヤーの手札を取得"""
+        return self.player_hand if player == "player" else self.opponent_hand
+
+    def get_deck(self, player: str) -> List[Card]:
+        """指定プレイヤーの山札を取得"""
+        return self.player_deck if player == "player" else self.opponent_deck
+
+    def get_prizes(self, player: str) -> List[Card]:
+        """指定プレイヤーのサイドを取得"""
+        return self.player_prizes if player == "player" else self.opponent_prizes
+
+    def get_discard(self, player: str) -> List[Card]:
+        """指定プレイヤーの捨て札を取得"""
+        return self.player_discard if player == "player" else self.opponent_discard
+
+    def get_bench(self, player: str) -> List[Optional[Card]]:
+        """指定プレイヤーのベンチを取得"""
+        return self.player_bench if player == "player" else self.opponent_bench
+
+    def get_active(self, player: str) -> Optional[Card]:
+        """指定プレイヤーのバトルポケモンを取得"""
+        return self.player_active if player == "player" else self.opponent_active
+
+    def set_active(self, player: str, pokemon: Optional[Card]):
+        """指定プレイヤーのバトルポケモンを設定"""
+        self.set_attr(self, 'player_active' if player == "player" else 'opponent_active', pokemon)
+
+    def get_bench_pokemon(self, player: str) -> List[Tuple[int, Card]]:
+        """指定プレイヤーのベンチポケモンを(インデックス, カード)のリストで取得"""
+        return [(i, p) for i, p in enumerate(self.get_bench(player)) if p is not None]
 
     def can_use_supporter(self) -> bool:
         """サポートカードが使用可能かチェック（公式ルール準拠版）"""
@@ -167,14 +489,16 @@ class GameState:
             
             # 🆕 公式ルール：山札が空の場合は即敗北
             if not deck:
-                print(f"⚠️ {player}の山札が空です - ゲーム終了（敗北）")
+                if tracer.turn <= DEBUG:
+                    tracer.log(TURN, DEBUG, f"⚠️ {player}の山札が空です - ゲーム終了（敗北）")
                 return None, False  # ゲーム継続不可
             
             # カードを1枚引く
-            drawn_card = deck.pop(0)
-            hand.append(drawn_card)
+            drawn_card = self.list_pop(deck, 0)
+            self.list_append(hand, drawn_card)
             
-            print(f"{player}が{drawn_card.name}を引きました")
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, f"{player}が{drawn_card.name}を引きました")
             return drawn_card, True  # ゲーム継続可能
             
         except Exception as e:
@@ -190,20 +514,22 @@ class GameState:
     
     def set_first_player(self, player: str):
         """先攻プレイヤーを設定（v4.23新規）"""
-        self.first_player = player
-        self.first_turn_player = player  # 互換性のため
-        print(f"先攻プレイヤー設定: {player}")
+        self.set_attr(self, 'first_player', player)
+        self.set_attr(self, 'first_turn_player', player)  # 互換性のため
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, f"先攻プレイヤー設定: {player}")
     
     def mark_attack_completed(self):
         """攻撃完了をマーク（v4.23強化版）"""
-        self.attacks_this_turn += 1
+        self.set_attr(self, 'attacks_this_turn', self.attacks_this_turn + 1)
         
         if self.current_player == "player":
-            self.player_has_attacked = True
+            self.set_attr(self, 'player_has_attacked', True)
         else:
-            self.opponent_has_attacked = True
+            self.set_attr(self, 'opponent_has_attacked', True)
         
-        print(f"攻撃完了マーク: {self.current_player} (攻撃回数: {self.attacks_this_turn})")
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, f"攻撃完了マーク: {self.current_player} (攻撃回数: {self.attacks_this_turn})")
     
     def can_evolve_pokemon(self, pokemon: Card) -> bool:
         """ポケモンが進化可能かチェック（v4.23修正版）"""
@@ -212,164 +538,188 @@ class GameState:
         
         # 1. 最初の自分の番では全てのポケモンが進化できない
         if self.current_player == "player" and not self.player_first_turn_completed:
-            print(f"進化制限: プレイヤーの最初のターンのため進化不可")
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, "進化制限: プレイヤーの最初のターンのため進化不可")
             return False
         elif self.current_player == "opponent" and not self.opponent_first_turn_completed:
-            print(f"進化制限: 相手の最初のターンのため進化不可")
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, "進化制限: 相手の最初のターンのため進化不可")
             return False
         
         # 2. そのポケモンがこのターンに場に出されたかチェック
         summoned_this_turn = getattr(pokemon, 'summoned_this_turn', False)
         if summoned_this_turn:
-            print(f"進化制限: {pokemon.name}はこのターンに場に出されたため進化不可")
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, f"進化制限: {pokemon.name}はこのターンに場に出されたため進化不可")
             return False
         
-        print(f"進化可能: {pokemon.name}")
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, f"進化可能: {pokemon.name}")
         return True
     
     def reset_turn_flags(self):
         """ターン開始時のフラグリセット（v4.23強化版）"""
-        print(f"=== ターンフラグリセット開始 ===")
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, "=== ターンフラグリセット開始 ===")
         
         # 基本的なフラグリセット
-        self.energy_played_this_turn = False
-        self.supporter_played_this_turn = False
-        self.attacks_this_turn = 0
+        self.set_attr(self, 'energy_played_this_turn', False)
+        self.set_attr(self, 'supporter_played_this_turn', False)
+        self.set_attr(self, 'attacks_this_turn', 0)
         
         # 攻撃フラグリセット
         if self.current_player == "player":
-            self.player_has_attacked = False
-            print("プレイヤーの攻撃フラグをリセット")
+            self.set_attr(self, 'player_has_attacked', False)
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, "プレイヤーの攻撃フラグをリセット")
         else:
-            self.opponent_has_attacked = False
-            print("相手の攻撃フラグをリセット")
+            self.set_attr(self, 'opponent_has_attacked', False)
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, "相手の攻撃フラグをリセット")
         
         # summoned_this_turnフラグリセット（現在のプレイヤーのみ）
         self._reset_summoned_flags_enhanced(self.current_player)
         
-        print(f"=== ターンフラグリセット完了 ===")
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, "=== ターンフラグリセット完了 ===")
     
     def _reset_summoned_flags_enhanced(self, player: str):
         """指定プレイヤーのsummoned_this_turnフラグを強制リセット（v4.23修正版）"""
         try:
-            print(f"--- {player}のsummoned_this_turnフラグリセット開始 ---")
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, f"--- {player}のsummoned_this_turnフラグリセット開始 ---")
             
             if player == "player":
                 # バトル場のポケモン
                 if self.player_active:
                     old_flag = getattr(self.player_active, 'summoned_this_turn', False)
-                    self.player_active.summoned_this_turn = False
-                    print(f"プレイヤーバトル場 {self.player_active.name}: {old_flag} → False")
+                    self.set_attr(self.player_active, 'summoned_this_turn', False)
+                    if tracer.turn <= DEBUG:
+                        tracer.log(TURN, DEBUG, f"プレイヤーバトル場 {self.player_active.name}: {old_flag} → False")
                 
                 # ベンチのポケモン
                 for i, pokemon in enumerate(self.player_bench):
                     if pokemon:
                         old_flag = getattr(pokemon, 'summoned_this_turn', False)
-                        pokemon.summoned_this_turn = False
-                        print(f"プレイヤーベンチ{i} {pokemon.name}: {old_flag} → False")
+                        self.set_attr(pokemon, 'summoned_this_turn', False)
+                        if tracer.turn <= DEBUG:
+                            tracer.log(TURN, DEBUG, f"プレイヤーベンチ{i} {pokemon.name}: {old_flag} → False")
             
             else:  # opponent
                 # バトル場のポケモン
                 if self.opponent_active:
                     old_flag = getattr(self.opponent_active, 'summoned_this_turn', False)
-                    self.opponent_active.summoned_this_turn = False
-                    print(f"相手バトル場 {self.opponent_active.name}: {old_flag} → False")
+                    self.set_attr(self.opponent_active, 'summoned_this_turn', False)
+                    if tracer.turn <= DEBUG:
+                        tracer.log(TURN, DEBUG, f"相手バトル場 {self.opponent_active.name}: {old_flag} → False")
                 
                 # ベンチのポケモン
                 for i, pokemon in enumerate(self.opponent_bench):
                     if pokemon:
                         old_flag = getattr(pokemon, 'summoned_this_turn', False)
-                        pokemon.summoned_this_turn = False
-                        print(f"相手ベンチ{i} {pokemon.name}: {old_flag} → False")
+                        self.set_attr(pokemon, 'summoned_this_turn', False)
+                        if tracer.turn <= DEBUG:
+                            tracer.log(TURN, DEBUG, f"相手ベンチ{i} {pokemon.name}: {old_flag} → False")
         
         except Exception as e:
             print(f"フラグリセットエラー ({player}): {e}")
         
-        print(f"--- {player}のsummoned_this_turnフラグリセット完了 ---")
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, f"--- {player}のsummoned_this_turnフラグリセット完了 ---")
     
     def switch_turn(self):
         """ターンを交代（v4.24強化版：ドロー処理統合）"""
-        print(f"=== ターン交代処理開始 ===")
-        print(f"現在: ターン{self.turn_count}, {self.current_player}")
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, "=== ターン交代処理開始 ===")
+            tracer.log(TURN, DEBUG, f"現在: ターン{self.turn_count}, {self.current_player}")
         
         # 現在のプレイヤーの最初のターン完了をマーク
         if self.current_player == "player" and not self.player_first_turn_completed:
-            self.player_first_turn_completed = True
-            print("プレイヤーの最初のターンが完了しました")
+            self.set_attr(self, 'player_first_turn_completed', True)
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, "プレイヤーの最初のターンが完了しました")
         elif self.current_player == "opponent" and not self.opponent_first_turn_completed:
-            self.opponent_first_turn_completed = True
-            print("相手の最初のターンが完了しました")
+            self.set_attr(self, 'opponent_first_turn_completed', True)
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, "相手の最初のターンが完了しました")
         
         # ターン交代
         old_player = self.current_player
-        self.current_player = "opponent" if self.current_player == "player" else "player"
-        self.turn_count += 1
+        self.set_attr(self, 'current_player', "opponent" if self.current_player == "player" else "player")
+        self.set_attr(self, 'turn_count', self.turn_count + 1)
         
         # 新しいターンのフラグリセット
         self.reset_turn_flags()
         
-        print(f"ターン交代完了: {old_player} → {self.current_player}")
-        print(f"新ターン: ターン{self.turn_count}, {self.current_player}")
-        
-        # 先攻1ターン目チェック情報表示
-        if self.is_first_player_first_turn():
-            print(f"⚠️  先攻1ターン目: {self.current_player}は攻撃できません")
-        
-        # デバッグ情報
-        if self.current_player == "player":
-            can_evolve = not self.is_current_player_first_turn()
-            print(f"プレイヤーの進化可能状態: {can_evolve}")
-        else:
+        if tracer.turn <= DEBUG:
+            tracer.log(TURN, DEBUG, f"ターン交代完了: {old_player} → {self.current_player}")
+            tracer.log(TURN, DEBUG, f"新ターン: ターン{self.turn_count}, {self.current_player}")
+            
+            # 先攻1ターン目チェック情報表示
+            if self.is_first_player_first_turn():
+                tracer.log(TURN, DEBUG, f"⚠️  先攻1ターン目: {self.current_player}は攻撃できません")
+            
+            # デバッグ情報
             can_evolve = not self.is_current_player_first_turn()
-            print(f"相手の進化可能状態: {can_evolve}")
-        
-        print(f"=== ターン交代処理完了 ===")
+            if self.current_player == "player":
+                tracer.log(TURN, DEBUG, f"プレイヤーの進化可能状態: {can_evolve}")
+            else:
+                tracer.log(TURN, DEBUG, f"相手の進化可能状態: {can_evolve}")
+            
+            tracer.log(TURN, DEBUG, "=== ターン交代処理完了 ===")
     
     def start_turn(self, player: str):
         """ターン開始処理（v4.24追加）"""
-        print(f"=== {player}のターン開始処理 ===")
+        if tracer.turn > DEBUG:
+            return
+        
+        tracer.log(TURN, DEBUG, f"=== {player}のターン開始処理 ===")
         
         # 念のため、ターン開始時にもフラグ状態を確認
         self._debug_summoned_flags()
         
         # 先攻1ターン目の場合は警告表示
         if self.is_first_player_first_turn():
-            print(f"⚠️  先攻1ターン目: 攻撃制限が有効です")
+            tracer.log(TURN, DEBUG, "⚠️  先攻1ターン目: 攻撃制限が有効です")
         
-        print(f"=== {player}のターン開始処理完了 ===")
+        tracer.log(TURN, DEBUG, f"=== {player}のターン開始処理完了 ===")
     
     def _debug_summoned_flags(self):
         """デバッグ用：現在のsummoned_this_turnフラグ状態を表示"""
-        print("--- 現在のsummoned_this_turnフラグ状態 ---")
+        if tracer.turn > DEBUG:
+            return
+        
+        tracer.log(TURN, DEBUG, "--- 現在のsummoned_this_turnフラグ状態 ---")
         
         # プレイヤー
         if self.player_active:
             flag = getattr(self.player_active, 'summoned_this_turn', False)
-            print(f"プレイヤーバトル場 {self.player_active.name}: {flag}")
+            tracer.log(TURN, DEBUG, f"プレイヤーバトル場 {self.player_active.name}: {flag}")
         
         for i, pokemon in enumerate(self.player_bench):
             if pokemon:
                 flag = getattr(pokemon, 'summoned_this_turn', False)
-                print(f"プレイヤーベンチ{i} {pokemon.name}: {flag}")
+                tracer.log(TURN, DEBUG, f"プレイヤーベンチ{i} {pokemon.name}: {flag}")
         
         # 相手
         if self.opponent_active:
             flag = getattr(self.opponent_active, 'summoned_this_turn', False)
-            print(f"相手バトル場 {self.opponent_active.name}: {flag}")
+            tracer.log(TURN, DEBUG, f"相手バトル場 {self.opponent_active.name}: {flag}")
         
         for i, pokemon in enumerate(self.opponent_bench):
             if pokemon:
                 flag = getattr(pokemon, 'summoned_this_turn', False)
-                print(f"相手ベンチ{i} {pokemon.name}: {flag}")
+                tracer.log(TURN, DEBUG, f"相手ベンチ{i} {pokemon.name}: {flag}")
         
-        print("--- フラグ状態表示完了 ---")
+        tracer.log(TURN, DEBUG, "--- フラグ状態表示完了 ---")
     
     def set_pokemon_summoned_this_turn(self, pokemon: Card, value: bool = True):
         """ポケモンのsummoned_this_turnフラグを設定（v4.23追加）"""
         if pokemon:
             old_value = getattr(pokemon, 'summoned_this_turn', False)
-            pokemon.summoned_this_turn = value
-            print(f"フラグ設定: {pokemon.name} summoned_this_turn {old_value} → {value}")
+            self.set_attr(pokemon, 'summoned_this_turn', value)
+            if tracer.turn <= DEBUG:
+                tracer.log(TURN, DEBUG, f"フラグ設定: {pokemon.name} summoned_this_turn {old_value} → {value}")
     
     def get_turn_status(self) -> dict:
         """現在のターン状態を取得（v4.23強化版）"""
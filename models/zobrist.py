@@ -0,0 +1,110 @@
+# models/zobrist.py
+# Version: 1.1
+# Updated: 2026-10-18 07:30
+# 局面ハッシュ（Zobrist方式・加算版）のキー生成と各要素の寄与計算
+
+import hashlib
+from typing import Dict, Iterable
+
+MASK64 = (1 << 64) - 1
+
+# 要素→64bitキーの対応（必要になった時点で生成してキャッシュ）
+_KEYS: Dict[tuple, int] = {}
+
+
+def key(*parts) -> int:
+    """
+    要素に対応する64bitの乱数キー
+
+    Pythonのhash()はプロセスごとに変わるため、要素の表現からBLAKE2bで決定的に生成する。
+    ワーカー間・実行間で同じ局面は同じハッシュになる。
+    """
+    value = _KEYS.get(parts)
+    if value is None:
+        digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+        value = _KEYS[parts] = int.from_bytes(digest, "little")
+    return value
+
+
+def mix(value: int) -> int:
+    """64bit値の攪拌（splitmix64の最終段）。ポケモンのハッシュを場の位置と結びつけるのに使用"""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+# ------------------------------------------------------------------
+# カード単体のハッシュ（Card.zhash）
+# 多重集合（付いているエネルギー等）を扱えるよう、XORではなく 2^64 を法とした加算で合成する。
+# ------------------------------------------------------------------
+
+def card_attr_component(name: str, value) -> int:
+    """カードの状態属性1つ分の寄与"""
+    if name == 'damage_taken':
+        return key('damage', value)
+    if name == 'condition_mask':
+        return key('condition', value)
+    if name == 'attached_energy':
+        return multiset(('energy',), value)
+    return 0
+
+
+def energy_component(energy) -> int:
+    """付いているエネルギー1枚分の寄与"""
+    return key('energy', energy.prototype.id)
+
+
+# 状態を持たないカード（ダメージ・特殊状態・付いているエネルギーなし）のハッシュ（プロトタイプID → ハッシュ）
+_FRESH_CARD_HASHES: Dict[str, int] = {}
+
+
+def card_hash(card) -> int:
+    """カードのハッシュを状態から計算（山札・手札など状態を持たないカードはプロトタイプごとにキャッシュ）"""
+    if not card.damage_taken and not card.condition_mask and not card.attached_energy:
+        value = _FRESH_CARD_HASHES.get(card.prototype.id)
+        if value is None:
+            value = _FRESH_CARD_HASHES[card.prototype.id] = (
+                key('card', card.prototype.id) + card_attr_component('damage_taken', card.damage_taken) +
+                card_attr_component('condition_mask', card.condition_mask) + multiset(('energy',), ())) & MASK64
+        return value
+    return (key('card', card.prototype.id) +
+            card_attr_component('damage_taken', card.damage_taken) +
+            card_attr_component('condition_mask', card.condition_mask) +
+            card_attr_component('attached_energy', card.attached_energy)) & MASK64
+
+
+# ------------------------------------------------------------------
+# 盤面全体への寄与
+# ------------------------------------------------------------------
+
+def slot_component(side: str, slot: int, card) -> int:
+    """場のポケモン1匹分の寄与（slot 0=バトル場、1〜5=ベンチ）"""
+    if card is None:
+        return 0
+    return mix(card.zhash ^ key('slot', side, slot))
+
+
+def zone_card_component(side: str, zone: str, card) -> int:
+    """手札・トラッシュの1枚分の寄与（カードの種類のみ）"""
+    return key(side, zone, card.prototype.id)
+
+
+def multiset(prefix: tuple, cards: Iterable) -> int:
+    """カードの多重集合の寄与"""
+    total = 0
+    for card in cards:
+        total += key(*prefix, card.prototype.id)
+    return total & MASK64
+
+
+def count_component(side: str, zone: str, count: int) -> int:
+    """枚数のみを扱うゾーン（サイド）の寄与"""
+    return key(side, zone, count)
+
+
+def flag_component(name: str, value) -> int:
+    """ターン内フラグ・手番の寄与"""
+    if name == 'current_player':
+        return key('current_player', value)
+    return key(name) if value else 0
+
@@ -0,0 +1,22 @@
+# rl/__init__.py
+# Version: 1.3
+# Updated: 2026-10-17 23:30
+# 強化学習モジュール初期化
+
+from .observation import ObservationEncoder, OBSERVATION_SIZE
+from .env import PokecaEnv, VectorEnv, load_deck_data
+from .inference import MLP, InferenceBroker, NetworkAttackEvaluator
+from .replay import SharedReplayBuffer, SharedWeights
+
+__all__ = [
+    'ObservationEncoder',
+    'PokecaEnv',
+    'VectorEnv',
+    'OBSERVATION_SIZE',
+    'load_deck_data',
+    'MLP',
+    'InferenceBroker',
+    'NetworkAttackEvaluator',
+    'SharedReplayBuffer',
+    'SharedWeights'
+]
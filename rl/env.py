@@ -0,0 +1,436 @@
+# rl/env.py
+# Version: 1.2
+# Updated: 2026-10-18 14:10
+# 強化学習用の対戦環境（Gym形式）：tkinter非依存のMatch上で1陣営を外部の方策に操作させる
+#
+# PokecaEnv は学習側（既定は "player"）の1アクションを1ステップとし、相手のターンは
+# 登録したエージェント（既定は固定順のAIControllerAgent）で自動進行する。
+# 行動は engine.actions の整数エンコード（0〜ACTION_COUNT-1）で、合法手マスクを毎ステップ返す。
+#
+# VectorEnv はN個の環境を1回の呼び出しでまとめて進める。workers=0 なら同一プロセス内、
+# workers>0 なら子プロセスに環境を分配し、観測・報酬・終了フラグ・マスクは
+# multiprocessing.shared_memory 上のバッファへ直接書き込む（ステップごとの配列のpickleなし）。
+
+import multiprocessing
+import os
+import random
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from models.game_state import GameState
+from engine.match import Match, MatchResult
+from engine.agents import Agent, AIControllerAgent
+from engine.actions import legal_actions, ActionCodec, ACTION_COUNT, END_TURN
+from utils.tracing import tracer
+
+from .observation import ObservationEncoder, OBSERVATION_SIZE
+
+
+def load_deck_data(deck_ids: Sequence[int]) -> List[list]:
+    """CSVからデッキデータ（(Card, 枚数)のリスト）を読み込む"""
+    from database.database_manager import DatabaseManager
+    database_manager = DatabaseManager(
+        cards_csv_path=os.path.join(PROJECT_ROOT, "cards", "cards.csv"),
+        deck_csv_path=os.path.join(PROJECT_ROOT, "cards", "deck.csv")
+    )
+    return [database_manager.get_deck_cards(deck_id) for deck_id in deck_ids]
+
+
+class PokecaEnv:
+    """
+    1陣営を外部の方策で操作する対戦環境
+
+    reset() は (観測, 合法手マスク)、step(action) は (観測, 報酬, 終了, 合法手マスク) を返す。
+    返す配列は環境が保持するバッファそのもので、次の reset()/step() で上書きされる。
+
+    報酬は決着時に勝利+1・敗北-1（引き分け・ターン上限は0）。
+    prize_reward を指定すると、サイドを取るたびに +prize_reward、取られるたびに -prize_reward の中間報酬を加える。
+    マリガン・初期配置・きぜつ後の入れ替えは学習側も既定のAgent（先頭のポケモンを選ぶ）で行う。
+    """
+
+    def __init__(self, player_deck: list, opponent_deck: list, opponent: Optional[Agent] = None,
+                 side: str = "player", seed: Optional[int] = None,
+                 max_turns: int = Match.DEFAULT_MAX_TURNS, max_turn_actions: int = 30,
+                 prize_reward: float = 0.0, opponent_planner: bool = False,
+                 observation: Optional[np.ndarray] = None, action_mask: Optional[np.ndarray] = None):
+        """
+        Args:
+            player_deck / opponent_deck: "player" / "opponent" 側のデッキデータ（(Card, 枚数)のリスト）
+            opponent: 相手側のエージェント（未指定時はAIControllerAgent）
+            opponent_planner: 既定の相手をTurnPlannerで指させるか（既定は固定順。プランナーは1ステップが約10倍遅い）
+            side: 学習側の陣営
+            seed: 基準シード（各エピソードのシードはこれとエピソード番号から導出）
+            max_turn_actions: 1ターンに受け付けるアクション数の上限（超えたらターン終了）
+            observation / action_mask: 書き込み先のバッファ（VectorEnvが一括配列の行を渡す）
+        """
+        self.decks = {"player": player_deck, "opponent": opponent_deck}
+        self.side = side
+        self.opponent_side = GameState.get_opponent(side)
+        self.agents = {side: Agent(), self.opponent_side: opponent or AIControllerAgent(use_planner=opponent_planner)}
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(Match.SEED_BITS)
+        self.max_turns = max_turns
+        self.max_turn_actions = max_turn_actions
+        self.prize_reward = prize_reward
+
+        self.observation = observation if observation is not None else np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        self.action_mask = action_mask if action_mask is not None else np.zeros(ACTION_COUNT, dtype=bool)
+
+        self.match: Optional[Match] = None
+        self.episodes = 0
+        self.turn_actions = 0
+        self.done = True
+
+    @classmethod
+    def from_deck_ids(cls, deck_ids: Tuple[int, int], **options) -> 'PokecaEnv':
+        """デッキIDを指定して作成（CSVを読み込む）"""
+        player_deck, opponent_deck = load_deck_data(deck_ids)
+        return cls(player_deck, opponent_deck, **options)
+
+    @property
+    def result(self) -> Optional[MatchResult]:
+        """現在のエピソードの結果"""
+        return self.match.get_result() if self.match is not None else None
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        新しい試合を始め、学習側の最初の行動直前まで進める
+
+        Args:
+            seed: 試合シード（未指定時は基準シードとエピソード番号から導出）
+        """
+        if seed is None:
+            seed = Match.derive_seed(self.seed, self.episodes)
+        self.episodes += 1
+
+        self.match = Match(agents=self.agents, max_turns=self.max_turns, seed=seed)
+        self.done = False
+        if self.match.prepare(Match.build_deck(self.decks["player"]), Match.build_deck(self.decks["opponent"])):
+            self._advance_to_learner()
+
+        self.done = self.match.is_over
+        self._write_observation()
+        self._write_action_mask()
+        return self.observation, self.action_mask
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, np.ndarray]:
+        """
+        学習側のアクションを1つ実行（ワザ・ターン終了なら相手のターンを進めて次の手番まで）
+
+        合法手マスクで禁止されたアクションはターン終了として扱う。
+        """
+        if self.done:
+            raise RuntimeError("エピソードは終了しています。reset()を呼んでください")
+
+        match = self.match
+        state = match.game_state
+        prizes_before = len(state.get_prizes(self.side)), len(state.get_prizes(self.opponent_side))
+
+        action = int(action)
+        if not (0 <= action < ACTION_COUNT and self.action_mask[action]):
+            action = END_TURN
+
+        if action != END_TURN:
+            match.apply(action, self.side)
+            self.turn_actions += 1
+
+        if not match.is_over and (ActionCodec.ends_turn(action) or self.turn_actions >= self.max_turn_actions):
+            match.end_turn()
+            self._advance_to_learner()
+
+        self.done = match.is_over
+        reward = self._reward(prizes_before)
+        self._write_observation()
+        self._write_action_mask()
+        return self.observation, reward, self.done, self.action_mask
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+
+    def _advance_to_learner(self):
+        """相手のターンを自動進行し、学習側のターン開始処理（ドロー等）まで進める"""
+        match = self.match
+        state = match.game_state
+        while not match.is_over:
+            player = state.current_player
+            _, can_continue = match.start_turn(player)
+            if not can_continue:
+                return
+            if player == self.side:
+                self.turn_actions = 0
+                return
+
+            self.agents[player].take_turn(match, player)
+            if match.is_over:
+                return
+            match.end_turn()
+
+    def _reward(self, prizes_before: Tuple[int, int]) -> float:
+        """直前の状態からの報酬（決着時の勝敗と、指定時はサイドの増減）"""
+        match = self.match
+        state = match.game_state
+        reward = 0.0
+
+        if self.prize_reward:
+            taken = prizes_before[0] - len(state.get_prizes(self.side))
+            lost = prizes_before[1] - len(state.get_prizes(self.opponent_side))
+            reward += self.prize_reward * (taken - lost)
+
+        if match.is_over:
+            if match.winner == self.side:
+                reward += 1.0
+            elif match.winner == self.opponent_side:
+                reward -= 1.0
+        return reward
+
+    def _write_observation(self):
+        """観測ベクトル（学習側から見た局面、rl.observation）をバッファへ書き込む"""
+        ObservationEncoder.encode(self.match.game_state, self.side, self.observation)
+
+    def _write_action_mask(self):
+        """合法手マスクをバッファへ書き込む（終了後はターン終了のみ）"""
+        mask = self.action_mask
+        mask[:] = False
+        if self.done:
+            mask[END_TURN] = True
+            return
+        for action in legal_actions(self.match.game_state, self.side):
+            mask[action] = True
+
+
+def _make_envs(deck_data: List[list], seeds: Sequence[int], options: dict,
+               observations: np.ndarray, action_masks: np.ndarray) -> List[PokecaEnv]:
+    """各環境にバッファの行を割り当てて作成"""
+    return [
+        PokecaEnv(deck_data[0], deck_data[1], seed=seed, observation=observations[index],
+                  action_mask=action_masks[index], **options)
+        for index, seed in enumerate(seeds)
+    ]
+
+
+def _step_envs(envs: List[PokecaEnv], actions: Sequence[int], rewards: np.ndarray,
+               dones: np.ndarray) -> List[Tuple[int, MatchResult]]:
+    """
+    各環境を1ステップ進める（終了した環境は結果を記録して自動でreset）
+
+    Returns:
+        List[Tuple[int, MatchResult]]: 終了した環境の(ローカルインデックス, 結果)
+    """
+    finished = []
+    for index, (env, action) in enumerate(zip(envs, actions)):
+        _, reward, done, _ = env.step(action)
+        rewards[index] = reward
+        dones[index] = done
+        if done:
+            finished.append((index, env.result))
+            env.reset()
+    return finished
+
+
+def _worker(connection, buffer_names: Dict[str, str], num_envs: int, start: int, stop: int,
+            deck_ids: Tuple[int, int], seeds: Sequence[int], options: dict):
+    """子プロセス：担当範囲[start, stop)の環境を保持し、親からの命令で進める"""
+    tracer.configure("off")
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+
+    buffers = _SharedBuffers.attach(buffer_names, num_envs)
+    try:
+        envs = _make_envs(load_deck_data(deck_ids), seeds, options,
+                          buffers.observations[start:stop], buffers.action_masks[start:stop])
+        connection.send(("ready", None))
+        while True:
+            command, payload = connection.recv()
+            if command == "step":
+                finished = _step_envs(envs, payload, buffers.rewards[start:stop], buffers.dones[start:stop])
+                connection.send(("ok", [(start + index, result) for index, result in finished]))
+            elif command == "reset":
+                for env in envs:
+                    env.reset()
+                connection.send(("ok", []))
+            else:
+                break
+    except Exception as e:
+        connection.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        buffers.close()
+        connection.close()
+
+
+class _SharedBuffers:
+    """VectorEnvの一括バッファ（観測・報酬・終了フラグ・合法手マスク）を共有メモリ上に確保"""
+
+    _LAYOUT = (
+        ("observations", np.float32, (OBSERVATION_SIZE,)),
+        ("rewards", np.float32, ()),
+        ("dones", np.bool_, ()),
+        ("action_masks", np.bool_, (ACTION_COUNT,))
+    )
+
+    def __init__(self, memories: Dict[str, shared_memory.SharedMemory], num_envs: int, owner: bool):
+        self.memories = memories
+        self.owner = owner
+        for name, dtype, shape in self._LAYOUT:
+            setattr(self, name, np.ndarray((num_envs,) + shape, dtype=dtype, buffer=memories[name].buf))
+
+    @classmethod
+    def create(cls, num_envs: int) -> '_SharedBuffers':
+        memories = {}
+        for name, dtype, shape in cls._LAYOUT:
+            size = max(1, num_envs * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize)
+            memories[name] = shared_memory.SharedMemory(create=True, size=size)
+        return cls(memories, num_envs, owner=True)
+
+    @classmethod
+    def attach(cls, names: Dict[str, str], num_envs: int) -> '_SharedBuffers':
+        return cls({key: shared_memory.SharedMemory(name=name) for key, name in names.items()}, num_envs, owner=False)
+
+    @property
+    def names(self) -> Dict[str, str]:
+        return {key: memory.name for key, memory in self.memories.items()}
+
+    def close(self):
+        """共有メモリを解放（作成したプロセスはunlinkも行う）"""
+        for name, _, _ in self._LAYOUT:
+            setattr(self, name, None)
+        for memory in self.memories.values():
+            memory.close()
+            if self.owner:
+                memory.unlink()
+        self.memories = {}
+
+
+class VectorEnv:
+    """
+    N個のPokecaEnvを1回の呼び出しでまとめて進める
+
+    reset() は (観測[N, F], マスク[N, A])、step(actions) は (観測[N, F], 報酬[N], 終了[N], マスク[N, A]) を返す。
+    終了した環境はその場で自動的にresetされ、返す観測・マスクは次のエピソードの最初のものになる
+    （終了したエピソードの結果は pop_results() で取得）。
+
+    workers=0 なら同一プロセス内で順に進め、workers>0 なら環境を子プロセスへ均等に分配して並列に進める。
+    返す配列は内部バッファそのもので、次の reset()/step() で上書きされる。
+    """
+
+    def __init__(self, deck_ids: Tuple[int, int], num_envs: int, workers: int = 0,
+                 seed: Optional[int] = None, **env_options):
+        """
+        Args:
+            deck_ids: ("player"側, "opponent"側) のデッキID
+            workers: 子プロセス数（0なら同一プロセス内）
+            seed: 基準シード（環境iの基準シードは Match.derive_seed(seed, i)）
+            env_options: PokecaEnvへ渡す設定（opponent, opponent_planner, side, max_turns, prize_reward 等）
+        """
+        self.num_envs = num_envs
+        self.workers = min(workers, num_envs)
+        base_seed = seed if seed is not None else random.SystemRandom().getrandbits(Match.SEED_BITS)
+        seeds = [Match.derive_seed(base_seed, index) for index in range(num_envs)]
+        self.results: List[Tuple[int, MatchResult]] = []
+        self.closed = False
+
+        if self.workers <= 0:
+            self.buffers = None
+            self.observations = np.zeros((num_envs, OBSERVATION_SIZE), dtype=np.float32)
+            self.rewards = np.zeros(num_envs, dtype=np.float32)
+            self.dones = np.zeros(num_envs, dtype=bool)
+            self.action_masks = np.zeros((num_envs, ACTION_COUNT), dtype=bool)
+            self.envs = _make_envs(load_deck_data(deck_ids), seeds, env_options,
+                                   self.observations, self.action_masks)
+            return
+
+        self.envs = []
+        self.buffers = _SharedBuffers.create(num_envs)
+        self.observations = self.buffers.observations
+        self.rewards = self.buffers.rewards
+        self.dones = self.buffers.dones
+        self.action_masks = self.buffers.action_masks
+
+        bounds = np.linspace(0, num_envs, self.workers + 1).astype(int)
+        self.ranges = list(zip(bounds[:-1], bounds[1:]))
+        self.connections = []
+        self.processes = []
+        for start, stop in self.ranges:
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker,
+                args=(child_connection, self.buffers.names, num_envs, int(start), int(stop),
+                      deck_ids, seeds[start:stop], env_options),
+                daemon=True
+            )
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+        self._receive_all()
+
+    def reset(self) -> Tuple[np.ndarray, np.ndarray]:
+        """全環境をresetして最初の観測とマスクを返す"""
+        self.rewards[:] = 0.0
+        self.dones[:] = False
+        if self.buffers is None:
+            for env in self.envs:
+                env.reset()
+        else:
+            for connection in self.connections:
+                connection.send(("reset", None))
+            self._receive_all()
+        return self.observations, self.action_masks
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """全環境を1ステップ進める"""
+        actions = np.asarray(actions, dtype=np.int64)
+        if self.buffers is None:
+            self.results.extend(_step_envs(self.envs, actions.tolist(), self.rewards, self.dones))
+        else:
+            for connection, (start, stop) in zip(self.connections, self.ranges):
+                connection.send(("step", actions[start:stop].tolist()))
+            self._receive_all()
+        return self.observations, self.rewards, self.dones, self.action_masks
+
+    def pop_results(self) -> List[Tuple[int, MatchResult]]:
+        """前回の取得以降に終了したエピソードの(環境インデックス, 結果)を返す"""
+        results, self.results = self.results, []
+        return results
+
+    def close(self):
+        """子プロセスと共有メモリを解放"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.buffers is None:
+            return
+        for connection in self.connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        for connection in self.connections:
+            connection.close()
+        self.observations = self.rewards = self.dones = self.action_masks = None
+        self.buffers.close()
+
+    def _receive_all(self):
+        """全ワーカーの応答を待つ（エラー時は例外）"""
+        errors = []
+        for connection in self.connections:
+            status, payload = connection.recv()
+            if status == "error":
+                errors.append(payload)
+            elif payload:
+                self.results.extend(payload)
+        if errors:
+            raise RuntimeError(f"環境ワーカーでエラーが発生しました: {errors[0]}")
+
+    def __enter__(self) -> 'VectorEnv':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,235 @@
+# rl/inference.py
+# Version: 1.0
+# Updated: 2026-10-17 23:00
+# 方策・価値ネットワーク（NumPy MLP）と、多数の対戦・探索スレッドからの評価要求をまとめて処理する推論ブローカー
+#
+# 局面を1つずつ評価すると行列演算が小さすぎてCPUの大半が呼び出しのオーバーヘッドに消えるため、
+# InferenceBroker は専用スレッドで要求を集め、最大バッチサイズに達するか最大待ち時間が過ぎた時点で
+# 事前確保した入力バッファにまとめて1回の順伝播で評価し、結果を各呼び出し元へ返す。
+# NumPyの行列演算中はGILが解放されるため、呼び出し元のスレッドは評価待ちの間も局面の展開を進められる。
+#
+# NetworkAttackEvaluator は AIController のワザ評価（_evaluate_attack_with_colorless_efficiency）の代わりに、
+# 各ワザを実際に使った局面を変更ジャーナル上で作ってネットワークの価値で比較する。
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from engine.match import Match
+from utils.tracing import tracer
+
+from .observation import ObservationEncoder
+
+
+class MLP:
+    """
+    全結合ネットワーク（隠れ層はReLU、出力層は線形）
+
+    出力の並びは [価値, 方策のロジット...]（方策なしなら価値のみ）。価値は value() で tanh を通して -1〜1 にする。
+    """
+
+    def __init__(self, layer_sizes: Sequence[int], seed: Optional[int] = None,
+                 weights: Optional[List[np.ndarray]] = None):
+        """
+        Args:
+            layer_sizes: 入力から出力までの各層のユニット数（例: [OBSERVATION_SIZE, 256, 256, 1]）
+            weights: [W1, b1, W2, b2, ...]（未指定時はHe初期化）
+        """
+        self.layer_sizes = tuple(layer_sizes)
+        if weights is None:
+            rng = np.random.default_rng(seed)
+            weights = []
+            for fan_in, fan_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+                weights.append((rng.standard_normal((fan_in, fan_out)) * np.sqrt(2.0 / fan_in)).astype(np.float32))
+                weights.append(np.zeros(fan_out, dtype=np.float32))
+        self.weights = [np.asarray(weight, dtype=np.float32) for weight in weights]
+
+    @property
+    def input_size(self) -> int:
+        return self.layer_sizes[0]
+
+    @property
+    def output_size(self) -> int:
+        return self.layer_sizes[-1]
+
+    def forward(self, inputs: np.ndarray) -> np.ndarray:
+        """(N, 入力数) → (N, 出力数)"""
+        hidden = inputs
+        last = len(self.weights) - 2
+        for index in range(0, len(self.weights), 2):
+            hidden = hidden @ self.weights[index]
+            hidden += self.weights[index + 1]
+            if index < last:
+                np.maximum(hidden, 0.0, out=hidden)
+        return hidden
+
+    @staticmethod
+    def value(outputs: np.ndarray) -> np.ndarray:
+        """出力から価値（-1〜1）を取り出す"""
+        return np.tanh(outputs[..., 0])
+
+    def save(self, path: str):
+        """重みを.npzで保存"""
+        arrays = {f"w{index}": weight for index, weight in enumerate(self.weights)}
+        np.savez(path, layer_sizes=np.array(self.layer_sizes), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'MLP':
+        """save()で保存した重みを読み込む"""
+        with np.load(path) as data:
+            layer_sizes = data["layer_sizes"].tolist()
+            weights = [data[f"w{index}"] for index in range(2 * (len(layer_sizes) - 1))]
+        return cls(layer_sizes, weights=weights)
+
+
+class InferenceBroker:
+    """
+    評価要求をまとめてバッチ推論するスレッド
+
+    各呼び出し元は evaluate()（1局面）/ evaluate_batch()（複数局面）で結果を待つか、
+    submit() で Future を受け取る。ブローカーは最初の要求から max_wait 秒以内に届いた要求を
+    max_batch_size 行までまとめて1回で評価する。使い終わったら close() でスレッドを止める。
+    """
+
+    def __init__(self, model: MLP, max_batch_size: int = 256, max_wait: float = 0.001):
+        """
+        Args:
+            model: forward((N, 入力数)) → (N, 出力数) を持つモデル
+            max_batch_size: 1回の順伝播でまとめる最大行数
+            max_wait: 最初の要求が届いてから追加の要求を待つ最大時間（秒）
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.inputs = np.zeros((max_batch_size, model.input_size), dtype=np.float32)
+
+        # 統計
+        self.batches = 0
+        self.rows = 0
+
+        self._requests: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._serve, name="InferenceBroker", daemon=True)
+        self._thread.start()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.rows / self.batches if self.batches else 0.0
+
+    def submit(self, observations: np.ndarray) -> Future:
+        """
+        評価を要求（(入力数,) または (N, 入力数)）し、出力（(出力数,) または (N, 出力数)）のFutureを返す
+
+        結果が返るまで observations の中身を変更しないこと（ブローカーが入力バッファへコピーする）。
+        """
+        future = Future()
+        single = observations.ndim == 1
+        self._requests.put((observations.reshape(1, -1) if single else observations, single, future))
+        return future
+
+    def evaluate(self, observation: np.ndarray) -> np.ndarray:
+        """1局面を評価して出力を返す（結果が出るまで待つ）"""
+        return self.submit(observation).result()
+
+    def evaluate_batch(self, observations: np.ndarray) -> np.ndarray:
+        """複数局面を評価して (N, 出力数) を返す（結果が出るまで待つ）"""
+        return self.submit(observations).result()
+
+    def close(self):
+        """スレッドを止める（待機中の要求は処理してから終了）"""
+        if self._thread.is_alive():
+            self._requests.put(None)
+            self._thread.join()
+
+    def _serve(self):
+        """要求を集めてバッチ評価するループ（専用スレッド）"""
+        requests = self._requests
+        stopping = False
+        while not stopping:
+            request = requests.get()
+            if request is None:
+                break
+
+            pending = [request]
+            rows = len(request[0])
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                pending.append(request)
+                rows += len(request[0])
+
+            self._run(pending, rows)
+
+    def _run(self, pending: list, rows: int):
+        """まとめた要求を1回の順伝播で評価し、各Futureへ結果を返す"""
+        try:
+            if rows <= self.max_batch_size:
+                inputs = self.inputs[:rows]
+                offset = 0
+                for observations, _, _ in pending:
+                    inputs[offset:offset + len(observations)] = observations
+                    offset += len(observations)
+            else:
+                inputs = np.concatenate([observations for observations, _, _ in pending])
+            outputs = self.model.forward(inputs)
+        except Exception as e:
+            print(f"バッチ推論エラー: {e}")
+            for _, _, future in pending:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += rows
+        offset = 0
+        for observations, single, future in pending:
+            count = len(observations)
+            result = outputs[offset:offset + count]
+            future.set_result(result[0] if single else result)
+            offset += count
+
+
+class NetworkAttackEvaluator:
+    """
+    ワザ選択を価値ネットワークで行う評価器（AIController.attack_evaluator に設定して使う）
+
+    使えるワザごとに、実際の局面でワザを使った直後の局面を変更ジャーナル上で作って観測ベクトルにし、
+    全候補をまとめて1回の要求でブローカーへ送る。評価後は局面・乱数の状態とも元に戻す。
+    観測バッファを持つため、評価器はスレッドごとに作る（ブローカーは共有してよい）。
+    """
+
+    def __init__(self, broker: InferenceBroker):
+        self.broker = broker
+        self.observations = ObservationEncoder.allocate(2)
+
+    def score_attacks(self, match: Match, side: str, attack_numbers: Sequence[int]) -> List[float]:
+        """各ワザを使った後の局面の価値（side視点・-1〜1）"""
+        state = match.game_state
+        journaling = state.journal is not None
+        rng_state = match.rng.getstate()
+        count = len(attack_numbers)
+
+        with tracer.suspended():
+            for row, attack_number in enumerate(attack_numbers):
+                mark = state.mark()
+                match.attack(side, attack_number)
+                ObservationEncoder.encode(state, side, self.observations[row])
+                state.undo_to(mark)
+                match.rng.setstate(rng_state)
+
+        if not journaling:
+            state.stop_journal()
+
+        outputs = self.broker.evaluate_batch(self.observations[:count])
+        return MLP.value(outputs).tolist()
@@ -0,0 +1,215 @@
+# rl/observation.py
+# Version: 1.0
+# Updated: 2026-10-17 22:30
+# 局面（GameState）→固定長の特徴ベクトル（NumPy float32）への変換
+#
+# 特徴は観測者から見える情報のみ（相手の手札・両者の山札とサイドは枚数だけ）。
+#   陣営ごと（観測者→相手の順）:
+#     場の6枠（バトル場・ベンチ0〜4）×
+#       存在, 最大HP, ダメージ, 残りHP, タイプ(9), 進化段階, エネルギー枚数(タイプ別9),
+#       特殊状態(5), にげるコスト, このターンに出した, ルール持ち（ex）
+#     手札・山札・サイド・トラッシュの枚数
+#   観測者の手札の内訳: たねポケモン, 進化ポケモン, エネルギー(タイプ別9), グッズ, サポート, スタジアム, ポケモンのどうぐ
+#   全体: ターン数, 自分の手番, 先攻, 最初のターン, エネルギー使用済み, サポート使用済み, ワザ使用済み, 準備完了, スタジアム有無
+#
+# カードの静的な特徴（HP・タイプ・進化段階など）はプロトタイプごとに配列として1回だけ作り、
+# 以降は呼び出し側のバッファへコピーするだけなので、呼び出しごとの配列確保はない。
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from models.card import Card, CardType, TrainerType, SpecialCondition, CONDITION_BITS
+from models.game_state import GameState
+from utils.damage_calculator import DamageCalculator
+from engine.match import Match
+
+# 正規化後のタイプ（DamageCalculator._normalize_type_name の値域）
+TYPES = ('草', '炎', '水', '雷', '超', '闘', '悪', '鋼', '無色')
+_TYPE_INDEX = {type_name: index for index, type_name in enumerate(TYPES)}
+_TYPE_COUNT = len(TYPES)
+_CONDITIONS = tuple(SpecialCondition)
+
+# 数値特徴のスケール（おおよそ0〜数の範囲に収める）
+_HP_SCALE = 1.0 / 100.0
+_COUNT_SCALE = 1.0 / 10.0
+_TURN_SCALE = 1.0 / 50.0
+
+# 場の1枠の特徴の並び（静的部分はプロトタイプごとのキャッシュをそのままコピーする）
+_SLOT_PRESENT = 0
+_SLOT_MAX_HP = 1
+_SLOT_DAMAGE = 2
+_SLOT_REMAINING_HP = 3
+_SLOT_TYPE = 4
+_SLOT_EVOLVE_STEP = _SLOT_TYPE + _TYPE_COUNT
+_SLOT_ENERGY = _SLOT_EVOLVE_STEP + 1
+_SLOT_CONDITIONS = _SLOT_ENERGY + _TYPE_COUNT
+_SLOT_RETREAT = _SLOT_CONDITIONS + len(_CONDITIONS)
+_SLOT_SUMMONED = _SLOT_RETREAT + 1
+_SLOT_RULE = _SLOT_SUMMONED + 1
+SLOT_FEATURES = _SLOT_RULE + 1
+
+SLOTS = 1 + Match.BENCH_SIZE
+_ZONE_FEATURES = 4
+SIDE_FEATURES = SLOTS * SLOT_FEATURES + _ZONE_FEATURES
+
+# 手札の内訳
+_HAND_BASIC = 0
+_HAND_EVOLUTION = 1
+_HAND_ENERGY = 2
+_HAND_TRAINER = _HAND_ENERGY + _TYPE_COUNT
+_TRAINER_ORDER = (TrainerType.ITEM, TrainerType.SUPPORTER, TrainerType.STADIUM, TrainerType.POKEMON_TOOL)
+HAND_FEATURES = _HAND_TRAINER + len(_TRAINER_ORDER)
+
+GLOBAL_FEATURES = 9
+
+OBSERVATION_SIZE = 2 * SIDE_FEATURES + HAND_FEATURES + GLOBAL_FEATURES
+_HAND_OFFSET = 2 * SIDE_FEATURES
+_GLOBAL_OFFSET = _HAND_OFFSET + HAND_FEATURES
+
+# 特殊状態ビットマスク→特徴の対応表
+_CONDITION_TABLE = np.array(
+    [[1.0 if mask & CONDITION_BITS[condition] else 0.0 for condition in _CONDITIONS]
+     for mask in range(1 << len(_CONDITIONS))],
+    dtype=np.float32
+)
+
+# プロトタイプごとのキャッシュ
+_static_features: Dict[object, np.ndarray] = {}
+_energy_indices: Dict[object, int] = {}
+_hand_indices: Dict[object, int] = {}
+
+
+def _type_index(type_name: Optional[str]) -> int:
+    """タイプ名の正規化後のインデックス（不明・未設定は無色扱い）"""
+    if not type_name:
+        return _TYPE_INDEX['無色']
+    return _TYPE_INDEX.get(DamageCalculator._normalize_type_name(type_name), _TYPE_INDEX['無色'])
+
+
+def _slot_static(pokemon: Card) -> np.ndarray:
+    """場の1枠のうちカードの静的データだけで決まる部分（存在・最大HP・タイプ・進化段階・にげるコスト・ルール）"""
+    prototype = pokemon.prototype
+    features = _static_features.get(prototype)
+    if features is None:
+        features = np.zeros(SLOT_FEATURES, dtype=np.float32)
+        features[_SLOT_PRESENT] = 1.0
+        features[_SLOT_MAX_HP] = (prototype.hp or 0) * _HP_SCALE
+        features[_SLOT_TYPE + _type_index(prototype.pokemon_type)] = 1.0
+        features[_SLOT_EVOLVE_STEP] = prototype.evolve_step or 0
+        features[_SLOT_RETREAT] = prototype.retreat_cost or 0
+        features[_SLOT_RULE] = 1.0 if prototype.rule and "ex" in prototype.rule else 0.0
+        _static_features[prototype] = features
+    return features
+
+
+def _energy_index(energy: Card) -> int:
+    """エネルギーカードのタイプのインデックス"""
+    prototype = energy.prototype
+    index = _energy_indices.get(prototype)
+    if index is None:
+        index = _energy_indices[prototype] = _type_index(prototype.energy_kind or prototype.name.replace("エネルギー", ""))
+    return index
+
+
+def _hand_index(card: Card) -> int:
+    """手札の内訳のインデックス"""
+    prototype = card.prototype
+    index = _hand_indices.get(prototype)
+    if index is None:
+        if card.card_type == CardType.POKEMON:
+            index = _HAND_EVOLUTION if card.evolve_step else _HAND_BASIC
+        elif card.card_type == CardType.ENERGY:
+            index = _HAND_ENERGY + _energy_index(card)
+        elif card.card_type == CardType.TOOL:
+            index = _HAND_TRAINER + _TRAINER_ORDER.index(TrainerType.POKEMON_TOOL)
+        else:
+            trainer_type = card.trainer_type or Match._detect_trainer_type_from_name(card.name)
+            index = _HAND_TRAINER + _TRAINER_ORDER.index(trainer_type)
+        _hand_indices[prototype] = index
+    return index
+
+
+class ObservationEncoder:
+    """
+    局面を観測者視点の特徴ベクトルに変換
+
+    encode() は1局面を長さ SIZE のバッファへ、encode_batch() は複数局面を (N, SIZE) のバッファへ書き込む。
+    バッファは allocate() で1回だけ作って使い回す想定。
+    """
+
+    SIZE = OBSERVATION_SIZE
+
+    @staticmethod
+    def allocate(count: Optional[int] = None) -> np.ndarray:
+        """書き込み先のバッファを確保（countを指定すると (count, SIZE)）"""
+        shape = (OBSERVATION_SIZE,) if count is None else (count, OBSERVATION_SIZE)
+        return np.zeros(shape, dtype=np.float32)
+
+    @staticmethod
+    def encode(state: GameState, observer: str, out: np.ndarray) -> np.ndarray:
+        """
+        1局面を書き込む
+
+        Args:
+            observer: 観測者（この陣営から見える情報のみを使う）
+            out: 長さ SIZE の float32 配列（上書きされる）
+        """
+        out[:] = 0.0
+        opponent = GameState.get_opponent(observer)
+        ObservationEncoder._encode_side(state, observer, out, 0)
+        ObservationEncoder._encode_side(state, opponent, out, SIDE_FEATURES)
+
+        for card in state.get_hand(observer):
+            out[_HAND_OFFSET + _hand_index(card)] += 1.0
+
+        is_player = observer == "player"
+        has_attacked = state.player_has_attacked if is_player else state.opponent_has_attacked
+        out[_GLOBAL_OFFSET] = state.turn_count * _TURN_SCALE
+        out[_GLOBAL_OFFSET + 1] = state.current_player == observer
+        out[_GLOBAL_OFFSET + 2] = state.first_player == observer
+        out[_GLOBAL_OFFSET + 3] = state.initialization_complete and state.is_current_player_first_turn()
+        out[_GLOBAL_OFFSET + 4] = state.energy_played_this_turn
+        out[_GLOBAL_OFFSET + 5] = state.supporter_played_this_turn
+        out[_GLOBAL_OFFSET + 6] = has_attacked
+        out[_GLOBAL_OFFSET + 7] = state.initialization_complete
+        out[_GLOBAL_OFFSET + 8] = state.stadium is not None
+        return out
+
+    @staticmethod
+    def encode_batch(states: Sequence[GameState], observers: Sequence[str], out: np.ndarray) -> np.ndarray:
+        """
+        複数局面を1つの (N, SIZE) 配列へ書き込む
+
+        Args:
+            observers: 局面ごとの観測者（statesと同じ長さ）
+            out: (N以上, SIZE) の float32 配列（先頭N行が上書きされる）
+        """
+        encode = ObservationEncoder.encode
+        for row, (state, observer) in enumerate(zip(states, observers)):
+            encode(state, observer, out[row])
+        return out
+
+    @staticmethod
+    def _encode_side(state: GameState, player: str, out: np.ndarray, offset: int):
+        """1陣営分（場の6枠とゾーンの枚数）を書き込む（outは0クリア済み）"""
+        bench = state.get_bench(player)
+        for slot in range(SLOTS):
+            pokemon = state.get_active(player) if slot == 0 else bench[slot - 1]
+            if pokemon is not None:
+                base = offset + slot * SLOT_FEATURES
+                out[base:base + SLOT_FEATURES] = _slot_static(pokemon)
+                damage = pokemon.damage_taken
+                out[base + _SLOT_DAMAGE] = damage * _HP_SCALE
+                out[base + _SLOT_REMAINING_HP] = max(0, (pokemon.hp or 0) - damage) * _HP_SCALE
+                for energy in pokemon.attached_energy:
+                    out[base + _SLOT_ENERGY + _energy_index(energy)] += 1.0
+                if pokemon.condition_mask:
+                    out[base + _SLOT_CONDITIONS:base + _SLOT_RETREAT] = _CONDITION_TABLE[pokemon.condition_mask]
+                out[base + _SLOT_SUMMONED] = pokemon.summoned_this_turn
+
+        zones = offset + SLOTS * SLOT_FEATURES
+        out[zones] = len(state.get_hand(player)) * _COUNT_SCALE
+        out[zones + 1] = len(state.get_deck(player)) * _COUNT_SCALE
+        out[zones + 2] = len(state.get_prizes(player))
+        out[zones + 3] = len(state.get_discard(player)) * _COUNT_SCALE
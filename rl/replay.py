@@ -0,0 +1,202 @@
+# rl/replay.py
+# Version: 1.0
+# Updated: 2026-10-17 23:30
+# multiprocessing.shared_memory 上の固定長リングバッファ（経験再生）と、学習中の重みの共有領域
+#
+# アクタープロセスは遷移 (観測, 行動, 報酬, 次の観測, 終了, 次の合法手マスク) を共有メモリの配列へ直接書き込み、
+# 学習プロセスは同じ配列からミニバッチを取り出す。書き込み位置の確保だけをロックで行い、
+# 配列への書き込み・読み出しはロックなし（ステップごとのpickle・キュー送信は行わない）。
+# 書き込み中の行がまれにサンプルされても、その1行の観測が新旧で混ざるだけで学習には影響しない程度とみなす。
+
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .inference import MLP
+
+
+def _layout(fields: Sequence[Tuple[str, type, tuple]], count: int) -> Tuple[Dict[str, Tuple[int, type, tuple]], int]:
+    """各配列の(開始バイト, dtype, 形状)と合計バイト数（8バイト境界に揃える）"""
+    offsets = {}
+    offset = 0
+    for name, dtype, shape in fields:
+        full_shape = (count,) + shape
+        size = int(np.prod(full_shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+        offsets[name] = (offset, dtype, full_shape)
+        offset += (size + 7) // 8 * 8
+    return offsets, max(offset, 8)
+
+
+class SharedReplayBuffer:
+    """
+    共有メモリ上の経験再生バッファ（固定長・古いものから上書き）
+
+    作成したプロセスが close(unlink=True) で解放する。子プロセスへは Process の引数として渡す
+    （pickle時は共有メモリの名前とロックだけが渡り、子プロセス側で同じ領域を開き直す）。
+    """
+
+    def __init__(self, capacity: int, observation_size: int, action_count: int,
+                 name: Optional[str] = None, lock=None):
+        """
+        Args:
+            capacity: 保持する遷移数
+            name: 既存の共有メモリの名前（未指定時は新規作成）
+        """
+        self.capacity = capacity
+        self.observation_size = observation_size
+        self.action_count = action_count
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+
+        fields = (
+            ("observations", np.float32, (observation_size,)),
+            ("actions", np.int32, ()),
+            ("rewards", np.float32, ()),
+            ("next_observations", np.float32, (observation_size,)),
+            ("dones", np.bool_, ()),
+            ("next_masks", np.bool_, (action_count,))
+        )
+        offsets, size = _layout(fields, capacity)
+        header_size = 16
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=header_size + size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        # ヘッダー：[次の書き込み位置, 書き込んだ遷移の総数]
+        self.header = np.ndarray((2,), dtype=np.int64, buffer=self.memory.buf)
+        if name is None:
+            self.header[:] = 0
+        self.arrays: Dict[str, np.ndarray] = {}
+        for field, (offset, dtype, shape) in offsets.items():
+            self.arrays[field] = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=header_size + offset)
+
+    def __getstate__(self):
+        return (self.capacity, self.observation_size, self.action_count, self.memory.name, self.lock)
+
+    def __setstate__(self, state):
+        capacity, observation_size, action_count, name, lock = state
+        self.__init__(capacity, observation_size, action_count, name=name, lock=lock)
+
+    @property
+    def size(self) -> int:
+        """サンプル可能な遷移数"""
+        return int(min(self.header[1], self.capacity))
+
+    @property
+    def total(self) -> int:
+        """これまでに書き込んだ遷移の総数"""
+        return int(self.header[1])
+
+    def add(self, observation: np.ndarray, action: int, reward: float, next_observation: np.ndarray,
+            done: bool, next_mask: np.ndarray):
+        """遷移を1つ書き込む（位置の確保のみロック）"""
+        with self.lock:
+            index = int(self.header[0])
+            self.header[0] = (index + 1) % self.capacity
+            self.header[1] += 1
+
+        arrays = self.arrays
+        arrays["observations"][index] = observation
+        arrays["actions"][index] = action
+        arrays["rewards"][index] = reward
+        arrays["next_observations"][index] = next_observation
+        arrays["dones"][index] = done
+        arrays["next_masks"][index] = next_mask
+
+    def allocate_batch(self, batch_size: int) -> Dict[str, np.ndarray]:
+        """sample() の書き込み先（ミニバッチ用の配列一式）を確保"""
+        return {field: np.empty((batch_size,) + array.shape[1:], dtype=array.dtype)
+                for field, array in self.arrays.items()}
+
+    def sample(self, batch_size: int, rng: np.random.Generator,
+               out: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        一様にミニバッチを取り出す
+
+        Args:
+            out: allocate_batch() で確保した配列（指定時はそこへ書き込み、毎回の確保をしない）
+        """
+        if out is None:
+            out = self.allocate_batch(batch_size)
+        indices = rng.integers(0, self.size, size=batch_size)
+        for field, array in self.arrays.items():
+            np.take(array, indices, axis=0, out=out[field])
+        return out
+
+    def close(self, unlink: bool = False):
+        """共有メモリを閉じる（unlink=True なら領域も削除）"""
+        self.arrays = {}
+        self.header = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+class SharedWeights:
+    """
+    学習中のネットワークの重みを共有メモリで配布する領域
+
+    学習プロセスが publish() で書き込み、アクターは pull() で版が進んでいたときだけ自分のモデルへコピーする。
+    """
+
+    def __init__(self, layer_sizes: Sequence[int], name: Optional[str] = None, lock=None):
+        self.layer_sizes = tuple(layer_sizes)
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+
+        shapes = []
+        for fan_in, fan_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            shapes.extend([(fan_in, fan_out), (fan_out,)])
+        total = sum(int(np.prod(shape)) for shape in shapes)
+
+        header_size = 8
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=header_size + total * 4)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        # ヘッダー：重みの版（publishのたびに1増える）
+        self.header = np.ndarray((1,), dtype=np.int64, buffer=self.memory.buf)
+        if name is None:
+            self.header[0] = 0
+        self.weights: List[np.ndarray] = []
+        offset = header_size
+        for shape in shapes:
+            self.weights.append(np.ndarray(shape, dtype=np.float32, buffer=self.memory.buf, offset=offset))
+            offset += int(np.prod(shape)) * 4
+
+    def __getstate__(self):
+        return (self.layer_sizes, self.memory.name, self.lock)
+
+    def __setstate__(self, state):
+        layer_sizes, name, lock = state
+        self.__init__(layer_sizes, name=name, lock=lock)
+
+    @property
+    def version(self) -> int:
+        return int(self.header[0])
+
+    def publish(self, model: MLP):
+        """モデルの重みを書き込み、版を進める"""
+        with self.lock:
+            for shared, weight in zip(self.weights, model.weights):
+                shared[...] = weight
+            self.header[0] += 1
+
+    def pull(self, model: MLP, version: int) -> int:
+        """版が version より新しければモデルへコピーし、現在の版を返す"""
+        if self.header[0] == version:
+            return version
+        with self.lock:
+            for weight, shared in zip(model.weights, self.weights):
+                weight[...] = shared
+            return int(self.header[0])
+
+    def close(self, unlink: bool = False):
+        """共有メモリを閉じる（unlink=True なら領域も削除）"""
+        self.weights = []
+        self.header = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
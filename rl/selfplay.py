@@ -0,0 +1,360 @@
+# rl/selfplay.py
+# Version: 1.1
+# Updated: 2026-10-18 14:10
+# 自己対戦学習（要件定義書 2.2.2）：アクタープロセス群＋共有メモリの経験再生＋DQN学習プロセス
+#
+# 使い方:
+#   python -m rl.selfplay --decks 1,2 --actors 4 --episodes 2000 --eval-interval 200 --output weights.npz
+#
+# 各アクターはPokecaEnv（ヘッドレスのルール進行）で、学習中のネットワーク同士の対戦を行う。
+# 学習側はε-greedy、相手側は同じネットワークの貪欲方策で指す。
+# 遷移は SharedReplayBuffer に直接書き込み、重みは SharedWeights から版が進んだときだけ読み直す。
+# 学習プロセスはバッファからミニバッチを取り出してQ学習（ターゲットネットワーク・Adam）で更新し、
+# K エピソードごとに貪欲方策と既存のヒューリスティック AIController との勝率を測って記録する。
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from engine.match import Match
+from engine.agents import Agent, AIControllerAgent
+from engine.actions import legal_actions, ActionCodec, ACTION_COUNT, END_TURN
+from utils.tracing import tracer
+
+from .observation import ObservationEncoder, OBSERVATION_SIZE
+from .inference import MLP
+from .replay import SharedReplayBuffer, SharedWeights
+from .env import PokecaEnv, load_deck_data
+
+
+def select_action(model: MLP, observation: np.ndarray, mask: np.ndarray, epsilon: float,
+                  rng: np.random.Generator) -> int:
+    """
+    合法手の中からε-greedyで行動を選ぶ
+
+    ネットワークの出力の並びは [価値, 各行動のQ値...]。
+    """
+    legal = np.flatnonzero(mask)
+    if epsilon > 0.0 and rng.random() < epsilon:
+        return int(legal[rng.integers(len(legal))])
+    q_values = model.forward(observation.reshape(1, -1))[0, 1:]
+    return int(legal[np.argmax(q_values[legal])])
+
+
+class PolicyAgent(Agent):
+    """ネットワークのQ値で1ターン分の行動を選ぶエージェント（自己対戦の相手・評価用）"""
+
+    def __init__(self, model: MLP, epsilon: float = 0.0, seed: Optional[int] = None,
+                 max_turn_actions: int = 30):
+        self.model = model
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.max_turn_actions = max_turn_actions
+        self.observation = ObservationEncoder.allocate()
+        self.mask = np.zeros(ACTION_COUNT, dtype=bool)
+
+    def take_turn(self, match, player: str) -> List[str]:
+        """ターン終了かワザを選ぶまで行動する（ターン交代はMatch側で行う）"""
+        messages = []
+        state = match.game_state
+        for _ in range(self.max_turn_actions):
+            if match.is_over:
+                break
+            ObservationEncoder.encode(state, player, self.observation)
+            self.mask[:] = False
+            for action in legal_actions(state, player):
+                self.mask[action] = True
+
+            action = select_action(self.model, self.observation, self.mask, self.epsilon, self.rng)
+            if action == END_TURN:
+                break
+            _, action_messages = match.apply(action, player)
+            messages.extend(action_messages)
+            if ActionCodec.ends_turn(action):
+                break
+        return messages
+
+
+class DQNLearner:
+    """
+    MLPのQ学習（Huber損失・ターゲットネットワーク・Adam）
+
+    出力0列目の価値も、同じ目標値（-1〜1に切り詰め）へ tanh 経由の二乗誤差で同時に学習する
+    （rl.inference.NetworkAttackEvaluator がこの価値を使う）。
+    """
+
+    def __init__(self, model: MLP, gamma: float = 0.99, learning_rate: float = 1e-3,
+                 target_update: int = 500):
+        self.model = model
+        self.target = MLP(model.layer_sizes, weights=[weight.copy() for weight in model.weights])
+        self.gamma = gamma
+        self.learning_rate = learning_rate
+        self.target_update = target_update
+        self.updates = 0
+
+        # Adam
+        self.beta1 = 0.9
+        self.beta2 = 0.999
+        self.moments = [np.zeros_like(weight) for weight in model.weights]
+        self.velocities = [np.zeros_like(weight) for weight in model.weights]
+
+    def update(self, batch: dict) -> float:
+        """ミニバッチで1回更新し、Q値の損失を返す"""
+        observations = batch["observations"]
+        actions = batch["actions"]
+        count = len(actions)
+        rows = np.arange(count)
+
+        # 目標値：r + γ(1-done) max_{合法な a'} Q_target(s', a')
+        next_q = self.target.forward(batch["next_observations"])[:, 1:]
+        next_q = np.where(batch["next_masks"], next_q, -np.inf).max(axis=1)
+        next_q = np.where(batch["dones"] | ~np.isfinite(next_q), 0.0, next_q)
+        targets = batch["rewards"] + self.gamma * next_q
+
+        # 順伝播（逆伝播用に各層の入力を保持）
+        weights = self.model.weights
+        layer_inputs = []
+        hidden = observations
+        last = len(weights) - 2
+        for index in range(0, len(weights), 2):
+            layer_inputs.append(hidden)
+            hidden = hidden @ weights[index] + weights[index + 1]
+            if index < last:
+                hidden = np.maximum(hidden, 0.0)
+        outputs = hidden
+
+        gradient = np.zeros_like(outputs)
+        errors = outputs[rows, actions + 1] - targets
+        gradient[rows, actions + 1] = np.clip(errors, -1.0, 1.0) / count
+        values = np.tanh(outputs[:, 0])
+        gradient[:, 0] = (values - np.clip(targets, -1.0, 1.0)) * (1.0 - values * values) / count
+
+        # 逆伝播とAdam更新
+        self.updates += 1
+        step = self.learning_rate * np.sqrt(1.0 - self.beta2 ** self.updates) / (1.0 - self.beta1 ** self.updates)
+        for index in range(len(weights) - 2, -1, -2):
+            layer_input = layer_inputs[index // 2]
+            grads = (layer_input.T @ gradient, gradient.sum(axis=0))
+            if index > 0:
+                gradient = (gradient @ weights[index].T) * (layer_input > 0.0)
+            for offset, grad in enumerate(grads):
+                slot = index + offset
+                self.moments[slot] *= self.beta1
+                self.moments[slot] += (1.0 - self.beta1) * grad
+                self.velocities[slot] *= self.beta2
+                self.velocities[slot] += (1.0 - self.beta2) * grad * grad
+                weights[slot] -= step * self.moments[slot] / (np.sqrt(self.velocities[slot]) + 1e-8)
+
+        if self.updates % self.target_update == 0:
+            for target_weight, weight in zip(self.target.weights, weights):
+                target_weight[...] = weight
+
+        abs_errors = np.abs(errors)
+        return float(np.mean(np.where(abs_errors < 1.0, 0.5 * errors * errors, abs_errors - 0.5)))
+
+
+def _actor(actor_index: int, deck_ids: Tuple[int, int], replay: SharedReplayBuffer, weights: SharedWeights,
+           episodes, stop, seed: int, epsilon: float, opponent_epsilon: float, prize_reward: float):
+    """アクタープロセス：自己対戦で遷移を書き込み続ける"""
+    tracer.configure("off")
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+
+    try:
+        model = MLP(weights.layer_sizes)
+        version = weights.pull(model, -1)
+        rng = np.random.default_rng(seed)
+        side = "player" if actor_index % 2 == 0 else "opponent"
+        opponent = PolicyAgent(model, epsilon=opponent_epsilon, seed=Match.derive_seed(seed, 1))
+        player_deck, opponent_deck = load_deck_data(deck_ids)
+        env = PokecaEnv(player_deck, opponent_deck, opponent=opponent, side=side, seed=seed,
+                        prize_reward=prize_reward)
+        observation = ObservationEncoder.allocate()
+
+        while not stop.is_set():
+            version = weights.pull(model, version)
+            next_observation, mask = env.reset()
+            done = env.done
+            while not done and not stop.is_set():
+                observation[:] = next_observation
+                action = select_action(model, observation, mask, epsilon, rng)
+                next_observation, reward, done, mask = env.step(action)
+                replay.add(observation, action, reward, next_observation, done, mask)
+            if done:
+                with episodes.get_lock():
+                    episodes.value += 1
+    except Exception as e:
+        print(f"アクター{actor_index}でエラー: {e}", file=sys.stderr)
+    finally:
+        replay.close()
+        weights.close()
+
+
+def evaluate_against_heuristic(model: MLP, deck_ids: Tuple[int, int], games: int, seed: int,
+                               deck_data: Optional[List[list]] = None, use_planner: bool = False) -> float:
+    """
+    貪欲方策と既存のAIControllerを陣営を入れ替えながら対戦させ、勝率を返す
+
+    相手は既定で固定順のAIController（学習中の定期評価を重くしないため）。use_planner=True でTurnPlannerを使う。
+    """
+    player_deck, opponent_deck = deck_data or load_deck_data(deck_ids)
+    wins = 0
+    with tracer.suspended(), contextlib.redirect_stdout(io.StringIO()):
+        for game in range(games):
+            policy_side = "player" if game % 2 == 0 else "opponent"
+            heuristic_side = "opponent" if policy_side == "player" else "player"
+            match = Match(agents={policy_side: PolicyAgent(model), heuristic_side: AIControllerAgent(use_planner=use_planner)},
+                          seed=Match.derive_seed(seed, game))
+            result = match.run(Match.build_deck(player_deck), Match.build_deck(opponent_deck))
+            wins += result.winner == policy_side
+    return wins / games if games else 0.0
+
+
+class SelfPlayTrainer:
+    """
+    自己対戦学習の全体（アクタープロセスの起動・学習ループ・勝率の追跡）
+
+    history には (エピソード数, ヒューリスティックAIへの勝率) が eval_interval エピソードごとに追加される。
+    """
+
+    def __init__(self, deck_ids: Tuple[int, int], actors: int = 2, capacity: int = 100000,
+                 hidden_sizes: Tuple[int, ...] = (256, 256), batch_size: int = 256,
+                 gamma: float = 0.99, learning_rate: float = 1e-3, target_update: int = 500,
+                 epsilon: float = 0.1, opponent_epsilon: float = 0.05, prize_reward: float = 0.1,
+                 sync_interval: int = 50, eval_interval: int = 100, eval_games: int = 20,
+                 seed: int = 0, model: Optional[MLP] = None):
+        """
+        Args:
+            actors: アクタープロセス数
+            capacity: 経験再生バッファの遷移数
+            sync_interval: 重みをアクターへ配布する更新回数の間隔
+            eval_interval: 勝率を測るエピソード数の間隔（K）
+            eval_games: 1回の勝率測定の対戦数
+        """
+        self.deck_ids = deck_ids
+        self.actors = actors
+        self.batch_size = batch_size
+        self.epsilon = epsilon
+        self.opponent_epsilon = opponent_epsilon
+        self.prize_reward = prize_reward
+        self.sync_interval = sync_interval
+        self.eval_interval = eval_interval
+        self.eval_games = eval_games
+        self.seed = seed
+
+        self.model = model or MLP((OBSERVATION_SIZE,) + tuple(hidden_sizes) + (1 + ACTION_COUNT,), seed=seed)
+        self.learner = DQNLearner(self.model, gamma=gamma, learning_rate=learning_rate,
+                                  target_update=target_update)
+        self.capacity = capacity
+        self.history: List[Tuple[int, float]] = []
+        self.losses: List[float] = []
+
+    def train(self, episodes: int) -> List[Tuple[int, float]]:
+        """指定エピソード数に達するまで学習し、勝率の推移を返す"""
+        replay = SharedReplayBuffer(self.capacity, OBSERVATION_SIZE, ACTION_COUNT)
+        weights = SharedWeights(self.model.layer_sizes)
+        weights.publish(self.model)
+        episode_counter = multiprocessing.Value('q', 0)
+        stop = multiprocessing.Event()
+
+        processes = []
+        for actor_index in range(self.actors):
+            process = multiprocessing.Process(
+                target=_actor,
+                args=(actor_index, self.deck_ids, replay, weights, episode_counter, stop,
+                      Match.derive_seed(self.seed, actor_index), self.epsilon, self.opponent_epsilon,
+                      self.prize_reward),
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+
+        deck_data = load_deck_data(self.deck_ids)
+        rng = np.random.default_rng(self.seed)
+        batch = replay.allocate_batch(self.batch_size)
+        next_evaluation = self.eval_interval
+        started = time.perf_counter()
+
+        try:
+            while True:
+                finished = episode_counter.value
+                if finished >= next_evaluation or finished >= episodes:
+                    win_rate = evaluate_against_heuristic(self.model, self.deck_ids, self.eval_games,
+                                                          Match.derive_seed(self.seed, finished), deck_data)
+                    self.history.append((finished, win_rate))
+                    recent_loss = np.mean(self.losses[-100:]) if self.losses else float("nan")
+                    print(f"エピソード{finished:>7}: 対ヒューリスティック勝率 {win_rate:.3f}  "
+                          f"更新{self.learner.updates}回  損失{recent_loss:.4f}  "
+                          f"遷移{replay.total}  {time.perf_counter() - started:.1f}秒")
+                    next_evaluation = (finished // self.eval_interval + 1) * self.eval_interval
+                    if finished >= episodes:
+                        break
+
+                if replay.size < self.batch_size:
+                    time.sleep(0.01)
+                    if not any(process.is_alive() for process in processes):
+                        raise RuntimeError("すべてのアクタープロセスが終了しました")
+                    continue
+
+                replay.sample(self.batch_size, rng, out=batch)
+                self.losses.append(self.learner.update(batch))
+                if self.learner.updates % self.sync_interval == 0:
+                    weights.publish(self.model)
+        finally:
+            stop.set()
+            for process in processes:
+                process.join(timeout=10)
+            replay.close(unlink=True)
+            weights.close(unlink=True)
+
+        return self.history
+
+
+def _parse_decks(value: str) -> Tuple[int, int]:
+    """--decks 引数（例: 1,2）を解析"""
+    try:
+        deck_ids = tuple(int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"デッキIDは整数で指定してください: {value}")
+    if len(deck_ids) != 2:
+        raise argparse.ArgumentTypeError(f"デッキIDは2つ指定してください: {value}")
+    return deck_ids
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインエントリーポイント"""
+    parser = argparse.ArgumentParser(description="自己対戦学習（DQN・共有メモリ経験再生）")
+    parser.add_argument("--decks", type=_parse_decks, default=(1, 2), help="使用するデッキID（例: 1,2）")
+    parser.add_argument("--actors", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="アクタープロセス数")
+    parser.add_argument("--episodes", type=int, default=1000, help="学習するエピソード数")
+    parser.add_argument("--capacity", type=int, default=100000, help="経験再生バッファの遷移数")
+    parser.add_argument("--batch-size", type=int, default=256, help="ミニバッチの大きさ")
+    parser.add_argument("--eval-interval", type=int, default=100, help="勝率を測るエピソード間隔（K）")
+    parser.add_argument("--eval-games", type=int, default=20, help="1回の勝率測定の対戦数")
+    parser.add_argument("--seed", type=int, default=0, help="基準シード")
+    parser.add_argument("--output", help="学習後の重みの保存先（.npz）")
+    args = parser.parse_args(argv)
+
+    trainer = SelfPlayTrainer(args.decks, actors=args.actors, capacity=args.capacity,
+                              batch_size=args.batch_size, eval_interval=args.eval_interval,
+                              eval_games=args.eval_games, seed=args.seed)
+    trainer.train(args.episodes)
+
+    if args.output:
+        trainer.model.save(args.output)
+        print(f"重みを保存しました: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,12 @@
 # utils/damage_calculator.py
-# Version: 2.1
-# Updated: 2025-06-11 16:45
-# HP引き継ぎバグ修正対応ダメージ計算システム
+# Version: 2.4
+# Updated: 2026-10-17 17:00
+# HP引き継ぎバグ修正対応ダメージ計算システム・トレース対応
 
-import copy
 from typing import Tuple, List, Optional
 from models.card import Card
 from models.game_state import GameState
+from utils.tracing import tracer, DAMAGE, DEBUG
 
 class DamageCalculator:
     """ダメージ計算と適用を行うクラス（HP引き継ぎバグ修正版）"""
@@ -27,11 +27,13 @@ class DamageCalculator:
         messages = []
         
         try:
-            print(f"🔍 ダメージ計算開始: {attacker.name} → {defender.name}, ワザ{attack_number}")
-            
-            # HP引き継ぎバグ修正確認：カードインスタンスの独立性確認
-            if hasattr(defender, '_instance_id'):
-                messages.append(f"対象: {defender.name} (インスタンス: {defender._instance_id})")
+            trace_on = tracer.damage <= DEBUG
+            if trace_on:
+                tracer.log(DAMAGE, DEBUG, f"🔍 ダメージ計算開始: {attacker.name} → {defender.name}, ワザ{attack_number}")
+                
+                # HP引き継ぎバグ修正確認：カードインスタンスの独立性確認
+                if hasattr(defender, '_instance_id'):
+                    tracer.log(DAMAGE, DEBUG, f"対象: {defender.name} (インスタンス: {defender._instance_id})")
             
             # 基本ダメージの取得（旧形式対応）
             if attack_number == 1:
@@ -43,11 +45,11 @@ class DamageCalculator:
                 attack_name = getattr(attacker, 'attack2_name', f'ワザ{attack_number}')
                 attack_effect = getattr(attacker, 'attack2_effect', '')
             else:
-                print("❌ 無効なワザ番号です")
                 return 0, ["無効なワザ番号です"]
             
-            print(f"  - ワザ名: {attack_name}")
-            print(f"  - 基本ダメージ: {base_damage}")
+            if trace_on:
+                tracer.log(DAMAGE, DEBUG, f"  - ワザ名: {attack_name}")
+                tracer.log(DAMAGE, DEBUG, f"  - 基本ダメージ: {base_damage}")
             
             if base_damage == 0:
                 messages.append(f"「{attack_name}」の基本ダメージ: 0")
@@ -60,12 +62,14 @@ class DamageCalculator:
             # 弱点計算
             weakness_multiplier = DamageCalculator._calculate_weakness(attacker, defender, messages)
             final_damage = int(final_damage * weakness_multiplier)
-            print(f"  - 弱点計算後: {final_damage}")
+            if trace_on:
+                tracer.log(DAMAGE, DEBUG, f"  - 弱点計算後: {final_damage}")
             
             # 抵抗力計算
             resistance_reduction = DamageCalculator._calculate_resistance(attacker, defender, messages)
             final_damage = max(0, final_damage - resistance_reduction)
-            print(f"  - 抵抗力計算後: {final_damage}")
+            if trace_on:
+                tracer.log(DAMAGE, DEBUG, f"  - 抵抗力計算後: {final_damage}")
             
             # エネルギー効率によるボーナス計算
             energy_bonus = DamageCalculator._calculate_energy_efficiency_bonus(
@@ -77,7 +81,8 @@ class DamageCalculator:
             if final_damage != base_damage:
                 messages.append(f"最終ダメージ: {final_damage}")
             
-            print(f"✅ ダメージ計算完了: {final_damage}")
+            if trace_on:
+                tracer.log(DAMAGE, DEBUG, f"✅ ダメージ計算完了: {final_damage}")
             return final_damage, messages
             
         except Exception as e:
@@ -179,8 +184,13 @@ class DamageCalculator:
         return type_mapping.get(type_name, type_name)
     
     @staticmethod
-    def apply_damage(defender: Card, damage: int) -> Tuple[bool, List[str]]:
-        """ダメージを適用（HP引き継ぎバグ修正版）"""
+    def apply_damage(defender: Card, damage: int,
+                     game_state: Optional[GameState] = None) -> Tuple[bool, List[str]]:
+        """
+        ダメージを適用（HP引き継ぎバグ修正版）
+        
+        game_state指定時はその変更ジャーナル経由で更新する（探索時のundo対応）。
+        """
         messages = []
         
         try:
@@ -188,17 +198,18 @@ class DamageCalculator:
                 messages.append("ダメージは与えられませんでした")
                 return False, messages
             
-            # HP引き継ぎバグ修正確認：ダメージ適用前の状態確認
-            old_damage = getattr(defender, 'damage_taken', 0)
-            instance_info = getattr(defender, '_instance_id', 'unknown')
-            
             # ダメージカウンターの更新
-            defender.damage_taken = old_damage + damage
+            old_damage = getattr(defender, 'damage_taken', 0)
+            if game_state is not None:
+                game_state.set_attr(defender, 'damage_taken', old_damage + damage)
+            else:
+                defender.damage_taken = old_damage + damage
             
             messages.append(f"{defender.name}に{damage}ダメージ！")
             
-            if hasattr(defender, '_instance_id'):
-                messages.append(f"(インスタンス: {instance_info}, 累積ダメージ: {defender.damage_taken})")
+            # HP引き継ぎバグ修正確認：ダメージ適用後の状態確認
+            if tracer.damage <= DEBUG and hasattr(defender, '_instance_id'):
+                tracer.log(DAMAGE, DEBUG, f"(インスタンス: {defender._instance_id}, 累積ダメージ: {defender.damage_taken})")
             
             # HP状況の確認
             if defender.hp:
@@ -231,7 +242,7 @@ class DamageCalculator:
                     instance_info = getattr(knocked_out_pokemon, '_instance_id', 'unknown')
                     messages.append(f"きぜつしたポケモン: {knocked_out_pokemon.name} (インスタンス: {instance_info})")
                     
-                    game_state.player_active = None
+                    game_state.set_active("player", None)
                     messages.append("あなたのバトル場が空になりました")
                     
                     # ベンチにポケモンがいれば交代が必要
@@ -252,7 +263,7 @@ class DamageCalculator:
                     instance_info = getattr(knocked_out_pokemon, '_instance_id', 'unknown')
                     messages.append(f"相手のきぜつしたポケモン: {knocked_out_pokemon.name} (インスタンス: {instance_info})")
                     
-                    game_state.opponent_active = None
+                    game_state.set_active("opponent", None)
                     messages.append("相手のバトル場が空になりました")
                     
                     # ベンチにポケモンがいれば自動で交代
@@ -266,8 +277,8 @@ class DamageCalculator:
                                 original_damage = pokemon.damage_taken
                                 
                                 # バトル場に移動
-                                game_state.opponent_active = pokemon
-                                game_state.opponent_bench[i] = None
+                                game_state.set_active("opponent", pokemon)
+                                game_state.list_set(game_state.opponent_bench, i, None)
                                 
                                 # HP引き継ぎバグ修正確認：交代後のダメージ状態確認
                                 messages.append(f"相手が{pokemon.name}をバトル場に出しました")
@@ -387,21 +398,8 @@ class DamageCalculator:
             独立したポケモンインスタンス
         """
         try:
-            # 深いコピーで完全に独立したインスタンスを作成
-            independent_pokemon = copy.deepcopy(pokemon)
-            
-            # 状態を確実に初期化（念のため）
-            independent_pokemon.damage_taken = 0
-            independent_pokemon.special_conditions = set()
-            independent_pokemon.attached_energy = []
-            independent_pokemon.attached_tools = []
-            
-            # 新しいインスタンスIDを付与
-            if hasattr(pokemon, '_instance_id'):
-                original_id = pokemon._instance_id
-                independent_pokemon._instance_id = f"{original_id}_copy_{id(independent_pokemon)}"
-            
-            return independent_pokemon
+            # プロトタイプを共有した新しいインスタンス（状態は初期値・新しいインスタンスID）
+            return pokemon.new_instance()
             
         except Exception as e:
             print(f"ポケモン独立性確保エラー: {e}")
@@ -1,10 +1,11 @@
 # utils/energy_cost_checker.py
-# Version: 2.1
-# Updated: 2025-06-11 18:40
-# 先攻1ターン目攻撃制限対応・無色エネルギーシステム修正版
+# Version: 2.2
+# Updated: 2026-10-17 12:00
+# 先攻1ターン目攻撃制限対応・無色エネルギーシステム修正版・トレース対応
 
 from typing import Dict, Optional, Tuple, List
 from models.card import Card
+from utils.tracing import tracer, ENERGY, DEBUG
 
 class EnergyCostChecker:
     """エネルギーコスト判定を行うクラス（先攻1ターン目攻撃制限対応・無色エネルギーシステム対応版）"""
@@ -23,12 +24,15 @@ class EnergyCostChecker:
             Tuple[bool, str]: (使用可能か, 詳細メッセージ)
         """
         try:
-            print(f"🔍 エネルギーコストチェック開始: {pokemon.name}, ワザ{attack_number}")
+            trace_on = tracer.energy <= DEBUG
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, f"🔍 エネルギーコストチェック開始: {pokemon.name}, ワザ{attack_number}")
             
             # 先攻1ターン目の攻撃制限チェック
             if game_state and hasattr(game_state, 'is_first_player_first_turn'):
                 if game_state.is_first_player_first_turn():
-                    print("  ❌ 先攻1ターン目制限")
+                    if trace_on:
+                        tracer.log(ENERGY, DEBUG, "  ❌ 先攻1ターン目制限")
                     return False, "先攻プレイヤーの最初のターンは攻撃できません"
             
             # ワザの存在チェック（旧形式対応）
@@ -41,97 +45,104 @@ class EnergyCostChecker:
                 cost_types = getattr(pokemon, 'attack2_cost_types', None)
                 attack_power = getattr(pokemon, 'attack2_power', None)
             else:
-                print("  ❌ 無効なワザ番号")
+                if trace_on:
+                    tracer.log(ENERGY, DEBUG, "  ❌ 無効なワザ番号")
                 return False, "無効なワザ番号です"
             
-            print(f"  - ワザ名: {attack_name}")
-            print(f"  - コスト: {cost_types}")
-            print(f"  - ダメージ: {attack_power}")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, f"  - ワザ名: {attack_name}")
+                tracer.log(ENERGY, DEBUG, f"  - コスト: {cost_types}")
+                tracer.log(ENERGY, DEBUG, f"  - ダメージ: {attack_power}")
             
             if not attack_name:
-                print(f"  ❌ ワザ{attack_number}が設定されていません")
+                if trace_on:
+                    tracer.log(ENERGY, DEBUG, f"  ❌ ワザ{attack_number}が設定されていません")
                 return False, f"ワザ{attack_number}は設定されていません"
             
             # コストが設定されていない場合は使用可能
             if not cost_types:
-                print("  ✅ コストなしで使用可能")
+                if trace_on:
+                    tracer.log(ENERGY, DEBUG, "  ✅ コストなしで使用可能")
                 return True, f"「{attack_name}」は使用可能です（コスト：なし）"
             
             # 装着されているエネルギーの集計
             attached_energy = EnergyCostChecker._get_attached_energy_summary(pokemon)
-            print(f"  - 装着エネルギー: {attached_energy}")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, f"  - 装着エネルギー: {attached_energy}")
             
             # 無色エネルギー対応のコスト判定
             can_use, detailed_result = EnergyCostChecker._check_energy_cost_with_colorless(
                 cost_types, attached_energy, attack_name, attack_power
             )
             
-            print(f"  - 判定結果: {can_use}, {detailed_result}")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, f"  - 判定結果: {can_use}, {detailed_result}")
             return can_use, detailed_result
             
         except Exception as e:
             print(f"  ❌ エネルギーコスト判定エラー: {e}")
             return False, f"エネルギーコスト判定エラー: {e}"
 
+    # エネルギータイプ名の正規化テーブル
+    _ENERGY_TYPE_ALIASES = {
+        '無色エネルギー': '無色', 'colorless': '無色', 'Colorless': '無色', 'ノーマル': '無色',
+        '炎エネルギー': '炎', 'fire': '炎', 'Fire': '炎', '火': '炎',
+        '水エネルギー': '水', 'water': '水', 'Water': '水',
+        '雷エネルギー': '雷', 'electric': '雷', 'Electric': '雷', '電気': '雷',
+        '草エネルギー': '草', 'grass': '草', 'Grass': '草',
+        '超エネルギー': '超', 'psychic': '超', 'Psychic': '超',
+        '闘エネルギー': '闘', 'fighting': '闘', 'Fighting': '闘',
+        '悪エネルギー': '悪', 'darkness': '悪', 'Darkness': '悪',
+        '鋼エネルギー': '鋼', 'metal': '鋼', 'Metal': '鋼',
+        'フェアリーエネルギー': 'フェアリー', 'fairy': 'フェアリー', 'Fairy': 'フェアリー',
+        'ドラゴンエネルギー': 'ドラゴン', 'dragon': 'ドラゴン', 'Dragon': 'ドラゴン',
+    }
+
     @staticmethod
     def _get_attached_energy_summary(pokemon: Card) -> Dict[str, int]:
         """ポケモンに装着されているエネルギーを集計（デバッグ強化版）"""
         energy_summary = {"total": 0}
+        trace_on = tracer.energy <= DEBUG
         
-        print(f"    🔍 エネルギー集計開始: {pokemon.name}")
+        if trace_on:
+            tracer.log(ENERGY, DEBUG, f"    🔍 エネルギー集計開始: {pokemon.name}")
         
         if not hasattr(pokemon, 'attached_energy'):
-            print("    - attached_energy属性なし")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, "    - attached_energy属性なし")
             return energy_summary
         
         attached_energy_list = pokemon.attached_energy
         if not attached_energy_list:
-            print("    - 装着エネルギーなし")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, "    - 装着エネルギーなし")
             return energy_summary
         
-        print(f"    - 装着エネルギー数: {len(attached_energy_list)}")
+        if trace_on:
+            tracer.log(ENERGY, DEBUG, f"    - 装着エネルギー数: {len(attached_energy_list)}")
         
+        aliases = EnergyCostChecker._ENERGY_TYPE_ALIASES
         for i, energy_card in enumerate(attached_energy_list):
             # エネルギータイプの正規化
             energy_type = getattr(energy_card, 'energy_kind', None)
             if not energy_type:
                 energy_type = getattr(energy_card, 'name', '不明')
             
-            print(f"    - エネルギー{i+1}: {energy_card.name}, タイプ: {energy_type}")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, f"    - エネルギー{i+1}: {energy_card.name}, タイプ: {energy_type}")
             
             # タイプ名の正規化
-            if energy_type in ['無色エネルギー', 'colorless', 'Colorless', 'ノーマル']:
-                energy_type = '無色'
-            elif energy_type in ['炎エネルギー', 'fire', 'Fire', '火']:
-                energy_type = '炎'
-            elif energy_type in ['水エネルギー', 'water', 'Water']:
-                energy_type = '水'
-            elif energy_type in ['雷エネルギー', 'electric', 'Electric', '電気']:
-                energy_type = '雷'
-            elif energy_type in ['草エネルギー', 'grass', 'Grass']:
-                energy_type = '草'
-            elif energy_type in ['超エネルギー', 'psychic', 'Psychic']:
-                energy_type = '超'
-            elif energy_type in ['闘エネルギー', 'fighting', 'Fighting']:
-                energy_type = '闘'
-            elif energy_type in ['悪エネルギー', 'darkness', 'Darkness']:
-                energy_type = '悪'
-            elif energy_type in ['鋼エネルギー', 'metal', 'Metal']:
-                energy_type = '鋼'
-            elif energy_type in ['フェアリーエネルギー', 'fairy', 'Fairy']:
-                energy_type = 'フェアリー'
-            elif energy_type in ['ドラゴンエネルギー', 'dragon', 'Dragon']:
-                energy_type = 'ドラゴン'
+            energy_type = aliases.get(energy_type, energy_type)
             
-            print(f"    - 正規化後タイプ: {energy_type}")
+            if trace_on:
+                tracer.log(ENERGY, DEBUG, f"    - 正規化後タイプ: {energy_type}")
             
             # 集計
-            if energy_type not in energy_summary:
-                energy_summary[energy_type] = 0
-            energy_summary[energy_type] += 1
+            energy_summary[energy_type] = energy_summary.get(energy_type, 0) + 1
             energy_summary["total"] += 1
         
-        print(f"    - 集計結果: {energy_summary}")
+        if trace_on:
+            tracer.log(ENERGY, DEBUG, f"    - 集計結果: {energy_summary}")
         return energy_summary
 
     @staticmethod
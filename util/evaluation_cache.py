@@ -0,0 +1,64 @@
+# utils/evaluation_cache.py
+# Version: 1.0
+# Updated: 2026-10-18 00:00
+# LRU上限付きの評価値キャッシュ（AIのヒューリスティック評価のメモ化用・ヒット/ミス数を記録）
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# 未登録を表す値（Noneもキャッシュできるように専用のオブジェクトを使う）
+MISSING = object()
+
+
+class EvaluationCache:
+    """
+    キーごとの評価結果を最大 maxsize 件まで保持するキャッシュ
+
+    上限を超えると最も長く使われていないものから捨てる。
+    キーには盤面の状態のうち評価結果を決める部分（カードのプロトタイプ・付いているエネルギー等）だけを入れる。
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """キャッシュ済みの値（なければ MISSING）"""
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """値を登録（上限を超えたら最も古いものを削除）"""
+        entries = self.entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def clear(self):
+        """内容と統計を消去"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """統計（件数・上限・ヒット数・ミス数・ヒット率）"""
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate
+        }
@@ -1,10 +1,37 @@
 # utils/special_condition_helper.py
-# Version: 1.0
-# Updated: 2025-06-14 12:00
-# 特殊状態によるにげる制限チェック用ヘルパー
+# Version: 1.1
+# Updated: 2026-10-18 14:40
+# 特殊状態によるにげる制限チェック用ヘルパー（Card の condition_mask API 経由で読み書きする）
 
-from typing import Tuple
-from models.card import Card
+from typing import Tuple, Union
+from models.card import Card, SpecialCondition
+
+# 旧来の英語名 → SpecialCondition
+_CONDITION_NAMES = {
+    'sleep': SpecialCondition.SLEEP,
+    'paralyzed': SpecialCondition.PARALYSIS,
+    'confused': SpecialCondition.CONFUSION,
+    'poisoned': SpecialCondition.POISON,
+    'burned': SpecialCondition.BURN
+}
+
+# 表示用の文字列
+_CONDITION_DISPLAY = {
+    SpecialCondition.SLEEP: '😴ねむり',
+    SpecialCondition.PARALYSIS: '⚡マヒ',
+    SpecialCondition.CONFUSION: '😵混乱',
+    SpecialCondition.POISON: '💜どく',
+    SpecialCondition.BURN: '🔥やけど'
+}
+
+
+def _to_condition(condition: Union[SpecialCondition, str]) -> SpecialCondition:
+    """SpecialCondition・英語名・日本語名のいずれかを SpecialCondition に変換"""
+    if isinstance(condition, SpecialCondition):
+        return condition
+    if condition in _CONDITION_NAMES:
+        return _CONDITION_NAMES[condition]
+    return SpecialCondition(condition)
 
 class SpecialConditionHelper:
     """特殊状態に関連する処理を行うヘルパークラス"""
@@ -21,15 +48,12 @@ class SpecialConditionHelper:
             Tuple[bool, str]: (にげる可否, 制限理由)
         """
         try:
-            # ポケモンに特殊状態があるかチェック
-            special_conditions = getattr(pokemon, 'special_conditions', [])
-            
             # ねむり状態
-            if 'sleep' in special_conditions:
+            if pokemon.has_special_condition(SpecialCondition.SLEEP):
                 return False, "ねむり状態のためにげることができません"
             
             # マヒ状態
-            if 'paralyzed' in special_conditions:
+            if pokemon.has_special_condition(SpecialCondition.PARALYSIS):
                 return False, "マヒ状態のためにげることができません"
             
             # 混乱状態は通常にげることに影響しない
@@ -53,51 +77,50 @@ class SpecialConditionHelper:
             return True, ""
     
     @staticmethod
-    def apply_special_condition(pokemon: Card, condition: str) -> bool:
+    def apply_special_condition(pokemon: Card, condition: Union[SpecialCondition, str]) -> bool:
         """
-        ポケモンに特殊状態を適用
+        ポケモンに特殊状態を適用（ねむり・マヒ・こんらんは互いに置き換わる）
         
         Args:
             pokemon: 対象ポケモン
-            condition: 特殊状態名 (sleep, paralyzed, confused, poisoned, burned)
+            condition: SpecialCondition または特殊状態名 (sleep, paralyzed, confused, poisoned, burned)
             
         Returns:
-            bool: 適用成功可否
+            bool: 適用成功可否（すでにその状態なら False）
         """
         try:
-            if not hasattr(pokemon, 'special_conditions'):
-                pokemon.special_conditions = []
-            
-            if condition not in pokemon.special_conditions:
-                pokemon.special_conditions.append(condition)
-                print(f"{pokemon.name}に{condition}状態を付与")
-                return True
+            condition = _to_condition(condition)
+            if pokemon.has_special_condition(condition):
+                return False
             
-            return False
+            pokemon.add_special_condition(condition)
+            print(f"{pokemon.name}に{condition.value}状態を付与")
+            return True
         
         except Exception as e:
             print(f"特殊状態適用エラー: {e}")
             return False
     
     @staticmethod
-    def remove_special_condition(pokemon: Card, condition: str) -> bool:
+    def remove_special_condition(pokemon: Card, condition: Union[SpecialCondition, str]) -> bool:
         """
         ポケモンから特殊状態を除去
         
         Args:
             pokemon: 対象ポケモン
-            condition: 除去する特殊状態名
+            condition: 除去する SpecialCondition または特殊状態名
             
         Returns:
-            bool: 除去成功可否
+            bool: 除去成功可否（その状態でなければ False）
         """
         try:
-            if hasattr(pokemon, 'special_conditions') and condition in pokemon.special_conditions:
-                pokemon.special_conditions.remove(condition)
-                print(f"{pokemon.name}から{condition}状態を除去")
-                return True
+            condition = _to_condition(condition)
+            if not pokemon.has_special_condition(condition):
+                return False
             
-            return False
+            pokemon.remove_special_condition(condition)
+            print(f"{pokemon.name}から{condition.value}状態を除去")
+            return True
         
         except Exception as e:
             print(f"特殊状態除去エラー: {e}")
@@ -115,13 +138,10 @@ class SpecialConditionHelper:
             bool: 除去成功可否
         """
         try:
-            if hasattr(pokemon, 'special_conditions'):
-                conditions_cleared = len(pokemon.special_conditions)
-                pokemon.special_conditions = []
-                print(f"{pokemon.name}からすべての特殊状態を除去（{conditions_cleared}個）")
-                return True
-            
-            return False
+            conditions_cleared = bin(pokemon.condition_mask).count("1")
+            pokemon.clear_special_conditions()
+            print(f"{pokemon.name}からすべての特殊状態を除去（{conditions_cleared}個）")
+            return True
         
         except Exception as e:
             print(f"特殊状態全除去エラー: {e}")
@@ -139,20 +159,12 @@ class SpecialConditionHelper:
             str: 特殊状態の表示文字列
         """
         try:
-            if not hasattr(pokemon, 'special_conditions') or not pokemon.special_conditions:
+            if not pokemon.condition_mask:
                 return ""
             
-            condition_map = {
-                'sleep': '😴ねむり',
-                'paralyzed': '⚡マヒ',
-                'confused': '😵混乱',
-                'poisoned': '💜どく',
-                'burned': '🔥やけど'
-            }
-            
-            display_conditions = []
-            for condition in pokemon.special_conditions:
-                display_conditions.append(condition_map.get(condition, condition))
+            # SpecialCondition の定義順で並べる
+            display_conditions = [_CONDITION_DISPLAY[condition] for condition in SpecialCondition
+                                  if pokemon.has_special_condition(condition)]
             
             return " ".join(display_conditions)
         
@@ -0,0 +1,185 @@
+# utils/tracing.py
+# Version: 1.2
+# Updated: 2026-10-18 09:00
+# カテゴリ・レベル別トレース：無効時はほぼゼロコスト、有効時はリングバッファへ記録
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+# トレースカテゴリ
+ENERGY = "energy"
+DAMAGE = "damage"
+TURN = "turn"
+AI = "ai"
+CATEGORIES = (ENERGY, DAMAGE, TURN, AI)
+
+# トレースレベル（数値が大きいほど重要）
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {
+    "debug": DEBUG,
+    "info": INFO,
+    "warning": WARNING,
+    "error": ERROR,
+    "off": OFF
+}
+
+
+class _SuspendState(threading.local):
+    """スレッドごとの suspended() の入れ子の深さ"""
+    depth = 0
+
+
+def _level_property(category: str) -> property:
+    """カテゴリの閾値レベルの属性（suspended() 中のスレッドからは OFF に見える）"""
+    def get(self) -> int:
+        return OFF if self._suspend.depth else self._levels[category]
+
+    def set(self, level: int):
+        self._levels[category] = level
+
+    return property(get, set, doc=f"{category} カテゴリの閾値レベル")
+
+
+class Tracer:
+    """
+    カテゴリ・レベル別のトレース記録クラス
+
+    カテゴリごとの閾値レベルを属性（tracer.energy 等）として持つ。
+    呼び出し側は `if tracer.energy <= DEBUG:` のように属性比較でガードしてから
+    log() を呼ぶため、無効時はメッセージの組み立て（f文字列）が一切行われない。
+    suspended() はスレッドごとに働き、ブロック内のスレッドからだけ全カテゴリが無効に見える。
+    """
+
+    DEFAULT_CAPACITY = 4096
+
+    energy = _level_property(ENERGY)
+    damage = _level_property(DAMAGE)
+    turn = _level_property(TURN)
+    ai = _level_property(AI)
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._levels = {}
+        self._suspend = _SuspendState()
+
+        # カテゴリ別の閾値（既定はすべて無効）
+        self.energy = OFF
+        self.damage = OFF
+        self.turn = OFF
+        self.ai = OFF
+
+        # 直近のイベントを保持するリングバッファ
+        self.buffer: deque = deque(maxlen=capacity)
+
+        # 記録と同時に標準出力へも表示するか（GUIのデバッグコンソール用）
+        self.echo = False
+        self.echo_stream: Optional[TextIO] = None
+
+    def set_level(self, category: str, level: int):
+        """カテゴリの閾値レベルを設定"""
+        if category not in CATEGORIES:
+            raise ValueError(f"不明なトレースカテゴリです: {category}")
+        setattr(self, category, level)
+
+    def set_all(self, level: int):
+        """全カテゴリの閾値レベルを設定"""
+        for category in CATEGORIES:
+            setattr(self, category, level)
+
+    @contextmanager
+    def suspended(self):
+        """
+        ブロック内のみ全カテゴリを無効化（探索のプレイアウトなど大量に局面を進める処理用）
+
+        呼び出したスレッドだけに効き（入れ子可）、設定されたレベルは変更しないため、
+        探索スレッドの実行中も他のスレッド（GUIなど）のトレースは記録される。
+        """
+        suspend = self._suspend
+        suspend.depth += 1
+        try:
+            yield
+        finally:
+            suspend.depth -= 1
+
+    def enabled(self, category: str, level: int = DEBUG) -> bool:
+        """指定カテゴリ・レベルが有効かどうか"""
+        return level >= getattr(self, category)
+
+    def log(self, category: str, level: int, message: str, *args):
+        """
+        イベントを記録
+
+        argsが指定された場合は有効時のみ `message % args` で整形する。
+        """
+        if level < getattr(self, category):
+            return
+        if args:
+            message = message % args
+        self.buffer.append((time.perf_counter(), category, level, message))
+        if self.echo:
+            print(message, file=self.echo_stream or sys.stdout)
+
+    def configure(self, spec: str, default_level: int = DEBUG):
+        """
+        文字列指定でカテゴリを有効化
+
+        例: "all", "energy,damage", "ai:info,turn:debug", "off"
+        """
+        self.set_all(OFF)
+        for part in (p.strip() for p in spec.split(",")):
+            if not part:
+                continue
+            name, _, level_name = part.partition(":")
+            level = LEVEL_NAMES.get(level_name.lower(), default_level) if level_name else default_level
+            if name == "all":
+                self.set_all(level)
+            elif name == "off":
+                self.set_all(OFF)
+            else:
+                self.set_level(name, level)
+
+    def configure_from_env(self, variable: str = "POKECA_TRACE"):
+        """環境変数（例: POKECA_TRACE=ai,damage:info）から設定"""
+        spec = os.environ.get(variable)
+        if spec:
+            self.configure(spec)
+
+    def snapshot(self) -> List[Tuple[float, str, int, str]]:
+        """リングバッファの内容を取得"""
+        return list(self.buffer)
+
+    def format_events(self, events: Optional[Iterable[Tuple[float, str, int, str]]] = None) -> List[str]:
+        """イベントを表示用の行に整形"""
+        level_labels = {value: name.upper() for name, value in LEVEL_NAMES.items()}
+        lines = []
+        for timestamp, category, level, message in (self.buffer if events is None else events):
+            lines.append(f"{timestamp:.6f} [{category}:{level_labels.get(level, level)}] {message}")
+        return lines
+
+    def dump(self, stream: Optional[TextIO] = None, limit: Optional[int] = None):
+        """リングバッファの内容を出力（エラー発生時の調査用）"""
+        stream = stream or sys.stderr
+        lines = self.format_events()
+        if limit is not None:
+            lines = lines[-limit:]
+        print(f"--- トレースダンプ（{len(lines)}件） ---", file=stream)
+        for line in lines:
+            print(line, file=stream)
+
+    def clear(self):
+        """リングバッファを空にする"""
+        self.buffer.clear()
+
+
+# プロセス全体で共有するトレーサー
+tracer = Tracer()
+tracer.configure_from_env()